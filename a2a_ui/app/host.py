@@ -23,6 +23,16 @@ defaults are used:
 ``HOST_CARD_PATH``
     Path on the HostAgent server to retrieve the AgentCard.  Defaults to
     ``/card``.
+``HOST_CONNECT_TIMEOUT`` / ``HOST_READ_TIMEOUT``
+    Seconds to wait for a connection to the HostAgent and for each read
+    from it.  Default to ``5`` and ``120`` (agents can be slow to answer).
+``HOST_AGENTS_TTL``
+    Seconds the agent list from ``HOST_CARD_PATH`` is cached.  Defaults to
+    ``10``.
+
+All calls share one pooled ``httpx.AsyncClient``.  The FastAPI app opens it
+with ``HostBridge.start`` and closes it with ``HostBridge.aclose`` from its
+lifespan; a bridge used without that creates the client on first use.
 
 Example usage::
 
@@ -37,8 +47,10 @@ configured HostAgent server.  The bridge returns whatever JSON is returned
 from the HostAgent.  Any errors are propagated up to the caller.
 """
 
+import asyncio
 import os
-from typing import Any, Dict, Optional
+import time
+from typing import Any, AsyncIterator, Dict, Optional
 
 import httpx
 
@@ -58,20 +70,60 @@ class HostBridge:
         self.send_path: str = os.getenv("HOST_SEND_PATH", "/api/host/run")
         self.submit_path: str = os.getenv("HOST_SUBMIT_PATH", "/api/host/submit")
         self.card_path: str = os.getenv("HOST_CARD_PATH", "/card")
+        self.timeout = httpx.Timeout(
+            float(os.getenv("HOST_READ_TIMEOUT", "120")),
+            connect=float(os.getenv("HOST_CONNECT_TIMEOUT", "5")),
+        )
+        self.agents_ttl: float = float(os.getenv("HOST_AGENTS_TTL", "10"))
+        self._client: Optional[httpx.AsyncClient] = None
+        self._agents: Any = None
+        self._agents_expire_at = 0.0
+        self._agents_lock = asyncio.Lock()
+
+    def _new_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            base_url=self.host_url.rstrip("/"),
+            timeout=self.timeout,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+        )
+
+    async def start(self) -> None:
+        """Open the pooled client; called from the app lifespan."""
+        if self._client is None:
+            self._client = self._new_client()
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # Created on first use when the bridge runs outside the app lifespan
+        # (e.g. the module-level helpers below).
+        if self._client is None:
+            self._client = self._new_client()
+        return self._client
 
     async def list_remote_agents(self) -> Any:
         """Return the AgentCard of the HostAgent.
 
         The returned JSON should contain information about the host agent and
-        any registered remote agents.  This method simply performs an HTTP
-        GET to the ``/card`` endpoint on the HostAgent server and returns
-        whatever JSON is provided.
+        any registered remote agents.  This method performs an HTTP GET to
+        the ``/card`` endpoint on the HostAgent server and returns whatever
+        JSON is provided.  The result is cached for ``HOST_AGENTS_TTL``
+        seconds, and concurrent callers share a single request.
         """
-        url = self.host_url.rstrip("/") + self.card_path
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url)
+        if time.monotonic() < self._agents_expire_at:
+            return self._agents
+        async with self._agents_lock:
+            if time.monotonic() < self._agents_expire_at:
+                return self._agents
+            response = await self.client.get(self.card_path)
             response.raise_for_status()
-            return response.json()
+            self._agents = response.json()
+            self._agents_expire_at = time.monotonic() + self.agents_ttl
+            return self._agents
 
     async def send_message(
         self,
@@ -107,12 +159,50 @@ class HostBridge:
         # We intentionally ignore patient and mode when calling the host.  If
         # the host service needs these, you can include them in the payload
         # here, for example: payload.update({"patient": patient, "mode": mode}).
-        url = self.host_url.rstrip("/") + self.send_path
-        async with httpx.AsyncClient() as client:
-            response = await client.post(url, json=payload)
-            # Raise for HTTP errors so FastAPI returns 5xx to the client.
+        response = await self.client.post(self.send_path, json=payload)
+        # Raise for HTTP errors so FastAPI returns 5xx to the client.
+        response.raise_for_status()
+        return response.json()
+
+    async def open_message_stream(self, message: str) -> httpx.Response:
+        """Send a chat message and return the host response unread.
+
+        The request asks the HostAgent for ``text/event-stream``.  The status
+        is checked before returning, so errors still surface as exceptions;
+        the body is then read with ``iter_events`` and the caller must close
+        the response (``await response.aclose()``) when done.
+        """
+        request = self.client.build_request(
+            "POST",
+            self.send_path,
+            json={"text": message},
+            headers={"Accept": "text/event-stream"},
+        )
+        response = await self.client.send(request, stream=True)
+        try:
             response.raise_for_status()
-            return response.json()
+        except httpx.HTTPStatusError:
+            await response.aread()
+            await response.aclose()
+            raise
+        return response
+
+    @staticmethod
+    async def iter_events(response: httpx.Response) -> AsyncIterator[bytes]:
+        """Yield the body of a host response as server-sent events.
+
+        An SSE response from the host is passed through chunk by chunk as it
+        arrives.  A plain JSON response (a host without streaming) becomes a
+        single ``data:`` event, so the browser handles both the same way.
+        """
+        content_type = response.headers.get("content-type", "")
+        if content_type.startswith("text/event-stream"):
+            async for chunk in response.aiter_raw():
+                yield chunk
+            return
+        body = await response.aread()
+        lines = body.decode("utf-8").splitlines() or [""]
+        yield ("".join(f"data: {line}\n" for line in lines) + "\n").encode("utf-8")
 
     async def send_task(self, agent: str, payload: Dict[str, Any]) -> Any:
         """Submit a form or option selection to the HostAgent.
@@ -140,11 +230,9 @@ class HostBridge:
             the task submission.
         """
         json_payload = {"kind": agent, "values": payload}
-        url = self.host_url.rstrip("/") + self.submit_path
-        async with httpx.AsyncClient() as client:
-            response = await client.post(url, json=json_payload)
-            response.raise_for_status()
-            return response.json()
+        response = await self.client.post(self.submit_path, json=json_payload)
+        response.raise_for_status()
+        return response.json()
 
 
 # These helper functions maintain backwards compatibility with earlier versions
@@ -1,3 +1,5 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
@@ -5,14 +7,24 @@ from fastapi.responses import FileResponse
 from pathlib import Path
 
 
-from routes import api_router
+from routes import api_router, bridge
 
 
 APP_DIR = Path(__file__).resolve().parent
 STATIC_DIR = APP_DIR / "static"   
 
 
-app = FastAPI(title="a2a_medical_ui", version="0.1.0")
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    # One pooled connection to the HostAgent for the app's lifetime.
+    await bridge.start()
+    try:
+        yield
+    finally:
+        await bridge.aclose()
+
+
+app = FastAPI(title="a2a_medical_ui", version="0.1.0", lifespan=lifespan)
 
 
 app.add_middleware(
@@ -1,5 +1,9 @@
-from fastapi import APIRouter, HTTPException
+import logging
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
+from starlette.background import BackgroundTask
 from typing import Optional, Dict, Any
 
 # Hỗ trợ import 2 cách
@@ -8,9 +12,17 @@ try:
 except Exception:
     from host import HostBridge
 
+logger = logging.getLogger(__name__)
+
 api_router = APIRouter()
 bridge = HostBridge()
 
+
+def host_error(what: str) -> HTTPException:
+    # Chi tiết lỗi (URL nội bộ, trace của host) chỉ ghi log, không trả cho trình duyệt.
+    logger.exception("HostAgent %s failed", what)
+    return HTTPException(status_code=500, detail="HostAgent request failed")
+
 class Patient(BaseModel):
     name: Optional[str] = None
     age: Optional[int] = None
@@ -27,15 +39,27 @@ async def list_agents():
     return await bridge.list_remote_agents()
 
 @api_router.post("/chat")
-async def chat(inp: ChatIn):
+async def chat(inp: ChatIn, request: Request):
+    # Client đọc được SSE: chuyển tiếp stream của host để thấy tiến trình ngay.
+    if "text/event-stream" in request.headers.get("accept", ""):
+        try:
+            response = await bridge.open_message_stream(inp.message)
+        except Exception:
+            raise host_error("chat stream")
+        return StreamingResponse(
+            bridge.iter_events(response),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+            background=BackgroundTask(response.aclose),
+        )
     try:
         return await bridge.send_message(
             inp.message,
             patient=inp.patient.dict() if inp.patient else None,
             mode=inp.mode,
         )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    except Exception:
+        raise host_error("chat")
 
 
 # ---------------------------------------------------------------------------
@@ -80,12 +104,12 @@ async def message(inp: MessageIn):
     posts to ``/api/message`` instead of ``/api/chat``.  It takes a JSON
     object with a single ``text`` field and forwards the text to the
     HostAgent via ``bridge.send_message``.  Any exceptions are converted
-    into HTTP 500 responses.
+    into HTTP 500 responses with a generic detail; the error is logged.
     """
     try:
         return await bridge.send_message(inp.text)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    except Exception:
+        raise host_error("message")
 
 
 @api_router.post("/submit")
@@ -99,8 +123,8 @@ async def submit(inp: SubmitIn):
     """
     try:
         return await bridge.send_task(agent=inp.kind, payload=inp.values)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    except Exception:
+        raise host_error("submit")
 
 @api_router.post("/schedule")
 async def schedule_task(inp: Dict[str, Any]):
@@ -1,12 +1,36 @@
-const { fetchJSON, addMsg, patientPayload } = window.__utils;
+const { addMsg, patientPayload, readEvents } = window.__utils;
+
+function replyText(data) {
+  try {
+    const obj = JSON.parse(data);
+    if (typeof obj === "string") return obj;
+    return obj.reply || JSON.stringify(obj);
+  } catch (e) {
+    return data;
+  }
+}
 
 async function sendChat(text) {
   addMsg(text, "user");
   try {
     const payload = { message: text, patient: patientPayload(), mode: "orchestrate" };
-    const data = await fetchJSON("/api/chat", { method: "POST", body: JSON.stringify(payload) });
-    const reply = data.reply || JSON.stringify(data);
-    addMsg(reply, "bot");
+    // Stream: mỗi sự kiện từ host là một đoạn (delta) mới của câu trả lời,
+    // như các chunk artifact append=true; nối vào bong bóng ngay khi tới.
+    // Host không stream trả về JSON, thành đúng một sự kiện chứa cả câu trả lời.
+    const res = await fetch("/api/chat", {
+      method: "POST",
+      headers: { "Content-Type": "application/json", Accept: "text/event-stream" },
+      body: JSON.stringify(payload),
+    });
+    if (!res.ok) throw new Error(await res.text());
+    const bubble = addMsg("…", "bot");
+    const log = document.getElementById("chat-log");
+    let reply = "";
+    await readEvents(res, (data) => {
+      reply += replyText(data);
+      bubble.textContent = reply;
+      log.scrollTop = log.scrollHeight;
+    });
   } catch (e) {
     addMsg("Lỗi gửi tin: " + e.message, "bot");
   }
@@ -19,6 +19,30 @@ function addMsg(text, who = "bot") {
   m.textContent = text;
   log.appendChild(m);
   log.scrollTop = log.scrollHeight;
+  return m;
+}
+
+// Read a text/event-stream response, calling onEvent with each event's data.
+async function readEvents(res, onEvent) {
+  const reader = res.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+  for (;;) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true }).replace(/\r\n/g, "\n");
+    let end;
+    while ((end = buffer.indexOf("\n\n")) >= 0) {
+      const block = buffer.slice(0, end);
+      buffer = buffer.slice(end + 2);
+      const data = block
+        .split("\n")
+        .filter((line) => line.startsWith("data:"))
+        .map((line) => line.slice(5).replace(/^ /, ""))
+        .join("\n");
+      if (data) onEvent(data);
+    }
+  }
 }
 
 function patientPayload() {
@@ -30,4 +54,4 @@ function patientPayload() {
   };
 }
 
-window.__utils = { fetchJSON, el, addMsg, patientPayload };
\ No newline at end of file
+window.__utils = { fetchJSON, el, addMsg, patientPayload, readEvents };
\ No newline at end of file
@@ -1,4 +1,5 @@
 import os
+from contextlib import aclosing
 from typing import Any, AsyncIterable, Dict
 from google.adk.agents.llm_agent import LlmAgent
 from google.adk.tools.tool_context import ToolContext
@@ -78,16 +79,17 @@ class BookingAgent:
             session = await self._runner.session_service.create_session(
                 app_name=self._agent.name, user_id=self._user_id, state={}, session_id=session_id
             )
-        async for event in self._runner.run_async(user_id=self._user_id, session_id=session.id, new_message=content):
-            if event.is_final_response():
-                response = ""
-                if event.content and event.content.parts and event.content.parts[0].text:
-                    response = "\n".join([p.text for p in event.content.parts if p.text])
-                elif event.content and event.content.parts and any(p.function_response for p in event.content.parts):
-                    response = next((p.function_response.model_dump() for p in event.content.parts))
-                yield {"is_task_complete": True, "content": response}
-            else:
-                yield {"is_task_complete": False, "updates": "Đang xử lý yêu cầu đặt lịch khám..."}
+        async with aclosing(self._runner.run_async(user_id=self._user_id, session_id=session.id, new_message=content)) as events:
+            async for event in events:
+                if event.is_final_response():
+                    response = ""
+                    if event.content and event.content.parts and event.content.parts[0].text:
+                        response = "\n".join([p.text for p in event.content.parts if p.text])
+                    elif event.content and event.content.parts and any(p.function_response for p in event.content.parts):
+                        response = next((p.function_response.model_dump() for p in event.content.parts))
+                    yield {"is_task_complete": True, "content": response}
+                else:
+                    yield {"is_task_complete": False, "updates": "Đang xử lý yêu cầu đặt lịch khám..."}
 
     def _build_agent(self) -> LlmAgent:
         return LlmAgent(
@@ -1,7 +1,9 @@
 from common.server import A2AServer
 from common.types import AgentCard, AgentCapabilities, AgentSkill, MissingAPIKeyError
+from common.utils.push_notification_auth import PushNotificationSenderAuth
+from common.utils.push_notification_dispatcher import PushNotificationDispatcher
 from agent import Diagnose
-from task_manager import AgentTaskManager
+from task_manager import AgentTaskManager, SharedAgentTaskManager
 import click
 import os
 import logging
@@ -16,12 +18,16 @@ logger = logging.getLogger(__name__)
 @click.command() # cho phép chạy script với tham số CLI --host và --port
 @click.option("--host", default="localhost")
 @click.option("--port", default=10001)
-def main(host, port):
+@click.option("--workers", default=1, help="Số process phục vụ song song (chia sẻ model đã load).")
+@click.option("--executor-workers", default=None, type=int, help="Số thread của executor mặc định mỗi process (gọi LLM, I/O). Thread suy luận model đặt bằng env INFERENCE_WORKERS.")
+@click.option("--task-db", default="diagnose_tasks.db", help="File SQLite lưu task khi chạy nhiều process.")
+@click.option("--inference-backend", default=None, type=click.Choice(["torch", "onnx"]), help="Backend cho BGE-M3 + ViRanker (mặc định theo env DIAGNOSE_INFERENCE_BACKEND).")
+def main(host, port, workers, executor_workers, task_db, inference_backend):
     try:
         # if not os.getenv("GOOGLE_API_KEY"):
         #         raise MissingAPIKeyError("GOOGLE_API_KEY environment variable not set.")
         
-        capabilities = AgentCapabilities(streaming=True)
+        capabilities = AgentCapabilities(streaming=True, pushNotifications=True)
         skill = AgentSkill(
             id="medical_diagnose",
             name="Agent Chuẩn Đoán",
@@ -39,11 +45,32 @@ def main(host, port):
             capabilities=capabilities,
             skills=[skill],
         )
+        # Bind cổng ngay, load + warm-up ở nền trong từng worker (/ready trả 503
+        # cho tới khi xong). Nhiều worker: load weights trước khi fork để các
+        # worker dùng chung bộ nhớ (copy-on-write); JVM VnCoreNLP, Qdrant và
+        # LLM client không an toàn khi fork nên mỗi worker tự mở.
+        agent = Diagnose(lazy=True, backend=inference_backend, processes=workers)
+        if workers > 1:
+            agent.load_weights()
+        # Push notification: client nhận trạng thái task thay vì poll tasks/get.
+        # Khóa sinh trước khi fork để mọi worker ký cùng một khóa.
+        notification_sender_auth = PushNotificationSenderAuth()
+        notification_sender_auth.generate_jwk()
+        push_sender = PushNotificationDispatcher(notification_sender_auth)
+        if workers > 1:
+            task_manager = SharedAgentTaskManager(
+                agent=agent, db_path=task_db, push_sender=push_sender
+            )
+        else:
+            task_manager = AgentTaskManager(agent=agent, push_sender=push_sender)
         server = A2AServer(
             agent_card=agent_card,
-            task_manager=AgentTaskManager(agent=Diagnose()),
+            task_manager=task_manager,
             host=host,
             port=port,
+            workers=workers,
+            executor_workers=executor_workers,
+            warmup=agent.warmup,
         )
         server.start()
     except MissingAPIKeyError as e:
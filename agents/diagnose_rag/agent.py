@@ -1,13 +1,67 @@
 # diagnose/agent.py
 from __future__ import annotations
-from typing import AsyncIterator, Dict, Any, List, Optional
+from typing import AsyncIterator, Callable, Dict, Any, Iterator, List, Optional
+from concurrent.futures import ThreadPoolExecutor
 import asyncio
+import logging
+import threading
+import time
 
 # Core components for diagnose agent
 from core.embedder import EmbeddingGenerator
 from core.vector_db import VectorDB
 from core.retriever import Retriever, ViRanker
 from core.generator import LLMGenerator, DiagnosisAgent
+from core.inference_pool import InferencePool
+from common.server.artifact_stream import ArtifactChunker, coalesce_text
+from common.types import DataPart
+
+logger = logging.getLogger(__name__)
+
+WARMUP_QUERY = "Sốt cao, ho khan và đau họng trong 3 ngày"
+
+# Index các artifact khi stream: câu trả lời (theo token) và các đoạn ngữ cảnh.
+ANSWER_ARTIFACT = 0
+CONTEXTS_ARTIFACT = 1
+
+
+async def iterate_in_thread(
+    factory: Callable[..., Iterator[Any]],
+    *args: Any,
+    cancelled: threading.Event | None = None,
+) -> AsyncIterator[Any]:
+    """Chạy iterator đồng bộ (vd. HTTP stream của LLM) trong executor và trả
+    từng phần tử về event loop ngay khi có. Consumer dừng sớm (task bị hủy)
+    hoặc `cancelled` được set thì thread cũng dừng ở phần tử kế tiếp.
+    `cancelled` chỉ được đọc: kết thúc bình thường không đánh dấu task là hủy."""
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    stop = threading.Event()
+    done = object()
+
+    def produce():
+        try:
+            for item in factory(*args):
+                if stop.is_set() or (cancelled is not None and cancelled.is_set()):
+                    break
+                loop.call_soon_threadsafe(queue.put_nowait, (item, None))
+        except Exception as e:
+            loop.call_soon_threadsafe(queue.put_nowait, (done, e))
+        else:
+            loop.call_soon_threadsafe(queue.put_nowait, (done, None))
+
+    future = loop.run_in_executor(None, produce)
+    try:
+        while True:
+            item, error = await queue.get()
+            if error is not None:
+                raise error
+            if item is done:
+                break
+            yield item
+    finally:
+        stop.set()
+    await future
 
 # class Agent:
 #     SUPPORTED_CONTENT_TYPES = ["text", "text/plain"]
@@ -45,67 +99,237 @@ class Diagnose:
         rerank_k: int = 3,
         use_ws_for_query: bool = True,
         temperature: float = 0.2,
+        lazy: bool = False,
+        backend: str | None = None,
+        processes: int | None = None,
     ) -> None:
-        # 1) Embedding & Vector DB
-        self.embedder = EmbeddingGenerator(use_vncorenlp=use_ws_for_query)
-        self.vdb = VectorDB()
-
-        # 2) Retriever: dense + cross-encoder rerank
-        self.reranker = ViRanker()
-        self.retriever = Retriever(
-            vectordb=self.vdb,
-            embedder=self.embedder,
-            reranker=self.reranker,
-            top_k=top_k,
-            rerank_k=rerank_k,
+        """lazy=True hoãn việc load model tới `load()` (hoặc request đầu tiên),
+        để server bind cổng ngay và /ready báo 503 trong lúc load + warm-up.
+        backend: "torch" | "onnx" cho BGE-M3 + ViRanker (mặc định theo env
+        DIAGNOSE_INFERENCE_BACKEND).
+        processes: số process phục vụ (--workers), để chia core cho thread
+        suy luận của từng process."""
+        self.top_k = top_k
+        self.rerank_k = rerank_k
+        self.use_ws_for_query = use_ws_for_query
+        self.temperature = temperature
+        self.backend = backend
+
+        self.embedder: EmbeddingGenerator | None = None
+        self.vdb: VectorDB | None = None
+        self.reranker: ViRanker | None = None
+        self.retriever: Retriever | None = None
+        self.llm: LLMGenerator | None = None
+        self.core: DiagnosisAgent | None = None
+
+        # Suy luận model (embed + rerank) chạy trong pool riêng có admission
+        # control; gọi LLM qua HTTP vẫn dùng executor mặc định.
+        self.pool = InferencePool(processes=processes)
+
+        self._load_lock = threading.Lock()
+        self._first_request_done = False
+        if not lazy:
+            self.load()
+
+    @property
+    def loaded(self) -> bool:
+        return self.core is not None
+
+    def load_weights(self) -> None:
+        """Chỉ load weights BGE-M3 + ViRanker (idempotent).
+
+        An toàn khi gọi trước fork: các worker dùng chung weights
+        (copy-on-write). JVM của VnCoreNLP, Qdrant client và LLM client thì
+        không sống sót qua fork, nên được mở trong `load()` ở từng worker."""
+        with self._load_lock:
+            self._load_weights()
+
+    def _load_weights(self) -> None:
+        if self.embedder is not None and self.reranker is not None:
+            return
+        with ThreadPoolExecutor(max_workers=2, thread_name_prefix="diagnose-load") as pool:
+            # VnCoreNLP gắn sau, trong load(), vì nó boot JVM.
+            embedder = pool.submit(
+                self._timed, "BGE-M3", EmbeddingGenerator,
+                use_vncorenlp=False, backend=self.backend,
+                intra_op_threads=self.pool.torch_threads,
+            )
+            reranker = pool.submit(
+                self._timed, "ViRanker", ViRanker, backend=self.backend,
+                intra_op_threads=self.pool.torch_threads,
+            )
+            self.embedder = embedder.result()
+            self.reranker = reranker.result()
+
+    def load(self) -> None:
+        """Load BGE-M3, ViRanker, VnCoreNLP, Qdrant client và LLM song song
+        (idempotent)."""
+        with self._load_lock:
+            if self.loaded:
+                return
+            started = time.perf_counter()
+            # Các bước load chủ yếu là I/O (đọc weights, boot JVM, kết nối Qdrant)
+            # nên chạy song song trong thread là đủ.
+            with ThreadPoolExecutor(max_workers=3, thread_name_prefix="diagnose-load") as pool:
+                vdb = pool.submit(self._timed, "Qdrant client", VectorDB)
+                llm = pool.submit(
+                    self._timed, "LLM client", LLMGenerator, temperature=self.temperature
+                )
+                self._load_weights()
+                if self.use_ws_for_query:
+                    self._timed("VnCoreNLP", self.embedder.attach_word_segmenter)
+                self.vdb = vdb.result()
+                self.llm = llm.result()
+
+            # Retriever: dense + cross-encoder rerank
+            self.retriever = Retriever(
+                vectordb=self.vdb,
+                embedder=self.embedder,
+                reranker=self.reranker,
+                top_k=self.top_k,
+                rerank_k=self.rerank_k,
+            )
+            # LLM + logic chẩn đoán (ép format trong core.generator)
+            self.core = DiagnosisAgent(self.retriever, self.llm)
+            logger.info(f"Diagnose models loaded in {time.perf_counter() - started:.2f}s")
+
+    @staticmethod
+    def _timed(name: str, factory, *args, **kwargs):
+        started = time.perf_counter()
+        component = factory(*args, **kwargs)
+        logger.info(f"Loaded {name} in {time.perf_counter() - started:.2f}s")
+        return component
+
+    def warmup(self) -> None:
+        """Load (nếu lazy) rồi chạy suy luận giả để request đầu không phải trả
+        chi phí khởi tạo kernel/JIT. Dùng làm hook `warmup` của A2AServer."""
+        self.load()
+        started = time.perf_counter()
+        self.embedder.encode_query([WARMUP_QUERY])
+        self.reranker.rerank(
+            WARMUP_QUERY, [{"text": WARMUP_QUERY, "meta": {}}], top_k=1
         )
+        logger.info(f"Diagnose warm-up inference took {time.perf_counter() - started:.2f}s")
 
-        # 3) LLM + logic chẩn đoán (ép format trong core.generator)
-        self.llm = LLMGenerator(temperature=temperature)
-        self.core = DiagnosisAgent(self.retriever, self.llm)
+    async def _ensure_loaded(self) -> None:
+        if not self.loaded:
+            await asyncio.get_running_loop().run_in_executor(None, self.load)
+
+    def _log_first_request(self, started: float) -> None:
+        if not self._first_request_done:
+            self._first_request_done = True
+            logger.info(
+                f"First diagnose request served in {time.perf_counter() - started:.2f}s"
+            )
 
     # Non-stream, dùng cho _invoke khi client không subscribe
     def answer(self, query: str) -> Dict[str, Any]:
+        self.load()
         return self.core.answer(query)
 
-    async def invoke(self, query: str, session_id: Optional[str] = None) -> str:
-        result = self.core.answer(query)
+    @staticmethod
+    def _checkpoint(cancelled: threading.Event | None) -> None:
+        # Checkpoint hủy giữa các bước: task đã bị cancel thì không chạy bước
+        # tốn kém kế tiếp (rerank, gọi LLM).
+        if cancelled is not None and cancelled.is_set():
+            raise asyncio.CancelledError()
+
+    def _retrieve(
+        self, query: str, cancelled: threading.Event | None
+    ) -> List[Dict[str, Any]]:
+        """Truy hồi dense rồi rerank, chạy trong thread của pool suy luận; hủy
+        coroutine không dừng được thread nên kiểm tra cờ hủy giữa hai bước."""
+        self._checkpoint(cancelled)
+        docs = self.retriever.retrieve(query)
+        self._checkpoint(cancelled)
+        return self.retriever.rerank(query, docs)
+
+    async def invoke(
+        self,
+        query: str,
+        session_id: Optional[str] = None,
+        cancelled: threading.Event | None = None,
+    ) -> str:
+        started = time.perf_counter()
+        await self._ensure_loaded()
+        hits = await self.pool.run(self._retrieve, query, cancelled)
+        self._checkpoint(cancelled)
+        result = await asyncio.get_running_loop().run_in_executor(
+            None, self.core.generate, query, hits
+        )
+        self._log_first_request(started)
         return result.get("answer_raw", "")
 
     # Streaming theo ADK
     async def stream(
-        self, query: str, session_id: Optional[str] = None
+        self,
+        query: str,
+        session_id: Optional[str] = None,
+        cancelled: threading.Event | None = None,
     ) -> AsyncIterator[Dict[str, Any]]:
+        """cancelled: được task manager set khi nhận tasks/cancel; kiểm tra
+        giữa các bước truy hồi, rerank và sinh câu trả lời."""
+        started = time.perf_counter()
         # Bước 1: thông báo tiến trình
         yield {"is_task_complete": False, "updates": "🔎 Đang truy vấn RAG..."}
 
-        loop = asyncio.get_event_loop()
+        await self._ensure_loaded()
 
-        # Bước 2: truy hồi ngữ cảnh (không block event-loop)
-        hits: List[Dict[str, Any]] = await loop.run_in_executor(None, self.retriever, query)
+        # Bước 2: truy hồi + rerank trong pool suy luận (không block event-loop);
+        # quá tải thì OverloadedError được ném ra ngay.
+        hits: List[Dict[str, Any]] = await self.pool.run(self._retrieve, query, cancelled)
         preview = []
+        candidates: List[str] = []
         for h in hits:
             meta = h.get("meta", {}) or {}
             preview.append({
                 "book_name": meta.get("book_name"),
                 "page": meta.get("page"),
+                "label": meta.get("label"),
                 "score": meta.get("score"),
                 "ranker_score": meta.get("ranker_score"),
                 "id": meta.get("id"),
             })
+            # Bệnh ứng viên theo thứ tự rerank, để host chạy trước cost/schedule.
+            label = meta.get("label")
+            if label and label not in candidates:
+                candidates.append(label)
         yield {
             "is_task_complete": False,
             "updates": f"📚 Tìm thấy {len(hits)} đoạn liên quan.",
             "contexts_preview": preview,
+            "candidates": candidates,
         }
 
-        # Bước 3: sinh câu trả lời cuối (core.generator)
-        result: Dict[str, Any] = await loop.run_in_executor(None, self.core.answer, query)
+        # Bước 3: gửi các đoạn ngữ cảnh thành artifact "contexts", mỗi đoạn một chunk.
+        contexts = ArtifactChunker(index=CONTEXTS_ARTIFACT, name="contexts")
+        for i, hit in enumerate(hits):
+            yield {
+                "is_task_complete": False,
+                "artifact": contexts.chunk([DataPart(data=hit)], last=i == len(hits) - 1),
+            }
+
+        # Bước 4: stream câu trả lời theo token (gom thành chunk nhỏ) để client
+        # thấy chữ đầu tiên ngay, rồi parse chẩn đoán từ toàn bộ text.
+        answer = ArtifactChunker(index=ANSWER_ARTIFACT, name="answer")
+        pieces: List[str] = []
+        self._checkpoint(cancelled)
+        tokens = iterate_in_thread(
+            self.core.generate_stream, query, hits, cancelled=cancelled
+        )
+        async for text in coalesce_text(tokens):
+            pieces.append(text)
+            yield {"is_task_complete": False, "artifact": answer.text(text)}
+        if answer.sequence:
+            yield {"is_task_complete": False, "artifact": answer.close()}
+
+        result = self.core.parse("".join(pieces), hits)
+        # Ngữ cảnh đã nằm trong artifact "contexts", không gửi lại lần nữa.
         payload = {
             "answer": result.get("answer_raw"),
             "disease": result.get("disease"),
             "rationale": result.get("rationale"),
             "model": result.get("model"),
-            "contexts": result.get("contexts"),
         }
+        self._log_first_request(started)
         yield {"is_task_complete": True, "content": payload}
@@ -0,0 +1,96 @@
+"""So sánh backend torch và onnx (int8) cho BGE-M3 + ViRanker.
+
+Chạy từ thư mục agents/diagnose_rag:
+    python compare_backends.py --dataset ../../data/dataset_test.json
+
+Báo cáo:
+- độ tương đồng cosine giữa embedding của hai backend;
+- mức đồng thuận thứ hạng rerank (top-1 và Spearman);
+- độ trễ p50/p95 và throughput của từng backend.
+"""
+from __future__ import annotations
+import json
+import random
+import time
+from typing import Dict, List
+
+import click
+import numpy as np
+
+from core.embedder import EmbeddingGenerator
+from core.retriever import ViRanker
+
+
+def _spearman(a: np.ndarray, b: np.ndarray) -> float:
+    ra = a.argsort().argsort().astype(float)
+    rb = b.argsort().argsort().astype(float)
+    if ra.std() == 0 or rb.std() == 0:
+        return 1.0
+    return float(np.corrcoef(ra, rb)[0, 1])
+
+
+def _latency(samples: List[float]) -> Dict[str, float]:
+    arr = np.asarray(samples) * 1000
+    return {
+        "p50_ms": round(float(np.percentile(arr, 50)), 2),
+        "p95_ms": round(float(np.percentile(arr, 95)), 2),
+        "qps": round(len(samples) / (arr.sum() / 1000), 2),
+    }
+
+
+def _run(embedder, reranker, questions, candidates):
+    vecs, scores, embed_t, rerank_t = [], [], [], []
+    for q, docs in zip(questions, candidates):
+        t0 = time.perf_counter()
+        vecs.append(embedder.encode_query([q])[0])
+        t1 = time.perf_counter()
+        scores.append(np.asarray(reranker.model.predict([[q, d] for d in docs])))
+        t2 = time.perf_counter()
+        embed_t.append(t1 - t0)
+        rerank_t.append(t2 - t1)
+    return np.asarray(vecs), scores, embed_t, rerank_t
+
+
+@click.command()
+@click.option("--dataset", default="../../data/dataset_test.json")
+@click.option("--candidates", default=8, help="Số đoạn văn rerank cho mỗi câu hỏi.")
+@click.option("--limit", default=None, type=int)
+@click.option("--use-vncorenlp", is_flag=True, default=False)
+def main(dataset, candidates, limit, use_vncorenlp):
+    with open(dataset, encoding="utf-8") as f:
+        items = json.load(f)[:limit]
+
+    # Ứng viên rerank: context đúng của câu hỏi + context của các câu khác.
+    pool = sorted({c for it in items for c in it.get("context") or []})
+    rng = random.Random(0)
+    questions, cand_lists = [], []
+    for it in items:
+        own = list(it.get("context") or [])
+        others = [c for c in pool if c not in own]
+        questions.append(it["question"])
+        cand_lists.append(own + rng.sample(others, max(0, min(len(others), candidates - len(own)))))
+
+    results = {}
+    for backend in ("torch", "onnx"):
+        start = time.perf_counter()
+        embedder = EmbeddingGenerator(use_vncorenlp=use_vncorenlp, backend=backend)
+        reranker = ViRanker(backend=backend)
+        load_s = time.perf_counter() - start
+        # Warm-up một lượt để không tính chi phí khởi tạo vào độ trễ.
+        _run(embedder, reranker, questions[:1], cand_lists[:1])
+        vecs, scores, embed_t, rerank_t = _run(embedder, reranker, questions, cand_lists)
+        results[backend] = {"vecs": vecs, "scores": scores}
+        print(f"[{backend}] load {load_s:.1f}s | embed {_latency(embed_t)} | rerank {_latency(rerank_t)}")
+
+    t, o = results["torch"], results["onnx"]
+    cos = np.sum(t["vecs"] * o["vecs"], axis=1) / (
+        np.linalg.norm(t["vecs"], axis=1) * np.linalg.norm(o["vecs"], axis=1)
+    )
+    top1 = np.mean([a.argmax() == b.argmax() for a, b in zip(t["scores"], o["scores"])])
+    spearman = np.mean([_spearman(a, b) for a, b in zip(t["scores"], o["scores"])])
+    print(f"Embedding cosine: mean {cos.mean():.4f} | min {cos.min():.4f}")
+    print(f"Rerank agreement: top-1 {top1:.3f} | Spearman {spearman:.3f}")
+
+
+if __name__ == "__main__":
+    main()
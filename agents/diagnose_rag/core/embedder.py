@@ -7,6 +7,7 @@ from FlagEmbedding import BGEM3FlagModel
 
 # wrapper Java tự viết
 from .vncorenlp_wrapper import VnCoreNLP  
+from .onnx_backend import inference_backend
 
 def find_project_root(start_path: str, target_dir: str = "models"):
     """Leo lên các thư mục cha cho tới khi gặp folder target_dir."""
@@ -21,25 +22,42 @@ def find_project_root(start_path: str, target_dir: str = "models"):
         cur = new_cur
 
 class EmbeddingGenerator:
-    def __init__(self, use_vncorenlp: bool = False) -> None:
-        # 1) Load BGE-M3 embedding model
-        device = "cuda" if torch.cuda.is_available() else "cpu"
-        use_fp16 = device == "cuda"
-        self.model = BGEM3FlagModel("BAAI/bge-m3", use_fp16=use_fp16)
+    def __init__(
+        self,
+        use_vncorenlp: bool = False,
+        backend: str | None = None,
+        intra_op_threads: int | None = None,
+    ) -> None:
+        # 1) Load BGE-M3 embedding model (backend: torch | onnx, mặc định theo env)
+        self.backend = inference_backend(backend)
+        if self.backend == "onnx":
+            from .onnx_backend import OnnxDenseEncoder
+            self.model = OnnxDenseEncoder("BAAI/bge-m3", intra_op_threads=intra_op_threads)
+        else:
+            device = "cuda" if torch.cuda.is_available() else "cpu"
+            use_fp16 = device == "cuda"
+            self.model = BGEM3FlagModel("BAAI/bge-m3", use_fp16=use_fp16)
 
         # 2) Optionally load VNCoreNLP for word segmentation
         self.ws = None
         if use_vncorenlp:
-            # Path tới root project
-            BASE_DIR = find_project_root(__file__, "models")
-            VNCORENLP_DIR = os.path.join(BASE_DIR, "models", "vncorenlp")
-            if not os.path.exists(VNCORENLP_DIR):
-                raise FileNotFoundError(f"Không tìm thấy thư mục VnCoreNLP: {VNCORENLP_DIR}")
+            self.attach_word_segmenter()
 
-            self.ws = VnCoreNLP(
-                save_dir=VNCORENLP_DIR,
-                annotators=["wseg"]
-            )
+    def attach_word_segmenter(self) -> None:
+        """Boot VnCoreNLP (JVM qua pyjnius) để tách từ query. JVM không sống
+        sót qua fork nên khi chạy nhiều process phải gọi trong từng worker."""
+        if self.ws is not None:
+            return
+        # Path tới root project
+        BASE_DIR = find_project_root(__file__, "models")
+        VNCORENLP_DIR = os.path.join(BASE_DIR, "models", "vncorenlp")
+        if not os.path.exists(VNCORENLP_DIR):
+            raise FileNotFoundError(f"Không tìm thấy thư mục VnCoreNLP: {VNCORENLP_DIR}")
+
+        self.ws = VnCoreNLP(
+            save_dir=VNCORENLP_DIR,
+            annotators=["wseg"]
+        )
 
     @staticmethod
     def _normalize(text: str) -> str:
@@ -1,6 +1,6 @@
 from __future__ import annotations
-import os, requests, re
-from typing import List, Dict, Any
+import os, requests, re, json
+from typing import List, Dict, Any, Iterator
 
 SYSTEM_PROMPT = (
     "Bạn là bác sĩ chẩn đoán bệnh. "
@@ -55,18 +55,22 @@ class LLMGenerator:
         if self.model is None:
             raise ValueError(f"LLM_PROVIDER không hỗ trợ: {self.provider}. Hãy dùng openrouter | ollama.")
 
+    def _groq_endpoint(self) -> tuple[str, dict]:
+        groq_key = os.getenv("GROQ_API_KEY") or ""
+        groq_base = os.getenv("GROQ_BASE", "https://api.groq.com/openai/v1")
+        if not groq_key:
+            raise RuntimeError("GROQ_API_KEY trống trong .env")
+        return f"{groq_base}/chat/completions", {
+            "Authorization": f"Bearer {groq_key}",
+            "Content-Type": "application/json",
+        }
+
     def chat(self, messages: List[Dict[str, str]]) -> str:
         if self.provider == "groq":
-            groq_key = os.getenv("GROQ_API_KEY") or ""
-            groq_base = os.getenv("GROQ_BASE", "https://api.groq.com/openai/v1")
-            if not groq_key:
-                raise RuntimeError("GROQ_API_KEY trống trong .env")
+            url, headers = self._groq_endpoint()
             r = requests.post(
-                f"{groq_base}/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {groq_key}",
-                    "Content-Type": "application/json",
-                },
+                url,
+                headers=headers,
                 json={
                     "model": self.model,
                     "messages": messages,
@@ -96,6 +100,60 @@ class LLMGenerator:
 
         raise ValueError(f"LLM_PROVIDER không hỗ trợ: {self.provider}")
 
+    def chat_stream(self, messages: List[Dict[str, str]]) -> Iterator[str]:
+        """Như chat() nhưng trả từng đoạn text ngay khi LLM sinh ra, để câu trả
+        dài bắt đầu tới client sau token đầu tiên thay vì sau token cuối."""
+        if self.provider == "groq":
+            url, headers = self._groq_endpoint()
+            with requests.post(
+                url,
+                headers=headers,
+                json={
+                    "model": self.model,
+                    "messages": messages,
+                    "temperature": self.temperature,
+                    "stream": True,
+                },
+                stream=True,
+                timeout=120,
+            ) as r:
+                r.raise_for_status()
+                # SSE kiểu OpenAI: "data: {...}" từng dòng, kết thúc bằng [DONE].
+                for line in r.iter_lines():
+                    if not line.startswith(b"data:"):
+                        continue
+                    data = line[5:].strip()
+                    if data == b"[DONE]":
+                        return
+                    choices = json.loads(data).get("choices") or [{}]
+                    text = (choices[0].get("delta") or {}).get("content")
+                    if text:
+                        yield text
+            return
+
+        if self.provider == "ollama":
+            with requests.post(
+                f"{self.ollama_base}/api/chat",
+                json={"model": self.model, "messages": messages,
+                      "stream": True, "options": {"temperature": self.temperature}},
+                stream=True,
+                timeout=120,
+            ) as r:
+                r.raise_for_status()
+                # Ollama stream NDJSON: mỗi dòng một object, dòng cuối có done=true.
+                for line in r.iter_lines():
+                    if not line:
+                        continue
+                    data = json.loads(line)
+                    text = (data.get("message") or {}).get("content")
+                    if text:
+                        yield text
+                    if data.get("done"):
+                        return
+            return
+
+        raise ValueError(f"LLM_PROVIDER không hỗ trợ: {self.provider}")
+
 
 class DiagnosisAgent:
     def __init__(self, retriever, llm: LLMGenerator):
@@ -109,11 +167,20 @@ class DiagnosisAgent:
         return self.answer(query)
 
     def answer(self, query: str) -> Dict[str, Any]:
-        hits = self.retriever(query)
+        return self.generate(query, self.retriever(query))
+
+    def generate(self, query: str, hits: List[Dict[str, Any]]) -> Dict[str, Any]:
         contexts = [h["text"] for h in hits]
         messages = build_prompt(query, contexts)
-        txt = self.llm.chat(messages).strip()
+        return self.parse(self.llm.chat(messages), hits)
+
+    def generate_stream(self, query: str, hits: List[Dict[str, Any]]) -> Iterator[str]:
+        """Các đoạn text của câu trả lời; ghép lại rồi gọi parse()."""
+        contexts = [h["text"] for h in hits]
+        return self.llm.chat_stream(build_prompt(query, contexts))
 
+    def parse(self, txt: str, hits: List[Dict[str, Any]]) -> Dict[str, Any]:
+        txt = txt.strip()
         disease, rationale = None, None
         if "Không đủ thông tin trong nguồn" not in txt:
             for line in txt.splitlines():
@@ -0,0 +1,166 @@
+from __future__ import annotations
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict
+
+import numpy as np
+import torch
+
+logger = logging.getLogger(__name__)
+
+
+class OverloadedError(Exception):
+    """Hàng đợi suy luận đã đầy; client nên thử lại sau `retry_after` giây."""
+
+    def __init__(self, retry_after: float):
+        self.retry_after = retry_after
+        super().__init__(f"Inference queue is full, retry after {retry_after:.1f}s")
+
+
+class DeadlineExceededError(OverloadedError):
+    """Request chờ quá hạn trong hàng đợi trước khi tới lượt suy luận."""
+
+    def __init__(self, retry_after: float, waited: float):
+        super().__init__(retry_after)
+        self.waited = waited
+
+
+class _Timings:
+    def __init__(self, window: int = 512):
+        self.samples: Deque[float] = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, seconds: float):
+        self.samples.append(seconds)
+        self.count += 1
+        self.total += seconds
+
+    def mean(self, default: float = 0.0) -> float:
+        return float(np.mean(self.samples)) if self.samples else default
+
+    def summary(self) -> Dict[str, float]:
+        arr = np.asarray(self.samples or [0.0]) * 1000
+        return {
+            "count": self.count,
+            "total_s": round(self.total, 3),
+            "p50_ms": round(float(np.percentile(arr, 50)), 2),
+            "p95_ms": round(float(np.percentile(arr, 95)), 2),
+            "max_ms": round(float(arr.max()), 2),
+        }
+
+
+class InferencePool:
+    """Pool thread riêng, có giới hạn, cho suy luận model (BGE-M3, ViRanker).
+
+    - `workers` thread suy luận; mỗi thread dùng `torch_threads` thread
+      intra-op = số core / (`processes` × `workers`), nên tổng thread của mọi
+      process phục vụ (--workers) không vượt quá số core. Backend ONNX dùng
+      cùng giá trị cho intra_op_num_threads.
+    - Tối đa `max_queue` request chờ; vượt quá thì từ chối ngay bằng
+      OverloadedError kèm retry_after ước lượng từ thời gian phục vụ.
+    - Request chờ quá `deadline` giây trong hàng đợi bị huỷ bằng
+      DeadlineExceededError thay vì chạy muộn.
+    Thời gian chờ và thời gian phục vụ được đo riêng (xem `metrics`).
+    """
+
+    def __init__(
+        self,
+        workers: int | None = None,
+        max_queue: int | None = None,
+        deadline: float | None = None,
+        torch_threads: int | None = None,
+        processes: int | None = None,
+    ):
+        cpus = os.cpu_count() or 1
+        self.processes = processes or int(os.getenv("DIAGNOSE_PROCESSES", "1"))
+        self.workers = workers or int(os.getenv("INFERENCE_WORKERS", "2"))
+        self.max_queue = max_queue if max_queue is not None else int(os.getenv("INFERENCE_MAX_QUEUE", "16"))
+        self.deadline = deadline or float(os.getenv("INFERENCE_DEADLINE", "30"))
+        self.torch_threads = torch_threads or int(
+            os.getenv("INFERENCE_TORCH_THREADS", str(max(1, cpus // (self.processes * self.workers))))
+        )
+        torch.set_num_threads(self.torch_threads)
+        try:
+            torch.set_num_interop_threads(1)
+        except RuntimeError:
+            # Chỉ đặt được trước khi torch chạy tác vụ song song đầu tiên.
+            pass
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix="diagnose-inference"
+        )
+        self._slots: asyncio.Semaphore | None = None
+        self.queued = 0
+        self.running = 0
+        self.rejected = 0
+        self.expired = 0
+        self.queue_wait = _Timings()
+        self.service_time = _Timings()
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        # Tạo lười để gắn với event loop của worker (sau fork / uvicorn.run).
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.workers)
+        return self._slots
+
+    def retry_after(self) -> float:
+        backlog = (self.queued + self.running) / self.workers
+        return round(max(1.0, backlog * self.service_time.mean(default=1.0)), 1)
+
+    def check_admission(self) -> OverloadedError | None:
+        """Trả lỗi (và tính là một lần từ chối) nếu hàng đợi đã đầy."""
+        if self.queued >= self.max_queue:
+            self.rejected += 1
+            return OverloadedError(self.retry_after())
+        return None
+
+    async def run(self, fn: Callable[..., Any], *args, deadline: float | None = None) -> Any:
+        error = self.check_admission()
+        if error is not None:
+            raise error
+
+        deadline = deadline or self.deadline
+        enqueued = time.perf_counter()
+        self.queued += 1
+        try:
+            await asyncio.wait_for(self._semaphore().acquire(), timeout=deadline)
+        except asyncio.TimeoutError:
+            self.expired += 1
+            raise DeadlineExceededError(self.retry_after(), time.perf_counter() - enqueued)
+        finally:
+            self.queued -= 1
+
+        started = time.perf_counter()
+        self.queue_wait.add(started - enqueued)
+        self.running += 1
+        loop = asyncio.get_running_loop()
+
+        def finished(_):
+            # Trả slot khi thread thật sự xong, kể cả khi request đã bị huỷ,
+            # để số suy luận đang chạy không vượt quá số worker.
+            self.running -= 1
+            self.service_time.add(time.perf_counter() - started)
+            self._semaphore().release()
+
+        future = self._executor.submit(fn, *args)
+        future.add_done_callback(lambda f: loop.call_soon_threadsafe(finished, f))
+        return await asyncio.wrap_future(future)
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "processes": self.processes,
+            "workers": self.workers,
+            "torch_threads": self.torch_threads,
+            "max_queue": self.max_queue,
+            "queued": self.queued,
+            "running": self.running,
+            "rejected": self.rejected,
+            "expired": self.expired,
+            "queue_wait": self.queue_wait.summary(),
+            "service_time": self.service_time.summary(),
+        }
@@ -0,0 +1,160 @@
+from __future__ import annotations
+import logging
+import os
+from typing import List, Sequence
+
+import numpy as np
+
+try:
+    import onnxruntime as ort
+    from optimum.onnxruntime import (
+        ORTModelForFeatureExtraction,
+        ORTModelForSequenceClassification,
+        ORTQuantizer,
+    )
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    from transformers import AutoTokenizer
+    _ONNX_AVAILABLE = True
+except ImportError:
+    _ONNX_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Chọn backend suy luận cho BGE-M3 / ViRanker: "torch" (mặc định) hoặc "onnx".
+INFERENCE_BACKEND_ENV = "DIAGNOSE_INFERENCE_BACKEND"
+QUANTIZED_FILE = "model_quantized.onnx"
+
+
+def inference_backend(backend: str | None = None) -> str:
+    backend = (backend or os.getenv(INFERENCE_BACKEND_ENV, "torch")).lower()
+    if backend not in ("torch", "onnx"):
+        raise ValueError(f"{INFERENCE_BACKEND_ENV} không hỗ trợ: {backend}. Hãy dùng torch | onnx.")
+    if backend == "onnx" and not _ONNX_AVAILABLE:
+        raise ImportError(
+            "Backend onnx cần onnxruntime và optimum: pip install 'optimum[onnxruntime]'"
+        )
+    return backend
+
+
+def session_options(intra_op_threads: int | None = None) -> "ort.SessionOptions":
+    """Số thread intra/inter-op lấy từ ONNX_INTRA_OP_THREADS / ONNX_INTER_OP_THREADS.
+
+    Không đặt env thì intra-op = `intra_op_threads` (agent truyền
+    InferencePool.torch_threads để ORT cũng chia core theo số process × số
+    thread suy luận), hoặc 0 = ORT tự chọn; inter-op = 1 vì đồ thị
+    transformer gần như tuần tự.
+    """
+    opts = ort.SessionOptions()
+    opts.intra_op_num_threads = int(os.getenv("ONNX_INTRA_OP_THREADS", intra_op_threads or 0))
+    opts.inter_op_num_threads = int(os.getenv("ONNX_INTER_OP_THREADS", "1"))
+    opts.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+    opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    return opts
+
+
+def _export_dir(model_name: str) -> str:
+    cache_dir = os.getenv("ONNX_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "diagnose_onnx"))
+    return os.path.join(cache_dir, model_name.replace("/", "__"))
+
+
+def load_ort_model(
+    model_cls, model_name: str, quantize: bool = True, intra_op_threads: int | None = None
+):
+    """Export model sang ONNX (một lần, cache trên đĩa), lượng tử hoá int8 động
+    nếu cần, rồi mở bằng ONNX Runtime CPU."""
+    export_dir = _export_dir(model_name)
+    if not os.path.exists(os.path.join(export_dir, "model.onnx")):
+        logger.info(f"Exporting {model_name} to ONNX at {export_dir}")
+        model = model_cls.from_pretrained(model_name, export=True)
+        model.save_pretrained(export_dir)
+        AutoTokenizer.from_pretrained(model_name).save_pretrained(export_dir)
+
+    file_name = "model.onnx"
+    if quantize:
+        if not os.path.exists(os.path.join(export_dir, QUANTIZED_FILE)):
+            logger.info(f"Quantizing {model_name} to dynamic int8")
+            quantizer = ORTQuantizer.from_pretrained(export_dir, file_name="model.onnx")
+            # avx2 chạy được trên mọi CPU x86 hiện đại; int8 động không cần dữ
+            # liệu hiệu chuẩn.
+            qconfig = AutoQuantizationConfig.avx2(is_static=False, per_channel=True)
+            quantizer.quantize(save_dir=export_dir, quantization_config=qconfig)
+        file_name = QUANTIZED_FILE
+
+    model = model_cls.from_pretrained(
+        export_dir,
+        file_name=file_name,
+        provider="CPUExecutionProvider",
+        session_options=session_options(intra_op_threads),
+    )
+    tokenizer = AutoTokenizer.from_pretrained(export_dir)
+    return model, tokenizer
+
+
+def _quantize_enabled() -> bool:
+    return os.getenv("ONNX_QUANTIZE", "1").lower() not in ("0", "false", "no")
+
+
+class OnnxDenseEncoder:
+    """Dense embedding của BGE-M3 (CLS + chuẩn hoá L2) chạy trên ONNX Runtime,
+    cùng giao diện `encode` với BGEM3FlagModel cho phần dense."""
+
+    def __init__(
+        self,
+        model_name: str = "BAAI/bge-m3",
+        max_length: int = 512,
+        intra_op_threads: int | None = None,
+    ):
+        self.model, self.tokenizer = load_ort_model(
+            ORTModelForFeatureExtraction, model_name, quantize=_quantize_enabled(),
+            intra_op_threads=intra_op_threads,
+        )
+        self.max_length = max_length
+
+    def encode(self, texts: List[str], batch_size: int = 32, **_) -> dict:
+        vecs = []
+        for i in range(0, len(texts), batch_size):
+            batch = self.tokenizer(
+                texts[i:i + batch_size],
+                padding=True,
+                truncation=True,
+                max_length=self.max_length,
+                return_tensors="np",
+            )
+            hidden = self.model(**batch).last_hidden_state
+            cls = np.asarray(hidden)[:, 0]
+            vecs.append(cls / np.linalg.norm(cls, axis=1, keepdims=True))
+        dim = self.model.config.hidden_size
+        return {"dense_vecs": np.concatenate(vecs) if vecs else np.zeros((0, dim), dtype=np.float32)}
+
+
+class OnnxCrossEncoder:
+    """Cross-encoder (ViRanker) trên ONNX Runtime; `predict` trả điểm sigmoid
+    giống CrossEncoder.predict của sentence-transformers với 1 nhãn."""
+
+    def __init__(
+        self,
+        model_name: str = "namdp-ptit/ViRanker",
+        max_length: int = 512,
+        intra_op_threads: int | None = None,
+    ):
+        self.model, self.tokenizer = load_ort_model(
+            ORTModelForSequenceClassification, model_name, quantize=_quantize_enabled(),
+            intra_op_threads=intra_op_threads,
+        )
+        self.max_length = max_length
+
+    def predict(self, pairs: Sequence[Sequence[str]], batch_size: int = 32) -> np.ndarray:
+        scores = []
+        for i in range(0, len(pairs), batch_size):
+            batch = pairs[i:i + batch_size]
+            features = self.tokenizer(
+                [p[0] for p in batch],
+                [p[1] for p in batch],
+                padding=True,
+                truncation=True,
+                max_length=self.max_length,
+                return_tensors="np",
+            )
+            logits = np.asarray(self.model(**features).logits)[:, 0]
+            scores.append(1.0 / (1.0 + np.exp(-logits)))
+        return np.concatenate(scores) if scores else np.zeros(0, dtype=np.float32)
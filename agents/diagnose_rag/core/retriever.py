@@ -3,11 +3,23 @@ from typing import List, Dict, Any
 import torch
 from sentence_transformers import CrossEncoder
 
+from .onnx_backend import inference_backend
+
 
 class ViRanker:
-    def __init__(self, model_name: str = "namdp-ptit/ViRanker"):
-        device = "cuda" if torch.cuda.is_available() else "cpu"
-        self.model = CrossEncoder(model_name, device=device, model_kwargs={"use_safetensors": True})
+    def __init__(
+        self,
+        model_name: str = "namdp-ptit/ViRanker",
+        backend: str | None = None,
+        intra_op_threads: int | None = None,
+    ):
+        self.backend = inference_backend(backend)
+        if self.backend == "onnx":
+            from .onnx_backend import OnnxCrossEncoder
+            self.model = OnnxCrossEncoder(model_name, intra_op_threads=intra_op_threads)
+        else:
+            device = "cuda" if torch.cuda.is_available() else "cpu"
+            self.model = CrossEncoder(model_name, device=device, model_kwargs={"use_safetensors": True})
 
     def rerank(self, query: str, docs: List[Dict[str, Any]], top_k: int = 3) -> List[Dict[str, Any]]:
         if not docs:
@@ -35,6 +47,9 @@ class Retriever:
         self.rerank_k = rerank_k
 
     def __call__(self, query: str) -> List[Dict[str, Any]]:
+        return self.rerank(query, self.retrieve(query))
+
+    def retrieve(self, query: str) -> List[Dict[str, Any]]:
         qvec = self.embedder.encode_query([query])[0]
         hits = self.db.search(qvec, top_k=self.top_k)
 
@@ -46,11 +61,14 @@ class Retriever:
                 "id": payload.get("id"),
                 "book_name": payload.get("book_name"),
                 "page": payload.get("page"),
+                "label": payload.get("label"),
                 "score": float(h.score),
                 "ranker_score": None,
             }
             docs.append({"text": text_for_llm, "meta": meta})
+        return docs
 
+    def rerank(self, query: str, docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         if self.reranker:
             return self.reranker.rerank(query, docs, top_k=min(self.rerank_k, len(docs)))
         return docs[: self.rerank_k]
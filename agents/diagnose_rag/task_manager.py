@@ -1,35 +1,82 @@
 from __future__ import annotations
 from typing import AsyncIterable, Union, Any
-import json, logging
+import json, logging, threading
 
 from common.types import (
     SendTaskRequest, TaskSendParams, Message, TaskStatus, Artifact,
     TaskStatusUpdateEvent, TaskArtifactUpdateEvent, TextPart, TaskState, Task,
-    SendTaskResponse, InternalError, JSONRPCResponse,
+    SendTaskResponse, InternalError, JSONRPCResponse, ServerOverloadedError,
     SendTaskStreamingRequest, SendTaskStreamingResponse,
+    CancelTaskRequest, CancelTaskResponse,
 )
 from common.server.task_manager import InMemoryTaskManager
+from common.server.sqlite_task_manager import SqliteTaskManager
 import common.server.utils as utils
+from core.inference_pool import OverloadedError
 
 logger = logging.getLogger(__name__)
 
 class AgentTaskManager(InMemoryTaskManager):
-    def __init__(self, agent: Any):
-        super().__init__()
+    def __init__(self, agent: Any, **kwargs):
+        super().__init__(**kwargs)
         self.agent = agent
+        # Cờ hủy của các task đang chạy ở process này; agent kiểm tra giữa các
+        # bước truy hồi, rerank và gọi LLM (kể cả trong thread suy luận).
+        self._cancel_flags: dict[str, threading.Event] = {}
+
+    async def on_cancel_task(self, request: CancelTaskRequest) -> CancelTaskResponse:
+        flag = self._cancel_flags.get(request.params.id)
+        if flag is not None:
+            flag.set()
+        return await super().on_cancel_task(request)
+
+    async def _fail_task(self, task_id: str, reason: str, notify: bool = True) -> None:
+        # Lỗi (kể cả quá tải) kết thúc task ở FAILED thay vì để WORKING/SUBMITTED.
+        status = TaskStatus(
+            state=TaskState.FAILED,
+            message=Message(role="agent", parts=[TextPart(text=reason)]),
+        )
+        await self._update_store(task_id, status, None)
+        if notify:
+            await self.send_task_notification(task_id)
 
     async def _stream_generator(
         self, request: SendTaskStreamingRequest
     ) -> AsyncIterable[SendTaskStreamingResponse] | JSONRPCResponse:
         task_send_params: TaskSendParams = request.params
         query = self._get_user_query(task_send_params)
+        # Artifact cuối nhận index sau các artifact đã stream theo chunk.
+        next_index = 0
+        cancelled = self._cancel_flags[task_send_params.id] = threading.Event()
         try:
-            async for item in self.agent.stream(query, task_send_params.sessionId):
+            async for item in self.agent.stream(
+                query, task_send_params.sessionId, cancelled=cancelled
+            ):
+                chunk = item.get("artifact")
+                if chunk is not None:
+                    # Chunk artifact (token LLM, đoạn ngữ cảnh): không đổi status.
+                    next_index = max(next_index, chunk.index + 1)
+                    await self.append_artifacts(task_send_params.id, [chunk])
+                    yield SendTaskStreamingResponse(
+                        id=request.id,
+                        result=TaskArtifactUpdateEvent(
+                            id=task_send_params.id, artifact=chunk
+                        ),
+                    )
+                    continue
+
                 is_task_complete = bool(item.get("is_task_complete"))
                 artifacts = None
                 if not is_task_complete:
                     task_state = TaskState.WORKING
                     parts = [{"type": "text", "text": item.get("updates", "")}]
+                    progress = {
+                        key: item[key]
+                        for key in ("contexts_preview", "candidates")
+                        if item.get(key)
+                    }
+                    if progress:
+                        parts.append({"type": "data", "data": progress})
                 else:
                     content = item.get("content")
                     task_state = TaskState.COMPLETED
@@ -37,7 +84,7 @@ class AgentTaskManager(InMemoryTaskManager):
                         parts = [{"type": "data", "data": content}]
                     else:
                         parts = [{"type": "text", "text": str(content)}]
-                    artifacts = [Artifact(parts=parts, index=0, append=False)]
+                    artifacts = [Artifact(parts=parts, index=next_index, append=False)]
 
                 message = Message(role="agent", parts=parts)
                 task_status = TaskStatus(state=task_state, message=message)
@@ -66,8 +113,15 @@ class AgentTaskManager(InMemoryTaskManager):
                             final=True,
                         ),
                     )
+        except OverloadedError as e:
+            logger.warning(f"Rejecting task {task_send_params.id}: {e}")
+            await self._fail_task(task_send_params.id, str(e))
+            yield JSONRPCResponse(id=request.id, error=self._overloaded_error(e))
         except Exception as e:
             logger.error(f"An error occurred while streaming the response: {e}")
+            await self._fail_task(
+                task_send_params.id, "An error occurred while streaming the response"
+            )
             yield JSONRPCResponse(
                 id=request.id,
                 error=InternalError(
@@ -75,6 +129,8 @@ class AgentTaskManager(InMemoryTaskManager):
                 ),
             )
             return
+        finally:
+            self._cancel_flags.pop(task_send_params.id, None)
 
 
     def _validate_request(
@@ -89,24 +145,50 @@ class AgentTaskManager(InMemoryTaskManager):
             )
             return utils.new_incompatible_types_error(request.id)
 
+    def _check_admission(
+        self, request: Union[SendTaskRequest, SendTaskStreamingRequest]
+    ) -> JSONRPCResponse | None:
+        # Từ chối ngay khi hàng đợi suy luận đầy, trước khi tạo task/SSE stream.
+        pool = getattr(self.agent, "pool", None)
+        error = pool.check_admission() if pool is not None else None
+        if error is not None:
+            logger.warning(f"Rejecting task {request.params.id}: {error}")
+            return JSONRPCResponse(id=request.id, error=self._overloaded_error(error))
+        return None
+
+    @staticmethod
+    def _overloaded_error(error: OverloadedError) -> ServerOverloadedError:
+        return ServerOverloadedError(
+            message=str(error), data={"retryAfter": error.retry_after}
+        )
+
+    def metrics(self) -> dict:
+        metrics = super().metrics()
+        pool = getattr(self.agent, "pool", None)
+        if pool is not None:
+            metrics["inference"] = pool.metrics()
+        return metrics
+
     async def on_send_task(self, request: SendTaskRequest) -> SendTaskResponse:
-        error = self._validate_request(request)
+        error = self._validate_request(request) or self._check_admission(request)
         if error: return error
         await self.upsert_task(request.params)
-        return await self._invoke(request)
+        return await self.invoke_cancellable(request, self._invoke(request))
 
     async def on_send_task_subscribe(
         self, request: SendTaskStreamingRequest
     ) -> AsyncIterable[SendTaskStreamingResponse] | JSONRPCResponse:
-        error = self._validate_request(request)
+        error = self._validate_request(request) or self._check_admission(request)
         if error: return error
         await self.upsert_task(request.params)
-        return self._stream_generator(request)
+        return await self.stream_in_background(
+            request, self._stream_generator(request)
+        )
 
     async def _update_store(
         self, task_id: str, status: TaskStatus, artifacts: list[Artifact] | None
     ) -> Task:
-        async with self.lock:
+        async with self.task_lock(task_id):
             task = self.tasks[task_id]
             task.status = status
             if artifacts:
@@ -116,11 +198,21 @@ class AgentTaskManager(InMemoryTaskManager):
     async def _invoke(self, request: SendTaskRequest) -> SendTaskResponse:
         task_send_params: TaskSendParams = request.params
         query = self._get_user_query(task_send_params)
+        cancelled = self._cancel_flags[task_send_params.id] = threading.Event()
         try:
-            result = await self.agent.invoke(query, task_send_params.sessionId)
+            result = await self.agent.invoke(
+                query, task_send_params.sessionId, cancelled=cancelled
+            )
+        except OverloadedError as e:
+            # invoke_cancellable notifies once the response is returned.
+            await self._fail_task(task_send_params.id, str(e), notify=False)
+            return SendTaskResponse(id=request.id, error=self._overloaded_error(e))
         except Exception as e:
             logger.error(f"Error invoking agent: {e}")
+            await self._fail_task(task_send_params.id, "Error invoking agent")
             raise ValueError(f"Error invoking agent: {e}")
+        finally:
+            self._cancel_flags.pop(task_send_params.id, None)
         parts = [{"type": "text", "text": result}]
         task_state = TaskState.COMPLETED
         task = await self._update_store(
@@ -135,3 +227,13 @@ class AgentTaskManager(InMemoryTaskManager):
         if not isinstance(part, TextPart):
             raise ValueError("Only text parts are supported")
         return part.text
+
+
+class SharedAgentTaskManager(AgentTaskManager, SqliteTaskManager):
+    """AgentTaskManager whose tasks and stream events live in a SQLite file,
+    so several server worker processes can serve the same tasks."""
+
+    async def _update_store(
+        self, task_id: str, status: TaskStatus, artifacts: list[Artifact] | None
+    ) -> Task:
+        return await self.update_store(task_id, status, artifacts)
@@ -112,7 +112,7 @@ class AgentTaskManager(InMemoryTaskManager):
         if error:
             return error
         await self.upsert_task(request.params)
-        return await self._invoke(request)
+        return await self.invoke_cancellable(request, self._invoke(request))
     async def on_send_task_subscribe(
         self, request: SendTaskStreamingRequest
     ) -> AsyncIterable[SendTaskStreamingResponse] | JSONRPCResponse:
@@ -120,11 +120,13 @@ class AgentTaskManager(InMemoryTaskManager):
         if error:
             return error
         await self.upsert_task(request.params)
-        return self._stream_generator(request)
+        return await self.stream_in_background(
+            request, self._stream_generator(request)
+        )
     async def _update_store(
         self, task_id: str, status: TaskStatus, artifacts: list[Artifact]
     ) -> Task:
-        async with self.lock:
+        async with self.task_lock(task_id):
             try:
                 task = self.tasks[task_id]
             except KeyError:
@@ -0,0 +1,128 @@
+"""Time to first answer byte with chunked vs single-artifact answers.
+
+Run from the repository root:
+    python -m benchmarks.artifact_ttfb --tokens 400 --token-ms 20 --retrieval-ms 300
+
+An agent "retrieves" for `--retrieval-ms`, then its model produces `--tokens`
+tokens `--token-ms` apart (run in a thread, as Diagnose.stream does). With
+`chunked` the answer goes out as coalesce_text + ArtifactChunker chunks;
+with `single` it is sent as one artifact once generation ends, as before.
+Events go through InMemoryTaskManager's store and SSE queue, and a host-side
+ArtifactAssembler; the clock stops when the subscriber first has answer
+text, and when the task is final.
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from common.client import ArtifactAssembler
+from common.server import InMemoryTaskManager
+from common.server.artifact_stream import ArtifactChunker, coalesce_text
+from common.types import (
+    Artifact,
+    Message,
+    TaskArtifactUpdateEvent,
+    TaskSendParams,
+    TaskState,
+    TaskStatus,
+    TaskStatusUpdateEvent,
+    TextPart,
+)
+
+
+class StoreOnlyTaskManager(InMemoryTaskManager):
+    async def on_send_task(self, request):
+        raise NotImplementedError
+
+    async def on_send_task_subscribe(self, request):
+        raise NotImplementedError
+
+
+def generate(tokens: int, token_s: float):
+    for i in range(tokens):
+        time.sleep(token_s)
+        yield f"tok{i} "
+
+
+async def tokens_in_thread(tokens: int, token_s: float):
+    queue: asyncio.Queue = asyncio.Queue()
+    loop = asyncio.get_running_loop()
+
+    def run():
+        for token in generate(tokens, token_s):
+            loop.call_soon_threadsafe(queue.put_nowait, token)
+        loop.call_soon_threadsafe(queue.put_nowait, None)
+
+    worker = loop.run_in_executor(None, run)
+    while (token := await queue.get()) is not None:
+        yield token
+    await worker
+
+
+async def send(manager, task_id: str, artifact: Artifact):
+    await manager.append_artifacts(task_id, [artifact])
+    await manager.enqueue_events_for_sse(
+        task_id, TaskArtifactUpdateEvent(id=task_id, artifact=artifact))
+
+
+async def produce(manager, task_id: str, args, chunked: bool):
+    await asyncio.sleep(args.retrieval_ms / 1000)
+    tokens = tokens_in_thread(args.tokens, args.token_ms / 1000)
+    if chunked:
+        answer = ArtifactChunker(index=1, name="answer")
+        async for text in coalesce_text(tokens):
+            await send(manager, task_id, answer.text(text))
+        await send(manager, task_id, answer.close())
+    else:
+        text = "".join([token async for token in tokens])
+        await send(manager, task_id, Artifact(
+            name="answer", index=1, parts=[TextPart(text=text)]))
+    status = TaskStatus(state=TaskState.COMPLETED)
+    await manager.update_store(task_id, status, None)
+    await manager.enqueue_events_for_sse(
+        task_id, TaskStatusUpdateEvent(id=task_id, status=status, final=True))
+
+
+async def consume(manager, task_id: str, queue, started: float) -> tuple[float, float]:
+    assembler = ArtifactAssembler()
+    first = None
+    async for event in manager.dequeue_events_for_sse(1, task_id, queue):
+        result = event.result
+        if isinstance(result, TaskArtifactUpdateEvent) and first is None:
+            artifact = assembler.add(task_id, result.artifact)
+            if any(p.text for p in artifact.parts):
+                first = time.perf_counter() - started
+        elif isinstance(result, TaskArtifactUpdateEvent):
+            assembler.add(task_id, result.artifact)
+    return first, time.perf_counter() - started
+
+
+async def run_once(args, chunked: bool, i: int) -> tuple[float, float]:
+    manager = StoreOnlyTaskManager()
+    task_id = f"task-{i}"
+    await manager.upsert_task(TaskSendParams(
+        id=task_id, message=Message(role="user", parts=[TextPart(text="Tôi bị sốt")])))
+    queue = await manager.setup_sse_consumer(task_id)
+    started = time.perf_counter()
+    consumer = asyncio.create_task(consume(manager, task_id, queue, started))
+    await produce(manager, task_id, args, chunked)
+    return await consumer
+
+
+async def main(args):
+    for mode in ("single", "chunked"):
+        runs = [await run_once(args, mode == "chunked", i) for i in range(args.repeat)]
+        ttfb = statistics.median(r[0] for r in runs) * 1000
+        total = statistics.median(r[1] for r in runs) * 1000
+        print(f"{mode:<8} first answer byte {ttfb:7.0f} ms   complete {total:7.0f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tokens", type=int, default=400)
+    parser.add_argument("--token-ms", type=float, default=20)
+    parser.add_argument("--retrieval-ms", type=float, default=300)
+    parser.add_argument("--repeat", type=int, default=3)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,96 @@
+"""JSON-RPC request parsing and response serialization in A2AServer.
+
+Run from the repository root:
+    python -m benchmarks.jsonrpc_serialization --history 20 --artifacts 5
+
+Compares the old path (validate through the A2ARequest discriminated
+union, model_dump to a dict, stdlib json) with the one A2AServer uses now
+(validate the concrete model for the method, serialize straight to bytes
+with pydantic-core, or orjson for plain values when it is installed).
+"""
+
+import argparse
+import json
+import timeit
+
+from common.server.server import METHOD_HANDLERS, PydanticJSONResponse, loads_json
+from common.types import (
+    A2ARequest,
+    Artifact,
+    DataPart,
+    GetTaskResponse,
+    Message,
+    Task,
+    TaskState,
+    TaskStatus,
+    TextPart,
+)
+
+
+def make_task(history: int, artifacts: int) -> Task:
+    messages = [
+        Message(
+            role="user" if i % 2 == 0 else "agent",
+            parts=[TextPart(text="Triệu chứng sốt cao, ho khan và đau họng " * 4)],
+        )
+        for i in range(history)
+    ]
+    return Task(
+        id="task-1",
+        sessionId="session-1",
+        status=TaskStatus(state=TaskState.COMPLETED, message=messages[-1]),
+        history=messages,
+        artifacts=[
+            Artifact(
+                parts=[
+                    TextPart(text="Chẩn đoán sơ bộ: cúm mùa. " * 20),
+                    DataPart(data={"disease": "cúm", "contexts": ["đoạn"] * 8}),
+                ],
+                index=i,
+            )
+            for i in range(artifacts)
+        ],
+    )
+
+
+def report(name: str, fn, number: int):
+    seconds = min(timeit.repeat(fn, number=number, repeat=5)) / number
+    print(f"{name:<42} {seconds * 1e6:9.1f} us")
+
+
+def main(history: int, artifacts: int, number: int):
+    response = GetTaskResponse(id=1, result=make_task(history, artifacts))
+    body = json.dumps(
+        {"jsonrpc": "2.0", "id": 1, "method": "tasks/get", "params": {"id": "task-1"}}
+    ).encode()
+    print(f"response size: {len(PydanticJSONResponse(response).body)} bytes")
+
+    report(
+        "parse: A2ARequest union",
+        lambda: A2ARequest.validate_python(json.loads(body)),
+        number,
+    )
+    report(
+        "parse: method table + concrete model",
+        lambda: METHOD_HANDLERS["tasks/get"][0].model_validate(loads_json(body)),
+        number,
+    )
+    report(
+        "serialize: model_dump + json.dumps",
+        lambda: json.dumps(response.model_dump(mode="json", exclude_none=True)).encode(),
+        number,
+    )
+    report(
+        "serialize: PydanticJSONResponse",
+        lambda: PydanticJSONResponse(response).body,
+        number,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--history", type=int, default=20)
+    parser.add_argument("--artifacts", type=int, default=5)
+    parser.add_argument("--number", type=int, default=2000)
+    args = parser.parse_args()
+    main(args.history, args.artifacts, args.number)
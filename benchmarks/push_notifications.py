@@ -0,0 +1,92 @@
+"""Push-notification throughput: inline sends vs PushNotificationDispatcher.
+
+Run from the repository root:
+    python -m benchmarks.push_notifications --tasks 200 --updates 10 --latency-ms 20
+
+`--tasks` tasks run at once and each publishes `--updates` status updates
+back to back, to one receiver answering after `--latency-ms` (an httpx
+MockTransport, so no sockets are involved). `inline` awaits
+PushNotificationSenderAuth.send_push_notification in the update path, as
+the task managers did before; `dispatcher` calls
+PushNotificationDispatcher.notify and waits for the queue to drain.
+Reports updates per second as seen by the agent (until its last update is
+published) and end to end (until the last delivery), plus POSTs made.
+"""
+
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from common.utils.push_notification_auth import PushNotificationSenderAuth
+from common.utils.push_notification_dispatcher import PushNotificationDispatcher
+
+URL = "http://client.example/notify"
+
+
+class Receiver:
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.posts = 0
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(self.latency)
+        self.posts += 1
+        return httpx.Response(200)
+
+
+def update(task_id: str, n: int) -> dict:
+    return {
+        "id": task_id,
+        "status": {"state": "working", "message": {"role": "agent", "parts": [
+            {"type": "text", "text": f"Đang tra cứu tài liệu, bước {n}"}]}},
+        "final": False,
+    }
+
+
+async def run(args, mode: str, key) -> tuple[float, float, int]:
+    receiver = Receiver(args.latency_ms / 1000)
+    auth = PushNotificationSenderAuth(
+        client=httpx.AsyncClient(transport=httpx.MockTransport(receiver)))
+    auth.private_key_jwk = key
+    dispatcher = PushNotificationDispatcher(auth)
+
+    async def task(i: int):
+        task_id = f"task-{i}"
+        for n in range(args.updates):
+            if mode == "inline":
+                await auth.send_push_notification(URL, update(task_id, n))
+            else:
+                dispatcher.notify(URL, task_id, update(task_id, n))
+            # The agent's own work between updates.
+            await asyncio.sleep(0)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(task(i) for i in range(args.tasks)))
+    published = time.perf_counter() - started
+    await dispatcher.aclose(timeout=None)
+    delivered = time.perf_counter() - started
+    await auth.aclose()
+    return published, delivered, receiver.posts
+
+
+async def main(args):
+    signer = PushNotificationSenderAuth()
+    signer.generate_jwk()
+    total = args.tasks * args.updates
+    for mode in ("inline", "dispatcher"):
+        published, delivered, posts = await run(args, mode, signer.private_key_jwk)
+        print(
+            f"{mode:<10} {total / published:9.0f} updates/s published"
+            f"   {total / delivered:7.0f} updates/s delivered"
+            f"   {posts:6d} POSTs   {delivered * 1000:7.0f} ms"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tasks", type=int, default=200)
+    parser.add_argument("--updates", type=int, default=10)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,55 @@
+"""Routing accuracy and latency of hosts.multiagent.routing.decide_route.
+
+Run from the repository root:
+    python -m benchmarks.routing --examples data/routing_examples.jsonl
+
+A route counts as correct when both the agent list and `chained` match the
+label. Also reports how many messages clear BYPASS_CONFIDENCE (the host
+skips the LLM planning turn for those) and how accurate that subset is.
+"""
+
+import argparse
+import json
+import timeit
+
+from hosts.multiagent.routing import BYPASS_CONFIDENCE, decide_route
+
+
+def load(path: str) -> list[dict]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--examples", default="data/routing_examples.jsonl")
+    parser.add_argument("--number", type=int, default=2000)
+    args = parser.parse_args()
+
+    examples = load(args.examples)
+    correct = bypassed = bypassed_correct = 0
+    for example in examples:
+        decision = decide_route(example["text"])
+        ok = decision.agents == example["agents"] and decision.chained == example["chained"]
+        correct += ok
+        if decision.confidence >= BYPASS_CONFIDENCE:
+            bypassed += 1
+            bypassed_correct += ok
+        if not ok:
+            print(f"miss: {example['text']!r} -> {decision.agents} chained={decision.chained}")
+
+    texts = [example["text"] for example in examples]
+    seconds = min(
+        timeit.repeat(lambda: [decide_route(t) for t in texts], number=args.number, repeat=5)
+    ) / (args.number * len(texts))
+
+    print(f"examples                 {len(examples)}")
+    print(f"accuracy                 {correct / len(examples):.1%}")
+    print(f"bypass (>= {BYPASS_CONFIDENCE})        {bypassed / len(examples):.1%}")
+    if bypassed:
+        print(f"bypass accuracy          {bypassed_correct / bypassed:.1%}")
+    print(f"latency per message      {seconds * 1e6:.1f} us")
+
+
+if __name__ == "__main__":
+    main()
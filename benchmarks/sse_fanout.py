@@ -0,0 +1,99 @@
+"""Throughput of many concurrently streaming tasks through InMemoryTaskManager.
+
+Run from the repository root:
+    python -m benchmarks.sse_fanout --tasks 500 --events 40
+
+Each task has one SSE subscriber draining its stream while a producer
+stores WORKING updates and publishes them. `--lock-stripes 1` approximates
+the old single manager-wide lock; `--stalled` adds subscribers that never
+read, which used to hold up publishing for every task.
+"""
+
+import argparse
+import asyncio
+import time
+
+from common.server import InMemoryTaskManager
+from common.types import (
+    Message,
+    TaskSendParams,
+    TaskState,
+    TaskStatus,
+    TaskStatusUpdateEvent,
+    TextPart,
+)
+
+
+class StoreOnlyTaskManager(InMemoryTaskManager):
+    async def on_send_task(self, request):
+        raise NotImplementedError
+
+    async def on_send_task_subscribe(self, request):
+        raise NotImplementedError
+
+
+async def _stream(manager, task_id: str, events: int):
+    for step in range(events):
+        status = TaskStatus(
+            state=TaskState.WORKING,
+            message=Message(role="agent", parts=[TextPart(text=f"step {step}")]),
+        )
+        await manager.update_store(task_id, status, None)
+        await manager.enqueue_events_for_sse(
+            task_id, TaskStatusUpdateEvent(id=task_id, status=status)
+        )
+        # Yield like an agent awaiting its model between updates.
+        await asyncio.sleep(0)
+    status = TaskStatus(state=TaskState.COMPLETED)
+    await manager.update_store(task_id, status, None)
+    await manager.enqueue_events_for_sse(
+        task_id, TaskStatusUpdateEvent(id=task_id, status=status, final=True)
+    )
+
+
+async def _drain(manager, task_id: str, queue) -> int:
+    received = 0
+    async for _ in manager.dequeue_events_for_sse(1, task_id, queue):
+        received += 1
+    return received
+
+
+async def run(tasks: int, events: int, lock_stripes: int, stalled: int) -> float:
+    manager = StoreOnlyTaskManager(lock_stripes=lock_stripes)
+    consumers = []
+    for i in range(tasks + stalled):
+        task_id = f"task-{i}"
+        await manager.upsert_task(
+            TaskSendParams(
+                id=task_id, message=Message(role="user", parts=[TextPart(text="hi")])
+            )
+        )
+        queue = await manager.setup_sse_consumer(task_id)
+        if i < tasks:
+            consumers.append(asyncio.create_task(_drain(manager, task_id, queue)))
+
+    started = time.perf_counter()
+    await asyncio.gather(
+        *(_stream(manager, f"task-{i}", events) for i in range(tasks + stalled))
+    )
+    await asyncio.gather(*consumers)
+    return time.perf_counter() - started
+
+
+async def main(args):
+    total = args.tasks * (args.events + 1)
+    for stripes in (1, args.lock_stripes):
+        elapsed = await run(args.tasks, args.events, stripes, args.stalled)
+        print(
+            f"lock_stripes={stripes:<3} stalled={args.stalled}: "
+            f"{total / elapsed:9.0f} events/s ({elapsed:.3f}s)"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tasks", type=int, default=500)
+    parser.add_argument("--events", type=int, default=40)
+    parser.add_argument("--lock-stripes", type=int, default=64)
+    parser.add_argument("--stalled", type=int, default=0)
+    asyncio.run(main(parser.parse_args()))
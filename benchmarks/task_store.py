@@ -0,0 +1,88 @@
+"""update_store throughput of InMemoryTaskManager vs SqliteTaskManager.
+
+Run from the repository root:
+    python -m benchmarks.task_store --tasks 200 --updates 50
+
+Every task gets `updates` WORKING updates (each appends a history message)
+and a final COMPLETED update with an artifact, all tasks concurrently, as
+a busy agent would produce them.
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from common.server import InMemoryTaskManager, SqliteTaskManager
+from common.types import (
+    Artifact,
+    Message,
+    TaskSendParams,
+    TaskState,
+    TaskStatus,
+    TextPart,
+)
+
+
+class StoreOnlyTaskManager(InMemoryTaskManager):
+    async def on_send_task(self, request):
+        raise NotImplementedError
+
+    async def on_send_task_subscribe(self, request):
+        raise NotImplementedError
+
+
+class StoreOnlySqliteTaskManager(SqliteTaskManager):
+    async def on_send_task(self, request):
+        raise NotImplementedError
+
+    async def on_send_task_subscribe(self, request):
+        raise NotImplementedError
+
+
+def send_params(task_id: str) -> TaskSendParams:
+    return TaskSendParams(
+        id=task_id, message=Message(role="user", parts=[TextPart(text="hello")])
+    )
+
+
+async def _drive(manager, tasks: int, updates: int) -> float:
+    for i in range(tasks):
+        await manager.upsert_task(send_params(f"task-{i}"))
+
+    async def one_task(task_id: str):
+        for step in range(updates):
+            message = Message(role="agent", parts=[TextPart(text=f"step {step}")])
+            await manager.update_store(
+                task_id, TaskStatus(state=TaskState.WORKING, message=message), None
+            )
+        await manager.update_store(
+            task_id,
+            TaskStatus(state=TaskState.COMPLETED),
+            [Artifact(parts=[TextPart(text="done " * 50)])],
+        )
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one_task(f"task-{i}") for i in range(tasks)))
+    return time.perf_counter() - started
+
+
+async def main(tasks: int, updates: int):
+    total = tasks * (updates + 1)
+    elapsed = await _drive(StoreOnlyTaskManager(), tasks, updates)
+    print(f"in-memory: {total / elapsed:10.0f} updates/s ({elapsed:.3f}s)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = StoreOnlySqliteTaskManager(db_path=os.path.join(tmp, "tasks.db"))
+        elapsed = await _drive(manager, tasks, updates)
+        await manager.close()
+    print(f"sqlite:    {total / elapsed:10.0f} updates/s ({elapsed:.3f}s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tasks", type=int, default=200)
+    parser.add_argument("--updates", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.tasks, args.updates))
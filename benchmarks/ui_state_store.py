@@ -0,0 +1,108 @@
+"""Insert cost, retention and list latency of the demo UI StateStore.
+
+Run from the repository root:
+    python -m benchmarks.ui_state_store --conversations 10000 100000
+
+Each conversation gets a user message, a task that is opened and then
+completed, and the agent's reply, the way ADKHostManager records a turn.
+Reports the cost per turn, what is retained under `--max-conversations`
+(the A2A_MAX_CONVERSATIONS default), peak traced memory and the latency of
+an incremental conversation/list and message/list.
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+# The demo UI imports its packages (service, state, ...) as top-level names.
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "demo", "ui"))
+
+from common.types import Message, Task, TaskState, TaskStatus, TextPart  # noqa: E402
+from service.server.revision_log import page_sequence  # noqa: E402
+from service.server.state_store import StateStore  # noqa: E402
+from service.types import Conversation  # noqa: E402
+
+
+def message(conversation_id: str, message_id: str, text: str) -> Message:
+    return Message(
+        role="user",
+        parts=[TextPart(text=text)],
+        metadata={"conversation_id": conversation_id, "message_id": message_id},
+    )
+
+
+def turn(store: StateStore, i: int):
+    conversation_id = f"c-{i}"
+    conversation = Conversation(conversation_id=conversation_id, is_active=True)
+    store.add_conversation(conversation)
+    question = message(conversation_id, f"m-{i}", "Tôi bị sốt và đau đầu ba ngày nay")
+    store.add_pending(f"m-{i}", conversation_id)
+    store.add_message(question, conversation)
+    with store.lock:
+        task = Task(
+            id=f"t-{i}",
+            sessionId=conversation_id,
+            status=TaskStatus(state=TaskState.WORKING),
+            history=[question],
+        )
+        store.put_task(task)
+        store.task_map[f"m-{i}"] = task.id
+        task.status = TaskStatus(state=TaskState.COMPLETED)
+        store.put_task(task)
+    store.add_message(
+        message(conversation_id, f"r-{i}", "Có thể là sốt xuất huyết."), conversation)
+    store.remove_pending(f"m-{i}")
+
+
+def fill(conversations: int, max_conversations: int) -> tuple[StateStore, float]:
+    store = StateStore(max_conversations=max_conversations)
+    start = time.perf_counter()
+    for i in range(conversations):
+        turn(store, i)
+    return store, time.perf_counter() - start
+
+
+def run(conversations: int, max_conversations: int):
+    # Memory is traced in a separate pass: tracing slows every allocation.
+    tracemalloc.start()
+    fill(conversations, max_conversations)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    store, elapsed = fill(conversations, max_conversations)
+
+    cursor = store.conversations.revision
+    turn(store, conversations)
+    start = time.perf_counter()
+    changed = store.list_conversations(cursor)
+    list_us = (time.perf_counter() - start) * 1e6
+    conversation = store.get_conversation(f"c-{conversations}")
+    start = time.perf_counter()
+    page_sequence(conversation.messages, 1)
+    messages_us = (time.perf_counter() - start) * 1e6
+
+    print(
+        f"{conversations:>7} turns  max={max_conversations:<7} "
+        f"{elapsed / conversations * 1e6:6.1f} us/turn  "
+        f"kept {len(store.conversations):>6} conversations "
+        f"{len(store.tasks):>6} tasks {len(store.task_map):>6} ids  "
+        f"peak {peak / 2**20:6.1f} MiB  "
+        f"list {len(changed.items)} changed in {list_us:.0f} us, "
+        f"messages in {messages_us:.0f} us"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--conversations", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--max-conversations", type=int, default=1000)
+    args = parser.parse_args()
+    for conversations in args.conversations:
+        run(conversations, args.max_conversations)
+        # Unbounded, for comparison.
+        run(conversations, conversations + 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 from .client import A2AClient
-from .card_resolver import A2ACardResolver
+from .card_resolver import A2ACardResolver, AgentCardCache
+from .artifact_assembler import ArtifactAssembler
 
-__all__ = ["A2AClient", "A2ACardResolver"]
+__all__ = ["A2AClient", "A2ACardResolver", "AgentCardCache", "ArtifactAssembler"]
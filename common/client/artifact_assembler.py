@@ -0,0 +1,251 @@
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable
+
+from common.server.artifact_stream import CHUNK_KEY
+from common.types import Artifact, DataPart, FilePart, Part, TextPart
+
+# Metadata set on an artifact that was closed with chunks missing.
+INCOMPLETE_KEY = "incomplete"
+MISSING_CHUNKS_KEY = "missing_chunks"
+TRUNCATED_KEY = "truncated"
+EXPIRED_KEY = "expired"
+
+
+@dataclass
+class _Assembly:
+    artifact: Artifact
+    updated_at: float
+    size: int = 0
+    # Sequence number expected next; None when the sender does not number
+    # its chunks.
+    next_chunk: int | None = None
+    # [first, last] ranges of chunk numbers that never arrived.
+    missing: list[list[int]] = field(default_factory=list)
+    # Set when chunks are known to be lost but not which ones.
+    incomplete: bool = False
+    truncated: bool = False
+
+
+class ArtifactAssembler:
+    """Reassembles chunked artifacts streamed by remote agents.
+
+    `add` takes every TaskArtifactUpdateEvent artifact and returns the
+    artifact as assembled so far, so a host can show long outputs while they
+    stream; the returned artifact has `lastChunk` set once it is complete.
+
+    Memory is bounded per task: once the chunks buffered for a task reach
+    `max_task_bytes`, further parts are dropped and the artifact is marked
+    truncated. Gaps in the chunk numbers stamped by ArtifactChunker are
+    recorded instead of silently joining the neighbours, and assemblies that
+    see no chunk for `ttl` seconds are handed back by `expire` as incomplete.
+    """
+
+    def __init__(
+        self,
+        max_task_bytes: int | None = None,
+        ttl: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if max_task_bytes is None:
+            max_task_bytes = int(
+                os.environ.get("A2A_ARTIFACT_BUFFER_BYTES", 8 * 1024 * 1024)
+            )
+        if ttl is None:
+            ttl = float(os.environ.get("A2A_ARTIFACT_TTL_SECONDS", 300))
+        self.max_task_bytes = max_task_bytes
+        self.ttl = ttl
+        self._clock = clock
+        # task id -> artifact index -> assembly in progress
+        self._tasks: dict[str, dict[int, _Assembly]] = {}
+        self._task_bytes: dict[str, int] = {}
+        self._last_sweep = clock()
+        self.expired = 0
+        self.truncated = 0
+        # Task callbacks may arrive from several threads.
+        self._lock = threading.Lock()
+
+    def add(self, task_id: str, chunk: Artifact) -> Artifact:
+        with self._lock:
+            return self._add(task_id, chunk, self._clock())
+
+    def _add(self, task_id: str, chunk: Artifact, now: float) -> Artifact:
+        assemblies = self._tasks.setdefault(task_id, {})
+        assembly = assemblies.get(chunk.index)
+        if not chunk.append:
+            if assembly is not None:
+                # The agent restarted this artifact; drop what we had.
+                self._release(task_id, chunk.index)
+            if chunk.lastChunk is None or chunk.lastChunk:
+                # The whole artifact in one event.
+                self._forget_if_idle(task_id)
+                return chunk
+            assembly = self._start(task_id, chunk, now)
+        elif assembly is None:
+            # The first chunk was lost or arrived after its TTL.
+            assembly = self._start(task_id, chunk, now, missing_start=True)
+        else:
+            self._append(task_id, assembly, chunk, now)
+
+        if chunk.lastChunk:
+            self._release(task_id, chunk.index)
+            return self._finish(assembly)
+        return assembly.artifact
+
+    def _start(
+        self, task_id: str, chunk: Artifact, now: float, missing_start: bool = False
+    ) -> _Assembly:
+        artifact = chunk.model_copy(
+            update={"parts": [], "metadata": dict(chunk.metadata or {})}
+        )
+        artifact.append = False
+        artifact.lastChunk = False
+        assembly = _Assembly(artifact=artifact, updated_at=now)
+        sequence = _chunk_number(chunk)
+        if sequence is not None:
+            assembly.next_chunk = 0
+        elif missing_start:
+            # Unnumbered: we only know something came before this chunk.
+            assembly.incomplete = True
+        self._tasks.setdefault(task_id, {})[chunk.index] = assembly
+        self._append(task_id, assembly, chunk, now)
+        return assembly
+
+    def _append(self, task_id: str, assembly: _Assembly, chunk: Artifact, now: float):
+        assembly.updated_at = now
+        sequence = _chunk_number(chunk)
+        if sequence is not None and assembly.next_chunk is not None:
+            if sequence < assembly.next_chunk:
+                # Replayed after a resubscribe; already applied.
+                return
+            if sequence > assembly.next_chunk:
+                assembly.missing.append([assembly.next_chunk, sequence - 1])
+            assembly.next_chunk = sequence + 1
+        if assembly.truncated:
+            return
+        size = sum(_part_size(p) for p in chunk.parts)
+        used = self._task_bytes.get(task_id, 0)
+        if used + size > self.max_task_bytes:
+            assembly.truncated = True
+            self.truncated += 1
+            return
+        self._task_bytes[task_id] = used + size
+        assembly.size += size
+        assembly.artifact.parts.extend(chunk.parts)
+
+    def _release(self, task_id: str, index: int):
+        assembly = self._tasks[task_id].pop(index)
+        self._task_bytes[task_id] = self._task_bytes.get(task_id, 0) - assembly.size
+        self._forget_if_idle(task_id)
+
+    def _forget_if_idle(self, task_id: str):
+        if not self._tasks.get(task_id):
+            self._tasks.pop(task_id, None)
+            self._task_bytes.pop(task_id, None)
+
+    @staticmethod
+    def _finish(assembly: _Assembly, expired: bool = False) -> Artifact:
+        artifact = assembly.artifact
+        artifact.parts = _join_text(artifact.parts)
+        artifact.lastChunk = True
+        metadata = artifact.metadata or {}
+        metadata.pop(CHUNK_KEY, None)
+        if assembly.incomplete or assembly.missing or assembly.truncated or expired:
+            metadata[INCOMPLETE_KEY] = True
+        if assembly.missing:
+            metadata[MISSING_CHUNKS_KEY] = assembly.missing
+        if assembly.truncated:
+            metadata[TRUNCATED_KEY] = True
+        if expired:
+            # The last chunk, and possibly others after it, never came.
+            metadata[EXPIRED_KEY] = True
+        artifact.metadata = metadata or None
+        return artifact
+
+    def close(self, task_id: str) -> list[Artifact]:
+        """Finish a task's open assemblies, e.g. once the task has ended.
+
+        Anything still open never got its last chunk, so it is returned
+        marked incomplete.
+        """
+        with self._lock:
+            assemblies = self._tasks.pop(task_id, {})
+            self._task_bytes.pop(task_id, None)
+        closed = []
+        for assembly in assemblies.values():
+            assembly.incomplete = True
+            closed.append(self._finish(assembly))
+        return closed
+
+    def expire(self, now: float | None = None) -> list[tuple[str, Artifact]]:
+        """Close assemblies idle for longer than `ttl`.
+
+        Returns (task id, artifact) pairs, each marked incomplete, so the
+        caller can keep what did arrive. Cheap to call on every event: the
+        buffer is only scanned a few times per TTL.
+        """
+        now = self._clock() if now is None else now
+        with self._lock:
+            if now - self._last_sweep < self.ttl / 4:
+                return []
+            self._last_sweep = now
+            stale = [
+                (task_id, index)
+                for task_id, assemblies in self._tasks.items()
+                for index, assembly in assemblies.items()
+                if now - assembly.updated_at >= self.ttl
+            ]
+            expired = []
+            for task_id, index in stale:
+                assembly = self._tasks[task_id][index]
+                self._release(task_id, index)
+                expired.append((task_id, self._finish(assembly, expired=True)))
+            self.expired += len(expired)
+        return expired
+
+    def metrics(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "tasks": len(self._tasks),
+                "assemblies": sum(len(a) for a in self._tasks.values()),
+                "buffered_bytes": sum(self._task_bytes.values()),
+                "expired": self.expired,
+                "truncated": self.truncated,
+            }
+
+
+def _chunk_number(chunk: Artifact) -> int | None:
+    if not chunk.metadata:
+        return None
+    sequence = chunk.metadata.get(CHUNK_KEY)
+    return sequence if isinstance(sequence, int) else None
+
+
+def _part_size(part: Part) -> int:
+    if isinstance(part, TextPart):
+        return len(part.text)
+    if isinstance(part, FilePart):
+        return len(part.file.bytes or part.file.uri or "")
+    if isinstance(part, DataPart):
+        return len(json.dumps(part.data, ensure_ascii=False, default=str))
+    return 0
+
+
+def _join_text(parts: list[Part]) -> list[Part]:
+    """Merge runs of plain text parts, joining each run once."""
+    joined: list[Part] = []
+    run: list[str] = []
+    for part in parts:
+        if isinstance(part, TextPart) and not part.metadata:
+            run.append(part.text)
+            continue
+        if run:
+            joined.append(TextPart(text="".join(run)))
+            run = []
+        joined.append(part)
+    if run:
+        joined.append(TextPart(text="".join(run)))
+    return joined
@@ -3,7 +3,15 @@ from common.types import (
     AgentCard,
     A2AClientJSONError,
 )
+from typing import Any
+import asyncio
+import hashlib
 import json
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
 
 
 class A2ACardResolver:
@@ -19,3 +27,135 @@ class A2ACardResolver:
                 return AgentCard(**response.json())
             except json.JSONDecodeError as e:
                 raise A2AClientJSONError(str(e)) from e
+
+    async def get_agent_card_async(
+        self,
+        client: httpx.AsyncClient | None = None,
+        timeout: float = 5.0,
+        etag: str | None = None,
+    ) -> tuple[AgentCard | None, httpx.Response]:
+        """Fetch the card without blocking the event loop.
+
+        With an etag the request is conditional; on 304 Not Modified the
+        returned card is None and the caller keeps its cached copy.
+        """
+        headers = {"If-None-Match": etag} if etag else {}
+        url = self.base_url + "/" + self.agent_card_path
+        if client is None:
+            async with httpx.AsyncClient(timeout=timeout) as client:
+                response = await client.get(url, headers=headers)
+        else:
+            response = await client.get(url, headers=headers, timeout=timeout)
+        if response.status_code == 304:
+            return None, response
+        response.raise_for_status()
+        try:
+            return AgentCard(**response.json()), response
+        except json.JSONDecodeError as e:
+            raise A2AClientJSONError(str(e)) from e
+
+
+class AgentCardCache:
+    """Agent cards cached in memory and on disk, keyed by agent base URL.
+
+    Entries stay fresh for the response's Cache-Control max-age (or
+    `default_max_age`); stale entries are revalidated with If-None-Match, so
+    an unchanged card costs a 304. Unreachable agents are simply missing from
+    `resolve_all`, letting callers start with the agents that are up and
+    pick the others up on a later refresh.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str | None = None,
+        default_max_age: float = 300.0,
+        timeout: float = 5.0,
+    ):
+        self.cache_dir = cache_dir or os.path.join(
+            os.path.expanduser("~"), ".cache", "a2a", "agent_cards"
+        )
+        self.default_max_age = default_max_age
+        self.timeout = timeout
+        self._entries: dict[str, dict[str, Any]] = {}
+
+    def _path(self, base_url: str) -> str:
+        digest = hashlib.sha1(base_url.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}.json")
+
+    def _load(self, base_url: str) -> dict[str, Any] | None:
+        entry = self._entries.get(base_url)
+        if entry is None:
+            try:
+                with open(self._path(base_url), encoding="utf-8") as f:
+                    entry = json.load(f)
+            except (OSError, ValueError):
+                return None
+            self._entries[base_url] = entry
+        return entry
+
+    def _store(self, base_url: str, entry: dict[str, Any]):
+        self._entries[base_url] = entry
+        if entry.get("no_store"):
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = self._path(base_url) + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, self._path(base_url))
+        except OSError as e:
+            logger.warning(f"Could not persist agent card for {base_url}: {e}")
+
+    def _max_age(self, response: httpx.Response) -> tuple[float, bool]:
+        max_age, no_store = self.default_max_age, False
+        for directive in response.headers.get("cache-control", "").split(","):
+            name, _, value = directive.strip().partition("=")
+            name = name.lower()
+            if name == "max-age" and value.isdigit():
+                max_age = float(value)
+            elif name == "no-cache":
+                max_age = 0.0
+            elif name == "no-store":
+                max_age, no_store = 0.0, True
+        return max_age, no_store
+
+    def cached(self, base_url: str) -> AgentCard | None:
+        entry = self._load(base_url)
+        return AgentCard(**entry["card"]) if entry else None
+
+    async def resolve(
+        self, base_url: str, client: httpx.AsyncClient | None = None
+    ) -> AgentCard | None:
+        """Return the card for base_url, or None if the agent is unreachable."""
+        entry = self._load(base_url)
+        if entry and entry["expires"] > time.time():
+            return AgentCard(**entry["card"])
+
+        resolver = A2ACardResolver(base_url)
+        try:
+            card, response = await resolver.get_agent_card_async(
+                client, self.timeout, entry.get("etag") if entry else None
+            )
+        except (httpx.HTTPError, A2AClientJSONError, ValueError) as e:
+            logger.warning(f"Agent card for {base_url} unavailable: {e}")
+            return None
+
+        max_age, no_store = self._max_age(response)
+        if card is None:
+            # 304: the cached card is still current.
+            card = AgentCard(**entry["card"])
+        self._store(base_url, {
+            "card": card.model_dump(mode="json", exclude_none=True),
+            "etag": response.headers.get("etag") or (entry or {}).get("etag"),
+            "expires": time.time() + max_age,
+            "no_store": no_store,
+        })
+        return card
+
+    async def resolve_all(self, base_urls: list[str]) -> dict[str, AgentCard]:
+        """Resolve every URL concurrently; unreachable agents are left out."""
+        async with httpx.AsyncClient(timeout=self.timeout) as client:
+            cards = await asyncio.gather(
+                *(self.resolve(url, client) for url in base_urls)
+            )
+        return {url: card for url, card in zip(base_urls, cards) if card is not None}
@@ -1,5 +1,5 @@
 import httpx
-from httpx_sse import connect_sse
+from httpx_sse import aconnect_sse
 from typing import Any, AsyncIterable
 from common.types import (
     AgentCard,
@@ -18,6 +18,7 @@ from common.types import (
     A2AClientJSONError,
     SendTaskStreamingRequest,
     SendTaskStreamingResponse,
+    TaskResubscriptionRequest,
 )
 import json
 
@@ -39,12 +40,26 @@ class A2AClient:
         self, payload: dict[str, Any]
     ) -> AsyncIterable[SendTaskStreamingResponse]:
         request = SendTaskStreamingRequest(params=payload)
-        with httpx.Client(timeout=None) as client:
-            with connect_sse(
+        async for response in self._send_streaming_request(request):
+            yield response
+
+    async def resubscribe_task_streaming(
+        self, payload: dict[str, Any]
+    ) -> AsyncIterable[SendTaskStreamingResponse]:
+        """Reattach to a running task, replaying events after payload["lastEventId"]."""
+        request = TaskResubscriptionRequest(params=payload)
+        async for response in self._send_streaming_request(request):
+            yield response
+
+    async def _send_streaming_request(
+        self, request: JSONRPCRequest
+    ) -> AsyncIterable[SendTaskStreamingResponse]:
+        async with httpx.AsyncClient(timeout=None) as client:
+            async with aconnect_sse(
                 client, "POST", self.url, json=request.model_dump()
             ) as event_source:
                 try:
-                    for sse in event_source.iter_sse():
+                    async for sse in event_source.aiter_sse():
                         yield SendTaskStreamingResponse(**json.loads(sse.data))
                 except json.JSONDecodeError as e:
                     raise A2AClientJSONError(str(e)) from e
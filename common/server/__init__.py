@@ -1,4 +1,15 @@
 from .server import A2AServer
+from .artifact_stream import ArtifactChunker
 from .task_manager import TaskManager, InMemoryTaskManager
+from .sqlite_task_manager import SqliteTaskManager
+from .sse_queue import SSEOverflowPolicy, SSESubscriberQueue
 
-__all__ = ["A2AServer", "TaskManager", "InMemoryTaskManager"]
+__all__ = [
+    "A2AServer",
+    "ArtifactChunker",
+    "TaskManager",
+    "InMemoryTaskManager",
+    "SqliteTaskManager",
+    "SSEOverflowPolicy",
+    "SSESubscriberQueue",
+]
@@ -0,0 +1,114 @@
+"""Emit one artifact incrementally as a sequence of chunks.
+
+The first chunk of an artifact has `append=False`, later ones `append=True`
+and the last one `lastChunk=True`, as in the A2A spec. Each chunk also carries
+its position in `metadata[CHUNK_KEY]` so a receiver can tell when events were
+dropped (e.g. by a slow SSE subscriber) instead of silently gluing the
+neighbours together.
+"""
+
+import time
+from typing import Any, AsyncIterable, AsyncIterator, Iterable
+
+from common.types import Artifact, Part, TextPart
+
+# Metadata key holding the 0-based position of a chunk within its artifact.
+CHUNK_KEY = "chunk"
+
+
+class ArtifactChunker:
+    """Builds the chunk events of one artifact, in order."""
+
+    def __init__(
+        self,
+        index: int = 0,
+        name: str | None = None,
+        description: str | None = None,
+        metadata: dict[str, Any] | None = None,
+    ):
+        self.index = index
+        self.name = name
+        self.description = description
+        self.metadata = metadata
+        self.sequence = 0
+        self.closed = False
+
+    def chunk(self, parts: Iterable[Part], last: bool = False) -> Artifact:
+        if self.closed:
+            raise ValueError(f"Artifact {self.index} is already closed")
+        first = self.sequence == 0
+        artifact = Artifact(
+            # Name and description only need to travel once.
+            name=self.name if first else None,
+            description=self.description if first else None,
+            parts=list(parts),
+            metadata={**(self.metadata or {}), CHUNK_KEY: self.sequence},
+            index=self.index,
+            append=not first,
+            lastChunk=last,
+        )
+        self.sequence += 1
+        self.closed = last
+        return artifact
+
+    def text(self, text: str, last: bool = False) -> Artifact:
+        return self.chunk([TextPart(text=text)], last)
+
+    def close(self, parts: Iterable[Part] = ()) -> Artifact:
+        """The last chunk; it may carry no parts."""
+        return self.chunk(parts, last=True)
+
+
+async def coalesce_text(
+    chunks: AsyncIterable[str],
+    min_chars: int = 64,
+    max_delay: float = 0.05,
+) -> AsyncIterator[str]:
+    """Batch small text deltas (e.g. LLM tokens) into fewer, larger chunks.
+
+    The first delta is passed through at once to keep time to first byte
+    low; after that, text is flushed once `min_chars` have accumulated or
+    `max_delay` seconds have passed since the last flush.
+    """
+    buffer: list[str] = []
+    size = 0
+    flushed_at = None
+    async for text in chunks:
+        if not text:
+            continue
+        buffer.append(text)
+        size += len(text)
+        now = time.monotonic()
+        if flushed_at is None or size >= min_chars or now - flushed_at >= max_delay:
+            yield "".join(buffer)
+            buffer.clear()
+            size = 0
+            flushed_at = now
+    if buffer:
+        yield "".join(buffer)
+
+
+def merge_artifacts(
+    artifacts: list[Artifact] | None, updates: Iterable[Artifact]
+) -> list[Artifact]:
+    """Apply artifact updates to a task's artifact list in place.
+
+    An `append=True` update extends the parts of the artifact with the same
+    index; anything else is added as a new artifact. Chunks whose artifact is
+    unknown (its first chunk was never stored) start a new one.
+    """
+    if artifacts is None:
+        artifacts = []
+    for update in updates:
+        target = None
+        if update.append:
+            target = next(
+                (a for a in reversed(artifacts) if a.index == update.index), None
+            )
+        if target is None:
+            artifacts.append(update.model_copy(update={"parts": list(update.parts)}))
+            continue
+        target.parts.extend(update.parts)
+        if update.lastChunk is not None:
+            target.lastChunk = update.lastChunk
+    return artifacts
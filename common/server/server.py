@@ -1,12 +1,14 @@
 from starlette.applications import Starlette
-from starlette.responses import JSONResponse
+from starlette.responses import Response, JSONResponse
 from sse_starlette.sse import EventSourceResponse
 from starlette.requests import Request
 from common.types import (
-    A2ARequest,
+    JSONRPCRequest,
     JSONRPCResponse,
+    JSONRPCError,
     InvalidRequestError,
     JSONParseError,
+    MethodNotFoundError,
     GetTaskRequest,
     CancelTaskRequest,
     SendTaskRequest,
@@ -17,15 +19,85 @@ from common.types import (
     TaskResubscriptionRequest,
     SendTaskStreamingRequest,
 )
-from pydantic import ValidationError
+from pydantic import BaseModel, ValidationError
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+import asyncio
+import hashlib
+import hmac
+import inspect
 import json
-from typing import AsyncIterable, Any
+import os
+import signal
+import socket
+import time
+from typing import AsyncIterable, Any, Callable
 from common.server.task_manager import TaskManager
+from common.server.sse_queue import event_sequence
+from common.server.utils import blob_response
+from common.utils.blob_store import BlobStore, BlobTooLargeError
+from common.utils.file_transfer import FILES_PATH, UPLOAD_TOKEN_ENV
+
+try:
+    import orjson
+    _ORJSON_AVAILABLE = True
+except ImportError:
+    _ORJSON_AVAILABLE = False
 
 import logging
 
 logger = logging.getLogger(__name__)
 
+# JSON-RPC method -> (concrete request model, TaskManager handler name).
+METHOD_HANDLERS: dict[str, tuple[type[JSONRPCRequest], str]] = {
+    "tasks/get": (GetTaskRequest, "on_get_task"),
+    "tasks/send": (SendTaskRequest, "on_send_task"),
+    "tasks/sendSubscribe": (SendTaskStreamingRequest, "on_send_task_subscribe"),
+    "tasks/cancel": (CancelTaskRequest, "on_cancel_task"),
+    "tasks/pushNotification/set": (
+        SetTaskPushNotificationRequest,
+        "on_set_task_push_notification",
+    ),
+    "tasks/pushNotification/get": (
+        GetTaskPushNotificationRequest,
+        "on_get_task_push_notification",
+    ),
+    "tasks/resubscribe": (TaskResubscriptionRequest, "on_resubscribe_to_task"),
+}
+# Methods answered with an SSE stream, which cannot be part of a batch.
+STREAMING_METHODS = {"tasks/sendSubscribe", "tasks/resubscribe"}
+# How long clients may reuse the agent card before revalidating it.
+AGENT_CARD_MAX_AGE = 300
+# Largest file accepted by the blob upload endpoint.
+MAX_UPLOAD_BYTES = int(os.environ.get("A2A_MAX_UPLOAD_BYTES", 64 * 1024 * 1024))
+
+
+def loads_json(body: bytes) -> Any:
+    if _ORJSON_AVAILABLE:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+class PydanticJSONResponse(Response):
+    """JSON response that serializes pydantic models straight to bytes.
+
+    Models go through pydantic-core's serializer without building an
+    intermediate dict; plain values use orjson when it is installed.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, BaseModel):
+            return content.__pydantic_serializer__.to_json(content, exclude_none=True)
+        if isinstance(content, list) and all(
+            isinstance(item, BaseModel) for item in content
+        ):
+            return b"[" + b",".join(self.render(item) for item in content) + b"]"
+        if _ORJSON_AVAILABLE:
+            return orjson.dumps(content)
+        return json.dumps(content, separators=(",", ":")).encode("utf-8")
+
 
 class A2AServer:
     def __init__(
@@ -35,17 +107,63 @@ class A2AServer:
         endpoint="/",
         agent_card: AgentCard = None,
         task_manager: TaskManager = None,
+        workers: int = 1,
+        executor_workers: int | None = None,
+        warmup: Callable[[], Any] | None = None,
+        blob_store: BlobStore | None = None,
+        upload_token: str | None = None,
     ):
+        """
+        workers: number of server processes sharing the listening socket.
+            They are forked after the agent (and its models) is constructed,
+            so model weights are loaded once and shared copy-on-write; the
+            task manager must then share state across processes, e.g.
+            SqliteTaskManager.
+        executor_workers: size of the default thread pool each worker uses
+            for blocking inference, or None for asyncio's default.
+        warmup: optional callable (sync or async) run in every worker after
+            it starts; /ready answers 503 until it has finished.
+        blob_store: store behind the FILES_PATH upload/download endpoints,
+            used for file parts too large to inline (see
+            common.utils.file_transfer). With several workers, set
+            A2A_FILE_SPILL_DIR so they can serve each other's files.
+        upload_token: bearer token required by POST FILES_PATH (default
+            A2A_UPLOAD_TOKEN). Without one the upload endpoint is not
+            registered; downloads stay open since blob ids are content
+            hashes handed out in messages.
+        """
         self.host = host
         self.port = port
         self.endpoint = endpoint
         self.task_manager = task_manager
         self.agent_card = agent_card
-        self.app = Starlette()
+        self.workers = workers
+        self.executor_workers = executor_workers
+        self.warmup = warmup
+        self.blob_store = blob_store or BlobStore.from_env()
+        self.upload_token = upload_token or os.environ.get(UPLOAD_TOKEN_ENV)
+        self.ready = False
+        self.app = Starlette(lifespan=self._lifespan)
         self.app.add_route(self.endpoint, self._process_request, methods=["POST"])
         self.app.add_route(
             "/.well-known/agent.json", self._get_agent_card, methods=["GET"]
         )
+        self.app.add_route("/health", self._get_health, methods=["GET"])
+        self.app.add_route("/ready", self._get_ready, methods=["GET"])
+        self.app.add_route("/metrics", self._get_metrics, methods=["GET"])
+        if self.upload_token:
+            self.app.add_route(FILES_PATH, self._upload_file, methods=["POST"])
+        self.app.add_route(
+            FILES_PATH + "/{blob_id}", self._download_file, methods=["GET"]
+        )
+        push_sender = getattr(task_manager, "push_sender", None)
+        if push_sender is not None:
+            # Receivers verify notification signatures with these keys.
+            self.app.add_route(
+                "/.well-known/jwks.json",
+                push_sender.auth.handle_jwks_endpoint,
+                methods=["GET"],
+            )
 
     def start(self):
         if self.agent_card is None:
@@ -56,65 +174,261 @@ class A2AServer:
 
         import uvicorn
 
-        uvicorn.run(self.app, host=self.host, port=self.port)
+        if self.workers > 1:
+            self._serve_workers()
+        else:
+            uvicorn.run(self.app, host=self.host, port=self.port)
+
+    @asynccontextmanager
+    async def _lifespan(self, app: Starlette):
+        loop = asyncio.get_running_loop()
+        executor = None
+        if self.executor_workers:
+            executor = ThreadPoolExecutor(
+                max_workers=self.executor_workers, thread_name_prefix="a2a-inference"
+            )
+            loop.set_default_executor(executor)
+
+        warmup_task = asyncio.create_task(self._run_warmup())
+        try:
+            yield
+        finally:
+            warmup_task.cancel()
+            push_sender = getattr(self.task_manager, "push_sender", None)
+            if push_sender is not None:
+                await push_sender.aclose()
+                await push_sender.auth.aclose()
+            close = getattr(self.task_manager, "close", None)
+            if close is not None:
+                # Flushes durable task stores, e.g. SqliteTaskManager.
+                await close()
+            if executor is not None:
+                executor.shutdown(wait=False)
+
+    async def _run_warmup(self):
+        if self.warmup is not None:
+            started = time.perf_counter()
+            try:
+                if inspect.iscoroutinefunction(self.warmup):
+                    await self.warmup()
+                else:
+                    # Blocking warm-up (model inference) must not stall the loop.
+                    await asyncio.get_running_loop().run_in_executor(None, self.warmup)
+            except Exception as e:
+                # A failed warm-up only costs latency on the first requests.
+                logger.error(f"Warm-up failed: {e}")
+            logger.info(
+                f"Worker {os.getpid()} warmed up in {time.perf_counter() - started:.2f}s"
+            )
+        self.ready = True
+
+    def _serve_workers(self):
+        """Pre-fork `self.workers` uvicorn servers on one shared socket.
+
+        The parent only supervises: it restarts workers that die and forwards
+        SIGINT/SIGTERM to them on shutdown.
+        """
+        import uvicorn
+
+        sock = socket.create_server((self.host, self.port))
+        sock.set_inheritable(True)
+        children: dict[int, int] = {}
+        stopping = False
+
+        def spawn(slot: int):
+            pid = os.fork()
+            if pid == 0:
+                signal.signal(signal.SIGINT, signal.SIG_DFL)
+                signal.signal(signal.SIGTERM, signal.SIG_DFL)
+                config = uvicorn.Config(self.app, host=self.host, port=self.port)
+                uvicorn.Server(config).run(sockets=[sock])
+                os._exit(0)
+            children[pid] = slot
 
-    def _get_agent_card(self, request: Request) -> JSONResponse:
-        return JSONResponse(self.agent_card.model_dump(exclude_none=True))
+        def stop(signum, frame):
+            nonlocal stopping
+            stopping = True
+            for pid in children:
+                try:
+                    os.kill(pid, signal.SIGTERM)
+                except ProcessLookupError:
+                    pass
+
+        signal.signal(signal.SIGINT, stop)
+        signal.signal(signal.SIGTERM, stop)
+        for slot in range(self.workers):
+            spawn(slot)
+        logger.info(
+            f"Serving on {self.host}:{self.port} with {self.workers} workers"
+        )
+
+        while children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            except InterruptedError:
+                continue
+            slot = children.pop(pid, None)
+            if slot is None or stopping:
+                continue
+            logger.warning(f"Worker {pid} exited with status {status}, restarting")
+            time.sleep(1)
+            spawn(slot)
+        sock.close()
+
+    def _get_agent_card(self, request: Request) -> Response:
+        body = PydanticJSONResponse(self.agent_card).body
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        headers = {
+            "ETag": etag,
+            "Cache-Control": f"max-age={AGENT_CARD_MAX_AGE}",
+        }
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers=headers)
+        return Response(body, media_type="application/json", headers=headers)
+
+    def _get_health(self, request: Request) -> Response:
+        return JSONResponse({"status": "ok"})
+
+    def _get_ready(self, request: Request) -> Response:
+        if not self.ready:
+            return JSONResponse({"status": "warming_up"}, status_code=503)
+        return JSONResponse({"status": "ready"})
+
+    def _get_metrics(self, request: Request) -> Response:
+        metrics = getattr(self.task_manager, "metrics", None)
+        return PydanticJSONResponse(metrics() if metrics else {})
+
+    async def _upload_file(self, request: Request) -> Response:
+        """Store a streamed request body; answers with the file's URI."""
+        authorization = request.headers.get("authorization", "")
+        if not hmac.compare_digest(
+            authorization.encode(), f"Bearer {self.upload_token}".encode()
+        ):
+            return JSONResponse(
+                {"error": "Unauthorized"},
+                status_code=401,
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        length = request.headers.get("content-length")
+        if length and length.isdigit() and int(length) > MAX_UPLOAD_BYTES:
+            return JSONResponse(
+                {"error": f"File exceeds {MAX_UPLOAD_BYTES} bytes"}, status_code=413
+            )
+        try:
+            blob_id = await self.blob_store.put_stream(
+                request.stream(),
+                request.headers.get("content-type"),
+                max_size=MAX_UPLOAD_BYTES,
+            )
+        except BlobTooLargeError as e:
+            return JSONResponse({"error": str(e)}, status_code=413)
+        uri = str(request.base_url).rstrip("/") + f"{FILES_PATH}/{blob_id}"
+        return JSONResponse({"uri": uri}, status_code=201)
+
+    def _download_file(self, request: Request) -> Response:
+        return blob_response(self.blob_store, request.path_params["blob_id"], request)
 
     async def _process_request(self, request: Request):
         try:
-            body = await request.json()
-            json_rpc_request = A2ARequest.validate_python(body)
-
-            if isinstance(json_rpc_request, GetTaskRequest):
-                result = await self.task_manager.on_get_task(json_rpc_request)
-            elif isinstance(json_rpc_request, SendTaskRequest):
-                result = await self.task_manager.on_send_task(json_rpc_request)
-            elif isinstance(json_rpc_request, SendTaskStreamingRequest):
-                result = await self.task_manager.on_send_task_subscribe(
-                    json_rpc_request
+            body = loads_json(await request.body())
+            if isinstance(body, list):
+                return await self._process_batch(body)
+
+            method = body.get("method") if isinstance(body, dict) else None
+            if method not in METHOD_HANDLERS:
+                logger.warning(f"Unexpected request method: {method}")
+                return PydanticJSONResponse(
+                    JSONRPCResponse(
+                        id=body.get("id") if isinstance(body, dict) else None,
+                        error=MethodNotFoundError(),
+                    ),
+                    status_code=400,
                 )
-            elif isinstance(json_rpc_request, CancelTaskRequest):
-                result = await self.task_manager.on_cancel_task(json_rpc_request)
-            elif isinstance(json_rpc_request, SetTaskPushNotificationRequest):
-                result = await self.task_manager.on_set_task_push_notification(json_rpc_request)
-            elif isinstance(json_rpc_request, GetTaskPushNotificationRequest):
-                result = await self.task_manager.on_get_task_push_notification(json_rpc_request)
-            elif isinstance(json_rpc_request, TaskResubscriptionRequest):
-                result = await self.task_manager.on_resubscribe_to_task(
-                    json_rpc_request
+
+            request_model, handler_name = METHOD_HANDLERS[method]
+            json_rpc_request = request_model.model_validate(body)
+            if (
+                isinstance(json_rpc_request, TaskResubscriptionRequest)
+                and json_rpc_request.params.lastEventId is None
+                and request.headers.get("last-event-id", "").isdigit()
+            ):
+                json_rpc_request.params.lastEventId = int(
+                    request.headers["last-event-id"]
                 )
-            else:
-                logger.warning(f"Unexpected request type: {type(json_rpc_request)}")
-                raise ValueError(f"Unexpected request type: {type(request)}")
 
+            handler = getattr(self.task_manager, handler_name)
+            result = await handler(json_rpc_request)
             return self._create_response(result)
 
         except Exception as e:
             return self._handle_exception(e)
 
-    def _handle_exception(self, e: Exception) -> JSONResponse:
+    async def _process_batch(self, bodies: list[Any]) -> Response:
+        """Handle a JSON-RPC 2.0 batch, running its calls concurrently."""
+        if not bodies:
+            return PydanticJSONResponse(
+                JSONRPCResponse(id=None, error=InvalidRequestError()), status_code=400
+            )
+
+        responses = await asyncio.gather(
+            *(self._process_batch_item(body) for body in bodies)
+        )
+        return PydanticJSONResponse(list(responses))
+
+    async def _process_batch_item(self, body: Any) -> JSONRPCResponse:
+        request_id = body.get("id") if isinstance(body, dict) else None
+        try:
+            method = body.get("method") if isinstance(body, dict) else None
+            if method not in METHOD_HANDLERS:
+                return JSONRPCResponse(id=request_id, error=MethodNotFoundError())
+            if method in STREAMING_METHODS:
+                return JSONRPCResponse(
+                    id=request_id,
+                    error=InvalidRequestError(
+                        message="Streaming methods are not supported in a batch"
+                    ),
+                )
+
+            request_model, handler_name = METHOD_HANDLERS[method]
+            json_rpc_request = request_model.model_validate(body)
+            handler = getattr(self.task_manager, handler_name)
+            result = await handler(json_rpc_request)
+            if not isinstance(result, JSONRPCResponse):
+                raise ValueError(f"Unexpected result type: {type(result)}")
+            return result
+        except Exception as e:
+            return JSONRPCResponse(id=request_id, error=self._error_for_exception(e))
+
+    def _error_for_exception(self, e: Exception) -> JSONRPCError:
+        # orjson.JSONDecodeError subclasses json.JSONDecodeError.
         if isinstance(e, json.decoder.JSONDecodeError):
-            json_rpc_error = JSONParseError()
+            return JSONParseError()
         elif isinstance(e, ValidationError):
-            json_rpc_error = InvalidRequestError(data=json.loads(e.json()))
+            return InvalidRequestError(data=json.loads(e.json()))
         else:
             logger.error(f"Unhandled exception: {e}")
-            json_rpc_error = InternalError()
+            return InternalError()
 
-        response = JSONRPCResponse(id=None, error=json_rpc_error)
-        return JSONResponse(response.model_dump(exclude_none=True), status_code=400)
+    def _handle_exception(self, e: Exception) -> Response:
+        response = JSONRPCResponse(id=None, error=self._error_for_exception(e))
+        return PydanticJSONResponse(response, status_code=400)
 
-    def _create_response(self, result: Any) -> JSONResponse | EventSourceResponse:
+    def _create_response(self, result: Any) -> Response | EventSourceResponse:
         if isinstance(result, AsyncIterable):
 
             async def event_generator(result) -> AsyncIterable[dict[str, str]]:
                 async for item in result:
-                    yield {"data": item.model_dump_json(exclude_none=True)}
+                    event = {"data": item.model_dump_json(exclude_none=True)}
+                    sequence = event_sequence(item.result)
+                    if sequence is not None:
+                        event["id"] = str(sequence)
+                    yield event
 
             return EventSourceResponse(event_generator(result))
         elif isinstance(result, JSONRPCResponse):
-            return JSONResponse(result.model_dump(exclude_none=True))
+            return PydanticJSONResponse(result)
         else:
             logger.error(f"Unexpected result type: {type(result)}")
             raise ValueError(f"Unexpected result type: {type(result)}")
@@ -0,0 +1,531 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterable
+
+from common.types import (
+    Task,
+    TaskStatus,
+    TaskState,
+    Message,
+    Artifact,
+    TaskSendParams,
+    PushNotificationConfig,
+    GetTaskRequest,
+    GetTaskResponse,
+    CancelTaskRequest,
+    CancelTaskResponse,
+    TaskNotFoundError,
+    TaskNotCancelableError,
+    JSONRPCError,
+    JSONRPCResponse,
+    TaskStatusUpdateEvent,
+    TaskArtifactUpdateEvent,
+    TaskResubscriptionRequest,
+    SendTaskStreamingResponse,
+)
+from common.server.artifact_stream import merge_artifacts
+from common.server.task_manager import InMemoryTaskManager, TERMINAL_TASK_STATES
+from common.server.sse_queue import EVENT_SEQUENCE_KEY, is_terminal_event
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id TEXT PRIMARY KEY,
+    session_id TEXT,
+    status TEXT NOT NULL,
+    metadata TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_session ON tasks (session_id);
+CREATE TABLE IF NOT EXISTS task_history (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    task_id TEXT NOT NULL,
+    message TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_history_task ON task_history (task_id, seq);
+CREATE TABLE IF NOT EXISTS task_artifacts (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    task_id TEXT NOT NULL,
+    artifact TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_artifacts_task ON task_artifacts (task_id, seq);
+CREATE TABLE IF NOT EXISTS push_notifications (
+    task_id TEXT PRIMARY KEY,
+    config TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS task_events (
+    task_id TEXT NOT NULL,
+    sequence INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    event TEXT NOT NULL,
+    PRIMARY KEY (task_id, sequence)
+);
+"""
+
+_EVENT_TYPES = {
+    "status": TaskStatusUpdateEvent,
+    "artifact": TaskArtifactUpdateEvent,
+    "error": JSONRPCError,
+}
+
+
+def _event_kind(event) -> str:
+    if isinstance(event, TaskStatusUpdateEvent):
+        return "status"
+    if isinstance(event, TaskArtifactUpdateEvent):
+        return "artifact"
+    return "error"
+
+
+class _TaskCache(OrderedDict):
+    """Least-recently-used tasks kept in memory; the database stays the source
+    of truth."""
+
+    def __init__(self, maxsize: int):
+        super().__init__()
+        self.maxsize = maxsize
+
+    def get(self, key, default=None):
+        if key not in self:
+            return default
+        self.move_to_end(key)
+        return self[key]
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.move_to_end(key)
+        while len(self) > self.maxsize:
+            self.popitem(last=False)
+
+
+class SqliteTaskManager(InMemoryTaskManager):
+    """Durable task store backed by a SQLite database in WAL mode.
+
+    Status changes overwrite a single row, while history messages and artifacts
+    are appended as separate rows so an update never rewrites the whole task.
+    Writes issued concurrently from `update_store`/`upsert_task` are grouped
+    into a single transaction. Several worker processes can share the same
+    database file, so `on_get_task` also serves tasks created elsewhere, and
+    streamed events are persisted so `tasks/resubscribe` can follow a task
+    that is running in another worker.
+
+    Only the `cache_size` most recently used tasks are kept in memory. A task
+    is re-read from the database whenever a new message arrives for it, since
+    another worker may have advanced it, unless it is executing here.
+    """
+
+    def __init__(
+        self,
+        db_path: str = "tasks.db",
+        batch_size: int = 64,
+        flush_interval: float = 0.005,
+        event_poll_interval: float = 0.25,
+        cache_size: int = 1024,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        self.tasks = _TaskCache(cache_size)
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.event_poll_interval = event_poll_interval
+        self._pid: int | None = None
+        self._executor: ThreadPoolExecutor | None = None
+        self._conn: sqlite3.Connection | None = None
+        self._pending: list[tuple[str, tuple]] = []
+        self._batch_done: asyncio.Future | None = None
+        self._flush_handle: asyncio.TimerHandle | None = None
+        # Connections opened before a fork, kept referenced so the child never
+        # closes (and thereby uses) its parent's connection.
+        self._inherited_conns: list[sqlite3.Connection] = []
+
+    def _ensure_executor(self) -> ThreadPoolExecutor:
+        # The connection is opened on first use, i.e. in the worker process
+        # when the server forks after construction. Neither the worker thread
+        # nor a connection survive a fork, so a process that finds one
+        # opened by its parent opens its own instead. Connecting happens on
+        # the worker thread (see _db), never on the event loop.
+        if self._pid != os.getpid():
+            if self._conn is not None:
+                self._inherited_conns.append(self._conn)
+                self._conn = None
+            # sqlite3 connections are bound to one thread, so every statement
+            # runs on this single worker; it also keeps writes in order.
+            self._executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="sqlite-task-store"
+            )
+            self._pending = []
+            self._batch_done = None
+            self._flush_handle = None
+            self._pid = os.getpid()
+        return self._executor
+
+    def _db(self) -> sqlite3.Connection:
+        """The connection, opened on first use; called on the worker thread."""
+        if self._conn is None:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _close_db(self):
+        if self._conn is not None:
+            self._conn.close()
+
+    async def _run(self, fn, *args) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._ensure_executor(), fn, *args)
+
+    async def _write(self, statements: list[tuple[str, tuple]]):
+        """Queue statements for the next group commit and wait until it lands."""
+        loop = asyncio.get_running_loop()
+        self._ensure_executor()
+        self._pending.extend(statements)
+        if self._batch_done is None:
+            self._batch_done = loop.create_future()
+            self._flush_handle = loop.call_later(self.flush_interval, self._flush)
+        batch_done = self._batch_done
+        if len(self._pending) >= self.batch_size:
+            self._flush_handle.cancel()
+            self._flush()
+        await asyncio.shield(batch_done)
+
+    def _flush(self):
+        batch, self._pending = self._pending, []
+        batch_done, self._batch_done = self._batch_done, None
+        self._flush_handle = None
+        if batch_done is None:
+            return
+
+        def _complete(fut: asyncio.Future):
+            if batch_done.done():
+                return
+            if fut.exception() is not None:
+                batch_done.set_exception(fut.exception())
+            else:
+                batch_done.set_result(None)
+
+        loop = asyncio.get_running_loop()
+        loop.run_in_executor(self._executor, self._commit, batch).add_done_callback(
+            _complete
+        )
+
+    def _commit(self, batch: list[tuple[str, tuple]]):
+        conn = self._db()
+        with conn:
+            for sql, params in batch:
+                conn.execute(sql, params)
+
+    def _load_task(self, task_id: str, history_length: int | None) -> Task | None:
+        row = self._db().execute(
+            "SELECT session_id, status, metadata FROM tasks WHERE id = ?", (task_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        session_id, status, metadata = row
+
+        if history_length is None:
+            history_rows = self._db().execute(
+                "SELECT message FROM task_history WHERE task_id = ? ORDER BY seq",
+                (task_id,),
+            ).fetchall()
+        else:
+            history_rows = self._db().execute(
+                "SELECT message FROM task_history WHERE task_id = ?"
+                " ORDER BY seq DESC LIMIT ?",
+                (task_id, history_length),
+            ).fetchall()[::-1]
+        artifact_rows = self._db().execute(
+            "SELECT artifact FROM task_artifacts WHERE task_id = ? ORDER BY seq",
+            (task_id,),
+        ).fetchall()
+
+        return Task(
+            id=task_id,
+            sessionId=session_id,
+            status=TaskStatus.model_validate_json(status),
+            history=[Message.model_validate_json(r[0]) for r in history_rows],
+            artifacts=merge_artifacts(
+                None, (Artifact.model_validate_json(r[0]) for r in artifact_rows)
+            )
+            or None,
+            metadata=json.loads(metadata) if metadata else None,
+        )
+
+    def _load_session_task_ids(self, session_id: str) -> list[str]:
+        rows = self._db().execute(
+            "SELECT id FROM tasks WHERE session_id = ?", (session_id,)
+        ).fetchall()
+        return [r[0] for r in rows]
+
+    def _load_events(self, task_id: str, after_sequence: int) -> list[tuple]:
+        return self._db().execute(
+            "SELECT sequence, kind, event FROM task_events"
+            " WHERE task_id = ? AND sequence > ? ORDER BY sequence",
+            (task_id, after_sequence),
+        ).fetchall()
+
+    def _load_last_sequence(self, task_id: str) -> int:
+        row = self._db().execute(
+            "SELECT MAX(sequence) FROM task_events WHERE task_id = ?", (task_id,)
+        ).fetchone()
+        return row[0] or 0
+
+    def _load_push_notification_info(self, task_id: str) -> str | None:
+        row = self._db().execute(
+            "SELECT config FROM push_notifications WHERE task_id = ?", (task_id,)
+        ).fetchone()
+        return row[0] if row else None
+
+    async def get_task(self, task_id: str, history_length: int | None = None) -> Task | None:
+        return await self._run(self._load_task, task_id, history_length)
+
+    async def get_session_tasks(self, session_id: str) -> list[Task]:
+        task_ids = await self._run(self._load_session_task_ids, session_id)
+        tasks = [await self.get_task(task_id) for task_id in task_ids]
+        return [task for task in tasks if task is not None]
+
+    async def _cached_task(self, task_id: str) -> Task:
+        task = self.tasks.get(task_id)
+        if task is None:
+            task = await self.get_task(task_id)
+            if task is None:
+                logger.error(f"Task {task_id} not found for updating the task")
+                raise ValueError(f"Task {task_id} not found")
+            self.tasks[task_id] = task
+        return task
+
+    async def on_get_task(self, request: GetTaskRequest) -> GetTaskResponse:
+        logger.info(f"Getting task {request.params.id}")
+        history_length = request.params.historyLength
+        task = await self.get_task(
+            request.params.id,
+            history_length if history_length is not None and history_length > 0 else 0,
+        )
+        if task is None:
+            return GetTaskResponse(id=request.id, error=TaskNotFoundError())
+        return GetTaskResponse(id=request.id, result=task)
+
+    async def on_cancel_task(self, request: CancelTaskRequest) -> CancelTaskResponse:
+        logger.info(f"Cancelling task {request.params.id}")
+        task = await self.get_task(request.params.id, 0)
+        if task is None:
+            return CancelTaskResponse(id=request.id, error=TaskNotFoundError())
+        if request.params.id not in self.running_tasks:
+            # Either finished or executing in another worker process.
+            return CancelTaskResponse(id=request.id, error=TaskNotCancelableError())
+        async with self.task_lock(request.params.id):
+            await self._cached_task(request.params.id)
+        return await super().on_cancel_task(request)
+
+    async def upsert_task(self, task_send_params: TaskSendParams) -> Task:
+        logger.info(f"Upserting task {task_send_params.id}")
+        message_json = task_send_params.message.model_dump_json(exclude_none=True)
+        async with self.task_lock(task_send_params.id):
+            task = None
+            if task_send_params.id in self.running_tasks:
+                # Executing here, so the cached copy is current.
+                task = self.tasks.get(task_send_params.id)
+            if task is None:
+                task = await self.get_task(task_send_params.id)
+            if task is None:
+                task = Task(
+                    id=task_send_params.id,
+                    sessionId=task_send_params.sessionId,
+                    status=TaskStatus(state=TaskState.SUBMITTED),
+                    history=[],
+                )
+            task.history.append(task_send_params.message)
+            self.tasks[task.id] = task
+
+        await self._write([
+            (
+                "INSERT OR IGNORE INTO tasks (id, session_id, status) VALUES (?, ?, ?)",
+                (task.id, task.sessionId, task.status.model_dump_json(exclude_none=True)),
+            ),
+            (
+                "INSERT INTO task_history (task_id, message) VALUES (?, ?)",
+                (task.id, message_json),
+            ),
+        ])
+        await self.register_push_notification(task_send_params)
+        return task
+
+    async def update_store(
+        self, task_id: str, status: TaskStatus, artifacts: list[Artifact]
+    ) -> Task:
+        async with self.task_lock(task_id):
+            task = await self._cached_task(task_id)
+
+            task.status = status
+            statements = [(
+                "UPDATE tasks SET status = ? WHERE id = ?",
+                (status.model_dump_json(exclude_none=True), task_id),
+            )]
+
+            if status.message is not None:
+                task.history.append(status.message)
+                statements.append((
+                    "INSERT INTO task_history (task_id, message) VALUES (?, ?)",
+                    (task_id, status.message.model_dump_json(exclude_none=True)),
+                ))
+
+            if artifacts is not None:
+                task.artifacts = merge_artifacts(task.artifacts, artifacts)
+                statements.extend(
+                    (
+                        "INSERT INTO task_artifacts (task_id, artifact) VALUES (?, ?)",
+                        (task_id, artifact.model_dump_json(exclude_none=True)),
+                    )
+                    for artifact in artifacts
+                )
+
+        await self._write(statements)
+        return task
+
+    async def append_artifacts(self, task_id: str, artifacts: list[Artifact]) -> Task:
+        async with self.task_lock(task_id):
+            task = await self._cached_task(task_id)
+            task.artifacts = merge_artifacts(task.artifacts, artifacts)
+
+        # One row per chunk; rows are merged again on load.
+        await self._write([
+            (
+                "INSERT INTO task_artifacts (task_id, artifact) VALUES (?, ?)",
+                (task_id, artifact.model_dump_json(exclude_none=True)),
+            )
+            for artifact in artifacts
+        ])
+        return task
+
+    async def set_push_notification_info(self, task_id: str, notification_config: PushNotificationConfig):
+        if task_id not in self.tasks and await self.get_task(task_id, 0) is None:
+            raise ValueError(f"Task not found for {task_id}")
+
+        await self._write([(
+            "INSERT OR REPLACE INTO push_notifications (task_id, config) VALUES (?, ?)",
+            (task_id, notification_config.model_dump_json(exclude_none=True)),
+        )])
+        self.push_notification_infos[task_id] = notification_config
+
+    async def get_push_notification_info(self, task_id: str) -> PushNotificationConfig:
+        config = await self._run(self._load_push_notification_info, task_id)
+        if config is None:
+            raise ValueError(f"Push notification info not found for {task_id}")
+        return PushNotificationConfig.model_validate_json(config)
+
+    async def has_push_notification_info(self, task_id: str) -> bool:
+        return await self._run(self._load_push_notification_info, task_id) is not None
+
+    async def get_push_notification_config(self, task_id: str) -> PushNotificationConfig | None:
+        config = self.push_notification_infos.get(task_id)
+        if config is None:
+            # Possibly registered through another worker.
+            row = await self._run(self._load_push_notification_info, task_id)
+            if row is not None:
+                config = PushNotificationConfig.model_validate_json(row)
+                self.push_notification_infos[task_id] = config
+        return config
+
+    async def next_event_sequence(self, task_id, previous) -> int:
+        # Earlier turns may have been streamed by another worker; continue
+        # after their events instead of overwriting them.
+        persisted = await self._run(self._load_last_sequence, task_id)
+        return max(await super().next_event_sequence(task_id, previous), persisted + 1)
+
+    def _retire_event_sequence(self, task_id: str, next_sequence: int):
+        # task_events keeps the numbering (see next_event_sequence).
+        pass
+
+    async def enqueue_events_for_sse(self, task_id, task_update_event) -> int:
+        sequence = await super().enqueue_events_for_sse(task_id, task_update_event)
+        await self._write([
+            (
+                "INSERT OR REPLACE INTO task_events (task_id, sequence, kind, event)"
+                " VALUES (?, ?, ?, ?)",
+                (
+                    task_id,
+                    sequence,
+                    _event_kind(task_update_event),
+                    task_update_event.model_dump_json(exclude_none=True),
+                ),
+            ),
+            # Keep as many events per task as the in-memory log does.
+            (
+                "DELETE FROM task_events WHERE task_id = ? AND sequence <= ?",
+                (task_id, sequence - self.event_log_size),
+            ),
+        ])
+        return sequence
+
+    async def on_resubscribe_to_task(
+        self, request: TaskResubscriptionRequest
+    ) -> AsyncIterable[SendTaskStreamingResponse] | JSONRPCResponse:
+        event_log = self.task_event_logs.get(request.params.id)
+        if event_log is not None and not event_log.closed:
+            return await super().on_resubscribe_to_task(request)
+
+        # The task is not streaming here, though a later turn may be streaming
+        # in another worker: follow its persisted events.
+        if await self.get_task(request.params.id, 0) is None:
+            return JSONRPCResponse(id=request.id, error=TaskNotFoundError())
+        return self._follow_persisted_events(
+            request.id, request.params.id, request.params.lastEventId or 0
+        )
+
+    async def _follow_persisted_events(
+        self, request_id, task_id: str, last_sequence: int
+    ) -> AsyncIterable[SendTaskStreamingResponse]:
+        task_finished = False
+        while True:
+            rows = await self._run(self._load_events, task_id, last_sequence)
+            if rows and rows[0][0] > last_sequence + 1:
+                # Part of the stream was already pruned; start with the current
+                # status so the client can catch up.
+                task = await self.get_task(task_id, 0)
+                if task is not None:
+                    yield SendTaskStreamingResponse(
+                        id=request_id,
+                        result=TaskStatusUpdateEvent(id=task.id, status=task.status),
+                    )
+            for sequence, kind, payload in rows:
+                last_sequence = sequence
+                event = _EVENT_TYPES[kind].model_validate_json(payload)
+                if isinstance(event, JSONRPCError):
+                    yield SendTaskStreamingResponse(id=request_id, error=event)
+                    return
+                event.metadata = {**(event.metadata or {}), EVENT_SEQUENCE_KEY: sequence}
+                yield SendTaskStreamingResponse(id=request_id, result=event)
+                if is_terminal_event(event):
+                    return
+
+            if task_finished:
+                return
+            if not rows:
+                task = await self.get_task(task_id, 0)
+                # Poll once more after the task finished to pick up its last events.
+                task_finished = task is None or task.status.state in TERMINAL_TASK_STATES
+                await asyncio.sleep(0 if task_finished else self.event_poll_interval)
+
+    async def close(self):
+        """Flush pending writes and close the connection (on server shutdown)."""
+        if self._executor is None or self._pid != os.getpid():
+            return
+        if self._batch_done is not None:
+            self._flush_handle.cancel()
+            batch_done = self._batch_done
+            self._flush()
+            await asyncio.shield(batch_done)
+        await self._run(self._close_db)
+        self._executor.shutdown(wait=True)
+        self._executor = None
+        self._conn = None
+        self._pid = None
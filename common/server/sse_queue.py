@@ -0,0 +1,169 @@
+import asyncio
+from collections import deque
+from enum import Enum
+from typing import Any, List, Tuple
+
+from common.types import (
+    JSONRPCError,
+    InternalError,
+    TaskState,
+    TaskStatusUpdateEvent,
+)
+
+
+class SSEOverflowPolicy(str, Enum):
+    DROP_OLDEST = "drop_oldest"
+    COALESCE = "coalesce"
+    DISCONNECT = "disconnect"
+
+
+def _is_coalescible(event: Any) -> bool:
+    """A bare WORKING heartbeat: replacing it with a newer one loses nothing."""
+    return (
+        isinstance(event, TaskStatusUpdateEvent)
+        and not event.final
+        and event.status.state == TaskState.WORKING
+        and (event.status.message is None or not event.status.message.parts)
+    )
+
+
+def _is_terminal(event: Any) -> bool:
+    return isinstance(event, JSONRPCError) or (
+        isinstance(event, TaskStatusUpdateEvent) and event.final
+    )
+
+
+class SSESubscriberQueue:
+    """Bounded per-subscriber event buffer.
+
+    `put` never blocks the publisher. When the buffer is full the configured
+    policy decides what happens: drop the oldest buffered event, or disconnect
+    the subscriber by replacing its backlog with an error. With the coalesce
+    policy a full buffer first replaces a trailing WORKING status update
+    that carries no message with the new one, and drops the oldest event if
+    that is not possible. Updates carrying message parts (progress text,
+    candidate data) are never coalesced, and final status updates and
+    errors are never dropped.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 256,
+        policy: SSEOverflowPolicy = SSEOverflowPolicy.COALESCE,
+    ):
+        self.maxsize = maxsize
+        self.policy = SSEOverflowPolicy(policy)
+        self._events: deque = deque()
+        self._ready = asyncio.Event()
+        self.dropped = 0
+        self.coalesced = 0
+        self.max_depth = 0
+        self.disconnected = False
+
+    def qsize(self) -> int:
+        return len(self._events)
+
+    def empty(self) -> bool:
+        return not self._events
+
+    def put_nowait(self, event: Any) -> bool:
+        if self.disconnected:
+            return False
+
+        if 0 < self.maxsize <= len(self._events):
+            if (
+                self.policy == SSEOverflowPolicy.COALESCE
+                and _is_coalescible(event)
+                and _is_coalescible(self._events[-1])
+            ):
+                self._events[-1] = event
+                self.coalesced += 1
+                return True
+            if self.policy == SSEOverflowPolicy.DISCONNECT:
+                self.dropped += len(self._events)
+                self._events.clear()
+                self._events.append(
+                    InternalError(message="SSE consumer is too slow, disconnecting")
+                )
+                self.disconnected = True
+                self._ready.set()
+                return False
+            self._drop_oldest()
+
+        self._events.append(event)
+        self.max_depth = max(self.max_depth, len(self._events))
+        self._ready.set()
+        return True
+
+    async def put(self, event: Any) -> bool:
+        return self.put_nowait(event)
+
+    async def get(self) -> Any:
+        while not self._events:
+            self._ready.clear()
+            await self._ready.wait()
+        return self._events.popleft()
+
+    def _drop_oldest(self):
+        for i, event in enumerate(self._events):
+            if not _is_terminal(event):
+                del self._events[i]
+                self.dropped += 1
+                return
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "depth": len(self._events),
+            "max_depth": self.max_depth,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+            "disconnected": self.disconnected,
+        }
+
+
+EVENT_SEQUENCE_KEY = "sequence"
+
+
+def event_sequence(event: Any) -> int | None:
+    metadata = getattr(event, "metadata", None)
+    if not metadata:
+        return None
+    return metadata.get(EVENT_SEQUENCE_KEY)
+
+
+def is_terminal_event(event: Any) -> bool:
+    return _is_terminal(event)
+
+
+class TaskEventLog:
+    """Bounded ring buffer of the events emitted for one task.
+
+    Every event gets a monotonically increasing sequence number, stamped into
+    its metadata so it can be sent as the SSE event id and echoed back by a
+    resubscribing client.
+    """
+
+    def __init__(self, maxlen: int = 512, start_sequence: int = 1):
+        self._events: deque[Tuple[int, Any]] = deque(maxlen=maxlen)
+        self.next_sequence = start_sequence
+        self.closed = False
+
+    def append(self, event: Any) -> Tuple[int, Any]:
+        seq = self.next_sequence
+        self.next_sequence += 1
+        if hasattr(event, "metadata"):
+            event = event.model_copy(
+                update={"metadata": {**(event.metadata or {}), EVENT_SEQUENCE_KEY: seq}}
+            )
+        self._events.append((seq, event))
+        if _is_terminal(event):
+            self.closed = True
+        return seq, event
+
+    def since(self, last_sequence: int | None) -> Tuple[List[Any], bool]:
+        """Return the events after last_sequence and whether some were evicted."""
+        if last_sequence is None:
+            last_sequence = 0
+        oldest = self._events[0][0] if self._events else self.next_sequence
+        missed = last_sequence + 1 < oldest
+        return [event for seq, event in self._events if seq > last_sequence], missed
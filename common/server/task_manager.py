@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Union, AsyncIterable, List
+from typing import Union, AsyncIterable, Awaitable, List
 from common.types import Task
 from common.types import (
     JSONRPCResponse,
@@ -22,6 +22,7 @@ from common.types import (
     TaskStatus,
     TaskState,
     TaskResubscriptionRequest,
+    TaskResubscriptionParams,
     SendTaskStreamingRequest,
     SendTaskStreamingResponse,
     Artifact,
@@ -30,13 +31,22 @@ from common.types import (
     JSONRPCError,
     TaskPushNotificationConfig,
     InternalError,
+    InvalidParamsError,
 )
-from common.server.utils import new_not_implemented_error
+from common.server.artifact_stream import merge_artifacts
+from common.server.sse_queue import (
+    SSEOverflowPolicy,
+    SSESubscriberQueue,
+    TaskEventLog,
+)
+from common.utils.push_notification_dispatcher import PushNotificationDispatcher
 import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
 
+TERMINAL_TASK_STATES = (TaskState.COMPLETED, TaskState.CANCELED, TaskState.FAILED)
+
 class TaskManager(ABC):
     @abstractmethod
     async def on_get_task(self, request: GetTaskRequest) -> GetTaskResponse:
@@ -76,18 +86,58 @@ class TaskManager(ABC):
 
 
 class InMemoryTaskManager(TaskManager):
-    def __init__(self):
+    def __init__(
+        self,
+        lock_stripes: int = 64,
+        sse_queue_size: int = 256,
+        sse_overflow_policy: SSEOverflowPolicy = SSEOverflowPolicy.COALESCE,
+        event_log_size: int = 512,
+        cancel_timeout: float = 5.0,
+        push_sender: PushNotificationDispatcher | None = None,
+        event_log_ttl: float = 300.0,
+    ):
+        """push_sender: when set, tasks with a push notification config get a
+        signed notification on every state change, so clients need not poll
+        tasks/get; URLs are verified when registered.
+
+        event_log_ttl: seconds a finished turn's events stay available to
+        tasks/resubscribe before its log is dropped."""
         self.tasks: dict[str, Task] = {}
         self.push_notification_infos: dict[str, PushNotificationConfig] = {}
+        self.push_sender = push_sender
+        # Last state a notification was queued for, per unfinished task.
+        self._notified_states: dict[str, TaskState] = {}
+        # Kept for subclasses that still need a manager-wide critical section.
         self.lock = asyncio.Lock()
-        self.task_sse_subscribers: dict[str, List[asyncio.Queue]] = {}
+        # Per-task locks are striped by task id so updates to different tasks
+        # never wait on each other.
+        self._task_locks = [asyncio.Lock() for _ in range(max(1, lock_stripes))]
+        self.task_sse_subscribers: dict[str, List[SSESubscriberQueue]] = {}
         self.subscriber_lock = asyncio.Lock()
+        self.sse_queue_size = sse_queue_size
+        self.sse_overflow_policy = SSEOverflowPolicy(sse_overflow_policy)
+        # Totals from subscribers that already went away.
+        self.sse_dropped_events = 0
+        self.sse_coalesced_events = 0
+        self.sse_disconnected_consumers = 0
+        self.event_log_size = event_log_size
+        self.event_log_ttl = event_log_ttl
+        self.cancel_timeout = cancel_timeout
+        self.task_event_logs: dict[str, TaskEventLog] = {}
+        # Next sequence number of tasks whose event log was dropped.
+        self._retired_sequences: dict[str, int] = {}
+        # Execution registry: the asyncio task doing the agent work behind
+        # each A2A task, so tasks/cancel can actually stop it.
+        self.running_tasks: dict[str, asyncio.Task] = {}
+
+    def task_lock(self, task_id: str) -> asyncio.Lock:
+        return self._task_locks[hash(task_id) % len(self._task_locks)]
 
     async def on_get_task(self, request: GetTaskRequest) -> GetTaskResponse:
         logger.info(f"Getting task {request.params.id}")
         task_query_params: TaskQueryParams = request.params
 
-        async with self.lock:
+        async with self.task_lock(task_query_params.id):
             task = self.tasks.get(task_query_params.id)
             if task is None:
                 return GetTaskResponse(id=request.id, error=TaskNotFoundError())
@@ -98,16 +148,75 @@ class InMemoryTaskManager(TaskManager):
 
         return GetTaskResponse(id=request.id, result=task_result)
 
+    async def get_task(self, task_id: str, history_length: int | None = None) -> Task | None:
+        """Return a copy of the task, keeping the last history_length messages if given."""
+        async with self.task_lock(task_id):
+            task = self.tasks.get(task_id)
+            if task is None:
+                return None
+            if history_length is None:
+                return task.model_copy()
+            return self.append_task_history(task, history_length)
+
     async def on_cancel_task(self, request: CancelTaskRequest) -> CancelTaskResponse:
         logger.info(f"Cancelling task {request.params.id}")
         task_id_params: TaskIdParams = request.params
 
-        async with self.lock:
+        async with self.task_lock(task_id_params.id):
             task = self.tasks.get(task_id_params.id)
             if task is None:
                 return CancelTaskResponse(id=request.id, error=TaskNotFoundError())
 
-        return CancelTaskResponse(id=request.id, error=TaskNotCancelableError())
+        execution = self.running_tasks.get(task_id_params.id)
+        if (
+            execution is None
+            or execution.done()
+            or task.status.state in TERMINAL_TASK_STATES
+        ):
+            return CancelTaskResponse(id=request.id, error=TaskNotCancelableError())
+
+        execution.cancel()
+        # Give the agent a moment to unwind (close runners, drop executor
+        # results) before reporting the task as canceled.
+        await asyncio.wait({execution}, timeout=self.cancel_timeout)
+
+        status = TaskStatus(state=TaskState.CANCELED)
+        task = await self.update_store(task_id_params.id, status, None)
+        await self.enqueue_events_for_sse(
+            task_id_params.id,
+            TaskStatusUpdateEvent(id=task_id_params.id, status=status, final=True),
+        )
+        return CancelTaskResponse(
+            id=request.id, result=self.append_task_history(task, 0)
+        )
+
+    def track_execution(self, task_id: str, execution: asyncio.Task):
+        self.running_tasks[task_id] = execution
+        execution.add_done_callback(
+            lambda t: self.running_tasks.pop(task_id, None)
+            if self.running_tasks.get(task_id) is t
+            else None
+        )
+
+    async def invoke_cancellable(
+        self, request: SendTaskRequest, invocation: Awaitable[SendTaskResponse]
+    ) -> SendTaskResponse:
+        """Run a non-streaming invocation as a tracked, cancelable execution."""
+        execution = asyncio.ensure_future(invocation)
+        self.track_execution(request.params.id, execution)
+        try:
+            response = await asyncio.shield(execution)
+        except asyncio.CancelledError:
+            if not execution.cancelled():
+                raise
+            # Subclasses may have evicted the task from memory meanwhile.
+            task = await self.get_task(request.params.id, 0)
+            if task is None:
+                return SendTaskResponse(id=request.id, error=TaskNotFoundError())
+            task.status = TaskStatus(state=TaskState.CANCELED)
+            return SendTaskResponse(id=request.id, result=task)
+        await self.send_task_notification(request.params.id)
+        return response
 
     @abstractmethod
     async def on_send_task(self, request: SendTaskRequest) -> SendTaskResponse:
@@ -120,7 +229,7 @@ class InMemoryTaskManager(TaskManager):
         pass
 
     async def set_push_notification_info(self, task_id: str, notification_config: PushNotificationConfig):
-        async with self.lock:
+        async with self.task_lock(task_id):
             task = self.tasks.get(task_id)
             if task is None:
                 raise ValueError(f"Task not found for {task_id}")
@@ -130,7 +239,7 @@ class InMemoryTaskManager(TaskManager):
         return
     
     async def get_push_notification_info(self, task_id: str) -> PushNotificationConfig:
-        async with self.lock:
+        async with self.task_lock(task_id):
             task = self.tasks.get(task_id)
             if task is None:
                 raise ValueError(f"Task not found for {task_id}")
@@ -140,9 +249,49 @@ class InMemoryTaskManager(TaskManager):
         return
     
     async def has_push_notification_info(self, task_id: str) -> bool:
-        async with self.lock:
+        async with self.task_lock(task_id):
             return task_id in self.push_notification_infos
-            
+
+    async def get_push_notification_config(self, task_id: str) -> PushNotificationConfig | None:
+        """The task's push config, or None; looked up on every state change."""
+        return self.push_notification_infos.get(task_id)
+
+    async def verify_push_notification_config(self, config: PushNotificationConfig) -> bool:
+        if self.push_sender is None:
+            return True
+        return await self.push_sender.auth.verify_push_notification_url(config.url)
+
+    async def register_push_notification(self, task_send_params: TaskSendParams):
+        """Subscribe the task to the push config sent along with it, if any."""
+        config = task_send_params.pushNotification
+        if config is None:
+            return
+        if not await self.verify_push_notification_config(config):
+            logger.warning(f"Ignoring unverified push notification URL {config.url}")
+            return
+        await self.set_push_notification_info(task_send_params.id, config)
+
+    async def send_task_notification(self, task_id: str):
+        """Queue a push notification if the task's state changed since the last one."""
+        if self.push_sender is None:
+            return
+        task = self.tasks.get(task_id)
+        if task is None or self._notified_states.get(task_id) == task.status.state:
+            return
+        config = await self.get_push_notification_config(task_id)
+        if config is None:
+            return
+        if task.status.state in TERMINAL_TASK_STATES:
+            # Nothing follows until the next turn, which starts a new state.
+            self._notified_states.pop(task_id, None)
+        else:
+            self._notified_states[task_id] = task.status.state
+        # History stays out of the payload; tasks/get returns it when needed.
+        self.push_sender.notify(
+            config.url,
+            task_id,
+            self.append_task_history(task, 0).model_dump(mode="json", exclude_none=True),
+        )
 
     async def on_set_task_push_notification(
         self, request: SetTaskPushNotificationRequest
@@ -150,6 +299,12 @@ class InMemoryTaskManager(TaskManager):
         logger.info(f"Setting task push notification {request.params.id}")
         task_notification_params: TaskPushNotificationConfig = request.params
 
+        if not await self.verify_push_notification_config(task_notification_params.pushNotificationConfig):
+            return JSONRPCResponse(
+                id=request.id,
+                error=InvalidParamsError(message="Push notification URL is invalid"),
+            )
+
         try:
             await self.set_push_notification_info(task_notification_params.id, task_notification_params.pushNotificationConfig)
         except Exception as e:
@@ -184,7 +339,7 @@ class InMemoryTaskManager(TaskManager):
 
     async def upsert_task(self, task_send_params: TaskSendParams) -> Task:
         logger.info(f"Upserting task {task_send_params.id}")
-        async with self.lock:
+        async with self.task_lock(task_send_params.id):
             task = self.tasks.get(task_send_params.id)
             if task is None:
                 task = Task(
@@ -198,17 +353,69 @@ class InMemoryTaskManager(TaskManager):
             else:
                 task.history.append(task_send_params.message)
 
-            return task
+        await self.register_push_notification(task_send_params)
+        return task
 
     async def on_resubscribe_to_task(
         self, request: TaskResubscriptionRequest
     ) -> Union[AsyncIterable[SendTaskStreamingResponse], JSONRPCResponse]:
-        return new_not_implemented_error(request.id)
+        logger.info(f"Resubscribing to task {request.params.id}")
+        params: TaskResubscriptionParams = request.params
+
+        async with self.subscriber_lock:
+            event_log = self.task_event_logs.get(params.id)
+            if event_log is None:
+                return JSONRPCResponse(id=request.id, error=TaskNotFoundError())
+
+            # Snapshot the backlog and register the live queue in one step so
+            # no event is either missed or delivered twice.
+            backlog, missed = event_log.since(params.lastEventId)
+            sse_event_queue = None
+            if not event_log.closed:
+                sse_event_queue = SSESubscriberQueue(
+                    maxsize=self.sse_queue_size, policy=self.sse_overflow_policy
+                )
+                self.task_sse_subscribers.setdefault(params.id, []).append(
+                    sse_event_queue
+                )
+
+        if missed:
+            # Part of the stream was already evicted from the ring buffer; start
+            # the replay with the current status so the client can catch up.
+            task = self.tasks.get(params.id)
+            if task is not None:
+                backlog.insert(0, TaskStatusUpdateEvent(id=task.id, status=task.status))
+
+        return self._replay_events_for_sse(
+            request.id, params.id, backlog, sse_event_queue
+        )
+
+    async def _replay_events_for_sse(
+        self,
+        request_id,
+        task_id: str,
+        backlog: list,
+        sse_event_queue: SSESubscriberQueue | None,
+    ) -> AsyncIterable[SendTaskStreamingResponse]:
+        for event in backlog:
+            if isinstance(event, JSONRPCError):
+                yield SendTaskStreamingResponse(id=request_id, error=event)
+                return
+            yield SendTaskStreamingResponse(id=request_id, result=event)
+            if isinstance(event, TaskStatusUpdateEvent) and event.final:
+                return
+
+        if sse_event_queue is None:
+            return
+        async for response in self.dequeue_events_for_sse(
+            request_id, task_id, sse_event_queue
+        ):
+            yield response
 
     async def update_store(
         self, task_id: str, status: TaskStatus, artifacts: list[Artifact]
     ) -> Task:
-        async with self.lock:
+        async with self.task_lock(task_id):
             try:
                 task = self.tasks[task_id]
             except KeyError:
@@ -221,10 +428,19 @@ class InMemoryTaskManager(TaskManager):
                 task.history.append(status.message)
 
             if artifacts is not None:
-                if task.artifacts is None:
-                    task.artifacts = []
-                task.artifacts.extend(artifacts)
+                task.artifacts = merge_artifacts(task.artifacts, artifacts)
+
+            return task
 
+    async def append_artifacts(self, task_id: str, artifacts: list[Artifact]) -> Task:
+        """Store artifact updates, e.g. streamed chunks, leaving the status as is."""
+        async with self.task_lock(task_id):
+            try:
+                task = self.tasks[task_id]
+            except KeyError:
+                logger.error(f"Task {task_id} not found for updating the task")
+                raise ValueError(f"Task {task_id} not found")
+            task.artifacts = merge_artifacts(task.artifacts, artifacts)
             return task
 
     def append_task_history(self, task: Task, historyLength: int | None):
@@ -244,21 +460,65 @@ class InMemoryTaskManager(TaskManager):
                 else:
                     self.task_sse_subscribers[task_id] = []
 
-            sse_event_queue = asyncio.Queue(maxsize=0) # <=0 is unlimited
+            sse_event_queue = SSESubscriberQueue(
+                maxsize=self.sse_queue_size, policy=self.sse_overflow_policy
+            )
             self.task_sse_subscribers[task_id].append(sse_event_queue)
             return sse_event_queue
 
-    async def enqueue_events_for_sse(self, task_id, task_update_event):
+    async def next_event_sequence(self, task_id: str, previous: TaskEventLog | None) -> int:
+        """First sequence number for a new turn's event log."""
+        # A follow-up turn on the same task continues the numbering.
+        if previous is not None:
+            return previous.next_sequence
+        return self._retired_sequences.pop(task_id, 1)
+
+    def _evict_event_log(self, task_id: str, event_log: TaskEventLog):
+        if self.task_event_logs.get(task_id) is not event_log:
+            # A follow-up turn already replaced it.
+            return
+        del self.task_event_logs[task_id]
+        self._retire_event_sequence(task_id, event_log.next_sequence)
+        if not self.task_sse_subscribers.get(task_id):
+            self.task_sse_subscribers.pop(task_id, None)
+
+    def _retire_event_sequence(self, task_id: str, next_sequence: int):
+        self._retired_sequences[task_id] = next_sequence
+
+    async def enqueue_events_for_sse(self, task_id, task_update_event) -> int:
+        """Record an event in the task's log, fan it out, and return its sequence."""
+        event_log = self.task_event_logs.get(task_id)
+        start_sequence = None
+        if event_log is None or event_log.closed:
+            # Outside the lock: subclasses may look it up in storage.
+            start_sequence = await self.next_event_sequence(task_id, event_log)
         async with self.subscriber_lock:
-            if task_id not in self.task_sse_subscribers:
-                return
+            event_log = self.task_event_logs.get(task_id)
+            if event_log is None or event_log.closed:
+                if start_sequence is None:
+                    start_sequence = event_log.next_sequence if event_log else 1
+                event_log = TaskEventLog(
+                    maxlen=self.event_log_size, start_sequence=start_sequence
+                )
+                self.task_event_logs[task_id] = event_log
+            sequence, task_update_event = event_log.append(task_update_event)
+            current_subscribers = list(self.task_sse_subscribers.get(task_id, ()))
+            if event_log.closed:
+                asyncio.get_running_loop().call_later(
+                    self.event_log_ttl, self._evict_event_log, task_id, event_log
+                )
 
-            current_subscribers = self.task_sse_subscribers[task_id]
-            for subscriber in current_subscribers:
-                await subscriber.put(task_update_event)
+        # Deliver outside the lock so a slow subscriber cannot stall other
+        # tasks from publishing or new consumers from subscribing.
+        for subscriber in current_subscribers:
+            if not subscriber.put_nowait(task_update_event):
+                logger.warning(f"Dropping slow SSE consumer for task {task_id}")
+        if isinstance(task_update_event, TaskStatusUpdateEvent):
+            await self.send_task_notification(task_id)
+        return sequence
 
     async def dequeue_events_for_sse(
-        self, request_id, task_id, sse_event_queue: asyncio.Queue
+        self, request_id, task_id, sse_event_queue: SSESubscriberQueue
     ) -> AsyncIterable[SendTaskStreamingResponse] | JSONRPCResponse:
         try:
             while True:                
@@ -274,4 +534,61 @@ class InMemoryTaskManager(TaskManager):
             async with self.subscriber_lock:
                 if task_id in self.task_sse_subscribers:
                     self.task_sse_subscribers[task_id].remove(sse_event_queue)
+                self.sse_dropped_events += sse_event_queue.dropped
+                self.sse_coalesced_events += sse_event_queue.coalesced
+                self.sse_disconnected_consumers += int(sse_event_queue.disconnected)
+
+    async def stream_in_background(
+        self,
+        request: SendTaskStreamingRequest,
+        responses: AsyncIterable[SendTaskStreamingResponse],
+    ) -> AsyncIterable[SendTaskStreamingResponse]:
+        """Run a streaming response generator independently of its client.
+
+        Every event is published through enqueue_events_for_sse, which records
+        it in the task's event log, and the caller gets a subscriber stream.
+        If the client goes away the agent keeps working and the client can
+        come back with tasks/resubscribe instead of sending the task again.
+        """
+        task_id = request.params.id
+        sse_event_queue = await self.setup_sse_consumer(task_id)
+        producer = asyncio.create_task(self._publish_responses(task_id, responses))
+        self.track_execution(task_id, producer)
+        return self.dequeue_events_for_sse(request.id, task_id, sse_event_queue)
+
+    async def _publish_responses(
+        self, task_id: str, responses: AsyncIterable[SendTaskStreamingResponse]
+    ):
+        try:
+            async for response in responses:
+                event = response.error if response.error is not None else response.result
+                if event is not None:
+                    await self.enqueue_events_for_sse(task_id, event)
+        except Exception as e:
+            logger.error(f"An error occurred while streaming task {task_id}: {e}")
+            await self.enqueue_events_for_sse(
+                task_id,
+                InternalError(message="An error occurred while streaming the response"),
+            )
+
+    def metrics(self) -> dict:
+        return {"sse": self.sse_metrics()}
+
+    def sse_metrics(self) -> dict:
+        subscribers = {
+            task_id: [queue.stats() for queue in queues]
+            for task_id, queues in list(self.task_sse_subscribers.items())
+            if queues
+        }
+        live = [stats for queues in subscribers.values() for stats in queues]
+        return {
+            "policy": self.sse_overflow_policy.value,
+            "queue_size": self.sse_queue_size,
+            "subscribers": subscribers,
+            "dropped": self.sse_dropped_events + sum(s["dropped"] for s in live),
+            "coalesced": self.sse_coalesced_events + sum(s["coalesced"] for s in live),
+            "disconnected": self.sse_disconnected_consumers
+            + sum(int(s["disconnected"]) for s in live),
+            "max_queue_depth": max((s["depth"] for s in live), default=0),
+        }
 
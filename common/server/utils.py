@@ -3,6 +3,9 @@ from common.types import (
     ContentTypeNotSupportedError,
     UnsupportedOperationError,
 )
+from common.utils.blob_store import BlobStore, parse_range
+from starlette.requests import Request
+from starlette.responses import Response, StreamingResponse
 from typing import List
 
 
@@ -26,3 +29,36 @@ def new_incompatible_types_error(request_id):
 
 def new_not_implemented_error(request_id):
     return JSONRPCResponse(id=request_id, error=UnsupportedOperationError())
+
+
+def blob_response(blob_store: BlobStore, blob_id: str, request: Request) -> Response:
+    """Stream a stored blob with ETag and single byte-range support."""
+    blob = blob_store.get(blob_id)
+    if blob is None:
+        return Response(status_code=404)
+    # Blob ids are content hashes, so the content never changes.
+    etag = f'"{blob_id}"'
+    headers = {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "public, max-age=31536000, immutable",
+    }
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    start, end, status = 0, blob.size - 1, 200
+    range_header = request.headers.get("range")
+    if range_header:
+        byte_range = parse_range(range_header, blob.size)
+        if byte_range is None:
+            headers["Content-Range"] = f"bytes */{blob.size}"
+            return Response(status_code=416, headers=headers)
+        start, end = byte_range
+        status = 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{blob.size}"
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(
+        blob_store.iter_bytes(blob, start, end),
+        status_code=status,
+        media_type=blob.mime_type or "application/octet-stream",
+        headers=headers,
+    )
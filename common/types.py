@@ -219,9 +219,14 @@ class GetTaskPushNotificationResponse(JSONRPCResponse):
     result: TaskPushNotificationConfig | None = None
 
 
+class TaskResubscriptionParams(TaskIdParams):
+    # Sequence number of the last event the client received (SSE Last-Event-ID).
+    lastEventId: int | None = None
+
+
 class TaskResubscriptionRequest(JSONRPCRequest):
     method: Literal["tasks/resubscribe",] = "tasks/resubscribe"
-    params: TaskIdParams
+    params: TaskResubscriptionParams
 
 
 A2ARequest = TypeAdapter(
@@ -302,6 +307,12 @@ class ContentTypeNotSupportedError(JSONRPCError):
     data: None = None
 
 
+class ServerOverloadedError(JSONRPCError):
+    code: int = -32000
+    message: str = "Server is overloaded, retry later"
+    data: Any | None = None
+
+
 class AgentProvider(BaseModel):
     organization: str
     url: str | None = None
@@ -0,0 +1,227 @@
+import hashlib
+import logging
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import AsyncIterable, Iterator
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class Blob:
+    mime_type: str | None
+    size: int
+    # Exactly one of these is set: in memory, or spilled to disk.
+    data: bytes | bytearray | None = None
+    path: str | None = None
+
+
+class BlobTooLargeError(Exception):
+    pass
+
+
+class BlobStore:
+    """Content-addressed store for file bytes.
+
+    Blobs are keyed by the sha256 of their bytes, so the same file attached to
+    several messages is stored once. Memory use is bounded by `max_bytes`; the
+    least recently used blobs are written to `spill_dir` (bounded by
+    `max_spill_bytes`) or dropped when no spill directory is configured.
+    A blob that fits in neither is rejected with BlobTooLargeError. Because file names are content hashes, several processes can share one
+    `spill_dir` and serve each other's spilled blobs.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 256 * 1024 * 1024,
+        spill_dir: str | None = None,
+        max_spill_bytes: int = 1024 * 1024 * 1024,
+        chunk_size: int = 64 * 1024,
+    ):
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        self.max_spill_bytes = max_spill_bytes
+        self.chunk_size = chunk_size
+        self._memory: OrderedDict[str, Blob] = OrderedDict()
+        self._disk: OrderedDict[str, Blob] = OrderedDict()
+        # Evicted from memory and being written to disk, still readable.
+        self._spilling: dict[str, Blob] = {}
+        self._memory_bytes = 0
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+
+    @classmethod
+    def from_env(cls) -> "BlobStore":
+        return cls(
+            max_bytes=int(os.environ.get("A2A_FILE_CACHE_BYTES", 256 * 1024 * 1024)),
+            spill_dir=os.environ.get("A2A_FILE_SPILL_DIR") or None,
+            max_spill_bytes=int(
+                os.environ.get("A2A_FILE_SPILL_BYTES", 1024 * 1024 * 1024)
+            ),
+        )
+
+    def put(self, data: bytes | bytearray | memoryview, mime_type: str | None = None) -> str:
+        """Store `data` and return its id (the hex sha256 of the bytes)."""
+        blob_id = hashlib.sha256(data).hexdigest()
+        if isinstance(data, memoryview):
+            data = data.tobytes()
+        return self._commit(blob_id, data, mime_type)
+
+    async def put_stream(
+        self,
+        chunks: AsyncIterable[bytes],
+        mime_type: str | None = None,
+        max_size: int | None = None,
+    ) -> str:
+        """Store a streamed upload, hashing it chunk by chunk."""
+        digest = hashlib.sha256()
+        data = bytearray()
+        async for chunk in chunks:
+            if max_size is not None and len(data) + len(chunk) > max_size:
+                raise BlobTooLargeError(f"File exceeds {max_size} bytes")
+            digest.update(chunk)
+            data += chunk
+        return self._commit(digest.hexdigest(), data, mime_type)
+
+    def _commit(self, blob_id: str, data: bytes | bytearray, mime_type: str | None) -> str:
+        if len(data) > self.max_bytes and not self._fits_on_disk(len(data)):
+            # It would be evicted as soon as stored, leaving a URI that 404s.
+            raise BlobTooLargeError(f"File exceeds {self.max_bytes} bytes")
+        with self._lock:
+            if blob_id in self._memory:
+                self._memory.move_to_end(blob_id)
+                return blob_id
+            if blob_id in self._disk:
+                self._disk.move_to_end(blob_id)
+                return blob_id
+            if blob_id in self._spilling:
+                return blob_id
+            self._memory[blob_id] = Blob(mime_type=mime_type, size=len(data), data=data)
+            self._memory_bytes += len(data)
+            victims = self._evict_memory()
+        self._spill(victims)
+        return blob_id
+
+    def _fits_on_disk(self, size: int) -> bool:
+        return bool(self.spill_dir) and size <= self.max_spill_bytes
+
+    def get(self, blob_id: str) -> Blob | None:
+        with self._lock:
+            for tier in (self._memory, self._disk):
+                blob = tier.get(blob_id)
+                if blob is not None:
+                    tier.move_to_end(blob_id)
+                    return blob
+            blob = self._spilling.get(blob_id)
+            if blob is not None:
+                return blob
+        return self._shared(blob_id)
+
+    def _shared(self, blob_id: str) -> Blob | None:
+        # Spilled by another process sharing the directory.
+        if not self.spill_dir or not re.fullmatch(r"[0-9a-f]{64}", blob_id):
+            return None
+        path = os.path.join(self.spill_dir, blob_id)
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return None
+        return Blob(mime_type=None, size=size, path=path)
+
+    def iter_bytes(self, blob: Blob, start: int = 0, end: int | None = None) -> Iterator[bytes]:
+        """Yield bytes `start`..`end` (inclusive) of the blob in chunks."""
+        end = blob.size - 1 if end is None else end
+        if blob.data is not None:
+            view = memoryview(blob.data)
+            for offset in range(start, end + 1, self.chunk_size):
+                yield bytes(view[offset : min(offset + self.chunk_size, end + 1)])
+            return
+        with open(blob.path, "rb") as f:
+            f.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = f.read(min(self.chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+
+    def _evict_memory(self) -> list[tuple[str, Blob]]:
+        """Drop the least recently used blobs; return those to spill. Locked."""
+        victims = []
+        while self._memory_bytes > self.max_bytes and self._memory:
+            blob_id, blob = self._memory.popitem(last=False)
+            self._memory_bytes -= blob.size
+            if self._fits_on_disk(blob.size):
+                self._spilling[blob_id] = blob
+                victims.append((blob_id, blob))
+        return victims
+
+    def _spill(self, victims: list[tuple[str, Blob]]):
+        # Files are written outside the lock so readers and writers of other
+        # blobs never wait on the disk.
+        for blob_id, blob in victims:
+            path = self._write(blob_id, blob)
+            with self._lock:
+                del self._spilling[blob_id]
+                if path is None:
+                    continue
+                # Readers holding the in-memory Blob keep their bytes.
+                self._disk[blob_id] = Blob(mime_type=blob.mime_type, size=blob.size, path=path)
+                self._disk_bytes += blob.size
+                expired = []
+                while self._disk_bytes > self.max_spill_bytes and self._disk:
+                    _, old = self._disk.popitem(last=False)
+                    self._disk_bytes -= old.size
+                    expired.append(old.path)
+            for old_path in expired:
+                try:
+                    os.remove(old_path)
+                except OSError:
+                    pass
+
+    def _write(self, blob_id: str, blob: Blob) -> str | None:
+        path = os.path.join(self.spill_dir, blob_id)
+        try:
+            # Write then rename, so a reader in another process never sees a
+            # partial file under the final name.
+            fd, tmp_path = tempfile.mkstemp(dir=self.spill_dir)
+            with os.fdopen(fd, "wb") as f:
+                f.write(blob.data)
+            os.replace(tmp_path, path)
+        except OSError:
+            logger.warning(f"Failed to spill blob {blob_id} to disk", exc_info=True)
+            return None
+        return path
+
+    def metrics(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "memory_blobs": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "disk_blobs": len(self._disk),
+                "disk_bytes": self._disk_bytes,
+            }
+
+
+def parse_range(header: str, size: int) -> tuple[int, int] | None:
+    """Parse a single `bytes=` range; None when it cannot be satisfied."""
+    match = re.fullmatch(r"bytes=(\d*)-(\d*)", header.strip())
+    if not match or not (match.group(1) or match.group(2)):
+        return None
+    if not match.group(1):
+        # Suffix range: the last N bytes.
+        length = int(match.group(2))
+        if length == 0:
+            return None
+        return max(size - length, 0), size - 1
+    start = int(match.group(1))
+    end = int(match.group(2)) if match.group(2) else size - 1
+    if start >= size or end < start:
+        return None
+    return start, min(end, size - 1)
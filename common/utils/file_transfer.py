@@ -0,0 +1,165 @@
+"""Out-of-band transfer of FilePart contents.
+
+Small files stay inline as base64 in `FileContent.bytes`. Larger ones are
+stored in a BlobStore served by the agent (`A2AServer` exposes
+`FILES_PATH`) or uploaded to another agent's store, and the message only
+carries `FileContent.uri`. Bodies are streamed in chunks in both directions.
+
+URIs come from other agents' messages, so `read_file` only fetches from
+origins the caller trusts (the agent that sent the part, plus
+A2A_FILE_ORIGINS) and caps what it downloads.
+"""
+
+import base64
+import binascii
+import os
+from typing import Any, AsyncIterator, Iterable
+from urllib.parse import urlsplit
+
+import httpx
+
+from common.types import FileContent, FilePart
+from common.utils.blob_store import BlobStore, BlobTooLargeError
+
+# Route of the blob endpoints on A2AServer.
+FILES_PATH = "/files"
+# Files up to this size are sent inline as base64.
+INLINE_FILE_LIMIT = int(os.environ.get("A2A_INLINE_FILE_BYTES", 256 * 1024))
+# Largest file read_file downloads.
+MAX_FILE_BYTES = int(os.environ.get("A2A_MAX_FILE_BYTES", 64 * 1024 * 1024))
+# Comma-separated origins (e.g. a shared file server) read_file always trusts.
+TRUSTED_FILE_ORIGINS = os.environ.get("A2A_FILE_ORIGINS", "")
+# Bearer token for POST FILES_PATH; uploads are disabled without one.
+UPLOAD_TOKEN_ENV = "A2A_UPLOAD_TOKEN"
+CHUNK_SIZE = 64 * 1024
+
+
+class UntrustedFileOriginError(ValueError):
+    pass
+
+
+def decode_file_bytes(data: str) -> bytes:
+    """Decode `FileContent.bytes`, which is base64 per the protocol."""
+    try:
+        return base64.b64decode(data, validate=True)
+    except binascii.Error as e:
+        raise ValueError(f"File bytes are not valid base64: {e}") from e
+
+
+def origin(url: str) -> str:
+    """scheme://host:port of an absolute http(s) URL, with the port explicit."""
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise UntrustedFileOriginError(f"Not an http(s) URL: {url!r}")
+    port = parts.port or (443 if parts.scheme == "https" else 80)
+    return f"{parts.scheme}://{parts.hostname.lower()}:{port}"
+
+
+def make_file_part(
+    data: bytes | bytearray | memoryview,
+    mime_type: str | None = None,
+    name: str | None = None,
+    blob_store: BlobStore | None = None,
+    base_url: str = "",
+    path: str = FILES_PATH,
+    inline_limit: int | None = None,
+    metadata: dict[str, Any] | None = None,
+) -> FilePart:
+    """Build a FilePart, inline when small (or without a store), else by URI.
+
+    The URI is `base_url` + `path` + the blob id; `inline_limit` defaults to
+    INLINE_FILE_LIMIT.
+    """
+    if inline_limit is None:
+        inline_limit = INLINE_FILE_LIMIT
+    if blob_store is None or len(data) <= inline_limit:
+        content = FileContent(
+            name=name,
+            mimeType=mime_type,
+            bytes=base64.b64encode(data).decode("ascii"),
+        )
+    else:
+        blob_id = blob_store.put(data, mime_type)
+        content = FileContent(
+            name=name,
+            mimeType=mime_type,
+            uri=f"{base_url.rstrip('/')}{path}/{blob_id}",
+        )
+    return FilePart(file=content, metadata=metadata)
+
+
+async def _chunks(data: memoryview) -> AsyncIterator[bytes]:
+    for offset in range(0, len(data), CHUNK_SIZE):
+        yield data[offset : offset + CHUNK_SIZE].tobytes()
+
+
+async def upload_file(
+    base_url: str,
+    data: bytes | bytearray | memoryview,
+    mime_type: str | None = None,
+    client: httpx.AsyncClient | None = None,
+    token: str | None = None,
+) -> str:
+    """Stream `data` to an agent's blob endpoint and return its URI.
+
+    The agent only accepts uploads with its upload token (`token`, default
+    A2A_UPLOAD_TOKEN).
+    """
+    url = base_url.rstrip("/") + FILES_PATH
+    headers = {"Content-Type": mime_type or "application/octet-stream"}
+    token = token or os.environ.get(UPLOAD_TOKEN_ENV)
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    content = _chunks(memoryview(data))
+    if client is None:
+        async with httpx.AsyncClient() as owned:
+            response = await owned.post(url, content=content, headers=headers)
+    else:
+        response = await client.post(url, content=content, headers=headers)
+    response.raise_for_status()
+    return response.json()["uri"]
+
+
+async def read_file(
+    file: FileContent,
+    client: httpx.AsyncClient | None = None,
+    allowed_origins: Iterable[str] = (),
+    max_size: int | None = None,
+) -> memoryview:
+    """Return the bytes of a file, decoding inline data or streaming its URI.
+
+    A URI is only fetched when its origin is one of `allowed_origins` (URLs
+    such as the sending agent's card URL) or A2A_FILE_ORIGINS; redirects are
+    not followed. Downloads larger than `max_size` (default MAX_FILE_BYTES)
+    raise BlobTooLargeError, whether announced by Content-Length or not.
+    """
+    if file.bytes:
+        return memoryview(decode_file_bytes(file.bytes))
+    trusted = {
+        origin(url)
+        for url in [*allowed_origins, *TRUSTED_FILE_ORIGINS.split(",")]
+        if url.strip()
+    }
+    if origin(file.uri) not in trusted:
+        raise UntrustedFileOriginError(f"Refusing to fetch file from {file.uri}")
+    max_size = MAX_FILE_BYTES if max_size is None else max_size
+    if client is None:
+        async with httpx.AsyncClient() as owned:
+            return await _download(owned, file.uri, max_size)
+    return await _download(client, file.uri, max_size)
+
+
+async def _download(client: httpx.AsyncClient, uri: str, max_size: int) -> memoryview:
+    async with client.stream("GET", uri, follow_redirects=False) as response:
+        response.raise_for_status()
+        length = response.headers.get("content-length")
+        if length and length.isdigit() and int(length) > max_size:
+            raise BlobTooLargeError(f"File exceeds {max_size} bytes")
+        # The header is only checked, never trusted for allocation: the body
+        # may be longer (or decoded larger) than announced.
+        buffer = bytearray()
+        async for chunk in response.aiter_bytes(CHUNK_SIZE):
+            if len(buffer) + len(chunk) > max_size:
+                raise BlobTooLargeError(f"File exceeds {max_size} bytes")
+            buffer += chunk
+        return memoryview(buffer)
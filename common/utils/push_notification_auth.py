@@ -1,6 +1,7 @@
 from jwcrypto import jwk
+import asyncio
 import uuid
-from starlette.responses import JSONResponse
+from starlette.responses import Response
 from starlette.requests import Request
 from typing import Any
 
@@ -11,10 +12,29 @@ import hashlib
 import httpx
 import logging
 
-from jwt import PyJWK, PyJWKClient
+from jwt import PyJWK, PyJWKSet
 
 logger = logging.getLogger(__name__)
 AUTH_HEADER_PREFIX = 'Bearer '
+# How long a verified (or rejected) notification URL is remembered.
+URL_VERIFICATION_TTL = 10 * 60
+JWKS_MAX_AGE = 5 * 60
+
+
+def canonical_body(data: dict[str, Any]) -> bytes:
+    """Serialize a notification the way its signature digest is computed.
+
+    Senders post exactly these bytes, so the body is serialized once and the
+    digest covers what is on the wire.
+    """
+    return json.dumps(
+        data,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode()
+
 
 class PushNotificationAuth:
     def _calculate_request_body_sha256(self, data: dict[str, Any]):
@@ -22,50 +42,73 @@ class PushNotificationAuth:
 
         This logic needs to be same for both the agent who signs the payload and the client verifier.
         """
-        body_str = json.dumps(
-            data,
-            ensure_ascii=False,
-            allow_nan=False,
-            indent=None,
-            separators=(",", ":"),
-        )
-        return hashlib.sha256(body_str.encode()).hexdigest()
+        return hashlib.sha256(canonical_body(data)).hexdigest()
 
 class PushNotificationSenderAuth(PushNotificationAuth):
-    def __init__(self):
+    def __init__(self, client: httpx.AsyncClient | None = None):
         self.public_keys = []
         self.private_key_jwk: PyJWK = None
+        self._jwks_body: bytes | None = None
+        # url -> (verified, expires at)
+        self._verified_urls: dict[str, tuple[bool, float]] = {}
+        self._client = client
 
-    @staticmethod
-    async def verify_push_notification_url(url: str) -> bool:
-        async with httpx.AsyncClient(timeout=10) as client:
-            try:
-                validation_token = str(uuid.uuid4())
-                response = await client.get(
-                    url,
-                    params={"validationToken": validation_token}
-                )
-                response.raise_for_status()
-                is_verified = response.text == validation_token
-
-                logger.info(f"Verified push-notification URL: {url} => {is_verified}")            
-                return is_verified                
-            except Exception as e:
-                logger.warning(f"Error during sending push-notification for URL {url}: {e}")
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # One pooled client for verification and delivery.
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(10, connect=5),
+                limits=httpx.Limits(max_connections=200, max_keepalive_connections=50),
+            )
+        return self._client
 
-        return False
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def verify_push_notification_url(self, url: str) -> bool:
+        cached = self._verified_urls.get(url)
+        if cached and cached[1] > time.monotonic():
+            return cached[0]
+        is_verified = False
+        try:
+            validation_token = str(uuid.uuid4())
+            response = await self.client.get(
+                url,
+                params={"validationToken": validation_token}
+            )
+            response.raise_for_status()
+            is_verified = response.text == validation_token
+
+            logger.info(f"Verified push-notification URL: {url} => {is_verified}")
+        except Exception as e:
+            logger.warning(f"Error during sending push-notification for URL {url}: {e}")
+            # Unreachable is not a verdict; try again next time.
+            return False
+        self._verified_urls[url] = (is_verified, time.monotonic() + URL_VERIFICATION_TTL)
+        return is_verified
 
     def generate_jwk(self):
         key = jwk.JWK.generate(kty='RSA', size=2048, kid=str(uuid.uuid4()), use="sig")
         self.public_keys.append(key.export_public(as_dict=True))
         self.private_key_jwk = PyJWK.from_json(key.export_private())
+        self._jwks_body = None
     
     def handle_jwks_endpoint(self, _request: Request):
         """Allow clients to fetch public keys.
+
+        The key set only changes in generate_jwk, so it is rendered once and
+        clients may cache it.
         """
-        return JSONResponse({
-            "keys": self.public_keys
-        })
+        if self._jwks_body is None:
+            self._jwks_body = json.dumps({"keys": self.public_keys}).encode()
+        return Response(
+            self._jwks_body,
+            media_type="application/json",
+            headers={"Cache-Control": f"public, max-age={JWKS_MAX_AGE}"},
+        )
     
     def _generate_jwt(self, data: dict[str, Any]):
         """JWT is generated by signing both the request payload SHA digest and time of token generation.
@@ -73,38 +116,142 @@ class PushNotificationSenderAuth(PushNotificationAuth):
         Payload is signed with private key and it ensures the integrity of payload for client.
         Including iat prevents from replay attack.
         """
-        
-        iat = int(time.time())
+        return self._sign(canonical_body(data))
 
+    def _sign(self, body: bytes) -> str:
         return jwt.encode(
-            {"iat": iat, "request_body_sha256": self._calculate_request_body_sha256(data)},
+            {"iat": int(time.time()), "request_body_sha256": hashlib.sha256(body).hexdigest()},
             key=self.private_key_jwk,
             headers={"kid": self.private_key_jwk.key_id},
             algorithm="RS256"
         )
 
+    async def post_notification(self, url: str, body: bytes) -> httpx.Response:
+        """Sign and post an already serialized (canonical_body) notification."""
+        headers = {
+            'Authorization': f"Bearer {self._sign(body)}",
+            'Content-Type': "application/json",
+        }
+        return await self.client.post(url, content=body, headers=headers)
+
     async def send_push_notification(self, url: str, data: dict[str, Any]):
-        jwt_token = self._generate_jwt(data)
-        headers = {'Authorization': f"Bearer {jwt_token}"}
-        async with httpx.AsyncClient(timeout=10) as client: 
+        try:
+            response = await self.post_notification(url, canonical_body(data))
+            response.raise_for_status()
+            logger.info(f"Push-notification sent for URL: {url}")
+        except Exception as e:
+            logger.warning(f"Error during sending push-notification for URL {url}: {e}")
+
+class JWKSCache:
+    """Async, kid-indexed cache of a sender's public keys.
+
+    Lookups of known kids never touch the network. An unknown kid triggers
+    one refetch of the key set, shared by concurrent callers and at most
+    every `min_refetch_interval` seconds, and a kid that is still unknown is
+    remembered for `negative_ttl` seconds so a flood of bad tokens cannot
+    hammer the JWKS endpoint. Once used, the set is also refreshed in the
+    background every `refresh_interval` seconds to pick up rotated keys.
+
+    Loop-bound state (the lock, the refresh task) is created on first use
+    and again when `get` is called from another event loop, cancelling the
+    old loop's refresh, so the cache can be loaded on one loop and used on
+    another.
+    """
+
+    def __init__(
+        self,
+        jwks_url: str,
+        refresh_interval: float = JWKS_MAX_AGE,
+        negative_ttl: float = 60,
+        min_refetch_interval: float = 10,
+    ):
+        self.jwks_url = jwks_url
+        self.refresh_interval = refresh_interval
+        self.negative_ttl = negative_ttl
+        self.min_refetch_interval = min_refetch_interval
+        self._keys: dict[str, PyJWK] = {}
+        # kid -> time until which it is known to be missing
+        self._missing: dict[str, float] = {}
+        self._fetched_at = float("-inf")
+        self._lock: asyncio.Lock | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._refresh_task: asyncio.Task | None = None
+
+    async def refresh(self):
+        async with httpx.AsyncClient(timeout=10) as client:
+            response = await client.get(self.jwks_url)
+            response.raise_for_status()
+            key_set = PyJWKSet.from_dict(response.json())
+        self._keys = {key.key_id: key for key in key_set.keys if key.key_id}
+        self._fetched_at = time.monotonic()
+        self._missing = {
+            kid: until for kid, until in self._missing.items() if kid not in self._keys
+        }
+
+    async def get(self, kid: str) -> PyJWK | None:
+        # Before the fast path, so a preloaded cache still starts refreshing.
+        self._bind_loop()
+        key = self._keys.get(kid)
+        if key is not None:
+            return key
+        now = time.monotonic()
+        if self._missing.get(kid, 0) > now:
+            return None
+        async with self._lock:
+            key = self._keys.get(kid)
+            if key is None and now - self._fetched_at >= self.min_refetch_interval:
+                await self.refresh()
+                key = self._keys.get(kid)
+        if key is None:
+            now = time.monotonic()
+            if len(self._missing) >= 1024:
+                self._missing = {k: t for k, t in self._missing.items() if t > now}
+            self._missing[kid] = now + self.negative_ttl
+        return key
+
+    def _bind_loop(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        # The refresh task of a previous loop would otherwise keep running
+        # there, using a lock of the wrong loop.
+        self.close()
+        self._loop = loop
+        self._lock = asyncio.Lock()
+        self._refresh_task = loop.create_task(self._refresh_periodically())
+
+    async def _refresh_periodically(self):
+        while True:
+            await asyncio.sleep(self.refresh_interval)
             try:
-                response = await client.post(
-                    url,
-                    json=data,
-                    headers=headers
-                )
-                response.raise_for_status()
-                logger.info(f"Push-notification sent for URL: {url}")                            
+                async with self._lock:
+                    await self.refresh()
             except Exception as e:
-                logger.warning(f"Error during sending push-notification for URL {url}: {e}")
+                logger.warning(f"Error refreshing JWKS from {self.jwks_url}: {e}")
+
+    def close(self):
+        task, self._refresh_task = self._refresh_task, None
+        if task is None or task.done():
+            return
+        loop = task.get_loop()
+        if loop.is_closed():
+            return
+        # The task's loop may be running in another thread.
+        loop.call_soon_threadsafe(task.cancel)
+
 
 class PushNotificationReceiverAuth(PushNotificationAuth):
     def __init__(self):
         self.public_keys_jwks = []
-        self.jwks_client = None
+        self.jwks: JWKSCache | None = None
 
     async def load_jwks(self, jwks_url: str):
-        self.jwks_client = PyJWKClient(jwks_url)
+        self.jwks = JWKSCache(jwks_url)
+        try:
+            await self.jwks.refresh()
+        except Exception as e:
+            # Fetched again on the first notification.
+            logger.warning(f"Error loading JWKS from {jwks_url}: {e}")
     
     async def verify_push_notification(self, request: Request) -> bool:
         auth_header = request.headers.get("Authorization")
@@ -113,7 +260,10 @@ class PushNotificationReceiverAuth(PushNotificationAuth):
             return False
         
         token = auth_header[len(AUTH_HEADER_PREFIX):]
-        signing_key = self.jwks_client.get_signing_key_from_jwt(token)
+        kid = jwt.get_unverified_header(token).get("kid")
+        signing_key = await self.jwks.get(kid) if kid else None
+        if signing_key is None:
+            raise ValueError(f"Unknown signing key {kid}")
 
         decode_token = jwt.decode(
             token,
@@ -122,14 +272,20 @@ class PushNotificationReceiverAuth(PushNotificationAuth):
             algorithms=["RS256"],
         )
 
-        actual_body_sha256 = self._calculate_request_body_sha256(await request.json())
-        if actual_body_sha256 != decode_token["request_body_sha256"]:
-            # Payload signature does not match the digest in signed token.
-            raise ValueError("Invalid request body")
-        
         if time.time() - decode_token["iat"] > 60 * 5:
             # Do not allow push-notifications older than 5 minutes.
             # This is to prevent replay attack.
             raise ValueError("Token is expired")
+
+        # Senders post the canonical bytes, so hash the body as received;
+        # re-serialize only for senders that encode JSON differently.
+        body = await request.body()
+        expected = decode_token["request_body_sha256"]
+        if (
+            hashlib.sha256(body).hexdigest() != expected
+            and self._calculate_request_body_sha256(json.loads(body)) != expected
+        ):
+            # Payload signature does not match the digest in signed token.
+            raise ValueError("Invalid request body")
         
         return True
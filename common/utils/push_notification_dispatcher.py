@@ -0,0 +1,165 @@
+import asyncio
+import logging
+import random
+from typing import Any
+
+import httpx
+
+from common.utils.push_notification_auth import (
+    PushNotificationSenderAuth,
+    canonical_body,
+)
+
+logger = logging.getLogger(__name__)
+
+# Statuses worth retrying; other errors will not go away on their own.
+RETRYABLE_STATUS = {408, 425, 429, 500, 502, 503, 504}
+
+
+class PushNotificationDispatcher:
+    """Delivers push notifications from a bounded queue.
+
+    `notify` never waits on the network. Notifications are keyed by
+    (url, task id): while one is still queued, a newer update for the same
+    task replaces its payload instead of queuing another request, so a
+    client receives the latest state rather than every intermediate one.
+    Updates for one task are delivered one at a time, in order.
+    Workers post through the sender's pooled client, at most
+    `per_url_concurrency` at a time per URL, and retry transport errors and
+    retryable statuses with exponential backoff. When the queue is full,
+    new notifications are dropped and counted.
+    """
+
+    def __init__(
+        self,
+        auth: PushNotificationSenderAuth,
+        max_queue: int = 1024,
+        workers: int = 16,
+        per_url_concurrency: int = 4,
+        max_attempts: int = 4,
+        backoff: float = 0.5,
+    ):
+        self.auth = auth
+        self.max_queue = max_queue
+        self.workers = workers
+        self.per_url_concurrency = per_url_concurrency
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self._queue: asyncio.Queue | None = None
+        # (url, task id) -> serialized body still waiting for a worker
+        self._pending: dict[tuple[str, str], bytes] = {}
+        self._in_flight: set[tuple[str, str]] = set()
+        # url -> (semaphore, deliveries using it)
+        self._url_limits: dict[str, list] = {}
+        self._workers: list[asyncio.Task] = []
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+        self.coalesced = 0
+        self.dropped = 0
+
+    def start(self):
+        """Start the workers on the running loop (done by the first notify)."""
+        if self._workers:
+            return
+        self._queue = asyncio.Queue(self.max_queue)
+        self._workers = [
+            asyncio.create_task(self._work()) for _ in range(self.workers)
+        ]
+
+    def notify(self, url: str, task_id: str, data: dict[str, Any]) -> bool:
+        """Queue a notification; False when it was dropped."""
+        self.start()
+        key = (url, task_id)
+        # Serialized now: later changes to `data` must not leak in.
+        body = canonical_body(data)
+        if key in self._pending:
+            self._pending[key] = body
+            self.coalesced += 1
+            return True
+        if key in self._in_flight:
+            # The worker sending the previous update sends this one next.
+            self._pending[key] = body
+            return True
+        try:
+            self._queue.put_nowait(key)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            logger.warning(f"Push-notification queue full, dropping update for {url}")
+            return False
+        self._pending[key] = body
+        return True
+
+    async def _work(self):
+        while True:
+            key = await self._queue.get()
+            try:
+                # Also send whatever arrived for this task while sending.
+                while key in self._pending:
+                    body = self._pending.pop(key)
+                    self._in_flight.add(key)
+                    try:
+                        await self._deliver(key[0], body)
+                    finally:
+                        self._in_flight.discard(key)
+            except Exception as e:
+                logger.warning(f"Error during sending push-notification for URL {key[0]}: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _post(self, url: str, body: bytes) -> httpx.Response:
+        entry = self._url_limits.get(url)
+        if entry is None:
+            entry = self._url_limits[url] = [asyncio.Semaphore(self.per_url_concurrency), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                return await self.auth.post_notification(url, body)
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._url_limits[url]
+
+    async def _deliver(self, url: str, body: bytes):
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                response = await self._post(url, body)
+                error = None if response.status_code < 400 else response.status_code
+            except httpx.TransportError as e:
+                error = e
+            if error is None:
+                self.sent += 1
+                return
+            if (
+                attempt == self.max_attempts
+                or (isinstance(error, int) and error not in RETRYABLE_STATUS)
+            ):
+                self.failed += 1
+                logger.warning(f"Push-notification to {url} failed: {error}")
+                return
+            self.retried += 1
+            # Full jitter keeps retries to one receiver from arriving in step.
+            await asyncio.sleep(random.uniform(0, self.backoff * 2 ** (attempt - 1)))
+
+    async def aclose(self, timeout: float | None = 5.0):
+        """Deliver what is queued (up to `timeout` seconds), then stop."""
+        if not self._workers:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Dropping {self._queue.qsize()} undelivered push-notifications")
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def metrics(self) -> dict[str, int]:
+        return {
+            "queued": self._queue.qsize() if self._queue else 0,
+            "sent": self.sent,
+            "failed": self.failed,
+            "retried": self.retried,
+            "coalesced": self.coalesced,
+            "dropped": self.dropped,
+        }
@@ -7,7 +7,7 @@ import functools
 import threading
 
 from state.state import AppState, SettingsState, StateMessage
-from state.host_agent_service import SendMessage, ListConversations, convert_message_to_state
+from state.host_agent_service import SendMessage, ListConversations, add_conversation_message, convert_message_to_state
 from .chat_bubble import chat_bubble
 from .form_render import is_form, render_form, form_sent
 from .async_poller import async_poller, AsyncAction
@@ -57,7 +57,7 @@ async def send_message(message: str, message_id: str = ""):
       lambda x: x.conversation_id == c.conversation_id,
       app_state.conversations), None)
   if conversation:
-    conversation.message_ids.append(state_message.message_id)
+    add_conversation_message(conversation, state_message.message_id)
   response = await SendMessage(request)
 
 
@@ -4,9 +4,10 @@ import mesop.labs as mel
 from .side_nav import sidenav
 from .async_poller import async_poller, AsyncAction
 from .poller import polling_buttons
+from .update_stream import update_stream
 
 from state.state import AppState
-from state.host_agent_service import UpdateAppState
+from state.host_agent_service import UpdateAppState, ApplyUpdates
 
 from styles.styles import (
     MAIN_COLUMN_STYLE,
@@ -24,6 +25,14 @@ async def refresh_app_state(e: mel.WebEvent):  # pylint: disable=unused-argument
     yield
 
 
+async def apply_updates(e: mel.WebEvent):
+    """Apply pushed state deltas event handler"""
+    yield
+    app_state = me.state(AppState)
+    await ApplyUpdates(app_state, e.value["deltas"])
+    yield
+
+
 @me.content_component
 def page_scaffold():
     """page scaffold component"""
@@ -39,6 +48,12 @@ def page_scaffold():
     async_poller(
         action=action, trigger_event=refresh_app_state
     )
+    update_stream(
+        trigger_event=apply_updates,
+        since=app_state.last_update_seq,
+        conversation_id=app_state.current_conversation_id,
+        key="update_stream",
+    )
 
     sidenav("")
 
@@ -0,0 +1,68 @@
+import {
+  LitElement,
+  html,
+} from 'https://cdn.jsdelivr.net/gh/lit/dist@3/core/lit-core.min.js';
+
+class UpdateStream extends LitElement {
+  static properties = {
+    triggerEvent: {type: String},
+    since: {type: Number},
+    conversation_id: {type: String},
+    batch_ms: {type: Number},
+  };
+
+  constructor() {
+    super();
+    this.pending = [];
+    this.flushTimer = null;
+    this.source = null;
+  }
+
+  render() {
+    return html`<div></div>`;
+  }
+
+  firstUpdated() {
+    // EventSource reconnects on its own and resumes with Last-Event-ID.
+    this.source = new EventSource(`/updates/stream?since=${this.since || 0}`);
+    this.source.onmessage = (e) => {
+      this.pending.push(JSON.parse(e.data));
+      this.scheduleFlush();
+    };
+  }
+
+  updated(changed) {
+    const previous = changed.get('conversation_id');
+    if (previous !== undefined && previous !== this.conversation_id) {
+      // Messages of the newly opened conversation are not in the stream yet.
+      this.pending.push({kind: 'resync'});
+      this.scheduleFlush();
+    }
+  }
+
+  disconnectedCallback() {
+    super.disconnectedCallback();
+    if (this.source) {
+      this.source.close();
+    }
+    clearTimeout(this.flushTimer);
+  }
+
+  scheduleFlush() {
+    // Coalesce bursts (e.g. streamed task updates) into one state update.
+    if (this.flushTimer === null) {
+      this.flushTimer = setTimeout(() => this.flush(), this.batch_ms || 100);
+    }
+  }
+
+  flush() {
+    this.flushTimer = null;
+    const deltas = this.pending;
+    this.pending = [];
+    if (deltas.length) {
+      this.dispatchEvent(new MesopEvent(this.triggerEvent, {deltas: deltas}));
+    }
+  }
+}
+
+customElements.define('update-stream-component', UpdateStream);
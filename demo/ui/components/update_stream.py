@@ -0,0 +1,35 @@
+from typing import Any, Callable
+
+import mesop.labs as mel
+
+
+@mel.web_component(path="./update_stream.js")
+def update_stream(
+    *,
+    trigger_event: Callable[[mel.WebEvent], Any],
+    since: int = 0,
+    conversation_id: str = "",
+    batch_ms: int = 100,
+    key: str | None = None,
+):
+  """Creates an invisible component that listens to the server update stream.
+
+  Deltas pushed by the server are batched for `batch_ms` and delivered to
+  `trigger_event` as `{"deltas": [...]}`. Opening a different conversation
+  sends a `resync` delta so its messages get loaded.
+
+  Returns:
+    The web component that was created.
+  """
+  return mel.insert_web_component(
+      name="update-stream-component",
+      key=key,
+      events={
+          "triggerEvent": trigger_event,
+      },
+      properties={
+          "since": since,
+          "conversation_id": conversation_id,
+          "batch_ms": batch_ms,
+      },
+  )
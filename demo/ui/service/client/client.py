@@ -1,6 +1,6 @@
 import httpx
 from httpx_sse import connect_sse
-from typing import Any, AsyncIterable
+from typing import Any, AsyncIterable, Awaitable, Callable, TypeVar
 from service.types import (
     CreateConversationRequest,
     CreateConversationResponse,
@@ -24,9 +24,12 @@ from service.types import (
     AgentClientJSONError,
     JSONRPCRequest,
     Conversation,
+    PagedResponse,
 )
 import json
 
+R = TypeVar("R", bound=PagedResponse)
+
 class ConversationClient:
 
   def __init__(self, base_url):
@@ -67,6 +70,26 @@ class ConversationClient:
   async def list_tasks(self, payload: ListTaskRequest) -> ListTaskResponse:
     return ListTaskResponse(**await self._send_request(payload))
 
+  async def list_changes(
+      self,
+      fetch: Callable[[JSONRPCRequest], Awaitable[R]],
+      payload: JSONRPCRequest,
+  ) -> R:
+    """Calls a paged list method from `payload.params.cursor` until there is
+    nothing more, merging the pages into the last response."""
+    items = []
+    reset = False
+    while True:
+      response = await fetch(payload)
+      items.extend(response.result or [])
+      reset = reset or response.reset
+      if not response.has_more:
+        break
+      payload.params.cursor = response.next_cursor
+    response.result = items
+    response.reset = reset
+    return response
+
   async def register_agent(self, payload: RegisterAgentRequest) -> RegisterAgentResponse:
     return RegisterAgentResponse(**await self._send_request(payload))
 
@@ -3,7 +3,7 @@ import datetime
 import json
 from typing import Tuple, Optional, Any
 import uuid
-from service.types import Conversation, Event
+from service.types import Conversation, Event, PageParams
 from common.types import (
     Message,
     Task,
@@ -19,12 +19,15 @@ from common.types import (
     FileContent,
     Part,
 )
+from common.client import ArtifactAssembler
 from hosts.multiagent.host_agent import HostAgent
 from hosts.multiagent.remote_agent_connection import (
     TaskCallbackArg,
 )
-from utils.agent_card import get_agent_card
 from service.server.application_manager import ApplicationManager
+from service.server.revision_log import Page, page_sequence
+from service.server.state_store import StateStore, task_still_open
+from common.utils.file_transfer import decode_file_bytes
 from google.adk import Runner
 from google.adk.sessions.in_memory_session_service import InMemorySessionService
 from google.adk.memory.in_memory_memory_service import InMemoryMemoryService
@@ -32,7 +35,6 @@ from google.adk.artifacts import InMemoryArtifactService
 from google.adk.events.event import Event as ADKEvent
 from google.adk.events.event_actions import EventActions as ADKEventActions
 from google.genai import types
-import base64
 
 
 class ADKHostManager(ApplicationManager):
@@ -42,22 +44,14 @@ class ADKHostManager(ApplicationManager):
   the AgentServer. This acts as the service contract that the Mesop app
   uses to send messages to the agent and provide information for the frontend.
   """
-  _conversations: list[Conversation]
-  _messages: list[Message]
-  _tasks: list[Task]
-  _events: dict[str, Event]
-  _pending_message_ids: list[str]
-  _agents: list[AgentCard]
-  _task_map: dict[str, str]
+  _store: StateStore
+  _agents: dict[str, AgentCard]
 
   def __init__(self):
-    self._conversations = []
-    self._messages = []
-    self._tasks = []
-    self._events = {}
-    self._pending_message_ids = []
-    self._agents = []
-    self._artifact_chunks = {}
+    # Conversations, messages, tasks, events and the message id maps.
+    self._store = StateStore()
+    self._agents = {}
+    self._artifacts = ArtifactAssembler()
     self._session_service = InMemorySessionService()
     self._artifact_service = InMemoryArtifactService()
     self._memory_service = InMemoryMemoryService()
@@ -66,9 +60,12 @@ class ADKHostManager(ApplicationManager):
     self.app_name = "A2A"
     self._initialize_host()
     # Map of message id to task id
-    self._task_map = {}
+    self._task_map = self._store.task_map
     # Map to manage 'lost' message ids until protocol level id is introduced
-    self._next_id = {} # dict[str, str]: previous message to next message
+    self._next_id = self._store.next_id # previous message to next message
+
+  async def aclose(self):
+    await self._host_agent.aclose()
 
   def _initialize_host(self):
     agent = self._host_agent.create_agent()
@@ -87,7 +84,8 @@ class ADKHostManager(ApplicationManager):
       )
       conversation_id = session.id
       c = Conversation(conversation_id=conversation_id, is_active=True)
-      self._conversations.append(c)
+      self._store.add_conversation(c)
+      self.publish_change('conversation', c.info())
       return c
 
 
@@ -107,23 +105,26 @@ class ADKHostManager(ApplicationManager):
     return message
 
   async def process_message(self, message: Message):
-    self._messages.append(message)
     message_id = get_message_id(message)
-    if message_id:
-      self._pending_message_ids.append(message_id)
     conversation_id = (
         message.metadata['conversation_id']
         if 'conversation_id' in message.metadata
         else None
     )
+    # The runner below still needs the inline bytes of `message`. Ingested
+    # first: a message with invalid file bytes must not stay pending.
+    stored = self.ingest_message(message)
+    if message_id:
+      self._store.add_pending(message_id, conversation_id)
     # Now check the conversation and attach the message id.
     conversation = self.get_conversation(conversation_id)
-    if conversation:
-      conversation.messages.append(message)
+    self._store.add_message(stored, conversation)
+    self.publish_change('message', stored)
+    self.publish_pending()
     self.add_event(Event(
         id=str(uuid.uuid4()),
         actor='user',
-        content=message,
+        content=stored,
         timestamp=datetime.datetime.utcnow().timestamp(),
     ))
     final_event: GenAIEvent | None = None
@@ -140,11 +141,7 @@ class ADKHostManager(ApplicationManager):
     last_message_id = get_last_message_id(message)
     if (last_message_id and
         last_message_id in self._task_map and
-        task_still_open(next(
-            filter(
-                lambda x: x.id == self._task_map[last_message_id],
-                self._tasks),
-            None))):
+        task_still_open(self._store.get_task(self._task_map[last_message_id]))):
           state_update['task_id'] = self._task_map[last_message_id]
     # Need to upsert session state now, only way is to append an event.
     self._session_service.append_event(session, ADKEvent(
@@ -161,7 +158,8 @@ class ADKHostManager(ApplicationManager):
       self.add_event(Event(
           id=event.id,
           actor=event.author,
-          content=self.adk_content_to_message(event.content, conversation_id),
+          content=self.ingest_message(
+              self.adk_content_to_message(event.content, conversation_id)),
           timestamp=event.timestamp,
       ))
       final_event = event
@@ -181,37 +179,67 @@ class ADKHostManager(ApplicationManager):
           **{'last_message_id': last_message_id,
              'message_id': new_message_id}
       }
-      self._messages.append(response)
-
-    if conversation:
-      conversation.messages.append(response)
-    self._pending_message_ids.remove(message_id)
+      response = self.ingest_message(response)
+      self._store.add_message(response, conversation)
+      self.publish_change('message', response)
+    self._store.remove_pending(message_id)
+    self.publish_pending()
 
   def add_task(self, task: Task):
-    self._tasks.append(task)
+    self._store.put_task(task)
+    self.publish_task(task)
 
   def update_task(self, task: Task):
-    for i, t in enumerate(self._tasks):
-      if t.id == task.id:
-        self._tasks[i] = task
-        return
+    if self.save_task(task):
+      self.publish_task(task)
+
+  def save_task(self, task: Task) -> bool:
+    """Store a known task; False if the task was never added."""
+    if not self._store.has_task(task.id):
+      return False
+    self._store.put_task(task)
+    return True
+
+  def publish_task(self, task: Task):
+    self.publish_change('task', task)
+    self.publish_task_pending()
+
+  def publish_task_pending(self):
+    # The pending text shown for a message follows its task's history.
+    if self._store.pending:
+      self.publish_pending()
 
   def task_callback(self, task: TaskCallbackArg):
+    # Remote agent connections call back from several threads; reading,
+    # changing and publishing a task is one step under the store lock, so
+    # updates are neither lost nor published out of order.
+    with self._store.lock:
+      return self._apply_task_update(task)
+
+  def _apply_task_update(self, task: TaskCallbackArg):
     if isinstance(task, TaskStatusUpdateEvent):
       current_task = self.add_or_get_task(task)
       current_task.status = task.status
+      closed = []
+      if not task_still_open(current_task):
+        closed = self._artifacts.close(current_task.id)
+        for artifact in closed:
+          self.put_artifact(current_task, artifact)
       self.attach_message_to_task(task.status.message, current_task.id)
       self.insert_message_history(current_task, task.status.message)
-      self.update_task(current_task)
+      if self.save_task(current_task):
+        self.publish_task_status(current_task)
+        for artifact in closed:
+          self.publish_artifact(current_task, artifact)
+        self.publish_task_pending()
       self.insert_id_trace(task.status.message)
       return current_task
     elif isinstance(task, TaskArtifactUpdateEvent):
       current_task = self.add_or_get_task(task)
       self.process_artifact_event(current_task, task)
-      self.update_task(current_task)
       return current_task
     # Otherwise this is a Task, either new or updated
-    elif not any(filter(lambda x: x.id == task.id, self._tasks)):
+    elif not self._store.has_task(task.id):
       self.attach_message_to_task(task.status.message, task.id)
       self.insert_id_trace(task.status.message)
       self.add_task(task)
@@ -242,15 +270,11 @@ class ADKHostManager(ApplicationManager):
     message_id = get_message_id(message)
     if not message_id:
       return
-    if get_message_id(task.status.message) not in [
-        get_message_id(x) for x in task.history
-    ]:
-      task.history.append(task.status.message)
-    else:
-      print("Message id already in history", get_message_id(task.status.message), task.history)
+    if not self._store.add_task_message(task, task.status.message):
+      print("Message id already in history", get_message_id(task.status.message))
 
   def add_or_get_task(self, task: TaskCallbackArg):
-    current_task = next(filter(lambda x: x.id == task.id, self._tasks), None)
+    current_task = self._store.get_task(task.id)
     if not current_task:
       conversation_id = None
       if task.metadata and 'conversation_id' in task.metadata:
@@ -268,48 +292,60 @@ class ADKHostManager(ApplicationManager):
     return current_task
 
   def process_artifact_event(self, current_task:Task, task_update_event: TaskArtifactUpdateEvent):
-    artifact = task_update_event.artifact
-    if not artifact.append:
-      #received the first chunk or entire payload for an artifact
-      if artifact.lastChunk is None or artifact.lastChunk:
-        #lastChunk bit is missing or is set to true, so this is the entire payload
-        #add this to artifacts
-        if not current_task.artifacts:
-          current_task.artifacts = []
-        current_task.artifacts.append(artifact)
+    # Chunks are shown as they arrive; the assembler bounds what is buffered.
+    chunk = task_update_event.artifact
+    partial = streaming_artifact(current_task, chunk.index)
+    seen = len(partial.parts) if partial is not None else 0
+    artifact = self._artifacts.add(task_update_event.id, chunk)
+    self.put_artifact(current_task, artifact)
+    if self.save_task(current_task):
+      if artifact is partial and not artifact.lastChunk:
+        # Only the parts the assembler accepted (replays and truncated
+        # chunks add none).
+        if len(artifact.parts) > seen:
+          self.publish_artifact(current_task, artifact.model_copy(update={
+              'parts': artifact.parts[seen:], 'append': True}))
       else:
-        #this is a chunk of an artifact, stash it in temp store for assemling
-        if not task_update_event.id in self._artifact_chunks:
-              self._artifact_chunks[task_update_event.id] = {}
-        self._artifact_chunks[task_update_event.id][artifact.index] = artifact
-    else:
-        # we received an append chunk, add to the existing temp artifact
-        current_temp_artifact = self._artifact_chunks[task_update_event.id][artifact.index]
-        # TODO handle if current_temp_artifact is missing
-        current_temp_artifact.parts.extend(artifact.parts)
-        if artifact.lastChunk:
-          current_task.artifacts.append(current_temp_artifact)
-          del self._artifact_chunks[task_update_event.id][artifact.index]
+        # A new artifact, a restarted one or a finished one (text joined).
+        self.publish_artifact(current_task, artifact)
+    # Close the artifacts of agents that went quiet, keeping what did arrive.
+    for task_id, expired in self._artifacts.expire():
+      task = self._store.get_task(task_id)
+      if task:
+        self.put_artifact(task, expired)
+        if self.save_task(task):
+          self.publish_artifact(task, expired)
+
+  def put_artifact(self, task: Task, artifact: Artifact):
+    """Add an artifact, replacing the partial one with its index if streaming."""
+    if task.artifacts is None:
+      task.artifacts = []
+    for i in range(len(task.artifacts) - 1, -1, -1):
+      existing = task.artifacts[i]
+      if existing is artifact:
+        # The assembler finishes the partial artifact in place.
+        return
+      if existing.index == artifact.index and existing.lastChunk is False:
+        task.artifacts[i] = artifact
+        return
+    task.artifacts.append(artifact)
 
   def add_event(self, event: Event):
-    self._events[event.id] = event
+    self._store.add_event(event)
+    self.publish_change('event', event)
 
   def get_conversation(
       self,
       conversation_id: Optional[str]
   ) -> Optional[Conversation]:
-    if not conversation_id:
-      return None
-    return next(
-        filter(lambda c: c.conversation_id == conversation_id,
-               self._conversations), None)
+    return self._store.get_conversation(conversation_id)
 
   def get_pending_messages(self) -> list[Tuple[str, str]]:
     rval = []
-    for message_id in self._pending_message_ids:
+    for message_id in list(self._store.pending):
       if message_id in self._task_map:
         task_id = self._task_map[message_id]
-        task = next(filter(lambda x: x.id == task_id, self._tasks), None)
+        task = self._store.get_task(task_id)
         if not task:
           rval.append((message_id, ""))
         elif task.history and task.history[-1].parts:
@@ -324,30 +360,41 @@ class ADKHostManager(ApplicationManager):
         rval.append((message_id, ""))
     return rval
 
-  def register_agent(self, url):
-    agent_data = get_agent_card(url)
-    if not agent_data.url:
-      agent_data.url = url
-    self._agents.append(agent_data)
-    self._host_agent.register_agent_card(agent_data)
-    # Now update the host agent definition
-    self._initialize_host()
+  def register_agent_card(self, card: AgentCard):
+    self._agents[card.name] = card
+    # The runner's agent reads cards and tools through the host agent, so
+    # registration does not need a new LlmAgent/Runner.
+    self._host_agent.register_agent_card(card)
 
   @property
   def agents(self) -> list[AgentCard]:
-    return self._agents
+    return list(self._agents.values())
+
+  def list_conversations(self, params: PageParams) -> Page:
+    return self._store.list_conversations(params.cursor, params.limit)
+
+  def list_messages(self, params: PageParams) -> Page:
+    conversation = self.get_conversation(params.conversation_id)
+    return page_sequence(
+        conversation.messages if conversation else [], params.cursor, params.limit)
+
+  def list_tasks(self, params: PageParams) -> Page:
+    return self._store.tasks.page(params.cursor, params.limit, params.conversation_id)
+
+  def list_events(self, params: PageParams) -> Page:
+    return self._store.events.page(params.cursor, params.limit, params.conversation_id)
 
   @property
   def conversations(self) -> list[Conversation]:
-    return self._conversations
+    return self._store.conversations.values()
 
   @property
   def tasks(self) -> list[Task]:
-    return self._tasks
+    return self._store.tasks.values()
 
   @property
   def events(self) -> list[Event]:
-    return sorted(self._events.values(), key=lambda x: x.timestamp)
+    return self._store.events.values()
 
   def adk_content_from_message(self, message: Message) -> types.Content:
     parts: list[types.Part] = []
@@ -358,15 +405,15 @@ class ADKHostManager(ApplicationManager):
         json_string = json.dumps(part.data)
         parts.append(types.Part.from_text(text=json_string))
       elif part.type == "file":
-        if part.uri:
+        if part.file.uri:
           parts.append(types.Part.from_uri(
-              file_uri=part.uri,
-              mime_type=part.mimeType
+              file_uri=part.file.uri,
+              mime_type=part.file.mimeType
           ))
-        elif content_part.bytes:
+        elif part.file.bytes:
           parts.append(types.Part.from_bytes(
-              data=part.bytes.encode('utf-8'),
-              mime_type=part.mimeType)
+              data=decode_file_bytes(part.file.bytes),
+              mime_type=part.file.mimeType)
           )
         else:
           raise ValueError("Unsupported message type")
@@ -389,15 +436,14 @@ class ADKHostManager(ApplicationManager):
         except:
           parts.append(TextPart(text=part.text))
       elif part.inline_data:
-        parts.append(FilePart(
-            data=part.inline_data.decode('utf-8'),
-            mimeType=part.inline_data.mime_type
-        ))
+        # Raw bytes go straight to the blob store, without a base64 round trip.
+        parts.append(self.file_part(
+            part.inline_data.data, part.inline_data.mime_type))
       elif part.file_data:
-        parts.append(FilePart(
+        parts.append(FilePart(file=FileContent(
             uri=part.file_data.file_uri,
             mimeType=part.file_data.mime_type
-        ))
+        )))
       # These aren't managed by the A2A message structure, these are internal
       # details of ADK, we will simply flatten these to json representations.
       elif part.video_metadata:
@@ -427,12 +473,8 @@ class ADKHostManager(ApplicationManager):
                                                               app_name=self.app_name,
                                                               filename = p.data['artifact-file-id'])
                 file_data = file_part.inline_data
-                base64_data = base64.b64encode(file_data.data).decode('utf-8')
-                parts.append(FilePart(
-                  file=FileContent(
-                      bytes=base64_data, mimeType=file_data.mime_type, name='artifact_file'
-                  )
-                ))
+                parts.append(self.file_part(
+                    file_data.data, file_data.mime_type, name='artifact_file'))
               else:
                 parts.append(DataPart(data=p.data))
             else:
@@ -449,6 +491,14 @@ class ADKHostManager(ApplicationManager):
         metadata={'conversation_id': conversation_id},
     )
 
+
+def streaming_artifact(task: Task, index: int) -> Artifact | None:
+  """The artifact at `index` that is still receiving chunks, if any."""
+  for artifact in reversed(task.artifacts or []):
+    if artifact.index == index:
+      return artifact if artifact.lastChunk is False else None
+  return None
+
 def get_message_id(m: Message | None) -> str  | None:
   if not m or not m.metadata or 'message_id' not in m.metadata:
     return None
@@ -458,10 +508,3 @@ def get_last_message_id(m: Message | None) -> str | None:
   if not m or not m.metadata or 'last_message_id' not in m.metadata:
     return None
   return m.metadata['last_message_id']
-
-def task_still_open(task: Task | None) -> bool:
-  if not task:
-    return False
-  return task.status.state in [
-      TaskState.SUBMITTED, TaskState.WORKING, TaskState.INPUT_REQUIRED
-  ]
\ No newline at end of file
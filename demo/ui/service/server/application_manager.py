@@ -1,9 +1,101 @@
 from abc import ABC, abstractmethod
-from common.types import Message, Task, AgentCard
-from service.types import Conversation, Event
+from common.types import Message, Task, AgentCard, FilePart, Artifact
+from service.types import Conversation, Event, PageParams
+from common.utils.blob_store import BlobStore
+from common.utils.file_transfer import decode_file_bytes, make_file_part
+from utils.agent_card import get_agent_card
+from .change_feed import ChangeFeed
+from .revision_log import Page
+
+# Route the server serves blob store files from.
+FILE_PATH = "/message/file"
+
+def load_agent_card(url: str) -> AgentCard:
+  """Fetch the agent card served at `url`. Blocking network I/O."""
+  card = get_agent_card(url)
+  if not card.url:
+    card.url = url
+  return card
 
 class ApplicationManager(ABC):
 
+  # Set by the server to push state changes to the UI as they happen.
+  change_feed: ChangeFeed | None = None
+
+  def publish_change(self, kind: str, data):
+    """Publish a delta of `kind` ('conversation', 'message', 'task',
+    'task_status', 'task_artifact', 'pending' or 'event') to the change feed,
+    if one is attached."""
+    if self.change_feed is not None:
+      self.change_feed.publish(kind, data)
+
+  def publish_task_status(self, task: Task):
+    """Publish a task's new status, with the message it added to the history,
+    instead of the whole task."""
+    self.publish_change('task_status', {
+        'id': task.id,
+        'sessionId': task.sessionId,
+        'status': task.status.model_dump(mode='json', exclude_none=True),
+    })
+
+  def publish_artifact(self, task: Task, artifact: Artifact):
+    """Publish an artifact of a task. With `append` set it carries only the
+    new parts of the artifact at `index`; otherwise it replaces that
+    artifact if it is still streaming, or adds a new one."""
+    self.publish_change('task_artifact', {
+        'id': task.id,
+        'sessionId': task.sessionId,
+        'artifact': artifact.model_dump(mode='json', exclude_none=True),
+    })
+
+  def publish_pending(self):
+    self.publish_change('pending', self.get_pending_messages())
+
+  # Set by the server; inline file bytes are moved here when messages arrive.
+  blob_store: BlobStore | None = None
+
+  def ingest_message(self, message: Message | None) -> Message | None:
+    """Return `message` with inline file bytes replaced by blob store URIs.
+
+    The original message is left untouched (it may still be sent to an
+    agent); messages without inline files are returned as is.
+    """
+    if message is None or self.blob_store is None:
+      return message
+    if not any(p.type == 'file' and p.file.bytes for p in message.parts):
+      return message
+    parts = []
+    for part in message.parts:
+      if part.type == 'file' and part.file.bytes:
+        part = self.file_part(
+            decode_file_bytes(part.file.bytes),
+            part.file.mimeType,
+            name=part.file.name,
+            metadata=part.metadata)
+      parts.append(part)
+    return message.model_copy(update={'parts': parts})
+
+  def file_part(
+      self,
+      data: bytes,
+      mime_type: str | None,
+      name: str | None = None,
+      metadata: dict | None = None,
+  ) -> FilePart:
+    """FilePart for raw bytes: a blob store URI, or base64 without a store."""
+    # The UI serves every stored file itself, however small.
+    return make_file_part(
+        data,
+        mime_type,
+        name=name,
+        blob_store=self.blob_store,
+        path=FILE_PATH,
+        inline_limit=0,
+        metadata=metadata)
+
+  async def aclose(self):
+    """Release background work on server shutdown."""
+
   @abstractmethod
   def create_conversation(self) -> Conversation:
     pass
@@ -16,14 +108,34 @@ class ApplicationManager(ABC):
   async def process_message(self, message: Message):
     pass
 
-  @abstractmethod
   def register_agent(self, url: str):
+    self.register_agent_card(load_agent_card(url))
+
+  @abstractmethod
+  def register_agent_card(self, card: AgentCard):
+    """Add a fetched card. Runs on the event loop, like every other update."""
     pass
 
   @abstractmethod
   def get_pending_messages(self) -> list[str]:
     pass
 
+  @abstractmethod
+  def list_conversations(self, params: PageParams) -> Page:
+    pass
+
+  @abstractmethod
+  def list_messages(self, params: PageParams) -> Page:
+    pass
+
+  @abstractmethod
+  def list_tasks(self, params: PageParams) -> Page:
+    pass
+
+  @abstractmethod
+  def list_events(self, params: PageParams) -> Page:
+    pass
+
   @property
   @abstractmethod
   def conversations(self) -> list[Conversation]:
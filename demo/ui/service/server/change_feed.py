@@ -0,0 +1,96 @@
+import asyncio
+import threading
+from collections import deque
+from typing import Any, AsyncIterator
+
+from pydantic import BaseModel
+
+
+class ChangeFeed:
+  """Sequence-numbered log of state changes made by an ApplicationManager.
+
+  Managers publish small deltas (a message, a task, the pending list) from
+  whatever thread they run on; the UI stream subscribes from the server loop
+  and receives each delta once instead of re-reading the whole state. The
+  last `maxlen` deltas are kept so a reconnecting client can catch up from its
+  last sequence; anything older is reported as a gap and the client resyncs.
+  """
+
+  def __init__(
+      self,
+      maxlen: int = 1024,
+      subscriber_queue_size: int = 256,
+  ):
+    self._deltas: deque[dict[str, Any]] = deque(maxlen=maxlen)
+    self._subscriber_queue_size = subscriber_queue_size
+    self._subscribers: set[tuple[asyncio.AbstractEventLoop, asyncio.Queue]] = set()
+    self._lock = threading.Lock()
+    self.sequence = 0
+
+  def publish(self, kind: str, data: Any):
+    """Record a change; safe to call from any thread."""
+    # Serialize now so later in-place mutation does not leak into the delta.
+    if isinstance(data, BaseModel):
+      data = data.model_dump(mode="json", exclude_none=True)
+    with self._lock:
+      self.sequence += 1
+      delta = {"seq": self.sequence, "kind": kind, "data": data}
+      self._deltas.append(delta)
+      subscribers = list(self._subscribers)
+    for loop, queue in subscribers:
+      loop.call_soon_threadsafe(self._offer, queue, delta)
+
+  def _offer(self, queue: asyncio.Queue, delta: dict[str, Any]):
+    try:
+      queue.put_nowait(delta)
+    except asyncio.QueueFull:
+      # A stalled client gets a single resync instead of unbounded buffering.
+      while not queue.empty():
+        queue.get_nowait()
+      queue.put_nowait(self._resync(delta["seq"]))
+
+  @staticmethod
+  def _resync(sequence: int) -> dict[str, Any]:
+    return {"seq": sequence, "kind": "resync", "data": None}
+
+  def since(self, sequence: int) -> tuple[list[dict[str, Any]], bool]:
+    """Return the deltas after `sequence` and whether some were dropped."""
+    with self._lock:
+      return self._since(sequence)
+
+  def _since(self, sequence: int) -> tuple[list[dict[str, Any]], bool]:
+    if sequence > self.sequence:
+      # The server restarted; the client's sequence means nothing here.
+      return [], True
+    deltas = [d for d in self._deltas if d["seq"] > sequence]
+    oldest = self._deltas[0]["seq"] if self._deltas else self.sequence + 1
+    return deltas, sequence + 1 < oldest and sequence < self.sequence
+
+  async def subscribe(self, sequence: int = 0) -> AsyncIterator[dict[str, Any]]:
+    """Yield every delta after `sequence`, then live deltas as they happen.
+
+    A client without a sequence (0) or one that fell out of the backlog first
+    gets a `resync` delta carrying the current sequence.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue(self._subscriber_queue_size)
+    subscriber = (loop, queue)
+    with self._lock:
+      # Register and read the backlog under one lock so nothing slips between.
+      self._subscribers.add(subscriber)
+      if sequence <= 0:
+        backlog, gap = [], True
+      else:
+        backlog, gap = self._since(sequence)
+      current = self.sequence
+    try:
+      if gap:
+        yield self._resync(current)
+      else:
+        for delta in backlog:
+          yield delta
+      while True:
+        yield await queue.get()
+    finally:
+      with self._lock:
+        self._subscribers.discard(subscriber)
@@ -2,7 +2,7 @@ import asyncio
 import datetime
 from typing import Tuple, Optional
 import uuid
-from service.types import Conversation, Event
+from service.types import Conversation, Event, PageParams
 from common.types import (
     Message,
     Task,
@@ -13,8 +13,9 @@ from common.types import (
     AgentCard,
     DataPart,
 )
-from utils.agent_card import get_agent_card
 from service.server.application_manager import ApplicationManager
+from service.server.revision_log import Page, page_sequence
+from service.server.state_store import StateStore
 from service.server import test_image
 
 class InMemoryFakeAgentManager(ApplicationManager):
@@ -24,28 +25,21 @@ class InMemoryFakeAgentManager(ApplicationManager):
   the AgentServer. This acts as the service contract that the Mesop app
   uses to send messages to the agent and provide information for the frontend.
   """
-  _conversations: list[Conversation]
-  _messages: list[Message]
-  _tasks: list[Task]
-  _events: list[Event]
-  _pending_message_ids: list[str]
+  _store: StateStore
   _next_message_idx: int
   _agents: list[AgentCard]
 
   def __init__(self):
-    self._conversations = []
-    self._messages = []
-    self._tasks = []
-    self._events = []
-    self._pending_message_ids = []
+    self._store = StateStore()
     self._next_message_idx = 0
     self._agents = []
-    self._task_map = {}
+    self._task_map = self._store.task_map
 
   def create_conversation(self) -> Conversation:
     conversation_id = str(uuid.uuid4())
     c = Conversation(conversation_id=conversation_id, is_active=True)
-    self._conversations.append(c)
+    self._store.add_conversation(c)
+    self.publish_change('conversation', c.info())
     return c
 
   def sanitize_message(self, message: Message) -> Message:
@@ -55,19 +49,20 @@ class InMemoryFakeAgentManager(ApplicationManager):
     return message
 
   async def process_message(self, message: Message):
-    self._messages.append(message)
+    message = self.ingest_message(message)
     message_id = message.metadata['message_id']
-    self._pending_message_ids.append(message_id)
     conversation_id = (
         message.metadata['conversation_id']
         if 'conversation_id' in message.metadata
         else None
     )
+    self._store.add_pending(message_id, conversation_id)
     # Now check the conversation and attach the message id.
     conversation = self.get_conversation(conversation_id)
-    if conversation:
-      conversation.messages.append(message)
-    self._events.append(Event(
+    self._store.add_message(message, conversation)
+    self.publish_change('message', message)
+    self.publish_pending()
+    self.add_event(Event(
         id=str(uuid.uuid4()),
         actor="host",
         content=message,
@@ -92,33 +87,40 @@ class InMemoryFakeAgentManager(ApplicationManager):
     await asyncio.sleep(self._next_message_idx)
     response = self.next_message()
     response.metadata = {**message.metadata, **{'message_id': str(uuid.uuid4())}}
-    if conversation:
-      conversation.messages.append(response)
-    self._events.append(Event(
+    response = self.ingest_message(response)
+    self._store.add_message(response, conversation)
+    self.publish_change('message', response)
+    self.add_event(Event(
         id=str(uuid.uuid4()),
         actor="host",
         content=response,
         timestamp=datetime.datetime.utcnow().timestamp(),
     ))
-    self._pending_message_ids.remove(message.metadata['message_id'])
+    self._store.remove_pending(message.metadata['message_id'])
+    self.publish_pending()
     # Now clean up the task
     if task:
       task.status.state = TaskState.COMPLETED
-      task.artifacts = [Artifact(name="response", parts=response.parts)]
-      task.history.append(response)
-      self.update_task(task)
+      artifact = Artifact(name="response", parts=response.parts)
+      task.artifacts = [artifact]
+      self._store.add_task_message(task, response)
+      if self._store.has_task(task.id):
+        self._store.put_task(task)
+        self.publish_task_status(task)
+        self.publish_artifact(task, artifact)
 
   def add_task(self, task: Task):
-    self._tasks.append(task)
+    self._store.put_task(task)
+    self.publish_change('task', task)
 
   def update_task(self, task: Task):
-    for i, t in enumerate(self._tasks):
-      if t.id == task.id:
-        self._tasks[i] = task
-        return
+    if self._store.has_task(task.id):
+      self._store.put_task(task)
+      self.publish_change('task', task)
 
   def add_event(self, event: Event):
-    self._events.append(event)
+    self._store.add_event(event)
+    self.publish_change('event', event)
 
   def next_message(self) -> Message:
     message = _message_queue[self._next_message_idx]
@@ -129,18 +131,14 @@ class InMemoryFakeAgentManager(ApplicationManager):
       self,
       conversation_id: Optional[str]
   ) -> Optional[Conversation]:
-    if not conversation_id:
-      return None
-    return next(
-        filter(lambda c: c.conversation_id == conversation_id,
-               self._conversations), None)
+    return self._store.get_conversation(conversation_id)
 
   def get_pending_messages(self) -> list[Tuple[str,str]]:
     rval = []
-    for message_id in self._pending_message_ids:
+    for message_id in list(self._store.pending):
       if message_id in self._task_map:
         task_id = self._task_map[message_id]
-        task = next(filter(lambda x: x.id == task_id, self._tasks), None)
+        task = self._store.get_task(task_id)
         if not task:
           rval.append((message_id, ""))
         elif task.history and task.history[-1].parts:
@@ -154,29 +152,40 @@ class InMemoryFakeAgentManager(ApplicationManager):
       else:
         rval.append((message_id, ""))
       return rval
-    return self._pending_message_ids
+    return list(self._store.pending)
 
-  def register_agent(self, url):
-    agent_data = get_agent_card(url)
-    if not agent_data.url:
-      agent_data.url = url
-    self._agents.append(agent_data)
+  def register_agent_card(self, card: AgentCard):
+    self._agents.append(card)
 
   @property
   def agents(self) -> list[AgentCard]:
     return self._agents
 
+  def list_conversations(self, params: PageParams) -> Page:
+    return self._store.list_conversations(params.cursor, params.limit)
+
+  def list_messages(self, params: PageParams) -> Page:
+    conversation = self.get_conversation(params.conversation_id)
+    return page_sequence(
+        conversation.messages if conversation else [], params.cursor, params.limit)
+
+  def list_tasks(self, params: PageParams) -> Page:
+    return self._store.tasks.page(params.cursor, params.limit, params.conversation_id)
+
+  def list_events(self, params: PageParams) -> Page:
+    return self._store.events.page(params.cursor, params.limit, params.conversation_id)
+
   @property
   def conversations(self) -> list[Conversation]:
-    return self._conversations
+    return self._store.conversations.values()
 
   @property
   def tasks(self) -> list[Task]:
-    return self._tasks
+    return self._store.tasks.values()
 
   @property
   def events(self) -> list[Event]:
-    return self._events
+    return self._store.events.values()
 
 # This represents the precanned responses that will be returned in order.
 # Extend this list to test more functionality of the UI
@@ -0,0 +1,93 @@
+import asyncio
+import logging
+import threading
+from collections import deque
+from typing import Any, Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+
+class MessageExecutor:
+  """Processes messages on one long-lived event loop in a background thread.
+
+  Messages of the same conversation run strictly in submission order; at most
+  `max_concurrency` conversations are processed at the same time. Because
+  every message runs on the same loop, HTTP clients and the manager's state
+  are shared by one thread instead of a new thread and loop per message.
+  """
+
+  def __init__(
+      self,
+      handler: Callable[[Any], Awaitable[None]],
+      max_concurrency: int = 8,
+  ):
+    self._handler = handler
+    self.max_concurrency = max_concurrency
+    self._loop = asyncio.new_event_loop()
+    self._semaphore = asyncio.Semaphore(max_concurrency)
+    # Per-conversation FIFO and the task draining it; loop thread only.
+    self._queues: dict[str, deque] = {}
+    self._workers: dict[str, asyncio.Task] = {}
+    self._lock = threading.Lock()
+    self._queued = 0
+    self._running = 0
+    self._processed = 0
+    self._failed = 0
+    self._thread = threading.Thread(
+        target=self._run, name="message-executor", daemon=True)
+    self._thread.start()
+
+  def _run(self):
+    asyncio.set_event_loop(self._loop)
+    self._loop.run_forever()
+
+  def submit(self, conversation_id: str, message: Any):
+    """Queue a message from any thread; returns immediately."""
+    with self._lock:
+      self._queued += 1
+    self._loop.call_soon_threadsafe(self._enqueue, conversation_id, message)
+
+  def _enqueue(self, conversation_id: str, message: Any):
+    queue = self._queues.get(conversation_id)
+    if queue is None:
+      queue = self._queues[conversation_id] = deque()
+      self._workers[conversation_id] = self._loop.create_task(
+          self._drain(conversation_id, queue))
+    queue.append(message)
+
+  async def _drain(self, conversation_id: str, queue: deque):
+    try:
+      while queue:
+        message = queue.popleft()
+        async with self._semaphore:
+          with self._lock:
+            self._queued -= 1
+            self._running += 1
+          try:
+            await self._handler(message)
+          except Exception as e:
+            logger.error(f"Failed to process message in {conversation_id}: {e}")
+            with self._lock:
+              self._failed += 1
+          finally:
+            with self._lock:
+              self._running -= 1
+              self._processed += 1
+    finally:
+      # No await since the last empty check, so no message can be lost here.
+      del self._queues[conversation_id]
+      del self._workers[conversation_id]
+
+  def metrics(self) -> dict[str, int]:
+    with self._lock:
+      return {
+          "queue_depth": self._queued,
+          "running": self._running,
+          "processed": self._processed,
+          "failed": self._failed,
+          "max_concurrency": self.max_concurrency,
+      }
+
+  def shutdown(self):
+    self._loop.call_soon_threadsafe(self._loop.stop)
+    self._thread.join(timeout=5)
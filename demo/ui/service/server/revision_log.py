@@ -0,0 +1,156 @@
+import threading
+from collections import OrderedDict
+from itertools import islice
+from typing import Callable, Generic, Iterator, NamedTuple, TypeVar
+
+T = TypeVar("T")
+
+
+class Page(NamedTuple):
+  items: list
+  # Pass back as `cursor` to get only what changed after this page.
+  next_cursor: int
+  has_more: bool
+  # The cursor is unknown here (e.g. the server restarted): the page starts
+  # from the beginning and the client should drop what it has.
+  reset: bool = False
+
+
+class RevisionLog(Generic[T]):
+  """Items keyed by id, kept in the order they were last changed.
+
+  Every `put` stamps the item with a new revision and moves it to the end, so
+  "what changed after cursor N" is read from the tail without sorting or
+  scanning the whole history. An optional `index` function keeps a secondary
+  ordering per value (e.g. per conversation id) with the same guarantees.
+  """
+
+  def __init__(
+      self,
+      key: Callable[[T], str],
+      index: Callable[[T], str | None] | None = None,
+  ):
+    self._key = key
+    self._index = index
+    self._items: OrderedDict[str, tuple[int, T]] = OrderedDict()
+    self._by_index: dict[str, OrderedDict[str, int]] = {}
+    self._index_of: dict[str, str] = {}
+    self._lock = threading.Lock()
+    self.revision = 0
+
+  def put(self, item: T) -> int:
+    """Insert or replace the item and return its new revision."""
+    key = self._key(item)
+    with self._lock:
+      self.revision += 1
+      self._items[key] = (self.revision, item)
+      self._items.move_to_end(key)
+      if self._index:
+        self._reindex(key, self._index(item))
+      return self.revision
+
+  def _reindex(self, key: str, value: str | None):
+    previous = self._index_of.get(key)
+    if previous is not None and previous != value:
+      self._by_index[previous].pop(key, None)
+      del self._index_of[key]
+    if value is None:
+      return
+    entries = self._by_index.setdefault(value, OrderedDict())
+    entries[key] = self.revision
+    entries.move_to_end(key)
+    self._index_of[key] = value
+
+  def remove(self, key: str) -> T | None:
+    with self._lock:
+      entry = self._items.pop(key, None)
+      index = self._index_of.pop(key, None)
+      if index is not None:
+        entries = self._by_index[index]
+        entries.pop(key, None)
+        if not entries:
+          del self._by_index[index]
+      return entry[1] if entry else None
+
+  def oldest(self) -> T | None:
+    """The item that has gone longest without a change."""
+    with self._lock:
+      if not self._items:
+        return None
+      return next(iter(self._items.values()))[1]
+
+  def keys(self, index: str | None = None) -> list[str]:
+    with self._lock:
+      if index is None:
+        return list(self._items)
+      return list(self._by_index.get(index, ()))
+
+  def get(self, key: str) -> T | None:
+    entry = self._items.get(key)
+    return entry[1] if entry else None
+
+  def __contains__(self, key: str) -> bool:
+    return key in self._items
+
+  def __len__(self) -> int:
+    return len(self._items)
+
+  def __iter__(self) -> Iterator[T]:
+    return iter(self.values())
+
+  def values(self) -> list[T]:
+    with self._lock:
+      return [item for _, item in self._items.values()]
+
+  def page(
+      self,
+      cursor: int = 0,
+      limit: int | None = None,
+      index: str | None = None,
+  ) -> Page:
+    """Items changed after `cursor`, oldest change first.
+
+    With `index`, only items whose index value (e.g. conversation id) matches.
+    """
+    with self._lock:
+      reset = cursor > self.revision
+      if reset:
+        cursor = 0
+      if index is None:
+        revisions = ((rev, key) for key, (rev, _) in self._items.items())
+        newest_first = ((rev, key) for key, (rev, _) in reversed(self._items.items()))
+      else:
+        entries = self._by_index.get(index, OrderedDict())
+        revisions = ((rev, key) for key, rev in entries.items())
+        newest_first = ((rev, key) for key, rev in reversed(entries.items()))
+
+      if cursor == 0:
+        changed = list(islice(revisions, limit + 1 if limit else None))
+      else:
+        # Walk back from the newest change; cost follows the changes, not
+        # the history.
+        changed = []
+        for rev, key in newest_first:
+          if rev <= cursor:
+            break
+          changed.append((rev, key))
+        changed.reverse()
+
+      has_more = limit is not None and len(changed) > limit
+      if has_more:
+        changed = changed[:limit]
+      items = [self._items[key][1] for _, key in changed]
+      if changed and has_more:
+        next_cursor = changed[-1][0]
+      else:
+        next_cursor = self.revision
+      return Page(items, next_cursor, has_more, reset)
+
+
+def page_sequence(items: list[T], cursor: int = 0, limit: int | None = None) -> Page:
+  """Pages an append-only list, using the offset as the cursor."""
+  reset = cursor > len(items)
+  if reset:
+    cursor = 0
+  end = len(items) if limit is None else min(len(items), cursor + limit)
+  return Page(items[cursor:end], end, end < len(items), reset)
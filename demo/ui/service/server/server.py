@@ -1,15 +1,18 @@
 import asyncio
-import base64
-import threading
+import json
 import os
-import uuid
-from typing import Any
 from fastapi import APIRouter
-from fastapi import Request, Response
-from common.types import Message, Task, FilePart, FileContent
+from fastapi import Request
+from sse_starlette.sse import EventSourceResponse
+from common.types import Message
+from common.server.utils import blob_response
+from common.utils.blob_store import BlobStore
 from .in_memory_manager import InMemoryFakeAgentManager
-from .application_manager import ApplicationManager
-from .adk_host_manager import ADKHostManager, get_message_id
+from .application_manager import FILE_PATH, ApplicationManager, load_agent_card
+from .adk_host_manager import ADKHostManager
+from .message_executor import MessageExecutor
+from .change_feed import ChangeFeed
+from .revision_log import Page
 from service.types import (
     Conversation,
     Event,
@@ -22,7 +25,9 @@ from service.types import (
     ListTaskResponse,
     RegisterAgentResponse,
     ListAgentResponse,
-    GetEventResponse
+    GetEventResponse,
+    PageParams,
+    PagedResponse,
 )
 
 class ConversationServer:
@@ -38,8 +43,14 @@ class ConversationServer:
       self.manager = ADKHostManager()
     else:
       self.manager = InMemoryFakeAgentManager()
-    self._file_cache = {} # dict[str, FilePart] maps file id to message data
-    self._message_to_cache = {} # dict[str, str] maps message id to cache id
+    self.blob_store = BlobStore.from_env()
+    self.manager.blob_store = self.blob_store
+    self.change_feed = ChangeFeed(
+        maxlen=int(os.environ.get("A2A_UPDATE_BACKLOG", "1024")))
+    self.manager.change_feed = self.change_feed
+    self._message_executor = MessageExecutor(
+        self.manager.process_message,
+        max_concurrency=int(os.environ.get("A2A_MESSAGE_CONCURRENCY", "8")))
 
     router.add_api_route(
         "/conversation/create",
@@ -65,6 +76,14 @@ class ConversationServer:
         "/message/pending",
         self._pending_messages,
         methods=["POST"])
+    router.add_api_route(
+        "/message/metrics",
+        self._message_metrics,
+        methods=["GET"])
+    router.add_api_route(
+        "/updates/stream",
+        self._stream_updates,
+        methods=["GET"])
     router.add_api_route(
         "/task/list",
         self._list_tasks,
@@ -78,9 +97,10 @@ class ConversationServer:
         self._list_agents,
         methods=["POST"])
     router.add_api_route(
-        "/message/file/{file_id}",
+        FILE_PATH + "/{file_id}",
         self._files,
         methods=["GET"])
+    router.add_event_handler("shutdown", self.manager.aclose)
 
 
   async def _create_conversation(self):
@@ -91,80 +111,84 @@ class ConversationServer:
     message_data = await request.json()
     message = Message(**message_data['params'])
     message = self.manager.sanitize_message(message)
-    t = threading.Thread(target=lambda: asyncio.run(self.manager.process_message(message)))
-    t.start()
+    self._message_executor.submit(
+        message.metadata.get('conversation_id', ''), message)
     return SendMessageResponse(result=MessageInfo(
         message_id=message.metadata['message_id'],
         conversation_id=message.metadata['conversation_id'] if 'conversation_id' in message.metadata else '',
     ))
 
+  async def _page_params(self, request: Request) -> PageParams:
+    try:
+      params = (await request.json()).get('params')
+    except ValueError:
+      params = None
+    if isinstance(params, str):
+      # message/list also accepts a bare conversation id.
+      return PageParams(conversation_id=params)
+    return PageParams(**params) if params else PageParams()
+
+  @staticmethod
+  def _paged(response: type[PagedResponse], page: Page):
+    return response(
+        result=page.items,
+        next_cursor=page.next_cursor,
+        has_more=page.has_more,
+        reset=page.reset)
+
   async def _list_messages(self, request: Request):
-    message_data = await request.json()
-    conversation_id = message_data['params']
-    conversation = self.manager.get_conversation(conversation_id)
-    if conversation:
-      return ListMessageResponse(result=self.cache_content(
-          conversation.messages))
-    return ListMessageResponse(result=[])
-
-  def cache_content(self, messages: list[Message]):
-    rval = []
-    for m in messages:
-      message_id = get_message_id(m)
-      if not message_id:
-        rval.append(m)
-        continue
-      new_parts = []
-      for i, part in enumerate(m.parts):
-        if part.type != 'file':
-          new_parts.append(part)
-          continue
-        message_part_id = f"{message_id}:{i}"
-        if message_part_id in self._message_to_cache:
-          cache_id = self._message_to_cache[message_part_id]
-        else:
-          cache_id = str(uuid.uuid4())
-          self._message_to_cache[message_part_id] = cache_id
-        # Replace the part data with a url reference
-        new_parts.append(FilePart(
-            file=FileContent(
-                mimeType=part.file.mimeType,
-                uri=f"/message/file/{cache_id}",
-            )
-        ))
-        if cache_id not in self._file_cache:
-          self._file_cache[cache_id] = part
-      m.parts = new_parts
-      rval.append(m)
-    return rval
+    page = self.manager.list_messages(await self._page_params(request))
+    return self._paged(ListMessageResponse, page)
+
+  async def _stream_updates(self, request: Request):
+    """Server-sent stream of state deltas for the UI.
+
+    Resumes after `since` (or the Last-Event-ID header EventSource sends on
+    reconnect); a client that cannot be caught up receives a `resync` delta.
+    """
+    since = request.headers.get(
+        'last-event-id', request.query_params.get('since', '0'))
+    try:
+      since = int(since)
+    except ValueError:
+      since = 0
+
+    async def event_generator():
+      async for delta in self.change_feed.subscribe(since):
+        yield {'id': str(delta['seq']), 'data': json.dumps(delta)}
+
+    return EventSourceResponse(event_generator())
+
+  def _message_metrics(self):
+    return self._message_executor.metrics()
 
   async def _pending_messages(self):
     return PendingMessageResponse(result=self.manager.get_pending_messages())
 
-  def _list_conversation(self):
-    return ListConversationResponse(result=self.manager.conversations)
+  async def _list_conversation(self, request: Request):
+    page = self.manager.list_conversations(await self._page_params(request))
+    return self._paged(ListConversationResponse, page)
 
-  def _get_events(self):
-    return GetEventResponse(result=self.manager.events)
+  async def _get_events(self, request: Request):
+    page = self.manager.list_events(await self._page_params(request))
+    return self._paged(GetEventResponse, page)
 
-  def _list_tasks(self):
-    return ListTaskResponse(result=self.manager.tasks)
+  async def _list_tasks(self, request: Request):
+    page = self.manager.list_tasks(await self._page_params(request))
+    return self._paged(ListTaskResponse, page)
 
   async def _register_agent(self, request: Request):
     message_data = await request.json()
     url = message_data['params']
-    self.manager.register_agent(url)
+    # Fetching the card is blocking network I/O; keep it off the event loop
+    # so an unreachable agent does not stall every other request. Registering
+    # it mutates the manager's catalog, so that happens back on the loop.
+    card = await asyncio.to_thread(load_agent_card, url)
+    self.manager.register_agent_card(card)
     return RegisterAgentResponse()
 
   async def _list_agents(self):
     return ListAgentResponse(result=self.manager.agents)
 
-  def _files(self, file_id):
-    if file_id not in self._file_cache:
-      raise Exception("file not found")
-    part = self._file_cache[file_id]
-    if "image" in part.file.mimeType:
-      return Response(
-          content=base64.b64decode(part.file.bytes),
-          media_type=part.file.mimeType)
-    return Response(content=part.file.bytes, media_type=part.file.mimeType)
+  def _files(self, file_id: str, request: Request):
+    return blob_response(self.blob_store, file_id, request)
@@ -0,0 +1,198 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from common.types import Message, Task, TaskState
+from service.types import Conversation, Event
+from .revision_log import Page, RevisionLog
+
+
+def task_conversation_id(task: Task) -> str | None:
+  if task.sessionId:
+    return task.sessionId
+  if task.metadata and 'conversation_id' in task.metadata:
+    return task.metadata['conversation_id']
+  return None
+
+def event_conversation_id(event: Event) -> str | None:
+  if event.content.metadata and 'conversation_id' in event.content.metadata:
+    return event.content.metadata['conversation_id']
+  return None
+
+def message_id_of(m: Message | None) -> str | None:
+  if not m or not m.metadata or 'message_id' not in m.metadata:
+    return None
+  return m.metadata['message_id']
+
+def task_still_open(task: Task | None) -> bool:
+  if not task:
+    return False
+  return task.status.state in [
+      TaskState.SUBMITTED, TaskState.WORKING, TaskState.INPUT_REQUIRED
+  ]
+
+
+class StateStore:
+  """Indexed in-memory state shared by the application managers.
+
+  Conversations, tasks and events are looked up by id in constant time and
+  listed per conversation through secondary indexes; each task keeps the set
+  of message ids in its history so status updates do not rescan it. Task
+  callbacks arrive from the message executor and remote agent threads, so
+  compound updates hold `lock`; managers hold it too while they read, change
+  and publish a task.
+
+  The conversation log changes only with conversation metadata, so listing
+  conversations does not resend them on every message; messages are paged
+  from the conversation itself.
+
+  Retention is bounded: past `max_conversations`, the least recently active
+  conversations without open tasks or pending messages are evicted together
+  with their messages, tasks and events. Every insert checks the bound, so
+  conversations that were pinned by an open task go once it ends. Past
+  `max_events`, the oldest events are dropped.
+  """
+
+  def __init__(
+      self,
+      max_conversations: int | None = None,
+      max_events: int | None = None,
+  ):
+    if max_conversations is None:
+      max_conversations = int(os.environ.get("A2A_MAX_CONVERSATIONS", "1000"))
+    if max_events is None:
+      max_events = int(os.environ.get("A2A_MAX_EVENTS", "100000"))
+    self.max_conversations = max_conversations
+    self.max_events = max_events
+    # Kept in change order so list requests only read what changed.
+    self.conversations: RevisionLog[Conversation] = RevisionLog(
+        key=lambda c: c.conversation_id)
+    self.tasks: RevisionLog[Task] = RevisionLog(
+        key=lambda t: t.id, index=task_conversation_id)
+    self.events: RevisionLog[Event] = RevisionLog(
+        key=lambda e: e.id, index=event_conversation_id)
+    # conversation id, least recently active first
+    self._activity: OrderedDict[str, None] = OrderedDict()
+    # message id -> task id
+    self.task_map: dict[str, str] = {}
+    # previous message id -> next message id
+    self.next_id: dict[str, str] = {}
+    # message id -> conversation id, in arrival order
+    self.pending: dict[str, str | None] = {}
+    self._task_message_ids: dict[str, set[str]] = {}
+    self.lock = threading.RLock()
+
+  def add_conversation(self, conversation: Conversation):
+    with self.lock:
+      self.conversations.put(conversation)
+      self._touch(conversation.conversation_id)
+      self._evict(keep=conversation.conversation_id)
+
+  def list_conversations(self, cursor: int = 0, limit: int | None = None) -> Page:
+    """Conversations changed after `cursor`, without their messages."""
+    page = self.conversations.page(cursor, limit)
+    return page._replace(items=[c.info() for c in page.items])
+
+  def get_conversation(self, conversation_id: Optional[str]) -> Optional[Conversation]:
+    if not conversation_id:
+      return None
+    return self.conversations.get(conversation_id)
+
+  def add_message(self, message: Message, conversation: Conversation | None):
+    with self.lock:
+      if conversation:
+        # message/list pages the conversation's own list; the conversation
+        # log is left alone.
+        conversation.messages.append(message)
+        self._touch(conversation.conversation_id)
+        self._evict(keep=conversation.conversation_id)
+
+  def _touch(self, conversation_id: str):
+    self._activity[conversation_id] = None
+    self._activity.move_to_end(conversation_id)
+
+  def add_pending(self, message_id: str, conversation_id: str | None):
+    with self.lock:
+      self.pending[message_id] = conversation_id
+
+  def remove_pending(self, message_id: str):
+    with self.lock:
+      self.pending.pop(message_id, None)
+      self._evict()
+
+  def get_task(self, task_id: str) -> Task | None:
+    return self.tasks.get(task_id)
+
+  def has_task(self, task_id: str) -> bool:
+    return task_id in self.tasks
+
+  def put_task(self, task: Task):
+    with self.lock:
+      if self.tasks.get(task.id) is not task:
+        # New or replaced task object: index its history once.
+        self._task_message_ids[task.id] = {
+            message_id_of(m) for m in task.history or [] if message_id_of(m)}
+      self.tasks.put(task)
+      conversation_id = task_conversation_id(task)
+      if conversation_id in self._activity:
+        self._touch(conversation_id)
+      self._evict(keep=conversation_id)
+
+  def add_task_message(self, task: Task, message: Message) -> bool:
+    """Append `message` to the task history unless its id is already there."""
+    message_id = message_id_of(message)
+    with self.lock:
+      ids = self._task_message_ids.get(task.id)
+      if ids is not None:
+        if message_id in ids:
+          return False
+        ids.add(message_id)
+      if task.history is None:
+        task.history = []
+      task.history.append(message)
+      return True
+
+  def add_event(self, event: Event):
+    with self.lock:
+      self.events.put(event)
+      while len(self.events) > self.max_events:
+        self.events.remove(self.events.oldest().id)
+
+  def _is_closed(self, conversation: Conversation) -> bool:
+    if not conversation.is_active:
+      return True
+    conversation_id = conversation.conversation_id
+    if conversation_id in self.pending.values():
+      return False
+    return not any(
+        task_still_open(self.tasks.get(task_id))
+        for task_id in self.tasks.keys(conversation_id))
+
+  def _evict(self, keep: str | None = None):
+    excess = len(self.conversations) - self.max_conversations
+    if excess <= 0:
+      return
+    # Least recently active first.
+    for conversation_id in list(self._activity):
+      if excess <= 0:
+        break
+      conversation = self.conversations.get(conversation_id)
+      if conversation_id != keep and self._is_closed(conversation):
+        self._remove_conversation(conversation)
+        excess -= 1
+
+  def _remove_conversation(self, conversation: Conversation):
+    conversation_id = conversation.conversation_id
+    self.conversations.remove(conversation_id)
+    self._activity.pop(conversation_id, None)
+    for message in conversation.messages:
+      message_id = message_id_of(message)
+      if message_id:
+        self.task_map.pop(message_id, None)
+        self.next_id.pop(message_id, None)
+    for task_id in self.tasks.keys(conversation_id):
+      self.tasks.remove(task_id)
+      self._task_message_ids.pop(task_id, None)
+    for event_id in self.events.keys(conversation_id):
+      self.events.remove(event_id)
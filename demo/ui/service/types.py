@@ -17,6 +17,26 @@ class Conversation(BaseModel):
   task_ids: list[str] = Field(default_factory=list)
   messages: list[Message] = Field(default_factory=list)
 
+  def info(self) -> 'ConversationInfo':
+    return ConversationInfo(
+        conversation_id=self.conversation_id,
+        is_active=self.is_active,
+        name=self.name,
+        task_ids=self.task_ids,
+        message_count=len(self.messages),
+    )
+
+class ConversationInfo(BaseModel):
+  """A conversation without its messages, as listed by conversation/list.
+
+  Messages are paged separately through message/list.
+  """
+  conversation_id: str
+  is_active: bool
+  name: str = ''
+  task_ids: list[str] = Field(default_factory=list)
+  message_count: int = 0
+
 class Event(BaseModel):
   id: str
   actor: str = ""
@@ -24,16 +44,31 @@ class Event(BaseModel):
   content: Message
   timestamp: float
 
+class PageParams(BaseModel):
+  """Cursor pagination for the list methods."""
+  # Return only what changed after this cursor (`next_cursor` of a previous
+  # response); 0 lists everything.
+  cursor: int = 0
+  limit: int | None = None
+  conversation_id: str | None = None
+
+class PagedResponse(JSONRPCResponse):
+  next_cursor: int = 0
+  has_more: bool = False
+  # The cursor was not recognised and the result starts over; replace
+  # rather than merge.
+  reset: bool = False
+
 class SendMessageRequest(JSONRPCRequest):
   method: Literal["message/send"] = "message/send"
   params: Message
 
 class ListMessageRequest(JSONRPCRequest):
   method: Literal["message/list"] = "message/list"
-  # This is the conversation id
-  params: str
+  # The conversation id, or paging params with conversation_id set.
+  params: str | PageParams
 
-class ListMessageResponse(JSONRPCResponse):
+class ListMessageResponse(PagedResponse):
   result: list[Message] | None = None
 
 class MessageInfo(BaseModel):
@@ -45,15 +80,17 @@ class SendMessageResponse(JSONRPCResponse):
 
 class GetEventRequest(JSONRPCRequest):
   method: Literal["events/get"] = "events/get"
+  params: PageParams | None = None
 
-class GetEventResponse(JSONRPCResponse):
+class GetEventResponse(PagedResponse):
   result: list[Event] | None = None
 
 class ListConversationRequest(JSONRPCRequest):
   method: Literal["conversation/list"] = "conversation/list"
+  params: PageParams | None = None
 
-class ListConversationResponse(JSONRPCResponse):
-  result: list[Conversation] | None = None
+class ListConversationResponse(PagedResponse):
+  result: list[ConversationInfo] | None = None
 
 class PendingMessageRequest(JSONRPCRequest):
   method: Literal["message/pending"] = "message/pending"
@@ -69,8 +106,9 @@ class CreateConversationResponse(JSONRPCResponse):
 
 class ListTaskRequest(JSONRPCRequest):
   method: Literal["task/list"] = "task/list"
+  params: PageParams | None = None
 
-class ListTaskResponse(JSONRPCResponse):
+class ListTaskResponse(PagedResponse):
   result: list[Task] | None = None
 
 class RegisterAgentRequest(JSONRPCRequest):
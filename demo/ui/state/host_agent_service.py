@@ -6,6 +6,7 @@ from typing import Tuple, Any
 from service.client.client import ConversationClient
 from service.types import (
     Conversation,
+    ConversationInfo,
     Event,
     CreateConversationRequest,
     ListConversationRequest,
@@ -13,6 +14,10 @@ from service.types import (
     ListMessageRequest,
     PendingMessageRequest,
     ListTaskRequest,
+    ListConversationResponse,
+    ListMessageResponse,
+    ListTaskResponse,
+    PageParams,
     RegisterAgentRequest,
     ListAgentRequest,
     GetEventRequest
@@ -27,11 +32,13 @@ from .state import (
 )
 import asyncio
 import threading
-from common.types import Artifact, Message, Task, Part
+from common.types import Artifact, Message, Task, TaskStatus, Part
 
 server_url = "http://localhost:12000"
+# Items per request when catching up on list changes.
+page_size = 200
 
-async def ListConversations() -> list[Conversation]:
+async def ListConversations() -> list[ConversationInfo]:
   client = ConversationClient(server_url)
   try:
     response = await client.list_conversation(ListConversationRequest())
@@ -105,39 +112,207 @@ async def ListMessages(conversation_id: str) -> list[Message]:
   except Exception as e:
     print("Failed to list messages ", e)
 
+async def GetMessageChanges(conversation_id: str, cursor: int) -> ListMessageResponse | None:
+  client = ConversationClient(server_url)
+  try:
+    return await client.list_changes(client.list_messages, ListMessageRequest(
+        params=PageParams(
+            conversation_id=conversation_id, cursor=cursor, limit=page_size)))
+  except Exception as e:
+    print("Failed to list messages ", e)
+
+async def GetConversationChanges(cursor: int) -> ListConversationResponse | None:
+  client = ConversationClient(server_url)
+  try:
+    return await client.list_changes(client.list_conversation, ListConversationRequest(
+        params=PageParams(cursor=cursor, limit=page_size)))
+  except Exception as e:
+    print("Failed to list conversations: ", e)
+
+async def GetTaskChanges(cursor: int) -> ListTaskResponse | None:
+  client = ConversationClient(server_url)
+  try:
+    return await client.list_changes(client.list_tasks, ListTaskRequest(
+        params=PageParams(cursor=cursor, limit=page_size)))
+  except Exception as e:
+    print("Failed to list tasks ", e)
+
 
 async def UpdateAppState(state: AppState, conversation_id: str):
-  """Update the app state."""
+  """Update the app state with what changed since the last update."""
   try:
     if conversation_id:
       state.current_conversation_id = conversation_id
-      messages = await ListMessages(conversation_id)
-      if not messages:
+      if state.messages_conversation_id != conversation_id:
         state.messages = []
-      else:
-        state.messages = [convert_message_to_state(x) for x in messages]
-    conversations = await ListConversations()
-    if not conversations:
-      state.conversations = []
-    else:
-      state.conversations = [
-          convert_conversation_to_state(x) for x in conversations
-      ]
-
-    state.task_list = []
-    for task in await GetTasks():
-      state.task_list.append(
-          SessionTask(
-              session_id=extract_conversation_id(task),
-              task=convert_task_to_state(task)
-          )
-      )
+        state.messages_cursor = 0
+      response = await GetMessageChanges(conversation_id, state.messages_cursor)
+      if response:
+        if response.reset:
+          state.messages = []
+        for message in response.result:
+          upsert(state.messages, convert_message_to_state(message), 'message_id')
+        state.messages_cursor = response.next_cursor
+    state.messages_conversation_id = conversation_id
+
+    response = await GetConversationChanges(state.conversations_cursor)
+    if response:
+      if response.reset:
+        state.conversations = []
+      for conversation in response.result:
+        upsert(
+            state.conversations,
+            convert_conversation_to_state(conversation),
+            'conversation_id')
+      state.conversations_cursor = response.next_cursor
+
+    response = await GetTaskChanges(state.tasks_cursor)
+    if response:
+      if response.reset:
+        state.task_list = []
+      for task in response.result:
+        upsert_task(state, task)
+      state.tasks_cursor = response.next_cursor
     state.background_tasks = await GetProcessingMessages()
     state.message_aliases = GetMessageAliases()
   except Exception as e:
     print("Failed to update state: ", e)
     traceback.print_exc(file=sys.stdout)
 
+async def ApplyUpdates(state: AppState, deltas: list[dict[str, Any]]):
+  """Apply deltas pushed by the update stream to the app state.
+
+  Falls back to a full UpdateAppState when the server asks for a resync, when
+  a sequence number was skipped, or when the shown conversation changed.
+  """
+  for delta in deltas:
+    seq = delta.get('seq') or 0
+    if (delta['kind'] == 'resync' or
+        (state.last_update_seq and seq > state.last_update_seq + 1) or
+        state.messages_conversation_id != state.current_conversation_id):
+      await UpdateAppState(state, state.current_conversation_id)
+      state.last_update_seq = max(seq, state.last_update_seq)
+      continue
+    if seq <= state.last_update_seq:
+      continue
+    try:
+      apply_delta(state, delta['kind'], delta['data'])
+    except Exception as e:
+      print("Failed to apply update: ", e)
+      traceback.print_exc(file=sys.stdout)
+    state.last_update_seq = seq
+
+def apply_delta(state: AppState, kind: str, data: Any):
+  if kind == 'conversation':
+    conversation = convert_conversation_to_state(ConversationInfo(**data))
+    upsert(state.conversations, conversation, 'conversation_id')
+  elif kind == 'message':
+    message = Message(**data)
+    state_message = convert_message_to_state(message)
+    conversation_id = extract_message_conversation(message)
+    conversation = next(
+        (c for c in state.conversations
+         if c.conversation_id == conversation_id), None)
+    if conversation:
+      add_conversation_message(conversation, state_message.message_id)
+    if conversation_id == state.current_conversation_id:
+      upsert(state.messages, state_message, 'message_id')
+  elif kind == 'task':
+    upsert_task(state, Task(**data))
+  elif kind == 'task_status':
+    apply_task_status(state, data)
+  elif kind == 'task_artifact':
+    apply_task_artifact(state, data)
+  elif kind == 'pending':
+    state.background_tasks = dict(data)
+
+def find_task(state: AppState, task_id: str) -> StateTask | None:
+  for session_task in state.task_list:
+    if session_task.task.task_id == task_id:
+      return session_task.task
+  return None
+
+def apply_task_status(state: AppState, data: dict[str, Any]):
+  status = TaskStatus(**data['status'])
+  task = find_task(state, data['id'])
+  if task is None:
+    if not status.message:
+      # Not renderable until the first status message arrives.
+      return
+    task = StateTask(
+        task_id=data['id'],
+        session_id=data.get('sessionId'),
+        message=convert_message_to_state(status.message),
+    )
+    state.task_list.append(
+        SessionTask(session_id=data.get('sessionId') or '', task=task))
+  task.state = str(status.state)
+  if status.message and extract_message_id(status.message) != task.message.message_id:
+    task.status_output = extract_content(status.message.parts)
+  render_task_output(task)
+
+def apply_task_artifact(state: AppState, data: dict[str, Any]):
+  task = find_task(state, data['id'])
+  if task is None:
+    # The task itself arrives as a 'task' delta or with the next resync.
+    return
+  artifact = Artifact(**data['artifact'])
+  content = extract_content(artifact.parts)
+  # Chunks extend, and a full artifact replaces, the one still streaming.
+  position = next(
+      (i for i in range(len(task.artifact_indexes) - 1, -1, -1)
+       if task.artifact_indexes[i] == artifact.index and task.artifact_open[i]),
+      None)
+  if position is None:
+    task.artifact_output.append(content)
+    task.artifact_indexes.append(artifact.index)
+    task.artifact_open.append(artifact.lastChunk is False)
+  else:
+    if artifact.append:
+      task.artifact_output[position] = append_content(
+          task.artifact_output[position], content)
+    else:
+      task.artifact_output[position] = content
+    task.artifact_open[position] = not artifact.lastChunk
+  render_task_output(task)
+
+def append_content(
+    content: list[Tuple[str | dict[str, Any], str]],
+    chunk: list[Tuple[str | dict[str, Any], str]],
+) -> list[Tuple[str | dict[str, Any], str]]:
+  """Extend streamed content, continuing its last text part like the
+  finished artifact will."""
+  if content and chunk and content[-1][1] == chunk[0][1] == 'text/plain':
+    return content[:-1] + [(content[-1][0] + chunk[0][0], 'text/plain')] + chunk[1:]
+  return content + chunk
+
+def render_task_output(task: StateTask):
+  task.artifacts = ([task.status_output] if task.status_output else []) + list(
+      task.artifact_output)
+
+def upsert_task(state: AppState, task: Task):
+  if not task.history:
+    # Not renderable until the first status message arrives.
+    return
+  session_task = SessionTask(
+      session_id=extract_conversation_id(task),
+      task=convert_task_to_state(task),
+  )
+  for i, t in enumerate(state.task_list):
+    if t.task.task_id == task.id:
+      state.task_list[i] = session_task
+      return
+  state.task_list.append(session_task)
+
+def upsert(items: list, item: Any, key: str):
+  value = getattr(item, key)
+  if value:
+    for i, existing in enumerate(items):
+      if getattr(existing, key) == value:
+        items[i] = item
+        return
+  items.append(item)
+
 def convert_message_to_state(message: Message) -> StateMessage:
   if not message:
     return StateMessage()
@@ -148,28 +323,38 @@ def convert_message_to_state(message: Message) -> StateMessage:
       content = extract_content(message.parts),
   )
 
-def convert_conversation_to_state(conversation: Conversation) -> StateConversation:
+def add_conversation_message(conversation: StateConversation, message_id: str):
+  """Count a message added since the conversation was listed."""
+  if message_id not in conversation.message_ids:
+    conversation.message_ids.append(message_id)
+    conversation.message_count += 1
+
+def convert_conversation_to_state(conversation: ConversationInfo) -> StateConversation:
   return StateConversation(
       conversation_id = conversation.conversation_id,
       conversation_name = conversation.name,
       is_active = conversation.is_active,
-      message_ids = [extract_message_id(x) for x in conversation.messages],
+      message_count = conversation.message_count,
   )
 
 def convert_task_to_state(task: Task) -> StateTask:
   # Get the first message as the description
   message = task.history[0]
   last_message = task.history[-1]
-  output = [extract_content(a.parts) for a in task.artifacts] if task.artifacts else []
-  if last_message != message:
-    output = [extract_content(last_message.parts)] + output
-  return StateTask(
+  artifacts = task.artifacts or []
+  state_task = StateTask(
       task_id=task.id,
       session_id=task.sessionId,
       state=str(task.status.state),
       message=convert_message_to_state(message),
-      artifacts=output,
+      status_output=(
+          extract_content(last_message.parts) if last_message != message else []),
+      artifact_output=[extract_content(a.parts) for a in artifacts],
+      artifact_indexes=[a.index for a in artifacts],
+      artifact_open=[a.lastChunk is False for a in artifacts],
   )
+  render_task_output(state_task)
+  return state_task
 
 def convert_event_to_state(event: Event) -> StateEvent:
   return StateEvent(
@@ -13,6 +13,9 @@ class StateConversation:
   conversation_id: str = ""
   conversation_name: str = ""
   is_active: bool = True
+  message_count: int = 0
+  # Messages counted since the conversation was listed, so one that is both
+  # sent here and echoed by the server is counted once.
   message_ids: list[str] = dataclasses.field(default_factory=list)
 
 @dataclass
@@ -30,7 +33,15 @@ class StateTask:
   session_id: str | None = None
   state: str | None = None
   message: StateMessage = dataclasses.field(default_factory=StateMessage)
+  # What is shown: status_output (if any) followed by artifact_output.
   artifacts: list[list[Tuple[ContentPart,str]]] = dataclasses.field(default_factory=list)
+  # Content of the latest status message when it is not the first message.
+  status_output: list[Tuple[ContentPart,str]] = dataclasses.field(default_factory=list)
+  # One entry per artifact, with its A2A index and whether chunks are still
+  # arriving, so streamed chunks can be appended in place.
+  artifact_output: list[list[Tuple[ContentPart,str]]] = dataclasses.field(default_factory=list)
+  artifact_indexes: list[int] = dataclasses.field(default_factory=list)
+  artifact_open: list[bool] = dataclasses.field(default_factory=list)
 
 @dataclass
 class SessionTask:
@@ -65,7 +76,17 @@ class AppState:
   completed_forms: dict[str, dict[str, Any] | None] = dataclasses.field(default_factory=dict)
   # This is used to track the message sent to agent with form data
   form_responses: dict[str, str] = dataclasses.field(default_factory=dict)
-  polling_interval: int = 1
+  # Full-state polling is only a fallback; live changes arrive through the
+  # update stream. 0 disables polling.
+  polling_interval: int = 0
+  # Sequence of the last applied update stream delta.
+  last_update_seq: int = 0
+  # Conversation whose messages are currently loaded in `messages`.
+  messages_conversation_id: str = ""
+  # List cursors: UpdateAppState only fetches what changed after these.
+  messages_cursor: int = 0
+  conversations_cursor: int = 0
+  tasks_cursor: int = 0
 
 @me.stateclass
 class SettingsState:
@@ -1,9 +1,13 @@
 import requests
 from common.types import AgentCard
 
+AGENT_CARD_TIMEOUT = 5
+
 def get_agent_card(remote_agent_address: str) -> AgentCard:
   """Get the agent card."""
   agent_card = requests.get(
-      f"http://{remote_agent_address}/.well-known/agent.json"
+      f"http://{remote_agent_address}/.well-known/agent.json",
+      timeout=AGENT_CARD_TIMEOUT,
   )
+  agent_card.raise_for_status()
   return AgentCard(**agent_card.json())
@@ -1,5 +1,5 @@
 from common.client import A2AClient, A2ACardResolver
-from common.types import TaskState, Task
+from common.types import TaskState, Task, TaskStatusUpdateEvent
 from common.utils.push_notification_auth import PushNotificationReceiverAuth
 import asyncclick as click
 import asyncio
@@ -76,27 +76,33 @@ async def completeTask(client: A2AClient, streaming, use_push_notifications: boo
         },
     }
 
-    # if use_push_notifications:
-    #     payload["pushNotification"] = {
-    #         "url": f"http://{notification_receiver_host}:{notification_receiver_port}/notify",
-    #         "authentication": {
-    #             "schemes": ["bearer"],
-    #         },
-    #     }
+    if use_push_notifications:
+        payload["pushNotification"] = {
+            "url": f"http://{notification_receiver_host}:{notification_receiver_port}/notify",
+            "authentication": {
+                "schemes": ["bearer"],
+            },
+        }
 
-    taskResult = None
+    # The state comes from the stream (or the response) itself; state changes
+    # also arrive as push notifications, so there is no need to poll get_task.
+    state = None
     if streaming:
         response_stream = client.send_task_streaming(payload)
         async for result in response_stream:
-            print(result)
             print(f"stream event => {result.model_dump_json(exclude_none=True)}")
-        taskResult = await client.get_task({"id": taskId})
+            if isinstance(result.result, TaskStatusUpdateEvent):
+                state = result.result.status.state
+        if state is None:
+            # The stream ended without a status update.
+            state = (await client.get_task({"id": taskId})).result.status.state
     else:
         taskResult = await client.send_task(payload)
         print(f"\n{taskResult.model_dump_json(exclude_none=True)}")
+        state = taskResult.result.status.state
 
     ## if the result is that more input is required, loop again.
-    state = TaskState(taskResult.result.status.state)
+    state = TaskState(state)
     if state.name == TaskState.INPUT_REQUIRED.name:
         return await completeTask(
             client,
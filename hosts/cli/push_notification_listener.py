@@ -58,15 +58,16 @@ class PushNotificationListener():
         return Response(content=validation_token, status_code=200)
     
     async def handle_notification(self, request: Request):
-        data = await request.json()
+        # Verify before parsing: rejected notifications cost no JSON decode.
         try:
             if not await self.notification_receiver_auth.verify_push_notification(request):
                 print("push notification verification failed")
-                return
+                return Response(status_code=401)
         except Exception as e:
             print(f"error verifying push notification: {e}")
             print(traceback.format_exc())
-            return
-            
+            return Response(status_code=401)
+
+        data = await request.json()
         print(f"\npush notification received => \n{data}\n")
         return Response(status_code=200)
@@ -9,18 +9,20 @@ import threading
 from typing import List, Optional, Callable
 
 from google.genai import types
-import base64
 from google.adk.agents.llm_agent import LlmAgent
 from google.adk import Agent
 from google.adk.agents.invocation_context import InvocationContext
 from google.adk.agents.readonly_context import ReadonlyContext
 from google.adk.agents.callback_context import CallbackContext
+from google.adk.models.llm_response import LlmResponse
 from google.adk.tools.tool_context import ToolContext
 from .remote_agent_connection import (
     RemoteAgentConnections,
     TaskUpdateCallback
 )
-from common.client import A2ACardResolver
+from common.client import AgentCardCache
+from common.utils.blob_store import BlobTooLargeError
+from common.utils.file_transfer import read_file
 from common.types import (
     AgentCard,
     Message,
@@ -32,7 +34,13 @@ from common.types import (
     Part,
     TaskStatusUpdateEvent,
 )
-from .routing import decide_route
+from .routing import BYPASS_CONFIDENCE, ROUTE_SKILLS, RoutingDecision, decide_route
+from .planner import (
+    SPECULATIVE_AGENTS,
+    ExecutionPlanner,
+    Speculation,
+    build_plan,
+)
 
 class HostAgent:
     """The host agent.
@@ -42,34 +50,104 @@ class HostAgent:
     """
 
     SUPPORTED_CONTENT_TYPES = ["text", "text/plain"]
+    CARD_REFRESH_INTERVAL = 30.0
 
     def __init__(
             self,
             remote_agent_addresses: List[str],
-            task_callback: TaskUpdateCallback | None = None
+            task_callback: TaskUpdateCallback | None = None,
+            card_cache: AgentCardCache | None = None,
     ):
         self.task_callback = task_callback
+        self.planner = ExecutionPlanner()
+        self.card_cache = card_cache or AgentCardCache()
+        self.remote_agent_addresses = list(remote_agent_addresses)
+        # Addresses whose card could not be fetched yet; retried on refresh.
+        self.pending_addresses = list(remote_agent_addresses)
         self.remote_agent_connections: dict[str, RemoteAgentConnections] = {}
         self.cards: dict[str, AgentCard] = {}
-        for address in remote_agent_addresses:
-            card_resolver = A2ACardResolver(address)
-            card = card_resolver.get_agent_card()
-            remote_connection = RemoteAgentConnections(card)
-            self.remote_agent_connections[card.name] = remote_connection
-            self.cards[card.name] = card
-        agent_info = []
-        for ra in self.list_remote_agents():
-            agent_info.append(json.dumps(ra))
-        self.agents = '\n'.join(agent_info)
+        # Route key ("diagnose", "cost", ...) -> name of the card serving it.
+        self.route_agents: dict[str, str] = {}
+        # Agent catalog for the prompt, one JSON line per card. Bumping
+        # catalog_version invalidates the cached catalog and instruction.
+        self._catalog_lines: dict[str, str] = {}
+        self._catalog: str | None = None
+        self._instruction_cache: tuple[tuple[int, str], str] | None = None
+        self.catalog_version = 0
+        self._refresh_task: asyncio.Task | None = None
+        if self.remote_agent_addresses:
+            try:
+                asyncio.get_running_loop()
+            except RuntimeError:
+                # No loop to refresh in (e.g. a Streamlit script): resolve all
+                # cards concurrently now, missing agents are retried on demand.
+                asyncio.run(self.discover_agents())
+            else:
+                self.start_card_refresh()
+
+    async def discover_agents(self):
+        """Resolve all remote agent cards concurrently and register new or
+        changed ones; agents that are down stay in pending_addresses."""
+        cards = await self.card_cache.resolve_all(self.remote_agent_addresses)
+        for card in cards.values():
+            self.register_agent_card(card)
+        self.pending_addresses = [
+            address for address in self.remote_agent_addresses
+            if address not in cards
+        ]
+
+    def start_card_refresh(self, interval: float | None = None):
+        """Keep discovering agents in the background on the running loop."""
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(
+                self._refresh_cards(interval or self.CARD_REFRESH_INTERVAL))
+
+    async def _refresh_cards(self, interval: float):
+        while True:
+            await self.discover_agents()
+            await asyncio.sleep(interval)
+
+    async def aclose(self):
+        """Stop the background card refresh. Call on shutdown, from the loop
+        that started it."""
+        task, self._refresh_task = self._refresh_task, None
+        if task is not None and not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
 
     def register_agent_card(self, card: AgentCard):
+        """Add or update one agent; re-registering an unchanged card is a no-op.
+
+        The LlmAgent reads tools and instruction through this object, so a
+        running Runner sees the new agent without being rebuilt.
+        """
+        if self.cards.get(card.name) == card:
+            return
         remote_connection = RemoteAgentConnections(card)
         self.remote_agent_connections[card.name] = remote_connection
         self.cards[card.name] = card
-        agent_info = []
-        for ra in self.list_remote_agents():
-            agent_info.append(json.dumps(ra))
-        self.agents = '\n'.join(agent_info)
+        skill_ids = {skill.id for skill in card.skills}
+        for route, skill_id in ROUTE_SKILLS.items():
+            if skill_id in skill_ids:
+                self.route_agents[route] = card.name
+        self._catalog_lines[card.name] = json.dumps(
+            {"name": card.name, "description": card.description},
+            ensure_ascii=False)
+        self._catalog = None
+        self.catalog_version += 1
+
+    def route_agent(self, route: str) -> str:
+        """Name of the registered agent serving a route key from decide_route."""
+        name = self.route_agents.get(route)
+        if name is None:
+            raise ValueError(f"No agent registered for route {route}")
+        return name
+
+    @property
+    def agents(self) -> str:
+        if self._catalog is None:
+            self._catalog = '\n'.join(self._catalog_lines.values())
+        return self._catalog
 
     def create_agent(self) -> LlmAgent:
         return LlmAgent(
@@ -90,7 +168,10 @@ class HostAgent:
 
     def root_instruction(self, context: ReadonlyContext) -> str:
         current_agent = self.check_state(context)
-        return f"""
+        key = (self.catalog_version, current_agent['active_agent'])
+        if self._instruction_cache and self._instruction_cache[0] == key:
+            return self._instruction_cache[1]
+        instruction = f"""
 You are the HostAgent, acting like a medical secretary. 
 You receive user input in either English or Vietnamese.
 
@@ -113,6 +194,8 @@ Agents available:
 
 Current agent: {current_agent['active_agent']}
     """
+        self._instruction_cache = (key, instruction)
+        return instruction
 
 
 
@@ -125,13 +208,26 @@ Current agent: {current_agent['active_agent']}
             return {"active_agent": f'{state["agent"]}'}
         return {"active_agent": "None"}
 
-    def before_model_callback(self, callback_context: CallbackContext, llm_request):
+    async def before_model_callback(self, callback_context: CallbackContext, llm_request):
         state = callback_context.state
         if 'session_active' not in state or not state['session_active']:
             if 'session_id' not in state:
                 state['session_id'] = str(uuid.uuid4())
             state['session_active'] = True
 
+        # A confident keyword route needs no planning turn: run the plan
+        # directly and answer in place of the model.
+        message = _new_user_message(llm_request)
+        if message is None:
+            return None
+        decision = decide_route(message)
+        if (decision.confidence < BYPASS_CONFIDENCE
+                or not all(a in self.route_agents for a in decision.agents)):
+            return None
+        answer = await self.send_message(message, callback_context, decision)
+        return LlmResponse(
+            content=types.Content(role="model", parts=[types.Part(text=answer)]))
+
     def list_remote_agents(self):
         """List the available remote agents you can use to delegate the task."""
         if not self.remote_agent_connections:
@@ -161,7 +257,19 @@ Current agent: {current_agent['active_agent']}
         Yields:
           A dictionary of JSON data.
         """
+        return await self._send_task(agent_name, message, tool_context)
+
+    async def _send_task(
+            self,
+            agent_name: str,
+            message: str,
+            tool_context: ToolContext,
+            task_id: str | None = None,
+            on_update: Callable[[Any], None] | None = None):
         print(agent_name)
+        if agent_name not in self.remote_agent_connections and self.pending_addresses:
+            # The agent may have come up since the last discovery.
+            await self.discover_agents()
         if agent_name not in self.remote_agent_connections:
             raise ValueError(f"Agent {agent_name} not found")
         state = tool_context.state
@@ -170,7 +278,9 @@ Current agent: {current_agent['active_agent']}
         client = self.remote_agent_connections[agent_name]
         if not client:
             raise ValueError(f"Client not available for {agent_name}")
-        if 'task_id' in state:
+        if task_id:
+            taskId = task_id
+        elif 'task_id' in state:
             taskId = state['task_id']
         else:
             taskId = str(uuid.uuid4())
@@ -197,7 +307,12 @@ Current agent: {current_agent['active_agent']}
             # pushNotification=None,
             metadata={'conversation_id': sessionId},
         )
-        task = await client.send_task(request, self.task_callback)
+        task_callback = self.task_callback
+        if on_update:
+            def task_callback(event):
+                on_update(event)
+                return self.task_callback(event) if self.task_callback else None
+        task = await client.send_task(request, task_callback)
         # Assume completion unless a state returns that isn't complete
         state['session_active'] = task.status.state not in [
             TaskState.COMPLETED,
@@ -216,53 +331,99 @@ Current agent: {current_agent['active_agent']}
             # Raise error for failure
             raise ValueError(f"Agent {agent_name} task {task.id} failed")
         response = []
+        # File URIs are only followed back to the agent that sent them.
+        origins = [card.url]
         if task.status.message:
             # Assume the information is in the task message.
-            response.extend(convert_parts(task.status.message.parts, tool_context))
+            response.extend(await convert_parts(
+                task.status.message.parts, tool_context, origins))
         if task.artifacts:
             for artifact in task.artifacts:
-                response.extend(convert_parts(artifact.parts, tool_context))
+                response.extend(await convert_parts(artifact.parts, tool_context, origins))
         return response
 
-    async def send_message(self, message: str, tool_context: ToolContext):
+    async def send_message(
+            self,
+            message: str,
+            tool_context: ToolContext,
+            decision: RoutingDecision | None = None):
         """
         Dùng routing để chọn agent phù hợp, có thể gọi song song hoặc chain.
         """
 
-        decision = decide_route(message)
-        responses = []
+        decision = decision or decide_route(message)
+        plan = build_plan(decision)
+        speculation: Speculation | None = None
 
-        if decision.chained:
-            # chain: ví dụ diagnose -> cost -> schedule
-            first = decision.agents[0]
-            first_resp = await self.send_task(first, message, tool_context)
-            responses.append(f"{first}: {first_resp}")
+        async def run_step(agent: str, step_input: str, attempt: int):
+            # Request hedge cần task id riêng để không đè lên task đang chạy.
+            task_id = str(uuid.uuid4()) if attempt else None
+            on_update = None
+            if speculation is not None and agent == "diagnose":
+                on_update = functools.partial(_speculate_on_candidates, speculation)
+            # Plan dùng route key; connection được đăng ký theo tên card.
+            return await self._send_task(
+                self.route_agent(agent), step_input, tool_context, task_id, on_update)
 
-            followup_input = str(first_resp)
-            for agent in decision.agents[1:]:
-                followup_resp = await self.send_task(agent, followup_input, tool_context)
-                responses.append(f"{agent}: {followup_resp}")
+        # Chain diagnose -> cost/schedule: chạy trước cost/schedule cho các bệnh
+        # ứng viên diagnose stream về, giữ lần chạy khớp chẩn đoán cuối.
+        speculative_agents = [
+            step.agent for step in plan
+            if "diagnose" in step.depends_on and step.agent in SPECULATIVE_AGENTS
+        ]
+        if speculative_agents:
+            speculation = Speculation(speculative_agents, run_step, message)
 
-        else:
-            # chạy song song nhiều agent
-            tasks = [
-                self.send_task(agent, message, tool_context)
-                for agent in decision.agents
-            ]
-            results = await asyncio.gather(*tasks)
-            for agent, result in zip(decision.agents, results):
-                responses.append(f"{agent}: {result}")
+        # DAG: diagnose -> (cost || schedule); agent lỗi/quá hạn chỉ mất phần của nó.
+        results = await self.planner.execute(plan, message, run_step, speculation)
+        responses = []
+        for step in plan:
+            result = results[step.agent]
+            if result.ok:
+                responses.append(f"{step.agent}: {result.value}")
+            else:
+                responses.append(f"{step.agent}: (không có kết quả: {result.error})")
 
         return "\n".join(map(str, responses))
 
-def convert_parts(parts: list[Part], tool_context: ToolContext):
+def _new_user_message(llm_request) -> str | None:
+    """Text of the user's message when this is the first model call of a
+    turn (the last content is the user's, not a tool result)."""
+    if not llm_request.contents:
+        return None
+    content = llm_request.contents[-1]
+    if content.role != "user" or not content.parts:
+        return None
+    if any(part.function_response for part in content.parts):
+        return None
+    text = "".join(part.text or "" for part in content.parts).strip()
+    return text or None
+
+
+def _speculate_on_candidates(speculation: Speculation, event: Any):
+    """Đọc `candidates` trong status update của diagnose và chạy trước."""
+    status = getattr(event, 'status', None)
+    if not status or not status.message:
+        return
+    for part in status.message.parts:
+        if part.type == "data" and part.data.get("candidates"):
+            speculation.on_candidates(part.data["candidates"])
+
+
+async def convert_parts(
+        parts: list[Part],
+        tool_context: ToolContext,
+        allowed_origins: list[str] = ()):
     rval = []
     for p in parts:
-        rval.append(convert_part(p, tool_context))
+        rval.append(await convert_part(p, tool_context, allowed_origins))
     return rval
 
 
-def convert_part(part: Part, tool_context: ToolContext):
+async def convert_part(
+        part: Part,
+        tool_context: ToolContext,
+        allowed_origins: list[str] = ()):
     if part.type == "text":
         return part.text
     elif part.type == "data":
@@ -270,14 +431,20 @@ def convert_part(part: Part, tool_context: ToolContext):
     elif part.type == "file":
         # Repackage A2A FilePart to google.genai Blob
         # Currently not considering plain text as files
-        file_id = part.file.name
-        file_bytes = base64.b64decode(part.file.bytes)
+        file_id = part.file.name or part.file.uri.rsplit("/", 1)[-1]
+        # Small files arrive inline; larger ones are streamed from their URI.
+        try:
+            file_bytes = await read_file(part.file, allowed_origins=allowed_origins)
+        except (ValueError, BlobTooLargeError) as e:
+            # Untrusted origin, invalid base64 or too large: drop the file,
+            # keep the rest of the reply.
+            return f"File {file_id} skipped: {e}"
         file_part = types.Part(
             inline_data=types.Blob(
                 mime_type=part.file.mimeType,
-                data=file_bytes))
+                data=file_bytes.tobytes()))
         tool_context.save_artifact(file_id, file_part)
         tool_context.actions.skip_summarization = True
         tool_context.actions.escalate = True
         return DataPart(data={"artifact-file-id": file_id})
-    return f"Unknown type: {p.type}"
+    return f"Unknown type: {part.type}"
@@ -0,0 +1,313 @@
+# hosts/multiagent/planner.py
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+import asyncio
+import logging
+import time
+import unicodedata
+
+from .routing import RoutingDecision
+
+logger = logging.getLogger(__name__)
+
+# agent -> các agent mà nó cần kết quả (chỉ áp dụng khi decision.chained)
+AGENT_DEPENDENCIES: Dict[str, List[str]] = {
+    "cost": ["diagnose"],
+    "schedule": ["diagnose"],
+}
+# Hạn chót (giây) cho từng agent, tính cả các lần hedge.
+AGENT_TIMEOUTS: Dict[str, float] = {
+    "diagnose": 60.0,
+    "cost": 30.0,
+    "schedule": 30.0,
+}
+DEFAULT_TIMEOUT = 30.0
+# Sau bao lâu chưa có kết quả thì gửi thêm một request dự phòng (hedge).
+# Chỉ bật cho agent chỉ-đọc và rẻ: hedge schedule có thể đặt lịch hai lần,
+# còn diagnose chậm vì suy luận (không phải vì straggler) nên hedge chỉ nhân
+# đôi tải lên pool suy luận vốn đã giới hạn.
+AGENT_HEDGE_AFTER: Dict[str, float] = {
+    "cost": 5.0,
+}
+
+# Agent được chạy trước (speculative) cho các bệnh ứng viên khi diagnose còn
+# đang chạy: cả hai chỉ tra cứu (bảng giá, đề xuất slot), không đặt lịch thật.
+SPECULATIVE_AGENTS = ("cost", "schedule")
+MAX_SPECULATIVE_CANDIDATES = 2
+
+# (agent, input, attempt) -> kết quả; attempt > 0 là request hedge/retry.
+StepRunner = Callable[[str, str, int], Awaitable[Any]]
+
+
+@dataclass
+class PlanStep:
+    agent: str
+    depends_on: List[str] = field(default_factory=list)
+    timeout: float = DEFAULT_TIMEOUT
+    hedge_after: Optional[float] = None
+    max_attempts: int = 2
+
+
+@dataclass
+class StepResult:
+    agent: str
+    ok: bool
+    value: Any = None
+    error: Optional[str] = None
+    elapsed: float = 0.0
+    attempts: int = 0
+
+
+def build_plan(decision: RoutingDecision) -> List[PlanStep]:
+    """Đổi RoutingDecision thành DAG: diagnose chạy trước, cost và schedule
+    dùng kết quả của diagnose và chạy song song với nhau."""
+    steps = []
+    for agent in decision.agents:
+        depends_on = []
+        if decision.chained:
+            depends_on = [
+                dep for dep in AGENT_DEPENDENCIES.get(agent, []) if dep in decision.agents
+            ]
+        steps.append(PlanStep(
+            agent=agent,
+            depends_on=depends_on,
+            timeout=AGENT_TIMEOUTS.get(agent, DEFAULT_TIMEOUT),
+            hedge_after=AGENT_HEDGE_AFTER.get(agent),
+        ))
+    return steps
+
+
+def _normalize_disease(name: str) -> str:
+    # Giữ dấu: bỏ dấu thì các tên bệnh khác nhau trong tiếng Việt có thể trùng.
+    return " ".join(unicodedata.normalize("NFC", name or "").split())
+
+
+def chained_input(message: str, disease: str) -> str:
+    """Input cho cost/schedule khi đã biết bệnh. Lần chạy thật và lần chạy
+    trước dùng chung hàm này, nên kết quả chạy trước chỉ được dùng lại khi
+    input giống hệt input của lần chạy thật."""
+    return f"{message}\nChẩn đoán: {_normalize_disease(disease)}"
+
+
+def diagnosed_disease(value: Any) -> Optional[str]:
+    """Tìm tên bệnh trong kết quả diagnose (các part đã convert)."""
+    items = value if isinstance(value, list) else [value]
+    for item in items:
+        if isinstance(item, dict) and item.get("disease"):
+            return item["disease"]
+    return None
+
+
+class Speculation:
+    """Chạy trước cost/schedule cho các bệnh ứng viên mà diagnose stream về
+    (`candidates`), trước khi có chẩn đoán cuối.
+
+    Khi diagnose xong, `take` trả về lần chạy có input trùng khớp với input
+    của lần chạy thật (cùng tên bệnh sau chuẩn hoá); các lần chạy còn lại bị
+    huỷ bởi `take`/`cancel`. Huỷ một lần chạy làm RemoteAgentConnections gửi
+    tasks/cancel cho task id của nó, nên agent cũng dừng việc thừa.
+    """
+
+    def __init__(
+        self,
+        agents: List[str],
+        run_step: StepRunner,
+        message: str,
+        max_candidates: int = MAX_SPECULATIVE_CANDIDATES,
+    ):
+        self.agents = agents
+        self.run_step = run_step
+        self.message = message
+        self.max_candidates = max_candidates
+        # (agent, input) -> lần chạy trước
+        self.tasks: Dict[Tuple[str, str], asyncio.Task] = {}
+        # Lần chạy đã huỷ nhưng chưa gửi xong tasks/cancel; giữ tham chiếu
+        # để task không bị thu gom giữa chừng.
+        self._cancelling: set[asyncio.Task] = set()
+        self.hits = 0
+        self.misses = 0
+
+    def on_candidates(self, candidates: List[str]):
+        for candidate in candidates[: self.max_candidates]:
+            if not _normalize_disease(candidate):
+                continue
+            step_input = chained_input(self.message, candidate)
+            for agent in self.agents:
+                if (agent, step_input) not in self.tasks:
+                    # attempt=1: dùng task id riêng cho request chạy trước.
+                    self.tasks[(agent, step_input)] = asyncio.create_task(
+                        self.run_step(agent, step_input, 1)
+                    )
+
+    def take(self, agent: str, step_input: Optional[str]) -> Optional[asyncio.Task]:
+        """Lấy lần chạy trước của `agent` có đúng `step_input`, huỷ các lần còn lại."""
+        match = None
+        for key in [key for key in self.tasks if key[0] == agent]:
+            task = self.tasks.pop(key)
+            if step_input is not None and key[1] == step_input:
+                match = task
+            else:
+                self._cancel(task)
+        if match is not None:
+            self.hits += 1
+        elif step_input is not None:
+            self.misses += 1
+        return match
+
+    def cancel(self):
+        for task in self.tasks.values():
+            self._cancel(task)
+        self.tasks.clear()
+
+    def _cancel(self, task: asyncio.Task):
+        if task.done():
+            return
+        task.cancel()
+        self._cancelling.add(task)
+        task.add_done_callback(self._cancelling.discard)
+
+
+class ExecutionPlanner:
+    """Chạy plan theo DAG: mỗi agent bắt đầu ngay khi các agent nó phụ thuộc
+    xong, nên tổng độ trễ xấp xỉ đường găng thay vì tổng các bước.
+
+    Mỗi bước có hạn chót riêng; bước quá hạn bị huỷ và chỉ mất kết quả của
+    bước đó. Nếu một phụ thuộc thất bại, bước sau vẫn chạy với câu hỏi gốc.
+    """
+
+    def __init__(self, deadline: Optional[float] = None):
+        # Hạn chót cho cả plan; hết hạn thì huỷ các bước còn chạy.
+        self.deadline = deadline
+
+    async def execute(
+        self,
+        plan: List[PlanStep],
+        message: str,
+        run_step: StepRunner,
+        speculation: Optional[Speculation] = None,
+    ) -> Dict[str, StepResult]:
+        tasks: Dict[str, asyncio.Task] = {}
+        # plan đã theo thứ tự topo nên phụ thuộc luôn được tạo trước.
+        for step in plan:
+            deps = [tasks[d] for d in step.depends_on]
+            tasks[step.agent] = asyncio.create_task(
+                self._run_step(step, deps, message, run_step, speculation)
+            )
+
+        try:
+            done, pending = await asyncio.wait(tasks.values(), timeout=self.deadline)
+        finally:
+            if speculation is not None:
+                speculation.cancel()
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+        results = {}
+        for step in plan:
+            task = tasks[step.agent]
+            if task in done:
+                results[step.agent] = task.result()
+            else:
+                results[step.agent] = StepResult(
+                    step.agent, ok=False, error="plan deadline exceeded"
+                )
+        return results
+
+    async def _run_step(
+        self,
+        step: PlanStep,
+        deps: List[asyncio.Task],
+        message: str,
+        run_step: StepRunner,
+        speculation: Optional[Speculation] = None,
+    ) -> StepResult:
+        dep_results: List[StepResult] = [await dep for dep in deps]
+        succeeded = [r for r in dep_results if r.ok]
+        disease = next(
+            (d for d in map(diagnosed_disease, (r.value for r in succeeded)) if d),
+            None,
+        )
+        step_input = message
+        if disease:
+            step_input = chained_input(message, disease)
+        elif succeeded:
+            step_input = "\n".join(str(r.value) for r in succeeded)
+
+        speculative = None
+        if speculation is not None and succeeded:
+            speculative = speculation.take(step.agent, step_input if disease else None)
+
+        started = time.perf_counter()
+        attempts = [0]
+        try:
+            if speculative is not None:
+                # Đã chạy trước cho đúng bệnh được chẩn đoán: chỉ chờ phần còn lại.
+                attempts[0] = 1
+                work = self._speculative(speculative, step, step_input, run_step, attempts)
+            else:
+                work = self._hedged(step, step_input, run_step, attempts)
+            value = await asyncio.wait_for(work, step.timeout)
+            return StepResult(
+                step.agent, ok=True, value=value,
+                elapsed=time.perf_counter() - started, attempts=attempts[0],
+            )
+        except asyncio.TimeoutError:
+            error = f"timed out after {step.timeout:.0f}s"
+        except Exception as e:
+            error = str(e)
+        logger.warning(f"Agent {step.agent} gave no result: {error}")
+        return StepResult(
+            step.agent, ok=False, error=error,
+            elapsed=time.perf_counter() - started, attempts=attempts[0],
+        )
+
+    async def _speculative(
+        self,
+        speculative: asyncio.Task,
+        step: PlanStep,
+        step_input: str,
+        run_step: StepRunner,
+        attempts: List[int],
+    ) -> Any:
+        try:
+            return await speculative
+        except Exception as e:
+            # Lần chạy trước lỗi thì chạy lại bình thường với kết quả diagnose.
+            logger.info(f"Speculative {step.agent} failed, running it again: {e}")
+            attempts[0] = 0
+            return await self._hedged(step, step_input, run_step, attempts)
+
+    async def _hedged(
+        self, step: PlanStep, step_input: str, run_step: StepRunner, attempts: List[int]
+    ) -> Any:
+        """Gửi request; nếu quá hedge_after chưa xong (hoặc lỗi) thì gửi thêm một
+        request dự phòng, lấy kết quả về trước và huỷ request còn lại (run_step
+        bị huỷ thì gửi tasks/cancel cho agent, xem RemoteAgentConnections)."""
+        pending: set[asyncio.Task] = set()
+
+        def launch():
+            pending.add(asyncio.create_task(run_step(step.agent, step_input, attempts[0])))
+            attempts[0] += 1
+
+        launch()
+        last_error: Optional[BaseException] = None
+        try:
+            while pending:
+                can_hedge = step.hedge_after is not None and attempts[0] < step.max_attempts
+                done, pending = await asyncio.wait(
+                    pending,
+                    timeout=step.hedge_after if can_hedge else None,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    last_error = task.exception()
+                if can_hedge:
+                    launch()
+            raise last_error
+        finally:
+            for task in pending:
+                task.cancel()
@@ -1,5 +1,8 @@
+import asyncio
+import logging
 from typing import Callable
 import uuid
+import httpx
 from common.types import (
     AgentCard,
     Task,
@@ -8,12 +11,20 @@ from common.types import (
     TaskArtifactUpdateEvent,
     TaskStatus,
     TaskState,
+    A2AClientHTTPError,
 )
 from common.client import A2AClient
+from common.server.sse_queue import event_sequence
 
 TaskCallbackArg = Task | TaskStatusUpdateEvent | TaskArtifactUpdateEvent
 TaskUpdateCallback = Callable[[TaskCallbackArg], Task]
 
+MAX_RESUBSCRIBE_ATTEMPTS = 3
+RESUBSCRIBE_BACKOFF_SECONDS = 0.5
+CANCEL_TIMEOUT_SECONDS = 5.0
+
+logger = logging.getLogger(__name__)
+
 class RemoteAgentConnections:
   """A class to hold the connections to the remote agents."""
 
@@ -32,6 +43,30 @@ class RemoteAgentConnections:
       self,
       request: TaskSendParams,
       task_callback: TaskUpdateCallback | None,
+  ) -> Task | None:
+    try:
+      return await self._send_task(request, task_callback)
+    except asyncio.CancelledError:
+      # The host gave up on this task (a hedge or speculative run lost, or a
+      # deadline passed); stop the agent from finishing work nobody reads.
+      await self.cancel_task(request.id)
+      raise
+
+  async def cancel_task(self, task_id: str) -> bool:
+    """Best-effort tasks/cancel; False when the agent did not cancel it."""
+    try:
+      response = await asyncio.wait_for(
+          self.agent_client.cancel_task({'id': task_id}),
+          CANCEL_TIMEOUT_SECONDS)
+    except Exception as e:
+      logger.info(f"Could not cancel task {task_id} on {self.card.name}: {e}")
+      return False
+    return response.error is None
+
+  async def _send_task(
+      self,
+      request: TaskSendParams,
+      task_callback: TaskUpdateCallback | None,
   ) -> Task | None:
     if self.card.capabilities.streaming:
       task = None
@@ -45,25 +80,42 @@ class RemoteAgentConnections:
             ),
             history=[request.message],
         ))
-      async for response in self.agent_client.send_task_streaming(request.model_dump()):
-        merge_metadata(response.result, request)
-        # For task status updates, we need to propagate metadata and provide
-        # a unique message id.
-        if (hasattr(response.result, 'status') and
-            hasattr(response.result.status, 'message') and
-            response.result.status.message):
-          merge_metadata(response.result.status.message, request.message)
-          m = response.result.status.message
-          if not m.metadata:
-            m.metadata = {}
-          if 'message_id' in m.metadata:
-            m.metadata['last_message_id'] = m.metadata['message_id']
-          m.metadata['message_id'] = str(uuid.uuid4())
-        if task_callback:
-          task = task_callback(response.result)
-        if hasattr(response.result, 'final') and response.result.final:
-          break
-      return task
+      last_sequence = None
+      attempts = 0
+      responses = self.agent_client.send_task_streaming(request.model_dump())
+      while True:
+        try:
+          async for response in responses:
+            sequence = event_sequence(response.result)
+            if sequence is not None:
+              last_sequence = sequence
+            merge_metadata(response.result, request)
+            # For task status updates, we need to propagate metadata and provide
+            # a unique message id.
+            if (hasattr(response.result, 'status') and
+                hasattr(response.result.status, 'message') and
+                response.result.status.message):
+              merge_metadata(response.result.status.message, request.message)
+              m = response.result.status.message
+              if not m.metadata:
+                m.metadata = {}
+              if 'message_id' in m.metadata:
+                m.metadata['last_message_id'] = m.metadata['message_id']
+              m.metadata['message_id'] = str(uuid.uuid4())
+            if task_callback:
+              task = task_callback(response.result)
+            if hasattr(response.result, 'final') and response.result.final:
+              return task
+          return task
+        except (A2AClientHTTPError, httpx.TransportError):
+          # The agent keeps working when our stream drops, so pick the stream
+          # back up instead of sending the task (and redoing the work) again.
+          if attempts >= MAX_RESUBSCRIBE_ATTEMPTS:
+            raise
+          attempts += 1
+          await asyncio.sleep(RESUBSCRIBE_BACKOFF_SECONDS * attempts)
+          responses = self.agent_client.resubscribe_task_streaming(
+              {'id': request.id, 'lastEventId': last_sequence})
     else: # Non-streaming
       response = await self.agent_client.send_task(request.model_dump())
       merge_metadata(response.result, request)
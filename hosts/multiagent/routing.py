@@ -1,33 +1,124 @@
 # hosts/multiagent/routing.py
 from __future__ import annotations
 from dataclasses import dataclass
-from typing import List, Dict
+from typing import List, Dict, Pattern
 import re
+import unicodedata
 
 @dataclass
 class RoutingDecision:
     agents: List[str]   # agents cần gọi
     reason: str
     chained: bool       # có cần chain không
+    confidence: float = 1.0  # 0..1, thấp khi chỉ là fallback
 
 KEYWORDS = {
-    "diagnose": [r"chẩn đoán", r"triệu chứng", r"symptom", r"diagnose"],
+    "diagnose": [r"chẩn đoán", r"triệu chứng", r"symptom", r"diagnose",
+                 r"sốt", r"ho", r"đau", r"mệt", r"buồn nôn", r"tiêu chảy",
+                 r"khó thở", r"chóng mặt", r"phát ban", r"ngứa",
+                 r"fever", r"cough", r"pain"],
     "cost":     [r"chi phí", r"cost", r"price", r"giá"],
     "schedule": [r"lịch", r"đặt hẹn", r"schedule", r"appointment"],
 }
+# Route key -> skill id trên AgentCard của agent phục vụ route đó. Tên card
+# ("Agent Chuẩn Đoán", ...) dành cho người đọc và có thể đổi, skill id thì ổn định.
+ROUTE_SKILLS: Dict[str, str] = {
+    "diagnose": "medical_diagnose",
+    "cost": "chi_phi",
+    "schedule": "de_xuat_va_dat_lich",
+}
 KNOWN_DISEASE = [
     r"viêm", r"ung thư", r"cảm", r"flu", r"asthma", r"covid",
     r"tiểu đường", r"diabetes", r"disease", r"bệnh"
 ]
 
+# Cụm từ chứa từ khoá nhưng không mang ý đó ("cảm ơn" không phải bệnh cảm,
+# "gia đình" không hỏi giá). Được khớp trước các từ khoá nên "nuốt" luôn chúng.
+EXCLUDED_PHRASES = [
+    r"cảm ơn", r"cám ơn", r"cảm thấy", r"cảm giác", r"cảm nhận",
+    r"gia đình", r"người già", r"tuổi già", r"giá như",
+    r"lịch sử", r"bệnh viện", r"bệnh nhân", r"ở đâu", r"họ tên",
+]
+
+# Độ tin cậy: khớp từ khoá có dấu > khớp không dấu (dễ trùng từ khác) > fallback.
+CONFIDENCE_ACCENTED = 0.9
+CONFIDENCE_UNACCENTED = 0.7
+CONFIDENCE_FALLBACK = 0.3
+# Từ mức này trở lên host chạy plan ngay, bỏ qua lượt lập kế hoạch của LLM.
+BYPASS_CONFIDENCE = 0.85
+
+
+def strip_accents(text: str) -> str:
+    text = unicodedata.normalize("NFD", text)
+    text = "".join(ch for ch in text if unicodedata.category(ch) != "Mn")
+    return text.replace("đ", "d").replace("Đ", "D")
+
+
+def _compile(strip: bool) -> Pattern[str]:
+    """Gộp mọi pattern thành một alternation có nhóm tên, quét text một lần.
+
+    Mỗi pattern phải khớp trọn từ (\\b), để "gia" không khớp giữa "giai đoạn";
+    nhóm `skip` (EXCLUDED_PHRASES) đứng đầu nên được ưu tiên tại cùng vị trí.
+    """
+    groups = dict(skip=EXCLUDED_PHRASES, **KEYWORDS, disease=KNOWN_DISEASE)
+    alternatives = []
+    for name, pats in groups.items():
+        pats = [strip_accents(p) if strip else p for p in pats]
+        alternatives.append(f"(?P<{name}>" + "|".join(pats) + ")")
+    return re.compile(r"\b(?:" + "|".join(alternatives) + r")\b")
+
+
+_ACCENTED_PATTERN = _compile(strip=False)
+_UNACCENTED_PATTERN = _compile(strip=True)
+
+
+def _scan(user_text: str) -> tuple[set[str], float]:
+    """Quét bản bỏ dấu một lần, rồi chấm từng chỗ khớp theo cách người dùng gõ.
+
+    Trong câu có dấu, chỗ khớp đúng pattern có dấu ("sốt", "covid") tính
+    CONFIDENCE_ACCENTED. Chỗ gõ không dấu ("sot") tính CONFIDENCE_UNACCENTED,
+    nên câu trộn như "tôi bi sot" vẫn khớp. Chỗ có dấu nhưng khác pattern là
+    từ khác cùng cách viết không dấu ("già" không phải "giá") nên bỏ qua.
+    Độ tin cậy chung là của nhóm kém chắc nhất.
+    """
+    text = unicodedata.normalize("NFC", user_text).lower()
+    stripped = strip_accents(text)
+    accented = stripped != text
+    if len(stripped) != len(text):
+        # Ký tự tách thành nhiều ký tự gốc (hiếm): bỏ dấu từng ký tự để vị
+        # trí trên bản bỏ dấu vẫn trỏ đúng vào text gốc.
+        stripped = "".join(
+            s if len(s := strip_accents(ch)) == 1 else ch for ch in text)
+    confidences: Dict[str, float] = {}
+    for m in _UNACCENTED_PATTERN.finditer(stripped):
+        group = m.lastgroup
+        if group == "skip":
+            continue
+        original = text[m.start():m.end()]
+        exact = _ACCENTED_PATTERN.fullmatch(original) if accented else None
+        if exact is not None and exact.lastgroup == group:
+            confidence = CONFIDENCE_ACCENTED
+        elif original == m.group():
+            confidence = CONFIDENCE_UNACCENTED
+        else:
+            continue
+        confidences[group] = max(confidence, confidences.get(group, 0.0))
+    if not confidences:
+        return set(), CONFIDENCE_FALLBACK
+    return set(confidences), min(confidences.values())
+
+
 def decide_route(user_text: str) -> RoutingDecision:
-    text = user_text.lower()
-    matches: Dict[str, bool] = {
-        agent: any(re.search(p, text) for p in pats)
-        for agent, pats in KEYWORDS.items()
-    }
+    found, confidence = _scan(user_text)
+    decision = _decide_route(found)
+    decision.confidence = CONFIDENCE_FALLBACK if not found else confidence
+    return decision
+
+
+def _decide_route(found: set[str]) -> RoutingDecision:
+    matches: Dict[str, bool] = {agent: agent in found for agent in KEYWORDS}
     chosen = [a for a, ok in matches.items() if ok]
-    knows_disease = any(re.search(p, text) for p in KNOWN_DISEASE)
+    knows_disease = "disease" in found
 
     # 1. biết bệnh + cost/schedule
     if knows_disease:
@@ -0,0 +1,38 @@
+import logging
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from a2a_ui.app import routes
+
+SECRET = "http://10.0.0.7:8010/api/host/run: connection refused"
+
+
+@pytest.fixture
+def client(monkeypatch):
+    async def fail(*args, **kwargs):
+        raise httpx.ConnectError(SECRET)
+
+    for name in ("send_message", "open_message_stream", "send_task"):
+        monkeypatch.setattr(routes.bridge, name, fail)
+    app = FastAPI()
+    app.include_router(routes.api_router, prefix="/api")
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("path, body, headers", [
+    ("/api/chat", {"message": "Tôi bị sốt"}, {}),
+    ("/api/chat", {"message": "Tôi bị sốt"}, {"Accept": "text/event-stream"}),
+    ("/api/message", {"text": "Tôi bị sốt"}, {}),
+    ("/api/submit", {"kind": "cost_agent", "values": {}}, {}),
+])
+def test_host_errors_are_logged_not_returned(client, caplog, path, body, headers):
+    with caplog.at_level(logging.ERROR, logger=routes.logger.name):
+        response = client.post(path, json=body, headers=headers)
+
+    assert response.status_code == 500
+    assert response.json() == {"detail": "HostAgent request failed"}
+    assert SECRET not in response.text
+    assert SECRET in caplog.text
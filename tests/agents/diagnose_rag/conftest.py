@@ -0,0 +1,9 @@
+import os
+import sys
+
+# The diagnose agent is run from its own directory and imports its modules
+# (agent, task_manager, core.*) as top-level names.
+sys.path.insert(
+    0,
+    os.path.join(os.path.dirname(__file__), "..", "..", "..", "agents", "diagnose_rag"),
+)
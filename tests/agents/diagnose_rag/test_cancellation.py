@@ -0,0 +1,132 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from common.types import (
+    CancelTaskRequest,
+    SendTaskStreamingRequest,
+    ServerOverloadedError,
+    TaskIdParams,
+    TaskState,
+)
+from core.inference_pool import OverloadedError
+from task_manager import AgentTaskManager
+from tests.conftest import send_params
+
+
+class StagedAgent:
+    """Fake agent that reports progress, then waits in a "retrieval" stage."""
+
+    def __init__(self, overloaded: bool = False):
+        self.overloaded = overloaded
+        self.in_stage = asyncio.Event()
+        self.cancelled: threading.Event | None = None
+
+    async def stream(self, query, session_id, cancelled=None):
+        self.cancelled = cancelled
+        yield {"is_task_complete": False, "updates": "retrieving"}
+        if self.overloaded:
+            raise OverloadedError(retry_after=2.0)
+        self.in_stage.set()
+        await asyncio.sleep(10)
+        yield {"is_task_complete": True, "content": "too late"}
+
+
+async def start_stream(manager, task_id: str = "t1"):
+    request = SendTaskStreamingRequest(id=1, params=send_params(task_id))
+    return await manager.on_send_task_subscribe(request)
+
+
+def test_overloaded_stream_fails_the_task(run):
+    async def scenario():
+        manager = AgentTaskManager(agent=StagedAgent(overloaded=True))
+        stream = await start_stream(manager)
+        responses = [response async for response in stream]
+        return manager.tasks["t1"], responses
+
+    task, responses = run(asyncio.wait_for(scenario(), 5))
+    assert task.status.state == TaskState.FAILED
+    assert responses[-1].error.code == ServerOverloadedError().code
+    assert responses[-1].error.data == {"retryAfter": 2.0}
+
+
+def test_cancel_sets_the_agent_flag_and_cancels_the_task(run):
+    async def scenario():
+        agent = StagedAgent()
+        manager = AgentTaskManager(agent=agent)
+        stream = await start_stream(manager)
+        await agent.in_stage.wait()
+        response = await manager.on_cancel_task(
+            CancelTaskRequest(id=2, params=TaskIdParams(id="t1"))
+        )
+        events = [r.result async for r in stream]
+        return agent, manager, response, events
+
+    agent, manager, response, events = run(asyncio.wait_for(scenario(), 5))
+    assert agent.cancelled.is_set()
+    assert response.result.status.state == TaskState.CANCELED
+    assert events[-1].final and events[-1].status.state == TaskState.CANCELED
+    assert "t1" not in manager.running_tasks
+    assert not manager._cancel_flags
+
+
+def test_retrieve_stops_between_stages_once_cancelled():
+    agent_module = pytest.importorskip("agent")
+
+    class Retriever:
+        def __init__(self, cancelled: threading.Event):
+            self.cancelled = cancelled
+            self.reranked = False
+
+        def retrieve(self, query):
+            # tasks/cancel arrives while the thread is still retrieving.
+            self.cancelled.set()
+            return [{"text": "doc", "meta": {}}]
+
+        def rerank(self, query, docs):
+            self.reranked = True
+            return docs
+
+    diagnose = agent_module.Diagnose(lazy=True)
+    cancelled = threading.Event()
+    diagnose.retriever = Retriever(cancelled)
+    with pytest.raises(asyncio.CancelledError):
+        diagnose._retrieve("query", cancelled)
+    assert not diagnose.retriever.reranked
+
+
+def test_iterating_in_a_thread_leaves_the_cancel_flag_alone(run):
+    agent_module = pytest.importorskip("agent")
+    cancelled = threading.Event()
+    produced = []
+
+    def tokens():
+        for i in range(20):
+            produced.append(i)
+            yield str(i)
+            time.sleep(0.01)
+
+    async def consume(limit: int | None = None):
+        received = []
+        stream = agent_module.iterate_in_thread(tokens, cancelled=cancelled)
+        async for token in stream:
+            received.append(token)
+            if limit is not None and len(received) == limit:
+                await stream.aclose()
+                break
+        return received
+
+    assert run(consume()) == [str(i) for i in range(20)]
+    # A normal completion is not a cancellation.
+    assert not cancelled.is_set()
+
+    produced.clear()
+    run(consume(limit=1))
+    assert not cancelled.is_set()
+    # The thread stops shortly after the consumer does.
+    assert len(produced) < 20
+
+    cancelled.set()
+    assert run(consume()) == []
@@ -0,0 +1,68 @@
+import asyncio
+import threading
+
+import pytest
+
+from core import inference_pool
+from core.inference_pool import DeadlineExceededError, InferencePool, OverloadedError
+
+
+@pytest.fixture(autouse=True)
+def fixed_cpus(monkeypatch):
+    monkeypatch.setattr(inference_pool.os, "cpu_count", lambda: 8)
+    # Keep the test process's own torch settings untouched.
+    monkeypatch.setattr(inference_pool.torch, "set_num_threads", lambda n: None)
+    monkeypatch.setattr(inference_pool.torch, "set_num_interop_threads", lambda n: None)
+    for name in ("DIAGNOSE_PROCESSES", "INFERENCE_WORKERS", "INFERENCE_TORCH_THREADS"):
+        monkeypatch.delenv(name, raising=False)
+
+
+def test_threads_are_split_across_processes_and_workers(monkeypatch):
+    assert InferencePool(workers=2).torch_threads == 4
+    assert InferencePool(workers=2, processes=2).torch_threads == 2
+    monkeypatch.setenv("DIAGNOSE_PROCESSES", "4")
+    assert InferencePool(workers=2).torch_threads == 1
+    # Never below one thread.
+    assert InferencePool(workers=4, processes=4).torch_threads == 1
+
+
+def test_full_queue_is_rejected_with_retry_after(run):
+    pool = InferencePool(workers=1, max_queue=1, deadline=5)
+    release = threading.Event()
+
+    async def scenario():
+        running = asyncio.ensure_future(pool.run(release.wait))
+        await asyncio.sleep(0.05)
+        queued = asyncio.ensure_future(pool.run(lambda: "queued"))
+        await asyncio.sleep(0.05)
+        with pytest.raises(OverloadedError) as excinfo:
+            await pool.run(lambda: "rejected")
+        release.set()
+        return await running, await queued, excinfo.value
+
+    first, second, error = run(scenario())
+    assert (first, second) == (True, "queued")
+    assert error.retry_after >= 1.0
+    metrics = pool.metrics()
+    assert metrics["rejected"] == 1
+    assert metrics["service_time"]["count"] == 2
+    assert metrics["queued"] == metrics["running"] == 0
+
+
+def test_request_waiting_past_its_deadline_expires(run):
+    pool = InferencePool(workers=1, max_queue=4, deadline=5)
+    release = threading.Event()
+
+    async def scenario():
+        running = asyncio.ensure_future(pool.run(release.wait))
+        await asyncio.sleep(0.05)
+        with pytest.raises(DeadlineExceededError) as excinfo:
+            await pool.run(lambda: None, deadline=0.05)
+        release.set()
+        await running
+        return excinfo.value
+
+    error = run(scenario())
+    assert error.waited >= 0.05
+    assert pool.metrics()["expired"] == 1
+    assert pool.metrics()["queue_wait"]["count"] == 1
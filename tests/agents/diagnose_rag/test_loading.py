@@ -0,0 +1,88 @@
+import time
+
+import agent as agent_module
+
+
+class FakeEmbedder:
+    def __init__(self, use_vncorenlp=False, backend=None, intra_op_threads=None):
+        self.use_vncorenlp = use_vncorenlp
+        self.intra_op_threads = intra_op_threads
+        self.ws = None
+
+    def attach_word_segmenter(self):
+        self.ws = "jvm"
+
+
+def record(created: list, name: str):
+    def factory(*args, **kwargs):
+        created.append(name)
+        return object()
+
+    return factory
+
+
+def test_weights_load_before_fork_and_clients_after(monkeypatch):
+    created = []
+    monkeypatch.setattr(agent_module, "EmbeddingGenerator", FakeEmbedder)
+    monkeypatch.setattr(agent_module, "ViRanker", record(created, "reranker"))
+    monkeypatch.setattr(agent_module, "VectorDB", record(created, "qdrant"))
+    monkeypatch.setattr(agent_module, "LLMGenerator", record(created, "llm"))
+
+    diagnose = agent_module.Diagnose(lazy=True, use_ws_for_query=True)
+    diagnose.load_weights()
+    # Only fork-safe weights: no JVM, no Qdrant or LLM client yet.
+    assert created == ["reranker"]
+    assert diagnose.embedder.use_vncorenlp is False
+    assert diagnose.embedder.ws is None
+    assert diagnose.embedder.intra_op_threads == diagnose.pool.torch_threads
+    assert not diagnose.loaded
+
+    embedder = diagnose.embedder
+    diagnose.load()
+    assert diagnose.loaded
+    assert diagnose.embedder is embedder
+    assert diagnose.embedder.ws == "jvm"
+    assert sorted(created) == ["llm", "qdrant", "reranker"]
+
+
+def test_models_load_concurrently(monkeypatch):
+    def slow(*args, **kwargs):
+        time.sleep(0.2)
+        return FakeEmbedder()
+
+    for name in ("EmbeddingGenerator", "ViRanker", "VectorDB", "LLMGenerator"):
+        monkeypatch.setattr(agent_module, name, slow)
+
+    diagnose = agent_module.Diagnose(lazy=True, use_ws_for_query=False)
+    started = time.perf_counter()
+    diagnose.load()
+    # Four 0.2 s loads, overlapped.
+    assert time.perf_counter() - started < 0.6
+
+
+def test_warmup_runs_dummy_inference_after_loading(monkeypatch):
+    calls = []
+
+    class Embedder(FakeEmbedder):
+        def encode_query(self, texts):
+            calls.append(("embed", texts))
+
+    class Reranker:
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def rerank(self, query, docs, top_k):
+            calls.append(("rerank", query))
+
+    monkeypatch.setattr(agent_module, "EmbeddingGenerator", Embedder)
+    monkeypatch.setattr(agent_module, "ViRanker", Reranker)
+    monkeypatch.setattr(agent_module, "VectorDB", lambda: object())
+    monkeypatch.setattr(agent_module, "LLMGenerator", lambda **kwargs: object())
+
+    diagnose = agent_module.Diagnose(lazy=True, use_ws_for_query=False)
+    diagnose.warmup()
+    assert diagnose.loaded
+    assert calls == [
+        ("embed", [agent_module.WARMUP_QUERY]),
+        ("rerank", agent_module.WARMUP_QUERY),
+    ]
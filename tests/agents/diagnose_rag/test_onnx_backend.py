@@ -0,0 +1,155 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("optimum.onnxruntime")
+
+import torch
+from tokenizers import Tokenizer, models, pre_tokenizers, processors
+from transformers import (
+    PreTrainedTokenizerFast,
+    XLMRobertaConfig,
+    XLMRobertaForSequenceClassification,
+    XLMRobertaModel,
+)
+
+from core import onnx_backend
+from core.onnx_backend import OnnxCrossEncoder, OnnxDenseEncoder, inference_backend
+
+WORDS = "sốt ho đau họng cúm cảm lạnh viêm phổi mệt mỏi đầu bụng tiêu chảy".split()
+QUERIES = ["sốt ho đau họng", "cúm mệt mỏi đau đầu", "tiêu chảy đau bụng"]
+
+
+def _tokenizer() -> PreTrainedTokenizerFast:
+    vocab = {t: i for i, t in enumerate(["<s>", "<pad>", "</s>", "<unk>"] + WORDS)}
+    tok = Tokenizer(models.WordLevel(vocab, unk_token="<unk>"))
+    tok.pre_tokenizer = pre_tokenizers.Whitespace()
+    tok.post_processor = processors.TemplateProcessing(
+        single="<s> $A </s>",
+        pair="<s> $A </s> </s> $B </s>",
+        special_tokens=[("<s>", 0), ("</s>", 2)],
+    )
+    return PreTrainedTokenizerFast(
+        tokenizer_object=tok,
+        bos_token="<s>",
+        eos_token="</s>",
+        pad_token="<pad>",
+        unk_token="<unk>",
+        cls_token="<s>",
+        sep_token="</s>",
+    )
+
+
+def _config(**kwargs) -> XLMRobertaConfig:
+    # Same architecture family as BGE-M3 / ViRanker, small enough to export
+    # in well under a second.
+    return XLMRobertaConfig(
+        vocab_size=4 + len(WORDS),
+        hidden_size=32,
+        num_hidden_layers=2,
+        num_attention_heads=2,
+        intermediate_size=64,
+        max_position_embeddings=64,
+        pad_token_id=1,
+        **kwargs,
+    )
+
+
+@pytest.fixture
+def onnx_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("ONNX_CACHE_DIR", str(tmp_path / "onnx"))
+    return tmp_path
+
+
+@pytest.fixture
+def tiny_encoder(tmp_path):
+    torch.manual_seed(0)
+    model = XLMRobertaModel(_config()).eval()
+    path = str(tmp_path / "tiny-encoder")
+    model.save_pretrained(path)
+    tokenizer = _tokenizer()
+    tokenizer.save_pretrained(path)
+    return path, model, tokenizer
+
+
+@pytest.fixture
+def tiny_reranker(tmp_path):
+    torch.manual_seed(0)
+    model = XLMRobertaForSequenceClassification(_config(num_labels=1)).eval()
+    path = str(tmp_path / "tiny-reranker")
+    model.save_pretrained(path)
+    tokenizer = _tokenizer()
+    tokenizer.save_pretrained(path)
+    return path, model, tokenizer
+
+
+def test_backend_defaults_to_torch(monkeypatch):
+    monkeypatch.delenv(onnx_backend.INFERENCE_BACKEND_ENV, raising=False)
+    assert inference_backend() == "torch"
+    monkeypatch.setenv(onnx_backend.INFERENCE_BACKEND_ENV, "ONNX")
+    assert inference_backend() == "onnx"
+    # An explicit argument wins over the environment.
+    assert inference_backend("torch") == "torch"
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        inference_backend("tensorrt")
+
+
+def test_session_options_read_thread_env(monkeypatch):
+    monkeypatch.setenv("ONNX_INTRA_OP_THREADS", "3")
+    monkeypatch.setenv("ONNX_INTER_OP_THREADS", "2")
+    opts = onnx_backend.session_options()
+    assert opts.intra_op_num_threads == 3
+    assert opts.inter_op_num_threads == 2
+
+
+def _torch_dense(model, tokenizer, texts) -> np.ndarray:
+    with torch.no_grad():
+        batch = tokenizer(texts, padding=True, return_tensors="pt")
+        cls = model(**batch).last_hidden_state[:, 0]
+        return torch.nn.functional.normalize(cls, dim=-1).numpy()
+
+
+def _torch_scores(model, tokenizer, pairs) -> np.ndarray:
+    with torch.no_grad():
+        batch = tokenizer(
+            [p[0] for p in pairs], [p[1] for p in pairs], padding=True, return_tensors="pt"
+        )
+        return torch.sigmoid(model(**batch).logits[:, 0]).numpy()
+
+
+def test_dense_encoder_matches_torch_fp32(onnx_cache, tiny_encoder, monkeypatch):
+    monkeypatch.setenv("ONNX_QUANTIZE", "0")
+    path, model, tokenizer = tiny_encoder
+    vecs = OnnxDenseEncoder(path).encode(QUERIES, batch_size=2)["dense_vecs"]
+    np.testing.assert_allclose(vecs, _torch_dense(model, tokenizer, QUERIES), atol=1e-4)
+
+
+def test_dense_encoder_int8_stays_close(onnx_cache, tiny_encoder):
+    path, model, tokenizer = tiny_encoder
+    vecs = OnnxDenseEncoder(path).encode(QUERIES)["dense_vecs"]
+    cosine = (vecs * _torch_dense(model, tokenizer, QUERIES)).sum(axis=1)
+    assert cosine.min() > 0.9
+
+
+def test_cross_encoder_matches_torch_fp32(onnx_cache, tiny_reranker, monkeypatch):
+    monkeypatch.setenv("ONNX_QUANTIZE", "0")
+    path, model, tokenizer = tiny_reranker
+    pairs = [[QUERIES[0], doc] for doc in QUERIES]
+    scores = OnnxCrossEncoder(path).predict(pairs, batch_size=2)
+    np.testing.assert_allclose(scores, _torch_scores(model, tokenizer, pairs), atol=1e-4)
+
+
+def test_empty_input_keeps_shape(onnx_cache, tiny_encoder, monkeypatch):
+    monkeypatch.setenv("ONNX_QUANTIZE", "0")
+    path, _, _ = tiny_encoder
+    assert OnnxDenseEncoder(path).encode([])["dense_vecs"].shape == (0, 32)
+
+
+def test_session_threads_follow_the_pool_unless_overridden(monkeypatch):
+    monkeypatch.delenv("ONNX_INTRA_OP_THREADS", raising=False)
+    assert onnx_backend.session_options(2).intra_op_num_threads == 2
+    assert onnx_backend.session_options().intra_op_num_threads == 0
+    monkeypatch.setenv("ONNX_INTRA_OP_THREADS", "3")
+    assert onnx_backend.session_options(2).intra_op_num_threads == 3
@@ -0,0 +1,128 @@
+from common.client import ArtifactAssembler
+from common.client.artifact_assembler import (
+    EXPIRED_KEY,
+    INCOMPLETE_KEY,
+    MISSING_CHUNKS_KEY,
+    TRUNCATED_KEY,
+)
+from common.server.artifact_stream import ArtifactChunker
+from common.types import Artifact, DataPart, TextPart
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _texts(artifact: Artifact) -> list[str]:
+    return [p.text for p in artifact.parts]
+
+
+def test_chunks_are_joined_once_complete():
+    assembler = ArtifactAssembler()
+    chunker = ArtifactChunker(name="answer")
+    partial = assembler.add("t", chunker.text("Sốt "))
+    assert partial.lastChunk is False and _texts(partial) == ["Sốt "]
+    assembler.add("t", chunker.text("xuất "))
+    done = assembler.add("t", chunker.text("huyết", last=True))
+
+    assert done.lastChunk is True
+    assert _texts(done) == ["Sốt xuất huyết"]
+    assert done.name == "answer"
+    assert not done.metadata
+    assert assembler.metrics()["tasks"] == 0
+
+
+def test_data_parts_are_kept_between_text_runs():
+    assembler = ArtifactAssembler()
+    chunker = ArtifactChunker()
+    assembler.add("t", chunker.text("a"))
+    assembler.add("t", chunker.chunk([DataPart(data={"page": 3})]))
+    assembler.add("t", chunker.text("b"))
+    done = assembler.add("t", chunker.text("c", last=True))
+    assert [p.type for p in done.parts] == ["text", "data", "text"]
+    assert done.parts[2].text == "bc"
+
+
+def test_whole_artifacts_pass_through():
+    assembler = ArtifactAssembler()
+    artifact = Artifact(parts=[TextPart(text="one shot")])
+    assert assembler.add("t", artifact) is artifact
+    assert assembler.metrics()["assemblies"] == 0
+
+
+def test_replayed_chunks_are_ignored_and_gaps_recorded():
+    assembler = ArtifactAssembler()
+    chunker = ArtifactChunker()
+    chunks = [chunker.text(t) for t in "abcde"] + [chunker.close()]
+    for i in (0, 1, 1, 4, 5):  # a replay, then chunks 2-3 lost
+        result = assembler.add("t", chunks[i])
+
+    assert _texts(result) == ["abe"]
+    assert result.metadata[INCOMPLETE_KEY] is True
+    assert result.metadata[MISSING_CHUNKS_KEY] == [[2, 3]]
+
+
+def test_lost_first_chunk_marks_the_artifact_incomplete():
+    assembler = ArtifactAssembler()
+    chunker = ArtifactChunker()
+    chunker.text("lost")
+    assembler.add("t", chunker.text("b"))
+    done = assembler.add("t", chunker.close())
+    assert done.metadata[MISSING_CHUNKS_KEY] == [[0, 0]]
+
+
+def test_restarted_artifact_drops_what_was_buffered():
+    assembler = ArtifactAssembler()
+    assembler.add("t", ArtifactChunker().text("stale"))
+    fresh = ArtifactChunker()
+    assembler.add("t", fresh.text("new "))
+    done = assembler.add("t", fresh.text("answer", last=True))
+    assert _texts(done) == ["new answer"]
+    assert assembler.metrics()["buffered_bytes"] == 0
+
+
+def test_buffer_is_bounded_per_task():
+    assembler = ArtifactAssembler(max_task_bytes=8)
+    chunker = ArtifactChunker()
+    other = ArtifactChunker(index=1)
+    assembler.add("t", chunker.text("12345"))
+    assembler.add("t", other.text("678"))
+    assembler.add("t", chunker.text("too much"))
+    # Another task has its own budget.
+    assembler.add("u", ArtifactChunker().text("12345678"))
+
+    done = assembler.add("t", chunker.close())
+    assert _texts(done) == ["12345"]
+    assert done.metadata[TRUNCATED_KEY] is True
+    assert assembler.metrics()["truncated"] == 1
+
+
+def test_idle_assemblies_expire_with_what_arrived():
+    clock = Clock()
+    assembler = ArtifactAssembler(ttl=10, clock=clock)
+    chunker = ArtifactChunker()
+    assembler.add("t", chunker.text("partial"))
+    clock.now = 5
+    assert assembler.expire() == []
+    clock.now = 11
+    [(task_id, artifact)] = assembler.expire()
+
+    assert task_id == "t"
+    assert _texts(artifact) == ["partial"]
+    assert artifact.metadata[EXPIRED_KEY] is True
+    assert assembler.metrics() == {
+        "tasks": 0, "assemblies": 0, "buffered_bytes": 0, "expired": 1, "truncated": 0}
+
+
+def test_close_finishes_open_assemblies_of_a_task():
+    assembler = ArtifactAssembler()
+    assembler.add("t", ArtifactChunker().text("a"))
+    assembler.add("t", ArtifactChunker(index=1).text("b"))
+    closed = assembler.close("t")
+    assert sorted(_texts(a)[0] for a in closed) == ["a", "b"]
+    assert all(a.metadata[INCOMPLETE_KEY] for a in closed)
+    assert assembler.close("t") == []
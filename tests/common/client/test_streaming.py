@@ -0,0 +1,77 @@
+import asyncio
+import functools
+
+import httpx
+
+from common.client import client as client_module
+from common.client import A2AClient
+from common.server import A2AServer
+from common.types import (
+    AgentCapabilities,
+    AgentCard,
+    SendTaskStreamingResponse,
+    TaskState,
+    TaskStatus,
+    TaskStatusUpdateEvent,
+)
+from tests.conftest import StoreOnlyTaskManager, send_params
+
+
+class StreamingManager(StoreOnlyTaskManager):
+    async def on_send_task_subscribe(self, request):
+        async def events():
+            for state in (TaskState.WORKING, TaskState.WORKING, TaskState.COMPLETED):
+                await asyncio.sleep(0.01)
+                yield SendTaskStreamingResponse(
+                    id=request.id,
+                    result=TaskStatusUpdateEvent(
+                        id=request.params.id,
+                        status=TaskStatus(state=state),
+                        final=state == TaskState.COMPLETED,
+                    ),
+                )
+
+        return events()
+
+
+def test_streaming_runs_on_the_event_loop(run, monkeypatch):
+    card = AgentCard(
+        name="test",
+        url="http://agent/",
+        version="1.0.0",
+        capabilities=AgentCapabilities(streaming=True),
+        skills=[],
+    )
+    app = A2AServer(agent_card=card, task_manager=StreamingManager()).app
+    # ASGITransport only works with an async client, so this fails if the
+    # stream is read through a blocking httpx.Client.
+    monkeypatch.setattr(
+        client_module.httpx,
+        "AsyncClient",
+        functools.partial(httpx.AsyncClient, transport=httpx.ASGITransport(app=app)),
+    )
+
+    async def scenario():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.005)
+
+        ticking = asyncio.create_task(ticker())
+        client = A2AClient(url="http://agent/")
+        states = [
+            response.result.status.state
+            async for response in client.send_task_streaming(
+                send_params("t1").model_dump()
+            )
+        ]
+        ticking.cancel()
+        return states, ticks
+
+    states, ticks = run(scenario())
+    assert states == [TaskState.WORKING, TaskState.WORKING, TaskState.COMPLETED]
+    # Other coroutines kept running while the stream was read.
+    assert ticks > 1
@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+
+from common.server.artifact_stream import (
+    CHUNK_KEY,
+    ArtifactChunker,
+    coalesce_text,
+    merge_artifacts,
+)
+from common.types import Artifact, TextPart
+
+
+def test_chunker_numbers_chunks_and_sends_the_name_once():
+    chunker = ArtifactChunker(index=2, name="answer", metadata={"lang": "vi"})
+    first = chunker.text("Sốt ")
+    second = chunker.text("xuất huyết")
+    last = chunker.close()
+
+    assert (first.append, first.lastChunk, first.name) == (False, False, "answer")
+    assert (second.append, second.lastChunk, second.name) == (True, False, None)
+    assert (last.append, last.lastChunk, last.parts) == (True, True, [])
+    assert [c.metadata[CHUNK_KEY] for c in (first, second, last)] == [0, 1, 2]
+    assert all(c.index == 2 and c.metadata["lang"] == "vi" for c in (first, second, last))
+    with pytest.raises(ValueError):
+        chunker.text("late")
+
+
+def test_single_chunk_artifact_is_first_and_last():
+    artifact = ArtifactChunker().text("done", last=True)
+    assert (artifact.append, artifact.lastChunk) == (False, True)
+
+
+async def _collect(chunks, **kwargs) -> list[str]:
+    return [text async for text in coalesce_text(chunks, **kwargs)]
+
+
+async def _tokens(tokens, delay: float = 0):
+    for token in tokens:
+        if delay:
+            await asyncio.sleep(delay)
+        yield token
+
+
+def test_coalesce_passes_the_first_delta_then_batches(run):
+    tokens = ["Sốt"] + ["ab"] * 10 + [""]
+    out = run(_collect(_tokens(tokens), min_chars=8, max_delay=60))
+    assert out[0] == "Sốt"
+    assert "".join(out) == "".join(tokens)
+    # Four tokens per batch, the remainder flushed at the end.
+    assert out[1:] == ["abababab", "abababab", "abab"]
+
+
+def test_coalesce_flushes_slow_streams_after_max_delay(run):
+    out = run(_collect(_tokens(["a", "b", "c"], delay=0.03), min_chars=1000, max_delay=0.01))
+    assert out == ["a", "b", "c"]
+
+
+def _chunk(text: str, index: int = 0, append: bool = True, last: bool | None = False):
+    return Artifact(parts=[TextPart(text=text)], index=index, append=append, lastChunk=last)
+
+
+def test_merge_artifacts_appends_chunks_by_index():
+    artifacts = merge_artifacts(None, [
+        _chunk("Sốt ", append=False),
+        _chunk("contexts", index=1, append=False, last=None),
+        _chunk("xuất "),
+        _chunk("huyết", last=True),
+    ])
+    assert [[p.text for p in a.parts] for a in artifacts] == [
+        ["Sốt ", "xuất ", "huyết"], ["contexts"]]
+    assert artifacts[0].lastChunk is True
+
+
+def test_merge_artifacts_starts_unknown_chunks_and_copies_parts():
+    update = _chunk("orphan")
+    artifacts = merge_artifacts([], [update])
+    assert len(artifacts) == 1
+    merge_artifacts(artifacts, [_chunk("more")])
+    # The stored artifact grew, the event that started it did not.
+    assert len(artifacts[0].parts) == 2
+    assert len(update.parts) == 1
+    # A non-append update with an existing index is a new artifact.
+    merge_artifacts(artifacts, [_chunk("again", append=False)])
+    assert len(artifacts) == 2
@@ -0,0 +1,77 @@
+import asyncio
+
+import httpx
+from starlette.testclient import TestClient
+
+from common.server import A2AServer
+from common.types import (
+    AgentCapabilities,
+    AgentCard,
+    TaskNotFoundError,
+)
+from tests.conftest import StoreOnlyTaskManager, send_params
+
+
+def make_server(manager) -> A2AServer:
+    card = AgentCard(
+        name="test",
+        url="http://agent/",
+        version="1.0.0",
+        capabilities=AgentCapabilities(),
+        skills=[],
+    )
+    return A2AServer(agent_card=card, task_manager=manager)
+
+
+def rpc(method: str, params: dict, request_id) -> dict:
+    return {"jsonrpc": "2.0", "id": request_id, "method": method, "params": params}
+
+
+def test_batch_answers_every_call_in_one_array():
+    manager = StoreOnlyTaskManager()
+    with TestClient(make_server(manager).app) as client:
+        client.portal.call(manager.upsert_task, send_params("t1"))
+        response = client.post(
+            "/",
+            json=[
+                rpc("tasks/get", {"id": "t1"}, 1),
+                rpc("tasks/get", {"id": "missing"}, 2),
+                rpc("tasks/nope", {}, 3),
+                rpc("tasks/sendSubscribe", {"id": "t2", "message": {}}, 4),
+                "not a request",
+            ],
+        )
+    assert response.status_code == 200
+    body = response.json()
+    assert [item.get("id") for item in body] == [1, 2, 3, 4, None]
+    assert body[0]["result"]["id"] == "t1"
+    assert body[1]["error"]["code"] == TaskNotFoundError().code
+    assert body[2]["error"]["code"] == -32601
+    assert body[3]["error"]["code"] == -32600
+    assert body[4]["error"]["code"] == -32601
+
+
+def test_empty_batch_is_invalid():
+    with TestClient(make_server(StoreOnlyTaskManager()).app) as client:
+        response = client.post("/", json=[])
+    assert response.status_code == 400
+    assert response.json()["error"]["code"] == -32600
+
+
+def test_batch_calls_run_concurrently(run):
+    class SlowManager(StoreOnlyTaskManager):
+        async def on_get_task(self, request):
+            await asyncio.sleep(0.2)
+            return await super().on_get_task(request)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=make_server(SlowManager()).app)
+        async with httpx.AsyncClient(transport=transport) as client:
+            started = asyncio.get_running_loop().time()
+            await client.post(
+                "http://agent/",
+                json=[rpc("tasks/get", {"id": f"t{i}"}, i) for i in range(10)],
+            )
+            return asyncio.get_running_loop().time() - started
+
+    assert run(scenario()) < 1.0
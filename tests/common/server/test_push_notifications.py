@@ -0,0 +1,159 @@
+import asyncio
+import hashlib
+import json
+
+import httpx
+import jwt
+import pytest
+from jwt import PyJWKSet
+from starlette.testclient import TestClient
+
+from common.server import A2AServer
+from common.types import (
+    AgentCapabilities,
+    AgentCard,
+    InvalidParamsError,
+    PushNotificationConfig,
+    SetTaskPushNotificationRequest,
+    TaskPushNotificationConfig,
+    TaskState,
+    TaskStatus,
+    TaskStatusUpdateEvent,
+)
+from common.utils.push_notification_auth import PushNotificationSenderAuth
+from common.utils.push_notification_dispatcher import PushNotificationDispatcher
+from tests.conftest import StoreOnlySqliteTaskManager, StoreOnlyTaskManager, send_params
+
+URL = "http://host.example/notify"
+CONFIG = PushNotificationConfig(url=URL)
+
+
+@pytest.fixture(scope="module")
+def key():
+    auth = PushNotificationSenderAuth()
+    auth.generate_jwk()
+    return auth
+
+
+class Client:
+    """The host: answers the URL check and records signed notifications."""
+
+    def __init__(self, verifies: bool = True):
+        self.verifies = verifies
+        self.checks = 0
+        self.requests: list[httpx.Request] = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        if request.method == "GET":
+            self.checks += 1
+            token = request.url.params["validationToken"]
+            return httpx.Response(200, text=token if self.verifies else "nope")
+        self.requests.append(request)
+        return httpx.Response(200)
+
+    def notifications(self, key: PushNotificationSenderAuth) -> list[dict]:
+        keys = {k.key_id: k for k in PyJWKSet.from_dict({"keys": key.public_keys}).keys}
+        received = []
+        for request in self.requests:
+            token = request.headers["Authorization"].removeprefix("Bearer ")
+            kid = jwt.get_unverified_header(token)["kid"]
+            claims = jwt.decode(token, keys[kid], algorithms=["RS256"])
+            assert claims["request_body_sha256"] == hashlib.sha256(request.content).hexdigest()
+            received.append(json.loads(request.content))
+        return received
+
+
+def _dispatcher(key, client: Client) -> PushNotificationDispatcher:
+    auth = PushNotificationSenderAuth(
+        client=httpx.AsyncClient(transport=httpx.MockTransport(client)))
+    auth.private_key_jwk = key.private_key_jwk
+    auth.public_keys = key.public_keys
+    return PushNotificationDispatcher(auth, backoff=0)
+
+
+async def _publish(manager, task_id: str, *states: TaskState):
+    for state in states:
+        status = TaskStatus(state=state)
+        await manager.update_store(task_id, status, None)
+        await manager.enqueue_events_for_sse(
+            task_id, TaskStatusUpdateEvent(id=task_id, status=status, final=False))
+
+
+def test_state_changes_are_pushed_once_each(run, key):
+    client = Client()
+
+    async def main():
+        manager = StoreOnlyTaskManager(push_sender=_dispatcher(key, client))
+        await manager.upsert_task(send_params("t1", pushNotification=CONFIG))
+        await manager.upsert_task(send_params("t2"))
+        await _publish(manager, "t1", TaskState.WORKING, TaskState.WORKING)
+        await asyncio.sleep(0.05)  # delivered before the task moves on
+        await _publish(manager, "t1", TaskState.COMPLETED)
+        await _publish(manager, "t2", TaskState.COMPLETED)
+        # Changes faster than delivery collapse into the latest state.
+        await manager.upsert_task(send_params("t3", pushNotification=CONFIG))
+        await _publish(manager, "t3", TaskState.WORKING, TaskState.COMPLETED)
+        await manager.push_sender.aclose()
+        return manager
+
+    manager = run(main())
+    # Finished tasks leave nothing behind.
+    assert manager._notified_states == {}
+    received = client.notifications(key)
+    states = [(n["id"], n["status"]["state"]) for n in received]
+    assert states == [("t1", "working"), ("t1", "completed"), ("t3", "completed")]
+    assert all(n["history"] == [] for n in received)
+    # The URL is checked once, not per task.
+    assert client.checks == 1
+
+
+def test_unverified_urls_are_not_registered(run, key):
+    client = Client(verifies=False)
+
+    async def main():
+        manager = StoreOnlyTaskManager(push_sender=_dispatcher(key, client))
+        await manager.upsert_task(send_params("t1", pushNotification=CONFIG))
+        registered = await manager.has_push_notification_info("t1")
+        response = await manager.on_set_task_push_notification(
+            SetTaskPushNotificationRequest(params=TaskPushNotificationConfig(
+                id="t1", pushNotificationConfig=CONFIG)))
+        await _publish(manager, "t1", TaskState.COMPLETED)
+        await manager.push_sender.aclose()
+        return registered, response
+
+    registered, response = run(main())
+    assert registered is False
+    assert response.error.code == InvalidParamsError().code
+    assert client.requests == []
+
+
+def test_configs_registered_by_another_worker_are_used(run, key, tmp_path):
+    db_path = str(tmp_path / "tasks.db")
+    client = Client()
+
+    async def main():
+        registering = StoreOnlySqliteTaskManager(
+            db_path=db_path, push_sender=_dispatcher(key, client))
+        publishing = StoreOnlySqliteTaskManager(
+            db_path=db_path, push_sender=_dispatcher(key, client))
+        await registering.upsert_task(send_params("t1", pushNotification=CONFIG))
+        await publishing.upsert_task(send_params("t1", text="more"))
+        await _publish(publishing, "t1", TaskState.COMPLETED)
+        await publishing.push_sender.aclose()
+        await registering.close()
+        await publishing.close()
+
+    run(main())
+    assert [n["status"]["state"] for n in client.notifications(key)] == ["completed"]
+
+
+def test_server_publishes_the_signing_keys(key):
+    card = AgentCard(
+        name="diagnose", url="http://diagnose.agents:10002/", version="1.0.0",
+        capabilities=AgentCapabilities(pushNotifications=True), skills=[])
+    manager = StoreOnlyTaskManager(push_sender=_dispatcher(key, Client()))
+    server = A2AServer(agent_card=card, task_manager=manager)
+
+    response = TestClient(server.app).get("/.well-known/jwks.json")
+    assert response.json() == {"keys": key.public_keys}
+    assert "max-age" in response.headers["cache-control"]
@@ -0,0 +1,55 @@
+import threading
+import time
+
+from starlette.testclient import TestClient
+
+from common.server import A2AServer
+from common.types import AgentCapabilities, AgentCard
+from tests.conftest import StoreOnlyTaskManager
+
+
+def make_server(warmup) -> A2AServer:
+    card = AgentCard(
+        name="test",
+        url="http://localhost:5000/",
+        version="1.0.0",
+        capabilities=AgentCapabilities(),
+        skills=[],
+    )
+    return A2AServer(agent_card=card, task_manager=StoreOnlyTaskManager(), warmup=warmup)
+
+
+def wait_ready(client) -> int:
+    for _ in range(200):
+        status = client.get("/ready").status_code
+        if status == 200:
+            break
+        time.sleep(0.01)
+    return status
+
+
+def test_ready_only_after_blocking_warmup():
+    release = threading.Event()
+    server = make_server(lambda: release.wait(5))
+    with TestClient(server.app) as client:
+        assert client.get("/health").json() == {"status": "ok"}
+        assert client.get("/ready").status_code == 503
+        release.set()
+        assert wait_ready(client) == 200
+        assert client.get("/ready").json() == {"status": "ready"}
+
+
+def test_failed_warmup_still_turns_ready():
+    def warmup():
+        raise RuntimeError("no model")
+
+    with TestClient(make_server(warmup).app) as client:
+        assert wait_ready(client) == 200
+
+
+def test_async_warmup():
+    async def warmup():
+        pass
+
+    with TestClient(make_server(warmup).app) as client:
+        assert wait_ready(client) == 200
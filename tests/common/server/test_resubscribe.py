@@ -0,0 +1,124 @@
+import asyncio
+
+from common.types import (
+    SendTaskStreamingRequest,
+    SendTaskStreamingResponse,
+    TaskNotFoundError,
+    TaskResubscriptionParams,
+    TaskResubscriptionRequest,
+    TaskState,
+    TaskStatus,
+    TaskStatusUpdateEvent,
+)
+from tests.conftest import StoreOnlyTaskManager, send_params
+
+
+def status_event(state: TaskState, final: bool = False) -> TaskStatusUpdateEvent:
+    return TaskStatusUpdateEvent(id="t1", status=TaskStatus(state=state), final=final)
+
+
+def resubscribe(last_event_id: int | None) -> TaskResubscriptionRequest:
+    return TaskResubscriptionRequest(
+        id=2, params=TaskResubscriptionParams(id="t1", lastEventId=last_event_id)
+    )
+
+
+def test_resubscribe_replays_then_follows_live_events(run):
+    async def scenario():
+        manager = StoreOnlyTaskManager()
+        await manager.upsert_task(send_params("t1"))
+        release = asyncio.Event()
+        runs = 0
+
+        async def agent():
+            nonlocal runs
+            runs += 1
+            for _ in range(3):
+                yield SendTaskStreamingResponse(
+                    id=1, result=status_event(TaskState.WORKING)
+                )
+            await release.wait()
+            yield SendTaskStreamingResponse(
+                id=1, result=status_event(TaskState.COMPLETED, final=True)
+            )
+
+        request = SendTaskStreamingRequest(id=1, params=send_params("t1"))
+        stream = await manager.stream_in_background(request, agent())
+        # The client reads one event, then its connection drops.
+        first = await stream.__anext__()
+        await stream.aclose()
+        while manager.task_event_logs["t1"].next_sequence <= 3:
+            await asyncio.sleep(0)
+
+        replay = await manager.on_resubscribe_to_task(
+            resubscribe(first.result.metadata["sequence"])
+        )
+        received = [await replay.__anext__(), await replay.__anext__()]
+        release.set()
+        received += [response async for response in replay]
+        return runs, received
+
+    runs, received = run(asyncio.wait_for(scenario(), 5))
+    assert runs == 1
+    assert [r.result.metadata["sequence"] for r in received] == [2, 3, 4]
+    assert received[-1].result.final
+
+
+def test_resubscribe_after_eviction_starts_with_current_status(run):
+    async def scenario():
+        manager = StoreOnlyTaskManager(event_log_size=2)
+        await manager.upsert_task(send_params("t1"))
+        for _ in range(4):
+            await manager.enqueue_events_for_sse("t1", status_event(TaskState.WORKING))
+        await manager.update_store("t1", TaskStatus(state=TaskState.COMPLETED), None)
+        await manager.enqueue_events_for_sse(
+            "t1", status_event(TaskState.COMPLETED, final=True)
+        )
+        replay = await manager.on_resubscribe_to_task(resubscribe(0))
+        return [response.result async for response in replay]
+
+    events = run(scenario())
+    # Current status first, then what is left in the ring buffer.
+    assert events[0].metadata is None
+    assert events[0].status.state == TaskState.COMPLETED
+    assert [e.metadata["sequence"] for e in events[1:]] == [4, 5]
+
+
+def test_finished_logs_are_dropped_after_the_ttl(run):
+    async def turn(manager):
+        await manager.enqueue_events_for_sse("t1", status_event(TaskState.WORKING))
+        return await manager.enqueue_events_for_sse(
+            "t1", status_event(TaskState.COMPLETED, final=True)
+        )
+
+    async def scenario():
+        manager = StoreOnlyTaskManager(event_log_ttl=0.05)
+        await manager.upsert_task(send_params("t1"))
+        await turn(manager)
+        # Within the TTL a client can still catch the end of the turn.
+        replay = await manager.on_resubscribe_to_task(resubscribe(1))
+        replayed = [response.result async for response in replay]
+        await asyncio.sleep(0.1)
+        gone = await manager.on_resubscribe_to_task(resubscribe(1))
+        dropped = "t1" not in manager.task_event_logs
+        # The next turn keeps counting; a TTL left over from turn 2 does not
+        # drop turn 3's log.
+        second = await turn(manager)
+        await asyncio.sleep(0.03)
+        await manager.enqueue_events_for_sse("t1", status_event(TaskState.WORKING))
+        await asyncio.sleep(0.03)
+        return replayed, gone, dropped, second, manager
+
+    replayed, gone, dropped, second, manager = run(scenario())
+    assert [e.metadata["sequence"] for e in replayed] == [2]
+    assert isinstance(gone.error, TaskNotFoundError)
+    assert dropped
+    assert second == 4
+    assert manager.task_event_logs["t1"].next_sequence == 6
+    assert manager._retired_sequences == {}
+    assert manager.task_sse_subscribers == {}
+
+
+def test_resubscribe_to_unknown_task(run):
+    response = run(StoreOnlyTaskManager().on_resubscribe_to_task(resubscribe(None)))
+    assert isinstance(response.error, TaskNotFoundError)
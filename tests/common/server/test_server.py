@@ -0,0 +1,87 @@
+import json
+
+import pytest
+from starlette.testclient import TestClient
+
+from common.server import A2AServer
+from common.types import (
+    AgentCapabilities,
+    AgentCard,
+    GetTaskResponse,
+    TaskState,
+    TaskStatus,
+)
+from tests.conftest import StoreOnlyTaskManager, send_params
+
+
+@pytest.fixture
+def manager():
+    return StoreOnlyTaskManager()
+
+
+@pytest.fixture
+def client(manager):
+    card = AgentCard(
+        name="test",
+        url="http://localhost:5000/",
+        version="1.0.0",
+        capabilities=AgentCapabilities(),
+        skills=[],
+    )
+    server = A2AServer(agent_card=card, task_manager=manager)
+    with TestClient(server.app) as client:
+        yield client
+
+
+def rpc(method: str, params: dict, request_id=1) -> dict:
+    return {"jsonrpc": "2.0", "id": request_id, "method": method, "params": params}
+
+
+def test_dispatches_by_method_and_serializes_the_model(client, manager):
+    client.portal.call(manager.upsert_task, send_params("t1"))
+    client.portal.call(
+        manager.update_store, "t1", TaskStatus(state=TaskState.WORKING), None
+    )
+    response = client.post("/", json=rpc("tasks/get", {"id": "t1", "historyLength": 1}))
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    parsed = GetTaskResponse.model_validate_json(response.content)
+    assert parsed.result.status.state == TaskState.WORKING
+    assert [m.parts[0].text for m in parsed.result.history] == ["hello"]
+    # Bytes come straight from pydantic-core, without None fields.
+    assert response.content == parsed.model_dump_json(exclude_none=True).encode()
+
+
+def test_unknown_method(client):
+    response = client.post("/", json=rpc("tasks/explode", {}))
+    assert response.status_code == 400
+    assert response.json()["error"]["code"] == -32601
+    assert response.json()["id"] == 1
+
+
+def test_invalid_params(client):
+    response = client.post("/", json=rpc("tasks/get", {"historyLength": 1}))
+    assert response.status_code == 400
+    assert response.json()["error"]["code"] == -32600
+
+
+def test_malformed_json(client):
+    response = client.post("/", content=b"{not json")
+    assert response.status_code == 400
+    assert response.json()["error"]["code"] == -32700
+
+
+def test_task_not_found_is_a_result_level_error(client):
+    response = client.post("/", json=rpc("tasks/get", {"id": "missing"}))
+    assert response.status_code == 200
+    assert response.json()["error"]["code"] == -32001
+    assert "result" not in response.json()
+
+
+def test_agent_card_is_cacheable(client):
+    response = client.get("/.well-known/agent.json")
+    assert json.loads(response.content)["name"] == "test"
+    etag = response.headers["etag"]
+    assert client.get(
+        "/.well-known/agent.json", headers={"If-None-Match": etag}
+    ).status_code == 304
@@ -0,0 +1,348 @@
+import asyncio
+import os
+import threading
+
+from common.types import (
+    Artifact,
+    GetTaskRequest,
+    Message,
+    PushNotificationConfig,
+    SendTaskRequest,
+    TaskQueryParams,
+    TaskResubscriptionParams,
+    TaskResubscriptionRequest,
+    TaskState,
+    TaskStatus,
+    TaskNotFoundError,
+    TaskStatusUpdateEvent,
+    TextPart,
+)
+from tests.conftest import StoreOnlySqliteTaskManager, send_params
+
+
+def agent_status(state: TaskState, text: str) -> TaskStatus:
+    return TaskStatus(
+        state=state, message=Message(role="agent", parts=[TextPart(text=text)])
+    )
+
+
+def test_task_survives_restart(run, tmp_path):
+    db_path = str(tmp_path / "tasks.db")
+
+    async def first_run():
+        manager = StoreOnlySqliteTaskManager(db_path=db_path)
+        await manager.upsert_task(send_params("t1", "question"))
+        await manager.update_store("t1", agent_status(TaskState.WORKING, "thinking"), None)
+        await manager.update_store(
+            "t1",
+            agent_status(TaskState.COMPLETED, "answer"),
+            [Artifact(parts=[TextPart(text="answer")])],
+        )
+        await manager.close()
+
+    async def after_restart():
+        manager = StoreOnlySqliteTaskManager(db_path=db_path)
+        try:
+            return await manager.get_task("t1")
+        finally:
+            await manager.close()
+
+    run(first_run())
+    task = run(after_restart())
+    assert task.sessionId == "s1"
+    assert task.status.state == TaskState.COMPLETED
+    assert [m.parts[0].text for m in task.history] == ["question", "thinking", "answer"]
+    assert task.artifacts[0].parts[0].text == "answer"
+
+
+def test_artifact_chunks_are_merged_on_load(run, tmp_path):
+    async def scenario():
+        manager = StoreOnlySqliteTaskManager(db_path=str(tmp_path / "tasks.db"))
+        await manager.upsert_task(send_params("t1"))
+        await manager.append_artifacts(
+            "t1", [Artifact(parts=[TextPart(text="a")], append=False, lastChunk=False)]
+        )
+        await manager.append_artifacts(
+            "t1", [Artifact(parts=[TextPart(text="b")], append=True, lastChunk=True)]
+        )
+        manager.tasks.clear()
+        task = await manager.get_task("t1")
+        await manager.close()
+        return task
+
+    task = run(scenario())
+    assert len(task.artifacts) == 1
+    assert [p.text for p in task.artifacts[0].parts] == ["a", "b"]
+    assert task.artifacts[0].lastChunk is True
+
+
+def test_history_length_and_session_lookup(run, tmp_path):
+    async def scenario():
+        manager = StoreOnlySqliteTaskManager(db_path=str(tmp_path / "tasks.db"))
+        await manager.upsert_task(send_params("t1", "one"))
+        await manager.upsert_task(send_params("t1", "two"))
+        await manager.upsert_task(send_params("t2", "other", session_id="s2"))
+        response = await manager.on_get_task(
+            GetTaskRequest(params=TaskQueryParams(id="t1", historyLength=1))
+        )
+        session = await manager.get_session_tasks("s1")
+        await manager.close()
+        return response, session
+
+    response, session = run(scenario())
+    assert [m.parts[0].text for m in response.result.history] == ["two"]
+    assert [task.id for task in session] == ["t1"]
+
+
+def test_task_cache_is_bounded(run, tmp_path):
+    async def scenario():
+        manager = StoreOnlySqliteTaskManager(
+            db_path=str(tmp_path / "tasks.db"), cache_size=2
+        )
+        for task_id in ("t1", "t2", "t3"):
+            await manager.upsert_task(send_params(task_id))
+        cached = list(manager.tasks)
+        # Evicted tasks are read back from the database.
+        task = await manager.update_store(
+            "t1", agent_status(TaskState.COMPLETED, "done"), None
+        )
+        await manager.close()
+        return cached, task, list(manager.tasks)
+
+    cached, task, cached_after = run(scenario())
+    assert cached == ["t2", "t3"]
+    assert task.status.state == TaskState.COMPLETED
+    assert [m.parts[0].text for m in task.history] == ["hello", "done"]
+    assert cached_after == ["t3", "t1"]
+
+
+def test_cancelling_a_task_evicted_from_the_cache(run, tmp_path):
+    async def cancel(manager, task_id: str):
+        invocation = asyncio.ensure_future(
+            manager.invoke_cancellable(
+                SendTaskRequest(id=1, params=send_params(task_id)),
+                asyncio.sleep(60),
+            )
+        )
+        await asyncio.sleep(0)
+        manager.running_tasks[task_id].cancel()
+        return await invocation
+
+    async def scenario():
+        manager = StoreOnlySqliteTaskManager(
+            db_path=str(tmp_path / "tasks.db"), cache_size=1
+        )
+        await manager.upsert_task(send_params("t1"))
+        await manager.upsert_task(send_params("t2"))
+        assert manager.tasks.get("t1") is None
+        responses = await cancel(manager, "t1"), await cancel(manager, "missing")
+        await manager.close()
+        return responses
+
+    cancelled, missing = run(scenario())
+    assert cancelled.result.id == "t1"
+    assert cancelled.result.status.state == TaskState.CANCELED
+    assert missing.error.code == TaskNotFoundError().code
+
+
+def test_upsert_reads_updates_from_other_workers(run, tmp_path):
+    db_path = str(tmp_path / "tasks.db")
+
+    async def scenario():
+        worker_a = StoreOnlySqliteTaskManager(db_path=db_path)
+        worker_b = StoreOnlySqliteTaskManager(db_path=db_path)
+        await worker_a.upsert_task(send_params("t1", "first"))
+        await worker_b.update_store(
+            "t1", agent_status(TaskState.INPUT_REQUIRED, "which one?"), None
+        )
+        task = await worker_a.upsert_task(send_params("t1", "the second"))
+        await worker_a.close()
+        await worker_b.close()
+        return task
+
+    task = run(scenario())
+    assert task.status.state == TaskState.INPUT_REQUIRED
+    assert [m.parts[0].text for m in task.history] == [
+        "first",
+        "which one?",
+        "the second",
+    ]
+
+
+def test_push_notification_config_survives_restart(run, tmp_path):
+    db_path = str(tmp_path / "tasks.db")
+    config = PushNotificationConfig(url="http://localhost:9999/notify")
+
+    async def first_run():
+        manager = StoreOnlySqliteTaskManager(db_path=db_path)
+        await manager.upsert_task(send_params("t1"))
+        await manager.set_push_notification_info("t1", config)
+        await manager.close()
+
+    async def after_restart():
+        manager = StoreOnlySqliteTaskManager(db_path=db_path)
+        try:
+            return await manager.get_push_notification_info("t1")
+        finally:
+            await manager.close()
+
+    run(first_run())
+    assert run(after_restart()) == config
+
+
+def test_resubscribe_replays_events_persisted_by_another_worker(run, tmp_path):
+    db_path = str(tmp_path / "tasks.db")
+
+    async def scenario():
+        worker_a = StoreOnlySqliteTaskManager(db_path=db_path)
+        worker_b = StoreOnlySqliteTaskManager(db_path=db_path)
+        await worker_a.upsert_task(send_params("t1"))
+        working = agent_status(TaskState.WORKING, "step")
+        await worker_a.update_store("t1", working, None)
+        await worker_a.enqueue_events_for_sse(
+            "t1", TaskStatusUpdateEvent(id="t1", status=working)
+        )
+        done = TaskStatus(state=TaskState.COMPLETED)
+        await worker_a.update_store("t1", done, None)
+        await worker_a.enqueue_events_for_sse(
+            "t1", TaskStatusUpdateEvent(id="t1", status=done, final=True)
+        )
+
+        stream = await worker_b.on_resubscribe_to_task(
+            TaskResubscriptionRequest(
+                id=1, params=TaskResubscriptionParams(id="t1", lastEventId=1)
+            )
+        )
+        events = [response.result async for response in stream]
+        await worker_a.close()
+        await worker_b.close()
+        return events
+
+    events = run(asyncio.wait_for(scenario(), 5))
+    assert [e.status.state for e in events] == [TaskState.COMPLETED]
+    assert events[0].final
+    assert events[0].metadata["sequence"] == 2
+
+
+async def _stream_turn(manager, task_id: str, text: str) -> int:
+    await manager.upsert_task(send_params(task_id, text=text))
+    working = agent_status(TaskState.WORKING, text)
+    await manager.update_store(task_id, working, None)
+    await manager.enqueue_events_for_sse(
+        task_id, TaskStatusUpdateEvent(id=task_id, status=working)
+    )
+    done = TaskStatus(state=TaskState.COMPLETED)
+    await manager.update_store(task_id, done, None)
+    return await manager.enqueue_events_for_sse(
+        task_id, TaskStatusUpdateEvent(id=task_id, status=done, final=True)
+    )
+
+
+def test_follow_up_turn_on_another_worker_continues_the_sequence(run, tmp_path):
+    db_path = str(tmp_path / "tasks.db")
+
+    async def scenario():
+        worker_a = StoreOnlySqliteTaskManager(db_path=db_path)
+        worker_b = StoreOnlySqliteTaskManager(db_path=db_path)
+        first_turn = await _stream_turn(worker_a, "t1", "first")
+        await _stream_turn(worker_b, "t1", "second")
+
+        # Worker A still holds turn 1's closed log; the client resumes after it.
+        stream = await worker_a.on_resubscribe_to_task(
+            TaskResubscriptionRequest(
+                id=1, params=TaskResubscriptionParams(id="t1", lastEventId=first_turn)
+            )
+        )
+        events = [response.result async for response in stream]
+        persisted = await worker_a._run(worker_a._load_events, "t1", 0)
+        await worker_a.close()
+        await worker_b.close()
+        return first_turn, events, persisted
+
+    first_turn, events, persisted = run(asyncio.wait_for(scenario(), 5))
+    assert first_turn == 2
+    assert [e.metadata["sequence"] for e in events] == [3, 4]
+    assert events[0].status.message.parts[0].text == "second"
+    assert [row[0] for row in persisted] == [1, 2, 3, 4]
+
+
+def test_persisted_events_are_bounded_per_task(run, tmp_path):
+    db_path = str(tmp_path / "tasks.db")
+
+    async def scenario():
+        manager = StoreOnlySqliteTaskManager(db_path=db_path, event_log_size=3)
+        follower = StoreOnlySqliteTaskManager(db_path=db_path)
+        await manager.upsert_task(send_params("t1"))
+        for i in range(5):
+            await manager.enqueue_events_for_sse("t1", TaskStatusUpdateEvent(
+                id="t1", status=agent_status(TaskState.WORKING, f"step {i}")))
+        await manager.update_store("t1", TaskStatus(state=TaskState.COMPLETED), None)
+        await manager.enqueue_events_for_sse("t1", TaskStatusUpdateEvent(
+            id="t1", status=TaskStatus(state=TaskState.COMPLETED), final=True))
+        persisted = await manager._run(manager._load_events, "t1", 0)
+        # A client that fell behind the pruning gets the current status first.
+        stream = await follower.on_resubscribe_to_task(
+            TaskResubscriptionRequest(
+                id=1, params=TaskResubscriptionParams(id="t1", lastEventId=1)
+            )
+        )
+        events = [response.result async for response in stream]
+        await manager.close()
+        await follower.close()
+        return persisted, events
+
+    persisted, events = run(asyncio.wait_for(scenario(), 5))
+    assert [row[0] for row in persisted] == [4, 5, 6]
+    assert events[0].status.state == TaskState.COMPLETED
+    assert "sequence" not in (events[0].metadata or {})
+    assert [e.metadata["sequence"] for e in events[1:]] == [4, 5, 6]
+
+
+def test_connection_opens_on_first_use(run, tmp_path):
+    class RecordingManager(StoreOnlySqliteTaskManager):
+        opened_on = None
+
+        def _db(self):
+            if self._conn is None:
+                self.opened_on = threading.current_thread()
+            return super()._db()
+
+    manager = RecordingManager(db_path=str(tmp_path / "tasks.db"))
+    assert manager._conn is None and manager._executor is None
+
+    async def scenario():
+        await manager.upsert_task(send_params("t1"))
+        opened = manager._conn is not None
+        await manager.close()
+        return opened
+
+    assert run(scenario())
+    # Connecting must not block the event loop.
+    assert manager.opened_on.name.startswith("sqlite-task-store")
+
+
+def test_forked_worker_opens_its_own_connection(run, tmp_path):
+    db_path = str(tmp_path / "tasks.db")
+    manager = StoreOnlySqliteTaskManager(db_path=db_path)
+    # The parent used the store before forking.
+    run(manager.upsert_task(send_params("parent")))
+    parent_conn = manager._conn
+
+    pid = os.fork()
+    if pid == 0:
+        status = 1
+        try:
+            run(manager.upsert_task(send_params("child")))
+            if manager._conn is not parent_conn and parent_conn in manager._inherited_conns:
+                status = 0
+        finally:
+            os._exit(status)
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
+
+    async def read_back():
+        tasks = await manager.get_session_tasks("s1")
+        await manager.close()
+        return tasks
+
+    assert sorted(task.id for task in run(read_back())) == ["child", "parent"]
@@ -0,0 +1,115 @@
+import asyncio
+
+from common.server.sse_queue import SSEOverflowPolicy, SSESubscriberQueue, TaskEventLog
+from common.types import (
+    DataPart,
+    InternalError,
+    Message,
+    TaskState,
+    TaskStatus,
+    TaskStatusUpdateEvent,
+    TextPart,
+)
+
+
+def heartbeat(final: bool = False, state: TaskState = TaskState.WORKING):
+    return TaskStatusUpdateEvent(id="t1", status=TaskStatus(state=state), final=final)
+
+
+def progress(text: str, data: dict | None = None):
+    parts = [TextPart(text=text)]
+    if data:
+        parts.append(DataPart(data=data))
+    return TaskStatusUpdateEvent(
+        id="t1",
+        status=TaskStatus(
+            state=TaskState.WORKING, message=Message(role="agent", parts=parts)
+        ),
+    )
+
+
+def drain(queue: SSESubscriberQueue) -> list:
+    return [queue._events.popleft() for _ in range(queue.qsize())]
+
+
+def test_coalesce_keeps_every_event_while_there_is_room():
+    queue = SSESubscriberQueue(maxsize=8, policy=SSEOverflowPolicy.COALESCE)
+    events = [heartbeat(), heartbeat(), heartbeat()]
+    for event in events:
+        assert queue.put_nowait(event)
+    assert drain(queue) == events
+    assert queue.coalesced == 0
+
+
+def test_coalesce_replaces_trailing_heartbeat_when_full():
+    queue = SSESubscriberQueue(maxsize=2, policy=SSEOverflowPolicy.COALESCE)
+    first, second, latest = progress("retrieving"), heartbeat(), heartbeat()
+    for event in (first, second, latest):
+        queue.put_nowait(event)
+    assert drain(queue) == [first, latest]
+    assert queue.coalesced == 1
+    assert queue.dropped == 0
+
+
+def test_coalesce_never_replaces_updates_with_message_parts():
+    queue = SSESubscriberQueue(maxsize=2, policy=SSEOverflowPolicy.COALESCE)
+    candidates = progress("candidates", {"candidates": ["flu", "cold"]})
+    queue.put_nowait(heartbeat())
+    queue.put_nowait(candidates)
+    latest = progress("reranking")
+    queue.put_nowait(latest)
+    # Full and nothing coalescible: the oldest event goes instead.
+    assert drain(queue) == [candidates, latest]
+    assert queue.coalesced == 0
+    assert queue.dropped == 1
+
+
+def test_drop_oldest_keeps_final_events():
+    queue = SSESubscriberQueue(maxsize=2, policy=SSEOverflowPolicy.DROP_OLDEST)
+    final = heartbeat(final=True, state=TaskState.COMPLETED)
+    queue.put_nowait(final)
+    queue.put_nowait(heartbeat())
+    latest = heartbeat()
+    queue.put_nowait(latest)
+    assert drain(queue) == [final, latest]
+    assert queue.dropped == 1
+
+
+def test_disconnect_replaces_backlog_with_error():
+    queue = SSESubscriberQueue(maxsize=2, policy=SSEOverflowPolicy.DISCONNECT)
+    queue.put_nowait(heartbeat())
+    queue.put_nowait(heartbeat())
+    assert not queue.put_nowait(heartbeat())
+    assert queue.disconnected
+    assert not queue.put_nowait(heartbeat())
+    (error,) = drain(queue)
+    assert isinstance(error, InternalError)
+    assert queue.stats()["dropped"] == 2
+
+
+def test_get_waits_for_put(run):
+    async def scenario():
+        queue = SSESubscriberQueue(maxsize=4)
+        getter = asyncio.create_task(queue.get())
+        await asyncio.sleep(0)
+        assert not getter.done()
+        event = heartbeat()
+        queue.put_nowait(event)
+        return event, await asyncio.wait_for(getter, 1)
+
+    event, received = run(scenario())
+    assert received is event
+
+
+def test_event_log_numbers_events_and_reports_evictions():
+    log = TaskEventLog(maxlen=2)
+    for _ in range(3):
+        log.append(heartbeat())
+    events, missed = log.since(0)
+    assert [e.metadata["sequence"] for e in events] == [2, 3]
+    assert missed
+    events, missed = log.since(2)
+    assert [e.metadata["sequence"] for e in events] == [3]
+    assert not missed
+    log.append(heartbeat(final=True, state=TaskState.COMPLETED))
+    assert log.closed
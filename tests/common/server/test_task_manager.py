@@ -0,0 +1,55 @@
+import asyncio
+
+from common.types import TaskState, TaskStatus, TaskStatusUpdateEvent
+from tests.conftest import StoreOnlyTaskManager, send_params
+
+
+def ids_on_different_stripes(manager) -> tuple[str, str]:
+    first = "task-0"
+    second = next(
+        f"task-{i}"
+        for i in range(1, 1000)
+        if manager.task_lock(f"task-{i}") is not manager.task_lock(first)
+    )
+    return first, second
+
+
+def test_updates_to_other_tasks_do_not_wait(run):
+    async def scenario():
+        manager = StoreOnlyTaskManager()
+        busy, other = ids_on_different_stripes(manager)
+        await manager.upsert_task(send_params(busy))
+        await manager.upsert_task(send_params(other))
+        async with manager.task_lock(busy):
+            await asyncio.wait_for(
+                manager.update_store(other, TaskStatus(state=TaskState.WORKING), None),
+                1,
+            )
+            blocked = asyncio.create_task(
+                manager.update_store(busy, TaskStatus(state=TaskState.WORKING), None)
+            )
+            await asyncio.sleep(0.01)
+            assert not blocked.done()
+        await asyncio.wait_for(blocked, 1)
+
+    run(scenario())
+
+
+def test_publishing_does_not_wait_for_a_stalled_subscriber(run):
+    async def scenario():
+        manager = StoreOnlyTaskManager(sse_queue_size=8)
+        await manager.upsert_task(send_params("t1"))
+        stalled = await manager.setup_sse_consumer("t1")
+        status = TaskStatus(state=TaskState.WORKING)
+        for _ in range(100):
+            await asyncio.wait_for(
+                manager.enqueue_events_for_sse(
+                    "t1", TaskStatusUpdateEvent(id="t1", status=status)
+                ),
+                1,
+            )
+        assert not manager.subscriber_lock.locked()
+        return stalled
+
+    stalled = run(scenario())
+    assert stalled.qsize() <= 8
@@ -0,0 +1,186 @@
+import hashlib
+import logging
+import os
+import threading
+
+import pytest
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from common.server.utils import blob_response
+from common.utils.blob_store import BlobStore, BlobTooLargeError, parse_range
+
+
+def _read(store: BlobStore, blob_id: str) -> bytes:
+    blob = store.get(blob_id)
+    return b"".join(store.iter_bytes(blob))
+
+
+def test_identical_bytes_are_stored_once():
+    store = BlobStore()
+    first = store.put(b"x-quang phoi", "image/png")
+    second = store.put(bytearray(b"x-quang phoi"), "image/png")
+    assert first == second == hashlib.sha256(b"x-quang phoi").hexdigest()
+    assert store.metrics()["memory_blobs"] == 1
+    assert store.metrics()["memory_bytes"] == len(b"x-quang phoi")
+
+
+def test_least_recently_used_blob_is_dropped_without_spill_dir():
+    store = BlobStore(max_bytes=10)
+    old = store.put(b"aaaa")
+    recent = store.put(b"bbbb")
+    store.get(old)  # `old` is now the most recently used
+    store.put(b"cccc")
+    assert store.get(recent) is None
+    assert _read(store, old) == b"aaaa"
+    assert store.metrics()["memory_bytes"] <= 10
+
+
+def test_evicted_blobs_spill_to_disk_and_stay_readable(tmp_path):
+    store = BlobStore(max_bytes=4, spill_dir=str(tmp_path), chunk_size=3)
+    spilled = store.put(b"0123456789", "application/pdf")
+    blob = store.get(spilled)
+    assert blob.data is None and os.path.exists(blob.path)
+    assert blob.mime_type == "application/pdf"
+    assert b"".join(store.iter_bytes(blob, 2, 7)) == b"234567"
+
+    # Another process sharing the directory finds it by content hash.
+    other = BlobStore(spill_dir=str(tmp_path))
+    assert _read(other, spilled) == b"0123456789"
+    assert other.get("../" + spilled) is None
+
+
+def test_spill_budget_removes_the_oldest_files(tmp_path):
+    store = BlobStore(max_bytes=0, spill_dir=str(tmp_path), max_spill_bytes=8)
+    first = store.put(b"aaaaa")
+    second = store.put(b"bbbbb")
+    assert not os.path.exists(os.path.join(tmp_path, first))
+    assert _read(store, second) == b"bbbbb"
+    assert store.metrics()["disk_bytes"] == 5
+
+
+def test_blob_larger_than_memory_is_rejected_unless_it_can_spill(tmp_path):
+    with pytest.raises(BlobTooLargeError):
+        BlobStore(max_bytes=4).put(b"0123456789")
+
+    store = BlobStore(max_bytes=4, spill_dir=str(tmp_path))
+    assert _read(store, store.put(b"0123456789")) == b"0123456789"
+    with pytest.raises(BlobTooLargeError):
+        BlobStore(max_bytes=4, spill_dir=str(tmp_path), max_spill_bytes=8).put(
+            b"0123456789"
+        )
+
+
+def test_spilling_does_not_hold_the_lock(tmp_path, monkeypatch):
+    store = BlobStore(max_bytes=4, spill_dir=str(tmp_path))
+    writing, release = threading.Event(), threading.Event()
+    write = store._write
+
+    def slow_write(blob_id, blob):
+        writing.set()
+        release.wait(5)
+        return write(blob_id, blob)
+
+    monkeypatch.setattr(store, "_write", slow_write)
+    first = store.put(b"aaaa")
+    putter = threading.Thread(target=store.put, args=(b"bbbb",))
+    putter.start()
+    assert writing.wait(5)
+
+    # While `first` is being written it is still served from memory.
+    reader = threading.Thread(target=lambda: store.get(first))
+    reader.start()
+    reader.join(1)
+    blocked = reader.is_alive()
+    assert store.get(first).data == b"aaaa"
+    release.set()
+    putter.join(5)
+    reader.join(5)
+    assert not blocked
+    assert store.get(first).path is not None
+
+
+def test_failed_spill_is_logged(tmp_path, caplog):
+    spill_dir = tmp_path / "spill"
+    store = BlobStore(max_bytes=4, spill_dir=str(spill_dir))
+    spill_dir.rmdir()
+    first = store.put(b"aaaa")
+    with caplog.at_level(logging.WARNING, logger="common.utils.blob_store"):
+        store.put(b"bbbb")
+    assert store.get(first) is None
+    assert "Failed to spill blob" in caplog.text
+    assert caplog.records[0].exc_info is not None
+
+
+def test_streamed_upload_over_the_limit_is_rejected(run):
+    store = BlobStore()
+
+    async def chunks():
+        for _ in range(4):
+            yield b"12345"
+
+    with pytest.raises(BlobTooLargeError):
+        run(store.put_stream(chunks(), max_size=12))
+    blob_id = run(store.put_stream(chunks(), max_size=20))
+    assert _read(store, blob_id) == b"12345" * 4
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        ("bytes=0-3", (0, 3)),
+        ("bytes=4-", (4, 9)),
+        ("bytes=-3", (7, 9)),
+        ("bytes=8-100", (8, 9)),
+        ("bytes=10-", None),
+        ("bytes=5-2", None),
+        ("bytes=-0", None),
+        ("bytes=-", None),
+        ("bytes=0-1,4-5", None),
+        ("items=0-1", None),
+    ],
+)
+def test_parse_range(header, expected):
+    assert parse_range(header, 10) == expected
+
+
+@pytest.fixture
+def file_client():
+    store = BlobStore(chunk_size=4)
+    blob_id = store.put(b"0123456789", "text/plain")
+
+    def files(request: Request):
+        return blob_response(store, request.path_params["blob_id"], request)
+
+    app = Starlette(routes=[Route("/files/{blob_id}", files)])
+    return TestClient(app), blob_id
+
+
+def test_blob_response_streams_with_etag(file_client):
+    client, blob_id = file_client
+    response = client.get(f"/files/{blob_id}")
+    assert response.status_code == 200
+    assert response.content == b"0123456789"
+    assert response.headers["etag"] == f'"{blob_id}"'
+    assert response.headers["content-length"] == "10"
+    assert response.headers["content-type"].startswith("text/plain")
+
+    cached = client.get(f"/files/{blob_id}", headers={"If-None-Match": f'"{blob_id}"'})
+    assert cached.status_code == 304
+    assert cached.content == b""
+
+
+def test_blob_response_ranges_and_missing_ids(file_client):
+    client, blob_id = file_client
+    partial = client.get(f"/files/{blob_id}", headers={"Range": "bytes=2-5"})
+    assert partial.status_code == 206
+    assert partial.content == b"2345"
+    assert partial.headers["content-range"] == "bytes 2-5/10"
+
+    unsatisfiable = client.get(f"/files/{blob_id}", headers={"Range": "bytes=20-"})
+    assert unsatisfiable.status_code == 416
+    assert unsatisfiable.headers["content-range"] == "bytes */10"
+
+    assert client.get("/files/" + "0" * 64).status_code == 404
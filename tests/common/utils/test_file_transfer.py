@@ -0,0 +1,154 @@
+import base64
+
+import httpx
+import pytest
+from starlette.testclient import TestClient
+
+from common.server import A2AServer
+from common.types import AgentCapabilities, AgentCard, FileContent
+from common.utils import file_transfer
+from common.utils.blob_store import BlobStore, BlobTooLargeError
+from common.utils.file_transfer import (
+    FILES_PATH,
+    UntrustedFileOriginError,
+    decode_file_bytes,
+    make_file_part,
+    read_file,
+    upload_file,
+)
+
+AGENT = "http://diagnose.agents:10002/"
+DATA = bytes(range(256)) * 8
+
+
+def _client(handler) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def test_decode_file_bytes_rejects_invalid_base64():
+    assert decode_file_bytes(base64.b64encode(b"\x00\xff").decode()) == b"\x00\xff"
+    with pytest.raises(ValueError):
+        decode_file_bytes("Tôi bị sốt")
+
+
+def test_make_file_part_inlines_small_files_only():
+    store = BlobStore()
+    small = make_file_part(b"tiny", "text/plain", blob_store=store)
+    assert base64.b64decode(small.file.bytes) == b"tiny"
+
+    large = make_file_part(
+        DATA, "image/png", blob_store=store, base_url=AGENT, inline_limit=16)
+    assert large.file.bytes is None
+    assert large.file.uri.startswith(AGENT.rstrip("/") + FILES_PATH + "/")
+
+
+def test_read_file_only_fetches_from_trusted_origins(run):
+    requested = []
+
+    def handler(request):
+        requested.append(str(request.url))
+        return httpx.Response(200, content=DATA)
+
+    async def read(uri, **kwargs):
+        async with _client(handler) as client:
+            return await read_file(FileContent(uri=uri), client, **kwargs)
+
+    uri = "http://diagnose.agents:10002/files/abc"
+    assert bytes(run(read(uri, allowed_origins=[AGENT]))) == DATA
+    # Same host on another port, link-local metadata, non-http schemes.
+    for untrusted in (
+        "http://diagnose.agents:8080/files/abc",
+        "http://169.254.169.254/latest/meta-data/",
+        "file:///etc/passwd",
+    ):
+        with pytest.raises(UntrustedFileOriginError):
+            run(read(untrusted, allowed_origins=[AGENT]))
+    # Nothing is trusted by default.
+    with pytest.raises(UntrustedFileOriginError):
+        run(read(uri))
+    assert requested == [uri]
+
+
+def test_read_file_trusts_configured_file_servers(run, monkeypatch):
+    monkeypatch.setattr(
+        file_transfer, "TRUSTED_FILE_ORIGINS", "https://files.example, http://x:1")
+
+    async def read():
+        async with _client(lambda r: httpx.Response(200, content=b"ok")) as client:
+            return await read_file(
+                FileContent(uri="https://FILES.example:443/files/abc"), client)
+
+    assert bytes(run(read())) == b"ok"
+
+
+def test_read_file_caps_announced_and_streamed_size(run):
+    async def stream():
+        for _ in range(4):
+            yield DATA
+
+    def announced(request):
+        return httpx.Response(200, headers={"Content-Length": str(10**12)}, content=b"")
+
+    def unannounced(request):
+        # Chunked body, no Content-Length.
+        return httpx.Response(200, content=stream())
+
+    def understated(request):
+        return httpx.Response(200, headers={"Content-Length": "10"}, content=stream())
+
+    async def read(handler):
+        async with _client(handler) as client:
+            return await read_file(
+                FileContent(uri=AGENT + "files/abc"), client,
+                allowed_origins=[AGENT], max_size=len(DATA) * 2)
+
+    for handler in (announced, unannounced, understated):
+        with pytest.raises(BlobTooLargeError):
+            run(read(handler))
+
+
+def test_redirects_are_not_followed(run):
+    def handler(request):
+        return httpx.Response(302, headers={"Location": "http://169.254.169.254/"})
+
+    async def read():
+        async with _client(handler) as client:
+            return await read_file(
+                FileContent(uri=AGENT + "files/abc"), client, allowed_origins=[AGENT])
+
+    with pytest.raises(httpx.HTTPStatusError):
+        run(read())
+
+
+def _server(**kwargs) -> A2AServer:
+    card = AgentCard(
+        name="diagnose", url=AGENT, version="1.0.0",
+        capabilities=AgentCapabilities(), skills=[])
+    return A2AServer(agent_card=card, blob_store=BlobStore(), **kwargs)
+
+
+def test_uploads_are_disabled_without_a_token(monkeypatch):
+    monkeypatch.delenv(file_transfer.UPLOAD_TOKEN_ENV, raising=False)
+    client = TestClient(_server().app)
+    assert client.post(FILES_PATH, content=b"data").status_code == 404
+
+
+def test_uploads_require_the_token(run):
+    server = _server(upload_token="s3cret")
+    client = TestClient(server.app)
+    assert client.post(FILES_PATH, content=b"data").status_code == 401
+    wrong = client.post(
+        FILES_PATH, content=b"data", headers={"Authorization": "Bearer nope"})
+    assert wrong.status_code == 401
+
+    async def upload():
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport) as http:
+            return await upload_file(
+                "http://testserver", DATA, "image/png", http, token="s3cret")
+
+    uri = run(upload())
+    blob = server.blob_store.get(uri.rsplit("/", 1)[-1])
+    assert b"".join(server.blob_store.iter_bytes(blob)) == DATA
+    # Downloads stay open: the id is only known from a message.
+    assert client.get(uri).content == DATA
@@ -0,0 +1,122 @@
+import asyncio
+import json
+import time
+
+import pytest
+from jwt import PyJWKSet
+from starlette.requests import Request
+
+from common.utils.push_notification_auth import (
+    JWKSCache,
+    PushNotificationReceiverAuth,
+    PushNotificationSenderAuth,
+    canonical_body,
+)
+
+
+@pytest.fixture(scope="module")
+def sender():
+    auth = PushNotificationSenderAuth()
+    auth.generate_jwk()
+    return auth
+
+
+class CountingCache(JWKSCache):
+    """JWKSCache serving the sender's public key set instead of fetching it."""
+
+    def __init__(self, sender, **kwargs):
+        super().__init__("http://agent.example/.well-known/jwks.json", **kwargs)
+        self.sender = sender
+        self.fetches = 0
+
+    async def refresh(self):
+        self.fetches += 1
+        key_set = PyJWKSet.from_dict({"keys": self.sender.public_keys})
+        self._keys = {key.key_id: key for key in key_set.keys}
+        self._fetched_at = time.monotonic()
+
+
+def test_unknown_kids_are_fetched_once_then_cached_as_missing(run, sender):
+    cache = CountingCache(sender, min_refetch_interval=0)
+    kid = sender.private_key_jwk.key_id
+
+    async def main():
+        found = await cache.get(kid)
+        assert await cache.get(kid) is found
+        missing = await asyncio.gather(*(cache.get("rotated-away") for _ in range(20)))
+        cache.close()
+        return found, missing
+
+    found, missing = run(main())
+    assert found.key_id == kid
+    assert missing == [None] * 20
+    # One fetch for the first lookup, one for the unknown kid.
+    assert cache.fetches == 2
+
+
+def test_preloaded_cache_refreshes_in_the_background(run, sender):
+    cache = CountingCache(sender, refresh_interval=0.01)
+    run(cache.refresh())
+    kid = sender.private_key_jwk.key_id
+
+    async def main():
+        assert await cache.get(kid) is not None
+        await asyncio.sleep(0.05)
+        cache.close()
+
+    run(main())
+    assert cache.fetches > 2
+
+
+def test_rebinding_to_another_loop_cancels_the_old_refresh(run, sender):
+    cache = CountingCache(sender)
+    kid = sender.private_key_jwk.key_id
+    first = asyncio.new_event_loop()
+    try:
+        first.run_until_complete(cache.get(kid))
+        old = cache._refresh_task
+
+        async def on_second_loop():
+            await cache.get(kid)
+            new = cache._refresh_task
+            cache.close()
+            return new
+
+        new = run(on_second_loop())
+        first.run_until_complete(asyncio.sleep(0))
+        assert old.cancelled()
+        assert new is not old
+    finally:
+        first.close()
+
+
+def _request(body: bytes, token: str | None) -> Request:
+    headers = [(b"content-type", b"application/json")]
+    if token:
+        headers.append((b"authorization", f"Bearer {token}".encode()))
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    return Request({"type": "http", "method": "POST", "headers": headers}, receive)
+
+
+def test_verify_hashes_the_received_bytes(run, sender):
+    receiver = PushNotificationReceiverAuth()
+    receiver.jwks = CountingCache(sender)
+    body = canonical_body({"id": "t1", "status": {"state": "completed"}})
+    token = sender._sign(body)
+
+    async def verify(request):
+        try:
+            return await receiver.verify_push_notification(request)
+        finally:
+            receiver.jwks.close()
+
+    assert run(verify(_request(body, token))) is True
+    # Same JSON, other formatting: accepted by re-serializing.
+    spaced = json.dumps(json.loads(body), ensure_ascii=False, indent=2).encode()
+    assert run(verify(_request(spaced, token))) is True
+    with pytest.raises(ValueError):
+        run(verify(_request(body.replace(b"completed", b"failed"), token)))
+    assert run(verify(_request(body, None))) is False
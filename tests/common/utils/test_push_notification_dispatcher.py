@@ -0,0 +1,147 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from common.utils.push_notification_auth import PushNotificationSenderAuth
+from common.utils.push_notification_dispatcher import PushNotificationDispatcher
+
+URL = "http://client.example/notify"
+
+
+@pytest.fixture(scope="module")
+def key():
+    auth = PushNotificationSenderAuth()
+    auth.generate_jwk()
+    return auth.private_key_jwk
+
+
+class Receiver:
+    """httpx transport recording deliveries; `gate` holds them until set."""
+
+    def __init__(self, statuses=(), gate: bool = False):
+        self.statuses = list(statuses)
+        self.bodies: list[dict] = []
+        self.active = 0
+        self.peak = 0
+        self.gate = asyncio.Event() if gate else None
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            if self.gate is not None:
+                await self.gate.wait()
+            else:
+                await asyncio.sleep(0)
+            status = self.statuses.pop(0) if self.statuses else 200
+            if isinstance(status, Exception):
+                raise status
+            if status < 400:
+                self.bodies.append(json.loads(request.content))
+            return httpx.Response(status)
+        finally:
+            self.active -= 1
+
+
+def _dispatcher(key, receiver: Receiver, **kwargs) -> PushNotificationDispatcher:
+    auth = PushNotificationSenderAuth(
+        client=httpx.AsyncClient(transport=httpx.MockTransport(receiver)))
+    auth.private_key_jwk = key
+    kwargs.setdefault("backoff", 0)
+    return PushNotificationDispatcher(auth, **kwargs)
+
+
+def test_updates_for_a_task_are_coalesced_and_ordered(run, key):
+    async def main():
+        receiver = Receiver(gate=True)
+        dispatcher = _dispatcher(key, receiver)
+        dispatcher.notify(URL, "t1", {"id": "t1", "n": 0})
+        await asyncio.sleep(0.01)  # n=0 is now in flight
+        for n in range(1, 6):
+            dispatcher.notify(URL, "t1", {"id": "t1", "n": n})
+        dispatcher.notify(URL, "t2", {"id": "t2", "n": 0})
+        receiver.gate.set()
+        await dispatcher.aclose()
+        return receiver, dispatcher
+
+    receiver, dispatcher = run(main())
+    t1 = [b["n"] for b in receiver.bodies if b["id"] == "t1"]
+    assert t1 == [0, 5]
+    assert {"id": "t2", "n": 0} in receiver.bodies
+    assert dispatcher.metrics()["sent"] == 3
+    assert dispatcher.metrics()["coalesced"] == 4
+
+
+def test_payload_is_captured_when_queued(run, key):
+    async def main():
+        receiver = Receiver()
+        dispatcher = _dispatcher(key, receiver)
+        data = {"id": "t1", "state": "working"}
+        dispatcher.notify(URL, "t1", data)
+        data["state"] = "completed"
+        await dispatcher.aclose()
+        return receiver.bodies
+
+    assert run(main()) == [{"id": "t1", "state": "working"}]
+
+
+def test_retryable_errors_are_retried(run, key):
+    async def main():
+        receiver = Receiver([503, httpx.ConnectError("refused"), 200])
+        dispatcher = _dispatcher(key, receiver)
+        dispatcher.notify(URL, "t1", {"id": "t1"})
+        await dispatcher.aclose()
+        return receiver, dispatcher.metrics()
+
+    receiver, metrics = run(main())
+    assert len(receiver.bodies) == 1
+    assert (metrics["sent"], metrics["retried"], metrics["failed"]) == (1, 2, 0)
+
+
+@pytest.mark.parametrize("statuses, attempts", [([400], 1), ([503] * 3, 3)])
+def test_permanent_errors_and_exhausted_retries_fail(run, key, statuses, attempts):
+    async def main():
+        receiver = Receiver(statuses)
+        dispatcher = _dispatcher(key, receiver, max_attempts=3)
+        dispatcher.notify(URL, "t1", {"id": "t1"})
+        await dispatcher.aclose()
+        return receiver, dispatcher.metrics()
+
+    receiver, metrics = run(main())
+    assert receiver.statuses == [503] * (len(statuses) - attempts)
+    assert (metrics["sent"], metrics["failed"]) == (0, 1)
+
+
+def test_full_queue_drops_new_tasks(run, key):
+    async def main():
+        receiver = Receiver(gate=True)
+        dispatcher = _dispatcher(key, receiver, max_queue=2, workers=1)
+        accepted = [dispatcher.notify(URL, f"t{i}", {"id": i}) for i in range(3)]
+        # Another update for a queued task still fits.
+        accepted.append(dispatcher.notify(URL, "t0", {"id": 0}))
+        receiver.gate.set()
+        await dispatcher.aclose()
+        return accepted, dispatcher.metrics()
+
+    accepted, metrics = run(main())
+    assert accepted == [True, True, False, True]
+    assert (metrics["sent"], metrics["dropped"]) == (2, 1)
+
+
+def test_concurrency_is_limited_per_url(run, key):
+    async def main():
+        receiver = Receiver(gate=True)
+        dispatcher = _dispatcher(key, receiver, workers=8, per_url_concurrency=2)
+        for i in range(8):
+            dispatcher.notify(URL, f"t{i}", {"id": i})
+        await asyncio.sleep(0.05)
+        peak = receiver.peak
+        receiver.gate.set()
+        await dispatcher.aclose()
+        return peak, dispatcher.metrics()
+
+    peak, metrics = run(main())
+    assert peak == 2
+    assert metrics["sent"] == 8
@@ -0,0 +1,40 @@
+import asyncio
+
+import pytest
+
+from common.server.sqlite_task_manager import SqliteTaskManager
+from common.server.task_manager import InMemoryTaskManager
+from common.types import Message, TaskSendParams, TextPart
+
+
+def send_params(task_id: str, text: str = "hello", session_id: str = "s1", **kwargs):
+    return TaskSendParams(
+        id=task_id,
+        sessionId=session_id,
+        message=Message(role="user", parts=[TextPart(text=text)]),
+        **kwargs,
+    )
+
+
+class StoreOnlyTaskManager(InMemoryTaskManager):
+    """InMemoryTaskManager without an agent, for exercising the store."""
+
+    async def on_send_task(self, request):
+        raise NotImplementedError
+
+    async def on_send_task_subscribe(self, request):
+        raise NotImplementedError
+
+
+class StoreOnlySqliteTaskManager(SqliteTaskManager):
+    async def on_send_task(self, request):
+        raise NotImplementedError
+
+    async def on_send_task_subscribe(self, request):
+        raise NotImplementedError
+
+
+@pytest.fixture
+def run():
+    """Run a coroutine to completion on a fresh event loop."""
+    return asyncio.run
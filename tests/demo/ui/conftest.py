@@ -0,0 +1,8 @@
+import os
+import sys
+
+# The demo UI runs from its own directory and imports its packages
+# (service, utils, state, ...) as top-level names.
+sys.path.insert(
+    0, os.path.join(os.path.dirname(__file__), "..", "..", "..", "demo", "ui")
+)
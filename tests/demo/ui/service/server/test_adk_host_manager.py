@@ -0,0 +1,22 @@
+from common.types import AgentCapabilities, AgentCard
+from service.server import application_manager
+from service.server.adk_host_manager import ADKHostManager
+
+
+def test_registering_agents_keeps_the_runner(monkeypatch):
+    def get_agent_card(url):
+        name = url.rstrip("/").rsplit("/", 1)[-1]
+        return AgentCard(
+            name=name, url=url, version="1.0.0",
+            capabilities=AgentCapabilities(), skills=[])
+
+    monkeypatch.setattr(application_manager, "get_agent_card", get_agent_card)
+    manager = ADKHostManager()
+    runner = manager._host_runner
+    manager.register_agent("http://agents/diagnose")
+    manager.register_agent("http://agents/cost")
+    manager.register_agent("http://agents/cost")
+
+    assert manager._host_runner is runner
+    assert [a.name for a in manager.agents] == ["diagnose", "cost"]
+    assert set(manager._host_agent.remote_agent_connections) == {"diagnose", "cost"}
@@ -0,0 +1,49 @@
+import base64
+
+from common.types import FileContent, FilePart, Message, TextPart
+from common.utils.blob_store import BlobStore
+from service.server.in_memory_manager import InMemoryFakeAgentManager
+
+PNG = b"\x89PNG\r\n\x1a\n" + bytes(range(64))
+
+
+def _message_with_file() -> Message:
+    return Message(
+        role="user",
+        parts=[
+            TextPart(text="Ảnh chụp X-quang"),
+            FilePart(file=FileContent(
+                name="xquang.png",
+                mimeType="image/png",
+                bytes=base64.b64encode(PNG).decode("ascii"))),
+        ],
+        metadata={"message_id": "m-1"},
+    )
+
+
+def test_ingest_moves_inline_bytes_to_the_blob_store():
+    manager = InMemoryFakeAgentManager()
+    manager.blob_store = BlobStore()
+    message = _message_with_file()
+
+    stored = manager.ingest_message(message)
+    file = stored.parts[1].file
+    assert file.bytes is None
+    assert file.uri.startswith("/message/file/")
+    assert (file.name, file.mimeType) == ("xquang.png", "image/png")
+    blob = manager.blob_store.get(file.uri.rsplit("/", 1)[-1])
+    assert b"".join(manager.blob_store.iter_bytes(blob)) == PNG
+    # The original still carries its bytes for the agent.
+    assert message.parts[1].file.bytes
+
+    # The same file again is stored once and gets the same URI.
+    again = manager.ingest_message(_message_with_file())
+    assert again.parts[1].file.uri == file.uri
+    assert manager.blob_store.metrics()["memory_blobs"] == 1
+
+
+def test_messages_without_inline_files_are_not_copied():
+    manager = InMemoryFakeAgentManager()
+    manager.blob_store = BlobStore()
+    message = Message(role="user", parts=[TextPart(text="Tôi bị sốt")])
+    assert manager.ingest_message(message) is message
@@ -0,0 +1,126 @@
+import threading
+
+from common.server.artifact_stream import CHUNK_KEY
+from common.types import (
+    Artifact,
+    Message,
+    TaskArtifactUpdateEvent,
+    TaskState,
+    TaskStatus,
+    TaskStatusUpdateEvent,
+    TextPart,
+)
+from service.server.adk_host_manager import ADKHostManager
+from service.server.change_feed import ChangeFeed
+
+
+def _manager() -> tuple[ADKHostManager, ChangeFeed]:
+    manager = ADKHostManager()
+    manager.change_feed = ChangeFeed()
+    return manager, manager.change_feed
+
+
+def _deltas(feed: ChangeFeed, after: int) -> list[dict]:
+    return feed.since(after)[0]
+
+
+def _chunk(text: str, sequence: int, last: bool = False) -> TaskArtifactUpdateEvent:
+    return TaskArtifactUpdateEvent(
+        id="task-1",
+        artifact=Artifact(
+            parts=[TextPart(text=text)],
+            index=0,
+            append=sequence > 0,
+            lastChunk=last,
+            metadata={CHUNK_KEY: sequence},
+        ),
+    )
+
+
+def test_status_update_publishes_only_the_status():
+    manager, feed = _manager()
+    reply = Message(
+        role="agent", parts=[TextPart(text="working")],
+        metadata={"message_id": "m-2"})
+    manager.task_callback(TaskStatusUpdateEvent(
+        id="task-1", status=TaskStatus(state=TaskState.WORKING, message=reply)))
+
+    kinds = [d["kind"] for d in _deltas(feed, 0)]
+    # The new task itself, then only its status.
+    assert kinds == ["task", "task_status"]
+    status = _deltas(feed, 0)[1]["data"]
+    assert set(status) == {"id", "sessionId", "status"}
+    assert status["status"]["state"] == "working"
+    assert status["status"]["message"]["parts"][0]["text"] == "working"
+
+
+def test_chunks_publish_appended_parts_and_the_joined_artifact():
+    manager, feed = _manager()
+    manager.task_callback(_chunk("Sốt ", 0))
+    start = feed.sequence
+    manager.task_callback(_chunk("xuất ", 1))
+    manager.task_callback(_chunk("huyết", 2))
+
+    deltas = _deltas(feed, start)
+    assert [d["kind"] for d in deltas] == ["task_artifact", "task_artifact"]
+    for delta, text in zip(deltas, ["xuất ", "huyết"]):
+        artifact = delta["data"]["artifact"]
+        assert artifact["append"] is True
+        assert artifact["index"] == 0
+        assert [p["text"] for p in artifact["parts"]] == [text]
+
+    # A chunk replayed after a resubscribe adds nothing, so nothing is sent.
+    before = feed.sequence
+    manager.task_callback(_chunk("xuất ", 1))
+    assert feed.sequence == before
+
+    manager.task_callback(_chunk("", 3, last=True))
+    final = _deltas(feed, before)[-1]["data"]["artifact"]
+    assert final["lastChunk"] is True
+    assert "append" not in final or final["append"] is False
+    assert [p["text"] for p in final["parts"]] == ["Sốt xuất huyết"]
+
+
+def test_ending_task_publishes_status_then_closed_artifacts():
+    manager, feed = _manager()
+    manager.task_callback(_chunk("partial", 0))
+    start = feed.sequence
+    manager.task_callback(TaskStatusUpdateEvent(
+        id="task-1", status=TaskStatus(state=TaskState.FAILED), final=True))
+
+    deltas = _deltas(feed, start)
+    assert [d["kind"] for d in deltas] == ["task_status", "task_artifact"]
+    closed = deltas[1]["data"]["artifact"]
+    assert closed["lastChunk"] is True
+    assert closed["metadata"]["incomplete"] is True
+
+
+def test_concurrent_chunks_are_neither_lost_nor_reordered():
+    manager, feed = _manager()
+    manager.task_callback(_chunk("", 0))
+    start = feed.sequence
+    threads = 8
+    per_thread = 50
+    # Unnumbered chunks, so none is mistaken for a replay.
+    chunks = [
+        TaskArtifactUpdateEvent(id="task-1", artifact=Artifact(
+            parts=[TextPart(text="x")], index=0, append=True, lastChunk=False))
+        for _ in range(threads * per_thread)
+    ]
+
+    def send(offset: int):
+        for chunk in chunks[offset::threads]:
+            manager.task_callback(chunk)
+
+    workers = [threading.Thread(target=send, args=(i,)) for i in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    [artifact] = manager._store.get_task("task-1").artifacts
+    assert len(artifact.parts) == threads * per_thread + 1
+    # Each published chunk is exactly the parts added since the previous one.
+    published = sum(
+        len(d["data"]["artifact"]["parts"]) for d in _deltas(feed, start))
+    assert published == threads * per_thread
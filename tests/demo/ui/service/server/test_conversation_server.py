@@ -0,0 +1,44 @@
+import asyncio
+
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+
+from common.types import AgentCapabilities, AgentCard
+from service.server import server as server_module
+from service.server.server import ConversationServer
+
+
+def _on_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+def test_agent_card_is_fetched_off_the_loop_and_registered_on_it(monkeypatch):
+    calls = []
+
+    def load_agent_card(url):
+        calls.append(("fetch", _on_loop()))
+        return AgentCard(
+            name="diagnose", url=url, version="1.0.0",
+            capabilities=AgentCapabilities(), skills=[])
+
+    monkeypatch.setenv("A2A_HOST", "FAKE")
+    monkeypatch.setattr(server_module, "load_agent_card", load_agent_card)
+    router = APIRouter()
+    server = ConversationServer(router)
+    register = server.manager.register_agent_card
+    monkeypatch.setattr(
+        server.manager, "register_agent_card",
+        lambda card: (calls.append(("register", _on_loop())), register(card)))
+    app = FastAPI()
+    app.include_router(router)
+
+    response = TestClient(app).post(
+        "/agent/register", json={"params": "localhost:10002"})
+
+    assert response.status_code == 200
+    assert calls == [("fetch", False), ("register", True)]
+    assert [a.name for a in server.manager.agents] == ["diagnose"]
@@ -0,0 +1,83 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from service.server.message_executor import MessageExecutor
+
+
+def wait_for(predicate, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+@pytest.fixture
+def executor_factory():
+    executors = []
+
+    def make(handler, **kwargs):
+        executor = MessageExecutor(handler, **kwargs)
+        executors.append(executor)
+        return executor
+
+    yield make
+    for executor in executors:
+        executor.shutdown()
+
+
+def test_messages_of_a_conversation_run_in_order(executor_factory):
+    seen = []
+
+    async def handler(message):
+        conversation, index = message
+        # Later messages finish faster; order must still hold.
+        await asyncio.sleep(0.01 * (5 - index))
+        seen.append(message)
+
+    executor = executor_factory(handler)
+    for index in range(5):
+        executor.submit("c1", ("c1", index))
+    wait_for(lambda: executor.metrics()["processed"] == 5)
+    assert seen == [("c1", i) for i in range(5)]
+
+
+def test_concurrency_is_capped_across_conversations(executor_factory):
+    running = peak = 0
+    lock = threading.Lock()
+
+    async def handler(message):
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        await asyncio.sleep(0.02)
+        with lock:
+            running -= 1
+
+    executor = executor_factory(handler, max_concurrency=3)
+    for conversation in range(10):
+        executor.submit(f"c{conversation}", conversation)
+    wait_for(lambda: executor.metrics()["processed"] == 10)
+    assert peak == 3
+
+
+def test_failures_are_counted_and_do_not_stop_the_queue(executor_factory):
+    loops = set()
+
+    async def handler(message):
+        loops.add(id(asyncio.get_running_loop()))
+        if message == "bad":
+            raise RuntimeError("boom")
+
+    executor = executor_factory(handler)
+    for message in ("ok", "bad", "ok"):
+        executor.submit("c1", message)
+    wait_for(lambda: executor.metrics()["processed"] == 3)
+    metrics = executor.metrics()
+    assert metrics["failed"] == 1
+    assert metrics["queue_depth"] == metrics["running"] == 0
+    # Every message ran on the executor's single loop.
+    assert len(loops) == 1
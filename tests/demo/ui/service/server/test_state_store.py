@@ -0,0 +1,69 @@
+from common.types import Message, Task, TaskState, TaskStatus, TextPart
+from service.server.state_store import StateStore
+from service.types import Conversation, ConversationInfo
+
+
+def _message(conversation_id: str, message_id: str) -> Message:
+    return Message(
+        role="user",
+        parts=[TextPart(text="Tôi bị sốt")],
+        metadata={"conversation_id": conversation_id, "message_id": message_id},
+    )
+
+
+def test_conversation_list_carries_metadata_not_messages():
+    store = StateStore()
+    conversation = Conversation(conversation_id="c-1", is_active=True, name="Sốt")
+    store.add_conversation(conversation)
+    for i in range(3):
+        store.add_message(_message("c-1", f"m-{i}"), conversation)
+
+    page = store.list_conversations()
+    assert page.items == [ConversationInfo(
+        conversation_id="c-1", is_active=True, name="Sốt", message_count=3)]
+    assert "messages" not in page.items[0].model_dump()
+
+
+def test_messages_do_not_resend_the_conversation():
+    store = StateStore()
+    conversation = Conversation(conversation_id="c-1", is_active=True)
+    store.add_conversation(conversation)
+    cursor = store.list_conversations().next_cursor
+
+    store.add_message(_message("c-1", "m-1"), conversation)
+    assert store.list_conversations(cursor).items == []
+    # The message is still reachable by id and in the conversation.
+    assert conversation.messages[-1].metadata["message_id"] == "m-1"
+
+
+def test_eviction_follows_message_activity():
+    store = StateStore(max_conversations=2)
+    old = Conversation(conversation_id="old", is_active=True)
+    busy = Conversation(conversation_id="busy", is_active=True)
+    store.add_conversation(busy)
+    store.add_conversation(old)
+    # `busy` was created first but is the most recently active.
+    store.add_message(_message("busy", "m-1"), busy)
+    store.add_conversation(Conversation(conversation_id="new", is_active=True))
+
+    assert store.get_conversation("old") is None
+    assert store.get_conversation("busy") is busy
+
+
+def test_store_returns_within_bound_once_the_pinning_task_ends():
+    store = StateStore(max_conversations=1)
+    store.add_conversation(Conversation(conversation_id="busy", is_active=True))
+    task = Task(
+        id="t-1", sessionId="busy", status=TaskStatus(state=TaskState.WORKING))
+    store.put_task(task)
+    store.add_conversation(Conversation(conversation_id="new", is_active=True))
+    # Over the bound while the task runs.
+    assert len(store.conversations) == 2
+
+    # Not only add_conversation evicts: the task update does, and the
+    # conversation it just touched is the one kept.
+    task.status = TaskStatus(state=TaskState.COMPLETED)
+    store.put_task(task)
+    assert len(store.conversations) == 1
+    assert store.get_conversation("busy") is not None
+    assert store.has_task("t-1")
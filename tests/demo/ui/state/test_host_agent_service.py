@@ -0,0 +1,76 @@
+from state.host_agent_service import apply_delta
+from state.state import AppState
+
+TASK = {"id": "task-1", "sessionId": "conv-1"}
+
+
+def _state() -> AppState:
+    return AppState(conversations=[], messages=[])
+
+
+def _status(state: AppState, status: dict):
+    apply_delta(state, "task_status", {**TASK, "status": status})
+
+
+def _artifact(state: AppState, text: str, **fields):
+    artifact = {"parts": [{"type": "text", "text": text}], "index": 0, **fields}
+    apply_delta(state, "task_artifact", {**TASK, "artifact": artifact})
+
+
+def _message(text: str, message_id: str) -> dict:
+    return {
+        "role": "agent",
+        "parts": [{"type": "text", "text": text}],
+        "metadata": {"message_id": message_id},
+    }
+
+
+def test_status_delta_creates_and_updates_the_task():
+    state = _state()
+    _status(state, {"state": "submitted", "message": _message("Tôi bị sốt", "m-1")})
+    [session_task] = state.task_list
+    task = session_task.task
+    assert task.state == "TaskState.SUBMITTED"
+    assert task.artifacts == []
+
+    _status(state, {"state": "working", "message": _message("Đang tra cứu", "m-2")})
+    assert task.state == "TaskState.WORKING"
+    assert task.artifacts == [[("Đang tra cứu", "text/plain")]]
+
+
+def test_artifact_chunks_extend_the_streaming_artifact_in_place():
+    state = _state()
+    _status(state, {"state": "working", "message": _message("Tôi bị sốt", "m-1")})
+    task = state.task_list[0].task
+
+    _artifact(state, "Sốt ", lastChunk=False)
+    _artifact(state, "xuất ", append=True, lastChunk=False)
+    _artifact(state, "huyết", append=True, lastChunk=False)
+    assert task.artifacts == [[("Sốt xuất huyết", "text/plain")]]
+
+    # The finished artifact replaces the streamed one instead of repeating it.
+    _artifact(state, "Sốt xuất huyết.", lastChunk=True)
+    assert task.artifacts == [[("Sốt xuất huyết.", "text/plain")]]
+
+    # A later artifact with the same index is a new one.
+    _artifact(state, "Chi phí", lastChunk=True)
+    assert len(task.artifacts) == 2
+
+
+def test_artifact_for_an_unknown_task_waits_for_resync():
+    state = _state()
+    _artifact(state, "orphan", lastChunk=True)
+    assert state.task_list == []
+
+
+def test_message_delta_counts_each_message_once():
+    state = _state()
+    apply_delta(state, "conversation", {
+        "conversation_id": "conv-1", "is_active": True, "message_count": 2})
+    message = {
+        **_message("Tôi bị ho", "m-3"),
+        "metadata": {"message_id": "m-3", "conversation_id": "conv-1"},
+    }
+    apply_delta(state, "message", message)
+    apply_delta(state, "message", message)
+    assert state.conversations[0].message_count == 3
@@ -0,0 +1,274 @@
+import asyncio
+
+import pytest
+from google.adk.models.llm_request import LlmRequest
+from google.genai import types
+
+from common.client import AgentCardCache
+from common.types import (
+    AgentCapabilities,
+    AgentCard,
+    AgentSkill,
+    Artifact,
+    DataPart,
+    FileContent,
+    FilePart,
+    Message,
+    Task,
+    TaskState,
+    TaskStatus,
+    TaskStatusUpdateEvent,
+    TextPart,
+)
+from hosts.multiagent.host_agent import HostAgent, convert_part
+from hosts.multiagent.remote_agent_connection import RemoteAgentConnections
+
+
+def test_card_refresh_stops_on_close(run, tmp_path, monkeypatch):
+    refreshes = 0
+
+    async def resolve_all(self, urls):
+        nonlocal refreshes
+        refreshes += 1
+        return {}
+
+    monkeypatch.setattr(AgentCardCache, "resolve_all", resolve_all)
+    monkeypatch.setattr(HostAgent, "CARD_REFRESH_INTERVAL", 0.01)
+
+    async def scenario():
+        host = HostAgent(
+            ["http://agent/"], card_cache=AgentCardCache(cache_dir=str(tmp_path))
+        )
+        await asyncio.sleep(0.05)
+        task = host._refresh_task
+        await host.aclose()
+        seen = refreshes
+        await asyncio.sleep(0.05)
+        return task, seen
+
+    task, seen = run(scenario())
+    assert task.cancelled()
+    assert seen > 1
+    # No refresh ran after close.
+    assert refreshes == seen
+
+
+class FakeContext:
+    def __init__(self):
+        self.state = {}
+
+
+def user_request(text: str) -> LlmRequest:
+    return LlmRequest(contents=[types.Content(role="user", parts=[types.Part(text=text)])])
+
+
+# Names and skill ids as the agents under agents/ publish them.
+PRODUCTION_CARDS = [
+    ("Agent Chuẩn Đoán", "medical_diagnose", 10001),
+    ("Agent Chi Phí", "chi_phi", 10002),
+    ("Agent Lên Lịch Khám Bệnh", "de_xuat_va_dat_lich", 10003),
+    ("Agent Đặt lịch", "booking", 10004),
+]
+
+
+def production_card(name: str, skill_id: str, port: int) -> AgentCard:
+    return AgentCard(
+        name=name, url=f"http://localhost:{port}/", version="1.0.0",
+        capabilities=AgentCapabilities(streaming=True),
+        skills=[AgentSkill(id=skill_id, name=name)])
+
+
+def production_host(skip: str | None = None) -> HostAgent:
+    host = HostAgent([])
+    for name, skill_id, port in PRODUCTION_CARDS:
+        if skill_id != skip:
+            host.register_agent_card(production_card(name, skill_id, port))
+    return host
+
+
+def test_route_keys_resolve_to_the_cards_serving_them():
+    host = production_host()
+    assert host.route_agents == {
+        "diagnose": "Agent Chuẩn Đoán",
+        "cost": "Agent Chi Phí",
+        "schedule": "Agent Lên Lịch Khám Bệnh",
+    }
+    with pytest.raises(ValueError):
+        production_host(skip="chi_phi").route_agent("cost")
+
+
+@pytest.fixture
+def host(monkeypatch):
+    host = production_host()
+    routed = []
+
+    async def send_message(self, message, tool_context, decision=None):
+        routed.append((message, decision.agents))
+        return "cost: 2.000.000đ"
+
+    monkeypatch.setattr(HostAgent, "send_message", send_message)
+    return host, routed
+
+
+def test_confident_route_skips_the_llm(run, host):
+    host, routed = host
+    response = run(host.before_model_callback(
+        FakeContext(), user_request("Chi phí điều trị viêm phổi là bao nhiêu?")))
+    assert response.content.parts[0].text == "cost: 2.000.000đ"
+    assert routed == [("Chi phí điều trị viêm phổi là bao nhiêu?", ["cost"])]
+
+
+@pytest.mark.parametrize("text", ["xin chào", "chi phi dieu tri viem phoi"])
+def test_unsure_route_goes_to_the_llm(run, host, text):
+    host, routed = host
+    assert run(host.before_model_callback(FakeContext(), user_request(text))) is None
+    assert routed == []
+
+
+def test_route_without_a_registered_agent_goes_to_the_llm(run, monkeypatch):
+    routed = []
+
+    async def send_message(self, message, tool_context, decision=None):
+        routed.append(message)
+
+    monkeypatch.setattr(HostAgent, "send_message", send_message)
+    host = production_host(skip="chi_phi")
+    request = user_request("Chi phí điều trị viêm phổi là bao nhiêu?")
+    assert run(host.before_model_callback(FakeContext(), request)) is None
+    assert routed == []
+
+
+class FakeAgents:
+    """Stands in for the remote agents behind RemoteAgentConnections.
+
+    Diagnose streams `candidates` (if any) and answers "Viêm phổi"; the
+    other agents echo their input after `delay` seconds.
+    """
+
+    def __init__(self, candidates=(), delay: float = 0.01):
+        self.candidates = list(candidates)
+        self.delay = delay
+        self.calls: list[tuple[str, str]] = []
+        self.cancelled: list[str] = []
+
+    async def send(self, connection, request, task_callback):
+        name = connection.card.name
+        text = request.message.parts[0].text
+        self.calls.append((name, text))
+        if name == "Agent Chuẩn Đoán":
+            if self.candidates and task_callback:
+                task_callback(TaskStatusUpdateEvent(id=request.id, status=TaskStatus(
+                    state=TaskState.WORKING,
+                    message=Message(role="agent", parts=[
+                        DataPart(data={"candidates": self.candidates})]))))
+            await asyncio.sleep(0.05)
+            parts = [DataPart(data={"disease": "Viêm phổi"})]
+        else:
+            await asyncio.sleep(self.delay)
+            parts = [TextPart(text=f"{name} <- {text}")]
+        return Task(
+            id=request.id, status=TaskStatus(state=TaskState.COMPLETED),
+            artifacts=[Artifact(parts=parts)])
+
+
+@pytest.fixture
+def agents(monkeypatch):
+    def install(**kwargs) -> FakeAgents:
+        fake = FakeAgents(**kwargs)
+
+        async def send_task(self, request, task_callback):
+            return await fake.send(self, request, task_callback)
+
+        async def cancel_task(self, task_id):
+            fake.cancelled.append(task_id)
+            return True
+
+        monkeypatch.setattr(RemoteAgentConnections, "_send_task", send_task)
+        monkeypatch.setattr(RemoteAgentConnections, "cancel_task", cancel_task)
+        return fake
+
+    return install
+
+
+def _bypass(run, host: HostAgent, text: str) -> str:
+    response = run(host.before_model_callback(FakeContext(), user_request(text)))
+    return response.content.parts[0].text
+
+
+def test_chained_plan_runs_against_production_cards(run, agents):
+    fake = agents()
+    answer = _bypass(run, production_host(), "Tôi bị sốt và ho, chi phí khám bao nhiêu?")
+
+    diagnosed = "Tôi bị sốt và ho, chi phí khám bao nhiêu?\nChẩn đoán: Viêm phổi"
+    assert [name for name, _ in fake.calls] == ["Agent Chuẩn Đoán", "Agent Chi Phí"]
+    assert fake.calls[1][1] == diagnosed
+    assert answer.splitlines()[1] == f"cost: {[f'Agent Chi Phí <- {diagnosed}']}"
+
+
+def test_speculative_runs_are_reused_with_production_cards(run, agents):
+    # Cost outlives diagnose, so the run for the losing candidate is cancelled.
+    fake = agents(candidates=["Cúm", "Viêm phổi"], delay=0.1)
+    text = "Tôi bị sốt và ho, chi phí khám và đặt lịch khám thế nào?"
+    answer = _bypass(run, production_host(), text)
+
+    started = [(name, run_input.rsplit(": ", 1)[-1]) for name, run_input in fake.calls[1:]]
+    # Both candidates ran ahead for cost and schedule; nothing ran after
+    # the diagnosis, which matched one of them.
+    assert sorted(started) == sorted(
+        (name, disease)
+        for name in ("Agent Chi Phí", "Agent Lên Lịch Khám Bệnh")
+        for disease in ("Cúm", "Viêm phổi"))
+    assert len(fake.cancelled) == 2
+    assert "Chẩn đoán: Viêm phổi" in answer.splitlines()[1]
+    assert "Chẩn đoán: Viêm phổi" in answer.splitlines()[2]
+
+
+def test_tool_results_go_to_the_llm(run, host):
+    host, routed = host
+    request = user_request("Chi phí điều trị viêm phổi?")
+    request.contents.append(types.Content(role="user", parts=[types.Part(
+        function_response=types.FunctionResponse(name="send_task", response={}))]))
+    assert run(host.before_model_callback(FakeContext(), request)) is None
+    assert routed == []
+
+
+def card(name: str, description: str = "") -> AgentCard:
+    return AgentCard(
+        name=name, url=f"http://{name}/", version="1.0.0", description=description,
+        capabilities=AgentCapabilities(), skills=[])
+
+
+def test_reregistering_an_unchanged_card_is_a_no_op():
+    host = HostAgent([])
+    host.register_agent_card(card("cost", "Bảng giá"))
+    version = host.catalog_version
+    connection = host.remote_agent_connections["cost"]
+    host.register_agent_card(card("cost", "Bảng giá"))
+    assert host.catalog_version == version
+    assert host.remote_agent_connections["cost"] is connection
+
+    host.register_agent_card(card("cost", "Bảng giá 2025"))
+    assert host.catalog_version == version + 1
+    assert "Bảng giá 2025" in host.agents
+    assert host.agents.count('"cost"') == 1
+
+
+def test_instruction_is_rendered_once_per_catalog_version():
+    host = HostAgent([])
+    host.register_agent_card(card("diagnose"))
+    context = FakeContext()
+    first = host.root_instruction(context)
+    assert host.root_instruction(context) is first
+
+    host.register_agent_card(card("schedule"))
+    second = host.root_instruction(context)
+    assert second is not first
+    assert '"schedule"' in second
+
+
+def test_file_from_another_origin_is_skipped_not_fetched(run):
+    part = FilePart(file=FileContent(
+        name="report.pdf", uri="http://169.254.169.254/latest/meta-data/"))
+    # No tool context is needed: nothing is downloaded or saved.
+    result = run(convert_part(part, None, ["http://diagnose.agents:10002/"]))
+    assert result.startswith("File report.pdf skipped")
@@ -0,0 +1,104 @@
+import asyncio
+
+from hosts.multiagent.planner import (
+    ExecutionPlanner,
+    PlanStep,
+    Speculation,
+    build_plan,
+    chained_input,
+)
+from hosts.multiagent.routing import RoutingDecision
+
+
+def test_only_cheap_read_only_agents_are_hedged():
+    plan = build_plan(RoutingDecision(
+        agents=["diagnose", "cost", "schedule"], reason="test", chained=True
+    ))
+    hedges = {step.agent: step.hedge_after for step in plan}
+    assert hedges["diagnose"] is None
+    assert hedges["schedule"] is None
+    assert hedges["cost"] is not None
+
+
+def test_losing_hedge_is_cancelled(run):
+    cancelled = []
+
+    async def run_step(agent, step_input, attempt):
+        try:
+            # The first request straggles; the hedge answers quickly.
+            await asyncio.sleep(5 if attempt == 0 else 0.01)
+            return f"attempt {attempt}"
+        except asyncio.CancelledError:
+            cancelled.append(attempt)
+            raise
+
+    async def scenario():
+        step = PlanStep(agent="cost", hedge_after=0.05)
+        results = await ExecutionPlanner().execute([step], "q", run_step)
+        await asyncio.sleep(0)
+        return results["cost"]
+
+    result = run(scenario())
+    assert result.ok and result.value == "attempt 1"
+    assert result.attempts == 2
+    assert cancelled == [0]
+
+
+def chained_plan():
+    return build_plan(
+        RoutingDecision(agents=["diagnose", "cost"], reason="test", chained=True)
+    )
+
+
+def run_with_speculation(run, diagnosed: str, candidates: list[str]):
+    calls = []
+
+    async def scenario():
+        speculation = None
+
+        async def run_step(agent, step_input, attempt):
+            calls.append((agent, step_input, attempt))
+            if agent == "diagnose":
+                speculation.on_candidates(candidates)
+                await asyncio.sleep(0.05)
+                return [{"disease": diagnosed}]
+            await asyncio.sleep(0.01)
+            return f"cost for {step_input!r}"
+
+        speculation = Speculation(["cost"], run_step, "q")
+        results = await ExecutionPlanner().execute(
+            chained_plan(), "q", run_step, speculation
+        )
+        return results, speculation
+
+    results, speculation = run(scenario())
+    return results, speculation, calls
+
+
+def test_speculative_run_is_reused_when_inputs_match(run):
+    results, speculation, calls = run_with_speculation(
+        run, diagnosed="Viêm  phổi", candidates=["Viêm phổi", "Cúm"]
+    )
+    expected = chained_input("q", "Viêm phổi")
+    cost_calls = [c for c in calls if c[0] == "cost"]
+    # Only the two speculative runs; the real step reused one of them.
+    assert [c[2] for c in cost_calls] == [1, 1]
+    assert results["cost"].value == f"cost for {expected!r}"
+    assert (speculation.hits, speculation.misses) == (1, 0)
+
+
+def test_similar_disease_names_do_not_match(run):
+    # "Cúm" is a substring of "Cúm A" but a different input: run it again.
+    results, speculation, calls = run_with_speculation(
+        run, diagnosed="Cúm A", candidates=["Cúm"]
+    )
+    cost_calls = [c for c in calls if c[0] == "cost"]
+    assert cost_calls[-1] == ("cost", chained_input("q", "Cúm A"), 0)
+    assert results["cost"].value == f"cost for {chained_input('q', 'Cúm A')!r}"
+    assert (speculation.hits, speculation.misses) == (0, 1)
+
+
+def test_normal_and_speculative_inputs_are_built_alike():
+    assert chained_input("q", " Viêm   phổi ") == chained_input("q", "Viêm phổi")
+    # Diacritics distinguish Vietnamese words, so they are kept.
+    assert chained_input("q", "Sởi") != chained_input("q", "Sôi")
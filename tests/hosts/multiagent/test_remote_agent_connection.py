@@ -0,0 +1,116 @@
+import asyncio
+import functools
+
+import httpx
+
+from common.client import client as client_module
+from common.server import A2AServer
+from common.types import AgentCapabilities, AgentCard, CancelTaskResponse
+from hosts.multiagent.planner import Speculation, chained_input
+from hosts.multiagent.remote_agent_connection import RemoteAgentConnections
+from tests.conftest import StoreOnlyTaskManager, send_params
+
+
+class SlowManager(StoreOnlyTaskManager):
+    """Never answers tasks/send; records tasks/cancel."""
+
+    def __init__(self):
+        super().__init__()
+        self.started = asyncio.Event()
+        self.cancelled: list[str] = []
+
+    async def on_send_task(self, request):
+        await self.upsert_task(request.params)
+        self.started.set()
+        await asyncio.Event().wait()
+
+    async def on_cancel_task(self, request):
+        self.cancelled.append(request.params.id)
+        return CancelTaskResponse(id=request.id)
+
+
+def test_cancelling_a_send_cancels_the_remote_task(run, monkeypatch):
+    card = AgentCard(
+        name="cost",
+        url="http://agent/",
+        version="1.0.0",
+        capabilities=AgentCapabilities(),
+        skills=[],
+    )
+
+    async def scenario():
+        manager = SlowManager()
+        app = A2AServer(agent_card=card, task_manager=manager).app
+        monkeypatch.setattr(
+            client_module.httpx,
+            "AsyncClient",
+            functools.partial(httpx.AsyncClient, transport=httpx.ASGITransport(app=app)),
+        )
+        connection = RemoteAgentConnections(card)
+        sending = asyncio.create_task(connection.send_task(send_params("t1"), None))
+        await manager.started.wait()
+        sending.cancel()
+        await asyncio.gather(sending, return_exceptions=True)
+        return manager.cancelled, sending.cancelled()
+
+    cancelled, was_cancelled = run(scenario())
+    assert cancelled == ["t1"]
+    assert was_cancelled
+
+
+def test_cancel_failure_is_reported_not_raised(run, monkeypatch):
+    def refuse(request):
+        raise httpx.ConnectError("connection refused", request=request)
+
+    monkeypatch.setattr(
+        client_module.httpx,
+        "AsyncClient",
+        functools.partial(httpx.AsyncClient, transport=httpx.MockTransport(refuse)),
+    )
+    card = AgentCard(
+        name="cost",
+        url="http://agent/",
+        version="1.0.0",
+        capabilities=AgentCapabilities(),
+        skills=[],
+    )
+    assert run(RemoteAgentConnections(card).cancel_task("t1")) is False
+
+
+def test_dropped_speculative_runs_cancel_their_remote_tasks(run, monkeypatch):
+    card = AgentCard(
+        name="cost",
+        url="http://agent/",
+        version="1.0.0",
+        capabilities=AgentCapabilities(),
+        skills=[],
+    )
+
+    async def scenario():
+        manager = SlowManager()
+        app = A2AServer(agent_card=card, task_manager=manager).app
+        monkeypatch.setattr(
+            client_module.httpx,
+            "AsyncClient",
+            functools.partial(httpx.AsyncClient, transport=httpx.ASGITransport(app=app)),
+        )
+        connection = RemoteAgentConnections(card)
+        task_ids = []
+
+        async def run_step(agent, step_input, attempt):
+            task_ids.append(f"{agent}-{len(task_ids)}")
+            return await connection.send_task(send_params(task_ids[-1]), None)
+
+        speculation = Speculation(["cost", "schedule"], run_step, "q")
+        speculation.on_candidates(["Cúm", "Sởi"])
+        while len(manager.tasks) < 4:
+            await asyncio.sleep(0.01)
+        assert speculation.take("cost", chained_input("q", "Sốt xuất huyết")) is None
+        speculation.cancel()
+        while speculation._cancelling:
+            await asyncio.sleep(0.01)
+        return sorted(task_ids), sorted(manager.cancelled)
+
+    task_ids, cancelled = run(scenario())
+    assert len(task_ids) == 4
+    assert cancelled == task_ids
@@ -0,0 +1,73 @@
+import json
+import os
+
+import pytest
+
+from hosts.multiagent.routing import (
+    BYPASS_CONFIDENCE,
+    CONFIDENCE_FALLBACK,
+    decide_route,
+)
+
+EXAMPLES = os.path.join(
+    os.path.dirname(__file__), "..", "..", "..", "data", "routing_examples.jsonl"
+)
+
+
+def load_examples() -> list[dict]:
+    with open(EXAMPLES, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def is_correct(example: dict) -> bool:
+    decision = decide_route(example["text"])
+    return decision.agents == example["agents"] and decision.chained == example["chained"]
+
+
+def test_labelled_accuracy():
+    examples = load_examples()
+    accuracy = sum(map(is_correct, examples)) / len(examples)
+    assert accuracy >= 0.9
+
+
+def test_routes_confident_enough_to_bypass_the_llm_are_right():
+    confident = [
+        e for e in load_examples()
+        if decide_route(e["text"]).confidence >= BYPASS_CONFIDENCE
+    ]
+    assert confident
+    assert all(map(is_correct, confident))
+
+
+@pytest.mark.parametrize(
+    "text",
+    ["cam on bac si", "Cảm ơn bác sĩ", "gia dinh toi", "Gia đình tôi khoẻ"],
+)
+def test_stock_phrases_are_not_keywords(text):
+    decision = decide_route(text)
+    assert decision.agents == ["diagnose"]
+    assert decision.confidence == CONFIDENCE_FALLBACK
+
+
+def test_keywords_match_whole_words_only():
+    # "gia" (price, unaccented) inside "giai" must not route to cost.
+    assert "cost" not in decide_route("giai doan cuoi").agents
+    assert decide_route("gia kham bao nhieu").agents == ["cost"]
+
+
+@pytest.mark.parametrize("text", ["tôi bi sot", "Tôi bị sot và ho"])
+def test_mixed_accents_still_match(text):
+    decision = decide_route(text)
+    assert decision.agents == ["diagnose"]
+    assert decision.confidence != CONFIDENCE_FALLBACK
+
+
+def test_unaccented_words_in_accented_text_are_not_confident():
+    decision = decide_route("Chi phí khám khi tôi bi sot?")
+    assert decision.agents == ["diagnose", "cost"]
+    assert decision.confidence < BYPASS_CONFIDENCE
+
+
+def test_other_accented_words_do_not_match_the_stripped_keyword():
+    # "già" (old) strips to "gia" like "giá" (price).
+    assert "cost" not in decide_route("Bà tôi già rồi, hay bị ho").agents